@@ -22,6 +22,7 @@ from accounts.api.token_utils import get_jwt_tokens_for_user
 from accounts.models import AuditLog
 from accounts.api.enhanced_auth import SecurityEventHandler
 from accounts.services import EmailVerificationService
+from accounts.services.onboarding_state import ARTIST, onboarding_state_cache
 from activities.models import AllActivity
 
 
@@ -2332,8 +2333,14 @@ def artist_onboarding_status_view(request, artist_id):
     data = {}
     errors = {}
 
+    data = onboarding_state_cache.get(ARTIST, artist_id, 'status', owner_id=request.user.pk)
+    if data is not None:
+        payload['message'] = "Successful"
+        payload['data'] = data
+        return Response(payload, status=status.HTTP_200_OK)
+
     try:
-        artist = Artist.objects.get(artist_id=artist_id, user=request.user)
+        artist = Artist.objects.select_related('user', 'publisher').get(artist_id=artist_id, user=request.user)
     except Artist.DoesNotExist:
         errors['artist_id'] = ['Artist not found or access denied.']
         payload['message'] = "Errors"
@@ -2365,6 +2372,7 @@ def artist_onboarding_status_view(request, artist_id):
         "can_skip_verification": user.verification_status == 'pending',
         "verification_required_for_features": get_verification_required_features(user),
     }
+    onboarding_state_cache.set(ARTIST, artist_id, 'status', user.pk, data)
 
     payload['message'] = "Successful"
     payload['data'] = data
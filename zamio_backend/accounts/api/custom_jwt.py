@@ -7,6 +7,8 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
+from accounts.services.principal_cache import activity_recorder, principal_cache
+
 User = get_user_model()
 
 
@@ -14,11 +16,10 @@ class CustomJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
         try:
             user_id = validated_token['user_id']
-            user = User.objects.get(user_id=user_id)
+            user = principal_cache.get_user(user_id)
             
-            # Update last activity
-            user.last_activity = timezone.now()
-            user.save(update_fields=['last_activity'])
+            # Recorded out of band and written back in bulk
+            activity_recorder.touch(user)
             
             # Check if account is locked
             if user.account_locked_until and user.account_locked_until > timezone.now():
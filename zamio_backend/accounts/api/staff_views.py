@@ -3,6 +3,8 @@ Staff Management API Views
 Provides comprehensive staff management functionality for admin users
 """
 
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
@@ -14,6 +16,7 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 
 from accounts.models import AuditLog, UserPermission
+from accounts.services.principal_cache import principal_cache
 from stations.models import StationStaff
 from core.utils import log_audit_event
 
@@ -31,6 +34,14 @@ def is_admin_user(user):
     return user.is_authenticated and (user.admin or user.is_staff or user.user_type == 'Admin')
 
 
+def staff_lookup(staff_id):
+    """Match a staff member by public user_id (UUID) or primary key"""
+    try:
+        return Q(user_id=uuid.UUID(str(staff_id)))
+    except ValueError:
+        return Q(id=staff_id)
+
+
 @api_view(['GET'])
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
@@ -217,7 +228,7 @@ def get_staff_details(request, staff_id):
         staff_member = User.objects.select_related().prefetch_related(
             'user_permissions', 'granted_permissions'
         ).get(
-            Q(user_id=staff_id) | Q(id=staff_id),
+            staff_lookup(staff_id),
             Q(admin=True) | Q(staff=True) | Q(user_type='Admin')
         )
         
@@ -386,7 +397,7 @@ def update_staff_member(request, staff_id):
     try:
         # Get staff member
         staff_member = User.objects.get(
-            Q(user_id=staff_id) | Q(id=staff_id),
+            staff_lookup(staff_id),
             Q(admin=True) | Q(staff=True) | Q(user_type='Admin')
         )
         
@@ -416,8 +427,9 @@ def update_staff_member(request, staff_id):
         
         # Update permissions if provided
         if 'permissions' in data:
-            # Deactivate existing permissions
+            # Deactivate existing permissions; a bulk update skips the signal handlers
             staff_member.user_permissions.filter(is_active=True).update(is_active=False)
+            principal_cache.invalidate_permissions(staff_member.pk)
             
             # Add new permissions
             for permission in data['permissions']:
@@ -467,7 +479,7 @@ def deactivate_staff_member(request, staff_id):
     try:
         # Get staff member
         staff_member = User.objects.get(
-            Q(user_id=staff_id) | Q(id=staff_id),
+            staff_lookup(staff_id),
             Q(admin=True) | Q(staff=True) | Q(user_type='Admin')
         )
         
@@ -481,8 +493,9 @@ def deactivate_staff_member(request, staff_id):
         staff_member.is_active = False
         staff_member.save()
         
-        # Deactivate permissions
+        # Deactivate permissions; a bulk update skips the signal handlers
         staff_member.user_permissions.filter(is_active=True).update(is_active=False)
+        principal_cache.invalidate_permissions(staff_member.pk)
         
         # Log audit event
         log_audit_event(
@@ -524,7 +537,7 @@ def get_staff_activity_log(request, staff_id):
     try:
         # Get staff member
         staff_member = User.objects.get(
-            Q(user_id=staff_id) | Q(id=staff_id),
+            staff_lookup(staff_id),
             Q(admin=True) | Q(staff=True) | Q(user_type='Admin')
         )
         
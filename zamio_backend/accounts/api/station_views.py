@@ -21,6 +21,7 @@ from accounts.api.token_utils import get_jwt_tokens_for_user
 from accounts.models import AuditLog
 from accounts.api.enhanced_auth import SecurityEventHandler
 from accounts.services import EmailVerificationService
+from accounts.services.onboarding_state import STATION, onboarding_state_cache
 from activities.models import AllActivity
 from django.core.mail import send_mail
 from django.contrib.auth import get_user_model, authenticate
@@ -1368,6 +1369,12 @@ def station_onboarding_status_view(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
+    cached = onboarding_state_cache.get(STATION, station_id, 'state')
+    if cached is not None:
+        payload['message'] = 'Successful'
+        payload['data'] = cached
+        return Response(payload, status=status.HTTP_200_OK)
+
     try:
         station = Station.objects.get(station_id=station_id)
     except Station.DoesNotExist:
@@ -1376,6 +1383,7 @@ def station_onboarding_status_view(request):
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
     data.update(serialize_station_onboarding_state(station))
+    onboarding_state_cache.set(STATION, station_id, 'state', station.user_id, data)
 
     payload['message'] = 'Successful'
     payload['data'] = data
@@ -1392,8 +1400,14 @@ def enhanced_station_onboarding_status_view(request, station_id):
     data = {}
     errors = {}
 
+    data = onboarding_state_cache.get(STATION, station_id, 'status', owner_id=request.user.pk)
+    if data is not None:
+        payload['message'] = "Successful"
+        payload['data'] = data
+        return Response(payload, status=status.HTTP_200_OK)
+
     try:
-        station = Station.objects.get(station_id=station_id, user=request.user)
+        station = Station.objects.select_related('user').get(station_id=station_id, user=request.user)
     except Station.DoesNotExist:
         errors['station_id'] = ['Station not found or access denied.']
         payload['message'] = "Errors"
@@ -1428,6 +1442,7 @@ def enhanced_station_onboarding_status_view(request, station_id):
         "stream_links": get_station_stream_links(station),
         "staff_members": get_station_staff_summary(station),
     }
+    onboarding_state_cache.set(STATION, station_id, 'status', user.pk, data)
 
     payload['message'] = "Successful"
     payload['data'] = data
@@ -6,7 +6,7 @@ from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
 from django.conf import settings
-from accounts.models import AuditLog
+from core.services.audit_writer import audit_writer
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -77,7 +77,7 @@ class AuditLoggingMiddleware(MiddlewareMixin):
                     response_data = {'error': 'Response parsing failed'}
             
             # Create audit log entry
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user_obj,
                 action=f"{request.method} {request.path}",
                 resource_type=self.extract_resource_type(request.path),
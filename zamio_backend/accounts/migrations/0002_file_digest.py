@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-19 01:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('mtime_ns', models.BigIntegerField()),
+                ('inode', models.BigIntegerField()),
+                ('digest', models.CharField(max_length=64)),
+                ('hashed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
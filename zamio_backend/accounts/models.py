@@ -377,7 +377,8 @@ class AuditLog(models.Model):
     request_data = models.JSONField(default=dict, blank=True)
     response_data = models.JSONField(default=dict, blank=True)
     status_code = models.IntegerField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the buffered writer persists it
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     trace_id = models.UUIDField(null=True, blank=True)
     
     class Meta:
@@ -392,6 +393,19 @@ class AuditLog(models.Model):
         return f"{self.user.email if self.user else 'System'} - {self.action} at {self.timestamp}"
 
 
+class FileDigest(models.Model):
+    """Memoised SHA-256 of a stored file, valid while its stat signature is unchanged"""
+    path = models.CharField(max_length=1024, unique=True)
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    inode = models.BigIntegerField()
+    digest = models.CharField(max_length=64)
+    hashed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.path} - {self.digest[:12]}"
+
+
 class KYCDocument(models.Model):
     """Enhanced KYC document model with proper file handling and security"""
     
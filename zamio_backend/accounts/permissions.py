@@ -1,12 +1,12 @@
 from functools import wraps
 from django.contrib.auth import get_user_model
-from django.db import models
 from django.http import JsonResponse
-from django.utils import timezone
 from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework import status
 
+from accounts.services.principal_cache import principal_cache
+
 User = get_user_model()
 
 
@@ -36,12 +36,7 @@ class HasUserPermission(permissions.BasePermission):
             return False
         
         # Check if user has the specific permission
-        return request.user.user_permissions.filter(
-            permission=self.permission_name,
-            is_active=True
-        ).filter(
-            models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=timezone.now())
-        ).exists()
+        return principal_cache.has_permission(request.user, self.permission_name)
 
 
 class RoleBasedPermission(permissions.BasePermission):
@@ -72,12 +67,7 @@ def require_permission(permission_name):
                 }, status=401)
             
             # Check if user has the specific permission
-            has_permission = request.user.user_permissions.filter(
-                permission=permission_name,
-                is_active=True
-            ).filter(
-                models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=timezone.now())
-            ).exists()
+            has_permission = principal_cache.has_permission(request.user, permission_name)
             
             if not has_permission:
                 return JsonResponse({
@@ -6,6 +6,7 @@ Provides serialization for User and related models
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import UserPermission, AuditLog, KYCDocument
+from .services.principal_cache import principal_cache
 
 User = get_user_model()
 
@@ -161,8 +162,9 @@ class StaffUpdateSerializer(serializers.ModelSerializer):
         if permissions is not None:
             request_user = self.context.get('request_user')
             
-            # Deactivate existing permissions
+            # Deactivate existing permissions; a bulk update skips the signal handlers
             instance.user_permissions.filter(is_active=True).update(is_active=False)
+            principal_cache.invalidate_permissions(instance.pk)
             
             # Add new permissions
             for permission in permissions:
@@ -10,7 +10,8 @@ from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponse, Http404
 from django.core.files.storage import default_storage
-from accounts.models import KYCDocument, User, AuditLog
+from accounts.models import KYCDocument, User
+from core.services.audit_writer import audit_writer
 
 
 class FileAccessService:
@@ -124,7 +125,7 @@ class FileAccessService:
             raise Http404("File not found in storage")
         
         # Log the access
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action='file_access',
             resource_type='KYCDocument',
@@ -156,7 +157,7 @@ class FileAccessService:
             
         except Exception as e:
             # Log the error
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='file_access_error',
                 resource_type='KYCDocument',
@@ -1,13 +1,14 @@
 """File upload service for handling secure file operations"""
 import logging
 import os
-import hashlib
 import mimetypes
 from typing import Dict, Any, Optional
 from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from accounts.models import KYCDocument, User
+from core.services.file_integrity import hash_stream
+from core.services.threat_scanner import get_scanner
 
 
 logger = logging.getLogger(__name__)
@@ -95,11 +96,7 @@ class FileUploadService:
     @classmethod
     def calculate_file_hash(cls, file: UploadedFile) -> str:
         """Calculate SHA-256 hash of file content"""
-        file.seek(0)
-        file_content = file.read()
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        file.seek(0)
-        return file_hash
+        return hash_stream(file)
     
     @classmethod
     def upload_kyc_document(
@@ -316,46 +313,26 @@ class FileUploadService:
         Raises:
             ValidationError: If malicious content is detected
         """
-        file.seek(0)
-        content = file.read(10240)  # Read first 10KB
-        file.seek(0)
-        
-        # Check for common malware patterns
-        malware_patterns = [
-            b'eval(',
-            b'exec(',
-            b'system(',
-            b'shell_exec(',
-            b'<script',
-            b'javascript:',
-            b'vbscript:',
-            b'data:text/html',
-            b'<?php',
-            b'<%',
-            b'#!/bin/sh',
-            b'#!/bin/bash'
-        ]
-        
-        content_lower = content.lower()
-        for pattern in malware_patterns:
-            if pattern in content_lower:
-                raise ValidationError(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
+        # Scan the first 10KB for common malware patterns in one pass
+        report = get_scanner('code_execution').scan_stream(file, limit=10240)
+        for pattern, _description in report.threats():
+            raise ValidationError(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
         
         # Check for suspicious file headers
-        if content.startswith(b'MZ'):  # Windows executable
+        if report.header.startswith(b'MZ'):  # Windows executable
             raise ValidationError('Executable files are not allowed')
         
-        if content.startswith(b'\x7fELF'):  # Linux executable
+        if report.header.startswith(b'\x7fELF'):  # Linux executable
             raise ValidationError('Executable files are not allowed')
         
-        if content.startswith(b'#!/'):  # Shell script
+        if report.header.startswith(b'#!/'):  # Shell script
             raise ValidationError('Script files are not allowed')
         
         # Check for embedded files (ZIP, RAR signatures)
-        if content.startswith(b'PK\x03\x04') or content.startswith(b'PK\x05\x06'):  # ZIP
+        if report.header.startswith(b'PK\x03\x04') or report.header.startswith(b'PK\x05\x06'):  # ZIP
             raise ValidationError('Archive files are not allowed')
         
-        if content.startswith(b'Rar!'):  # RAR
+        if report.header.startswith(b'Rar!'):  # RAR
             raise ValidationError('Archive files are not allowed')
     
     @classmethod
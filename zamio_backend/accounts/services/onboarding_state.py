@@ -0,0 +1,101 @@
+"""
+Cached onboarding status projections
+
+The artist and station onboarding status endpoints are polled by the
+frontends during login and dashboard bootstrap, and every call used to
+rebuild the same projection: completion percentage, required fields, next
+step, identity profile, publisher, stream links and staff, each walking
+related rows. ``OnboardingStateCache`` keeps the finished response for
+``ONBOARDING_STATE_CACHE_TTL`` seconds under one key per entity and view,
+so a poll is a single cache read.
+
+Entries are dropped by the signal handlers in ``accounts.signals`` whenever
+the profile, user/KYC, identity, publisher, stream-link or staff rows behind
+them change. Invalidation runs after the writing transaction commits, so a
+request cannot re-cache the state the transaction is replacing.
+"""
+import logging
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+ARTIST = 'artist'
+STATION = 'station'
+
+# Projections cached per entity; each status view owns one
+VIEWS = {
+    ARTIST: ('status',),
+    STATION: ('state', 'status'),
+}
+
+# User fields that appear in (or decide) an onboarding projection
+USER_FIELDS = frozenset({
+    'first_name', 'last_name', 'email', 'phone', 'location', 'country',
+    'verification_status', 'kyc_status', 'kyc_documents',
+    'verification_skipped_at', 'verification_reminder_sent',
+})
+
+
+class OnboardingStateCache:
+    """Onboarding status responses keyed by artist/station id"""
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'ONBOARDING_STATE_CACHE_TTL', 300)
+
+    @staticmethod
+    def key(entity: str, entity_id, view: str) -> str:
+        return f"zamio:onboarding:{entity}:{entity_id}:{view}"
+
+    def get(self, entity: str, entity_id, view: str, owner_id=None) -> Optional[Dict]:
+        """
+        The cached projection, or None on a miss. With ``owner_id`` an entry
+        owned by another user is also a miss, so the caller's own lookup
+        decides how to refuse it.
+        """
+        try:
+            entry = cache.get(self.key(entity, entity_id, view))
+        except Exception as e:
+            logger.error(f"Failed to read onboarding state for {entity} {entity_id}: {e}")
+            return None
+        if entry is None or (owner_id is not None and entry['owner_id'] != owner_id):
+            return None
+        return entry['data']
+
+    def set(self, entity: str, entity_id, view: str, owner_id, data: Dict):
+        try:
+            cache.set(self.key(entity, entity_id, view), {'owner_id': owner_id, 'data': data}, self.ttl)
+        except Exception as e:
+            logger.error(f"Failed to cache onboarding state for {entity} {entity_id}: {e}")
+
+    def invalidate(self, entity: str, entity_ids: Iterable):
+        keys = [
+            self.key(entity, entity_id, view)
+            for entity_id in entity_ids if entity_id
+            for view in VIEWS[entity]
+        ]
+        if keys:
+            transaction.on_commit(lambda: self._delete(keys))
+
+    @staticmethod
+    def _delete(keys):
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            logger.error(f"Failed to invalidate onboarding state: {e}")
+
+    def invalidate_user(self, user_pk):
+        """Drop the projections of every artist and station ``user_pk`` owns"""
+        from artists.models import Artist
+        from stations.models import Station
+
+        self.invalidate(ARTIST, Artist.objects.filter(user_id=user_pk).values_list('artist_id', flat=True))
+        self.invalidate(STATION, Station.objects.filter(user_id=user_pk).values_list('station_id', flat=True))
+
+
+# Singleton instance
+onboarding_state_cache = OnboardingStateCache()
@@ -0,0 +1,148 @@
+"""
+Cached principal resolution for token-authenticated requests
+
+Resolving the JWT principal used to cost a user SELECT, a ``last_activity``
+UPDATE and, behind ``HasUserPermission``, a permission query on every API
+call. Here:
+
+* the user row and the user's permission grants are cached for
+  ``AUTH_PRINCIPAL_CACHE_TTL`` seconds and dropped by signal handlers
+  (``accounts.signals``) whenever either changes;
+* ``last_activity`` is recorded in a Redis sorted set (user pk -> epoch
+  seconds) and written back in one ``bulk_update`` by the
+  ``flush_user_activity`` task, so each user is written at most once per
+  ``AUTH_ACTIVITY_FLUSH_INTERVAL``. Without Redis, a cache marker limits
+  the direct UPDATE to once per interval instead.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+FLUSH_BATCH_SIZE = 1000
+
+
+class PrincipalCache:
+    """User snapshots and active permission grants, keyed for the auth hot path"""
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL', 60)
+
+    @staticmethod
+    def user_key(user_id) -> str:
+        return f"zamio:auth:principal:{user_id}"
+
+    @staticmethod
+    def permissions_key(pk) -> str:
+        return f"zamio:auth:permissions:{pk}"
+
+    def get_user(self, user_id):
+        """User with the given public ``user_id``; raises ``User.DoesNotExist``"""
+        key = self.user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = User.objects.get(user_id=user_id)
+            cache.set(key, user, self.ttl)
+        return user
+
+    def grants(self, user) -> List[Tuple[str, Optional[datetime]]]:
+        """(permission, expires_at) for every active grant of ``user``"""
+        key = self.permissions_key(user.pk)
+        grants = cache.get(key)
+        if grants is None:
+            grants = list(
+                user.user_permissions.filter(is_active=True).values_list('permission', 'expires_at')
+            )
+            cache.set(key, grants, self.ttl)
+        return grants
+
+    def has_permission(self, user, permission_name: str) -> bool:
+        # Expiry is checked on every call, so a cached grant still lapses on time
+        now = timezone.now()
+        return any(
+            permission == permission_name and (expires_at is None or expires_at > now)
+            for permission, expires_at in self.grants(user)
+        )
+
+    def invalidate_user(self, user_id):
+        cache.delete(self.user_key(user_id))
+
+    def invalidate_permissions(self, pk):
+        cache.delete(self.permissions_key(pk))
+
+
+class ActivityRecorder:
+    """Coalesces per-request ``last_activity`` updates into periodic bulk writes"""
+
+    SORTED_SET_KEY = 'zamio:auth:last_activity'
+
+    def __init__(self):
+        self._redis = None
+        self._redis_resolved = False
+
+    @property
+    def interval(self) -> int:
+        return getattr(settings, 'AUTH_ACTIVITY_FLUSH_INTERVAL', 60)
+
+    def _connection(self):
+        if not self._redis_resolved:
+            self._redis_resolved = True
+            try:
+                from django_redis import get_redis_connection
+                self._redis = get_redis_connection('default')
+            except Exception:
+                # Non-redis cache backend or django-redis missing
+                self._redis = None
+        return self._redis
+
+    def touch(self, user):
+        """Note that ``user`` was active now; never raises into the request"""
+        now = timezone.now()
+        redis_conn = self._connection()
+        if redis_conn is not None:
+            try:
+                redis_conn.zadd(self.SORTED_SET_KEY, {str(user.pk): now.timestamp()})
+                return
+            except Exception as e:
+                logger.warning(f"Activity set unavailable, writing last_activity directly: {e}")
+
+        # One UPDATE per user per interval; cache.add only succeeds for the first request
+        try:
+            if cache.add(f"zamio:auth:activity:{user.pk}", 1, self.interval):
+                User.objects.filter(pk=user.pk).update(last_activity=now)
+        except Exception as e:
+            logger.error(f"Failed to record activity for user {user.pk}: {e}")
+
+    def flush(self) -> Dict[str, int]:
+        """Write the recorded activity times to the database in bulk"""
+        redis_conn = self._connection()
+        if redis_conn is None:
+            return {'users': 0}
+
+        # Read and clear atomically so touches arriving mid-flush land in the next one
+        pipeline = redis_conn.pipeline(transaction=True)
+        pipeline.zrange(self.SORTED_SET_KEY, 0, -1, withscores=True)
+        pipeline.delete(self.SORTED_SET_KEY)
+        entries, _deleted = pipeline.execute()
+
+        users = [
+            User(pk=int(member), last_activity=datetime.fromtimestamp(score, tz=dt_timezone.utc))
+            for member, score in entries
+        ]
+        if users:
+            User.objects.bulk_update(users, ['last_activity'], batch_size=FLUSH_BATCH_SIZE)
+        return {'users': len(users)}
+
+
+# Singleton instances
+principal_cache = PrincipalCache()
+activity_recorder = ActivityRecorder()
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import KYCDocument, UserPermission
+from accounts.services.onboarding_state import ARTIST, STATION, USER_FIELDS, onboarding_state_cache
+from accounts.services.principal_cache import principal_cache
+from artists.models import Artist, ArtistIdentityProfile
+from publishers.models import PublisherProfile
+from stations.models import Station, StationStaff, StationStreamLink
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_principal(sender, instance, **kwargs):
+    """Lock status, role or profile changes must reach token auth immediately"""
+    principal_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=UserPermission)
+@receiver(post_delete, sender=UserPermission)
+def invalidate_cached_permissions(sender, instance, **kwargs):
+    principal_cache.invalidate_permissions(instance.user_id)
+
+
+# Onboarding status projections
+
+@receiver(post_save, sender=User)
+def invalidate_user_onboarding_state(sender, instance, created, update_fields=None, **kwargs):
+    # Logins and other bookkeeping saves name their fields; skip the lookup for those
+    if created or (update_fields is not None and not USER_FIELDS.intersection(update_fields)):
+        return
+    onboarding_state_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=KYCDocument)
+@receiver(post_delete, sender=KYCDocument)
+def invalidate_kyc_onboarding_state(sender, instance, **kwargs):
+    onboarding_state_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_delete, sender=Artist)
+def invalidate_artist_onboarding_state(sender, instance, **kwargs):
+    onboarding_state_cache.invalidate(ARTIST, [instance.artist_id])
+
+
+@receiver(post_save, sender=ArtistIdentityProfile)
+@receiver(post_delete, sender=ArtistIdentityProfile)
+def invalidate_identity_onboarding_state(sender, instance, **kwargs):
+    onboarding_state_cache.invalidate(
+        ARTIST, Artist.objects.filter(pk=instance.artist_id).values_list('artist_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=PublisherProfile)
+def invalidate_publisher_onboarding_state(sender, instance, created, **kwargs):
+    if not created:
+        onboarding_state_cache.invalidate(
+            ARTIST, Artist.objects.filter(publisher=instance).values_list('artist_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_station_onboarding_state(sender, instance, **kwargs):
+    onboarding_state_cache.invalidate(STATION, [instance.station_id])
+
+
+@receiver(post_save, sender=StationStreamLink)
+@receiver(post_delete, sender=StationStreamLink)
+@receiver(post_save, sender=StationStaff)
+@receiver(post_delete, sender=StationStaff)
+def invalidate_station_child_onboarding_state(sender, instance, **kwargs):
+    onboarding_state_cache.invalidate(
+        STATION, Station.objects.filter(pk=instance.station_id).values_list('station_id', flat=True)
+    )
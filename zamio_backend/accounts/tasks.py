@@ -653,6 +653,40 @@ def send_bulk_notification_email_task(self, user_type_filter: Optional[str] = No
         }
 
 
+@shared_task
+def flush_user_activity() -> Dict[str, Any]:
+    """
+    Write the last_activity times recorded by token authentication back to
+    the user table in one bulk update.
+    """
+    from accounts.services.principal_cache import activity_recorder
+
+    try:
+        result = activity_recorder.flush()
+        logger.info(f"Flushed last activity for {result['users']} users")
+        return {'success': True, **result}
+    except Exception as e:
+        logger.error(f"Failed to flush user activity: {str(e)}")
+        return {'success': False, 'error': str(e)}
+
+
+@shared_task
+def flush_audit_log() -> Dict[str, Any]:
+    """
+    Drain the audit log stream into AuditLog rows, outside any request
+    transaction.
+    """
+    from core.services.audit_writer import audit_writer
+
+    try:
+        result = audit_writer.flush()
+        logger.info(f"Flushed {result['saved']} audit log entries ({result['dead_lettered']} dead-lettered)")
+        return {'success': True, **result}
+    except Exception as e:
+        logger.error(f"Failed to flush audit log: {str(e)}")
+        return {'success': False, 'error': str(e)}
+
+
 # Utility functions for task management
 
 def queue_email_verification(user_id: int, verification_token: str, 
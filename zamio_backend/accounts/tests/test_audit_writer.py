@@ -0,0 +1,169 @@
+import itertools
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import AuditLog, User
+from core.services.audit_writer import AuditLogWriter
+
+
+class InMemoryStream:
+    """The subset of Redis stream commands the audit writer uses, for one consumer group"""
+
+    def __init__(self):
+        self.streams = {}
+        self.pending = {}
+        self.delivered = set()
+        self._ids = itertools.count(1)
+
+    def xadd(self, key, fields):
+        entry_id = f'{next(self._ids)}-0'.encode()
+        self.streams.setdefault(key, {})[entry_id] = {
+            name.encode(): value if isinstance(value, bytes) else value.encode() for name, value in fields.items()
+        }
+        return entry_id
+
+    def xlen(self, key):
+        return len(self.streams.get(key, {}))
+
+    def xrange(self, key):
+        return list(self.streams.get(key, {}).items())
+
+    def xgroup_create(self, key, group, id='0', mkstream=False):
+        self.streams.setdefault(key, {})
+
+    def xreadgroup(self, group, consumer, streams, count=None):
+        (key, _cursor), = streams.items()
+        fresh = [(entry_id, fields) for entry_id, fields in self.streams[key].items() if entry_id not in self.delivered]
+        fresh = fresh[:count]
+        for entry_id, _fields in fresh:
+            self.delivered.add(entry_id)
+            self.pending[entry_id] = 1
+        return [(key.encode(), fresh)] if fresh else []
+
+    def xautoclaim(self, key, group, consumer, min_idle_time, start_id='0-0', count=None):
+        # Every pending entry counts as idle here
+        claimed = [(entry_id, self.streams[key].get(entry_id)) for entry_id in list(self.pending)[:count]]
+        for entry_id, _fields in claimed:
+            self.pending[entry_id] += 1
+        return [b'0-0', claimed, []]
+
+    def xpending_range(self, key, group, min, max, count, consumername=None):
+        if min not in self.pending:
+            return []
+        return [{'message_id': min, 'times_delivered': self.pending[min]}]
+
+    def xack(self, key, group, *entry_ids):
+        for entry_id in entry_ids:
+            self.pending.pop(entry_id, None)
+
+    def xdel(self, key, *entry_ids):
+        for entry_id in entry_ids:
+            self.streams[key].pop(entry_id, None)
+
+
+@override_settings(AUDIT_LOG_ASYNC=True, AUDIT_LOG_BATCH_SIZE=3, AUDIT_LOG_MAX_RETRIES=2)
+class AuditLogWriterTests(TestCase):
+    def setUp(self):
+        self.stream = InMemoryStream()
+        self.writer = AuditLogWriter()
+        patcher = patch.object(AuditLogWriter, '_connection', return_value=self.stream)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_events_are_queued_and_flushed_in_batches(self):
+        user = User.objects.create_user(email='audited@example.com', password='testpass123')
+        for index in range(4):
+            self.writer.log(user=user, action='media_file_access', resource_id=str(index))
+
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(self.writer.pending(), 4)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.writer.flush(), {'saved': 4, 'dead_lettered': 0})
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(self.writer.pending(), 0)
+        self.assertEqual(
+            list(AuditLog.objects.order_by('id').values_list('resource_id', 'user_id')),
+            [(str(index), user.pk) for index in range(4)]
+        )
+
+    def test_event_time_and_payload_survive_the_stream(self):
+        happened_at = timezone.now() - timedelta(minutes=5)
+        self.writer.log(
+            action='evidence_file_access', timestamp=happened_at,
+            request_data={'path': '/evidence/1'}, trace_id='6f1c2a9e-3f0b-4d55-9d7e-2b0c4c1f8a10',
+        )
+        self.writer.flush()
+
+        entry = AuditLog.objects.get()
+        self.assertEqual(entry.timestamp, happened_at)
+        self.assertEqual(entry.request_data, {'path': '/evidence/1'})
+        self.assertEqual(str(entry.trace_id), '6f1c2a9e-3f0b-4d55-9d7e-2b0c4c1f8a10')
+
+    def test_unacknowledged_entries_are_reclaimed_after_a_crashed_drain(self):
+        self.writer.log(action='track_processing', resource_id='in-flight')
+
+        with patch.object(AuditLog.objects, 'bulk_create', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                self.writer.flush()
+        self.assertEqual(AuditLog.objects.count(), 0)
+
+        self.assertEqual(self.writer.flush(), {'saved': 1, 'dead_lettered': 0})
+        self.assertEqual(AuditLog.objects.get().resource_id, 'in-flight')
+
+    def test_rows_that_keep_failing_are_dead_lettered_not_dropped(self):
+        self.writer.log(action='track_processing', resource_id='ok')
+        self.writer.log(action='track_processing', resource_id='poison')
+
+        original_save = AuditLog.save
+
+        def failing_save(entry, *args, **kwargs):
+            if entry.resource_id == 'poison':
+                raise RuntimeError('value too long')
+            return original_save(entry, *args, **kwargs)
+
+        with patch.object(AuditLog.objects, 'bulk_create', side_effect=RuntimeError('batch failed')), \
+                patch.object(AuditLog, 'save', failing_save):
+            self.assertEqual(self.writer.flush(), {'saved': 1, 'dead_lettered': 0})
+            self.assertEqual(self.writer.flush(), {'saved': 0, 'dead_lettered': 1})
+
+        self.assertEqual(list(AuditLog.objects.values_list('resource_id', flat=True)), ['ok'])
+        self.assertEqual(self.writer.pending(), 0)
+        self.assertEqual(self.stream.xlen(AuditLogWriter.DEAD_LETTER_KEY), 1)
+
+        self.assertEqual(self.writer.requeue_dead_letters(), 1)
+        self.writer.flush()
+        self.assertEqual(sorted(AuditLog.objects.values_list('resource_id', flat=True)), ['ok', 'poison'])
+
+    def test_without_a_stream_events_are_written_immediately(self):
+        with patch.object(AuditLogWriter, '_connection', return_value=None):
+            self.writer.log(action='media_integrity_failure')
+
+        self.assertTrue(AuditLog.objects.filter(action='media_integrity_failure').exists())
+
+
+@override_settings(AUDIT_LOG_ASYNC=True)
+class AuditLogWriterTransactionTests(TransactionTestCase):
+    def test_caller_rollback_does_not_lose_queued_events(self):
+        stream = InMemoryStream()
+        writer = AuditLogWriter()
+
+        with patch.object(AuditLogWriter, '_connection', return_value=stream):
+            writer.log(action='before_request')
+            try:
+                with transaction.atomic():
+                    writer.log(action='inside_failed_request')
+                    raise RuntimeError('request failed')
+            except RuntimeError:
+                pass
+            writer.flush()
+
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list('action', flat=True)), ['before_request', 'inside_failed_request']
+        )
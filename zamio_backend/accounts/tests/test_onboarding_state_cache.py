@@ -0,0 +1,96 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from artists.models import Artist
+from stations.models import Station, StationStaff, StationStreamLink
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'onboarding-state-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OnboardingStateCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_model = get_user_model()
+        self.station_user = user_model.objects.create_user(
+            email='cached-station@example.com',
+            password='StrongPass1!',
+            first_name='Station',
+            last_name='Owner',
+        )
+        self.station = Station.objects.create(user=self.station_user, name='Cached FM', station_id=str(uuid.uuid4()))
+        self.station_url = reverse(
+            'accounts:enhanced_station_onboarding_status_view', kwargs={'station_id': self.station.station_id}
+        )
+
+        self.artist_user = user_model.objects.create_user(
+            email='cached-artist@example.com',
+            password='StrongPass1!',
+            first_name='Artist',
+            last_name='Owner',
+        )
+        self.artist = Artist.objects.create(user=self.artist_user, stage_name='Cached Artist', artist_id=str(uuid.uuid4()))
+        self.artist_url = reverse('accounts:artist_onboarding_status_view', kwargs={'artist_id': self.artist.artist_id})
+
+    def _tables_read(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data['data'], ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_station_status_is_served_from_cache_until_a_related_row_changes(self):
+        self.client.force_authenticate(self.station_user)
+        first, sql = self._tables_read(self.station_url)
+        self.assertIn('stations_stationstreamlink', sql)
+        self.assertEqual(first['stream_links'], [])
+
+        cached, sql = self._tables_read(self.station_url)
+        self.assertEqual(cached, first)
+        self.assertNotIn('stations_', sql)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StationStreamLink.objects.create(station=self.station, link='https://radio.example.com/live')
+        data, _ = self._tables_read(self.station_url)
+        self.assertEqual([link['link'] for link in data['stream_links']], ['https://radio.example.com/live'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StationStaff.objects.create(station=self.station, name='Producer', email='producer@example.com')
+        data, _ = self._tables_read(self.station_url)
+        self.assertEqual([staff['name'] for staff in data['staff_members']], ['Producer'])
+
+    def test_artist_status_follows_profile_and_kyc_changes(self):
+        self.client.force_authenticate(self.artist_user)
+        first, _ = self._tables_read(self.artist_url)
+        self.assertFalse(first['profile_completed'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artist.profile_completed = True
+            self.artist.save()
+        data, _ = self._tables_read(self.artist_url)
+        self.assertTrue(data['profile_completed'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artist_user.verification_status = 'skipped'
+            self.artist_user.save(update_fields=['verification_status'])
+        data, _ = self._tables_read(self.artist_url)
+        self.assertEqual(data['verification_status'], 'skipped')
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.artist_user.save(update_fields=['last_login'])
+        self.assertEqual(callbacks, [])
+
+    def test_cached_status_is_not_served_to_other_users(self):
+        self.client.force_authenticate(self.artist_user)
+        self._tables_read(self.artist_url)
+
+        self.client.force_authenticate(self.station_user)
+        response = self.client.get(self.artist_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.api.custom_jwt import CustomJWTAuthentication
+from accounts.models import User, UserPermission
+from accounts.serializers import StaffUpdateSerializer
+from accounts.services.principal_cache import principal_cache
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'principal-cache-tests',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PrincipalCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create_user(email='principal@example.com', password='testpass123')
+        self.admin = User.objects.create_user(email='granter@example.com', password='testpass123')
+        self.token = AccessToken.for_user(self.user)
+
+    def _authenticate(self):
+        return CustomJWTAuthentication().get_user(self.token)
+
+    def test_repeat_requests_make_no_auth_queries(self):
+        self._authenticate()
+
+        with CaptureQueriesContext(connection) as queries:
+            user = self._authenticate()
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(len(queries.captured_queries), 0)
+
+    def test_last_activity_is_written_at_most_once_per_interval(self):
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self._authenticate()
+
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+    def test_saving_the_user_invalidates_the_snapshot(self):
+        self._authenticate()
+
+        self.user.account_locked_until = timezone.now() + timedelta(minutes=30)
+        self.user.save(update_fields=['account_locked_until'])
+
+        with self.assertRaisesMessage(Exception, 'Account is temporarily locked'):
+            self._authenticate()
+
+    def test_permission_grants_are_cached_and_invalidated(self):
+        self.assertFalse(principal_cache.has_permission(self.user, 'upload_music'))
+
+        grant = UserPermission.objects.create(user=self.user, permission='upload_music', granted_by=self.admin)
+        with self.assertNumQueries(1):
+            self.assertTrue(principal_cache.has_permission(self.user, 'upload_music'))
+            self.assertTrue(principal_cache.has_permission(self.user, 'upload_music'))
+
+        grant.expires_at = timezone.now() - timedelta(minutes=1)
+        grant.save()
+        self.assertFalse(principal_cache.has_permission(self.user, 'upload_music'))
+
+    def _cache_staff_grant(self):
+        self.user.staff = True
+        self.user.save()
+        UserPermission.objects.create(user=self.user, permission='view_analytics', granted_by=self.admin)
+        self.assertTrue(principal_cache.has_permission(self.user, 'view_analytics'))
+
+    def test_deactivating_a_staff_member_revokes_cached_grants(self):
+        self._cache_staff_grant()
+        self.admin.admin = True
+        self.admin.save()
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        response = client.delete(reverse('accounts:deactivate_staff_member', kwargs={'staff_id': self.user.user_id}))
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(principal_cache.has_permission(self.user, 'view_analytics'))
+
+    def test_replacing_staff_permissions_revokes_cached_grants(self):
+        self._cache_staff_grant()
+
+        serializer = StaffUpdateSerializer(
+            self.user, data={'permissions': ['manage_users']}, partial=True, context={'request_user': self.admin}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertFalse(principal_cache.has_permission(self.user, 'view_analytics'))
+        self.assertTrue(principal_cache.has_permission(self.user, 'manage_users'))
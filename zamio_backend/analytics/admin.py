@@ -4,14 +4,15 @@ from django.urls import reverse
 from django.utils import timezone
 from .models import (
     AnalyticsSnapshot, AnalyticsCache, RealtimeMetric, 
-    AnalyticsExport, UserAnalyticsPreference
+    AnalyticsExport, UserAnalyticsPreference, DailyPlayRollup, RollupWatermark,
+    MetricBucket
 )
 
 
 @admin.register(AnalyticsSnapshot)
 class AnalyticsSnapshotAdmin(admin.ModelAdmin):
     list_display = [
-        'snapshot_id', 'snapshot_type', 'metric_type', 
+        'snapshot_id', 'snapshot_type', 'metric_type', 'range_key',
         'period_start', 'value', 'count', 'created_at'
     ]
     list_filter = [
@@ -26,7 +27,7 @@ class AnalyticsSnapshotAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('snapshot_id', 'snapshot_type', 'metric_type')
+            'fields': ('snapshot_id', 'snapshot_type', 'metric_type', 'range_key')
         }),
         ('Time Period', {
             'fields': ('period_start', 'period_end')
@@ -237,6 +238,31 @@ class UserAnalyticsPreferenceAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user')
 
 
+@admin.register(DailyPlayRollup)
+class DailyPlayRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'track', 'station', 'plays', 'revenue', 'updated_at']
+    list_filter = ['day']
+    search_fields = ['track__title', 'station__name']
+    raw_id_fields = ['track', 'station']
+    readonly_fields = ['updated_at']
+    date_hierarchy = 'day'
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ['name', 'last_updated_at', 'cells_refreshed', 'last_run_at']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(MetricBucket)
+class MetricBucketAdmin(admin.ModelAdmin):
+    list_display = ['metric_name', 'resolution', 'bucket_start', 'value', 'station_id', 'artist_id']
+    list_filter = ['metric_name', 'resolution']
+    search_fields = ['metric_name', 'station_id', 'artist_id']
+    readonly_fields = ['updated_at']
+    date_hierarchy = 'bucket_start'
+
+
 # Custom admin views for analytics overview
 class AnalyticsOverviewAdmin(admin.ModelAdmin):
     """Custom admin view for analytics overview"""
@@ -0,0 +1,225 @@
+"""
+Materialized admin dashboard snapshots.
+
+The admin dashboard covers the whole platform, so computing it on a cache miss
+means aggregating every play, detection and royalty in the range. A scheduled
+task keeps one ``AnalyticsSnapshot`` per standard range instead:
+
+* additive figures (plays, revenue, detections, royalties, sign-ups) are kept
+  per local day as ``platform_activity`` snapshots and only days touched since
+  the watermark are recomputed, so a refresh re-reads today plus any day whose
+  source rows changed;
+* figures that cannot be summed day by day (distinct counts, rankings, the
+  activity feed) are recomputed once per range by the task, never by a request.
+
+The admin endpoint then reads a single row.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from music_monitor.models import AudioDetection, PlayLog, RoyaltyDistribution
+from .models import AnalyticsSnapshot, DailyPlayRollup, RollupWatermark
+from .services import analytics_aggregator, play_rollups
+
+ADMIN_SNAPSHOT_RANGES = ('today', '7d', '30d', '90d', 'mtd', 'ytd', '1y')
+
+ROLLING_DAYS = {'7d': 7, '30d': 30, '90d': 90, '1y': 365}
+
+
+def admin_range_bounds(range_key: str, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Start of the first local day in a named range, and now"""
+    now = now or timezone.now()
+    today = play_rollups.local_date(now)
+    if range_key == 'today':
+        first_day = today
+    elif range_key == 'mtd':
+        first_day = today.replace(day=1)
+    elif range_key == 'ytd':
+        first_day = today.replace(month=1, day=1)
+    elif range_key in ROLLING_DAYS:
+        first_day = today - timedelta(days=ROLLING_DAYS[range_key] - 1)
+    else:
+        raise ValueError(f"Unknown admin snapshot range: {range_key}")
+    return play_rollups.day_bounds(first_day)[0], now
+
+
+class AdminSnapshotService:
+    """Refreshes and serves the admin dashboard snapshots"""
+
+    WATERMARK_NAME = 'admin_snapshots'
+    COLD_START_KEY = 'zamio:admin_snapshots:cold_start'
+    COLD_START_TIMEOUT = 300
+    # Tracks how far the play rollups had got at the last refresh, so days
+    # whose rollup cells were removed (not just rewritten) are still picked up
+    PLAYS_WATERMARK_NAME = 'admin_snapshot_plays'
+
+    def get(self, range_key: str) -> Optional[Dict]:
+        snapshot = AnalyticsSnapshot.objects.filter(
+            snapshot_type='admin_range', metric_type='admin_dashboard', range_key=range_key
+        ).only('metadata').first()
+        return snapshot.metadata.get('data') if snapshot else None
+
+    def claim_cold_start(self) -> bool:
+        """True for the one request that should queue the first refresh"""
+        try:
+            return cache.add(self.COLD_START_KEY, 1, self.COLD_START_TIMEOUT)
+        except Exception:
+            return True
+
+    def run(self, ranges: Optional[Iterable[str]] = None, now: Optional[datetime] = None) -> Dict:
+        """Recompute changed days since the watermark and rebuild the range snapshots"""
+        now = now or timezone.now()
+        ranges = list(ranges or ADMIN_SNAPSHOT_RANGES)
+        bounds = {range_key: admin_range_bounds(range_key, now) for range_key in ranges}
+
+        first_day = min(play_rollups.local_date(start) for start, _end in bounds.values())
+        last_day = play_rollups.local_date(now)
+        # Day snapshots are shared by every range, so only days older than the
+        # longest standard range may be pruned, whichever ranges this run built
+        keep_from = min(
+            first_day,
+            *(play_rollups.local_date(admin_range_bounds(range_key, now)[0]) for range_key in ADMIN_SNAPSHOT_RANGES)
+        )
+
+        watermark, _ = RollupWatermark.objects.get_or_create(name=self.WATERMARK_NAME)
+        plays_watermark, _ = RollupWatermark.objects.get_or_create(name=self.PLAYS_WATERMARK_NAME)
+        rollups_until = RollupWatermark.objects.filter(
+            name=play_rollups.WATERMARK_NAME
+        ).values_list('last_updated_at', flat=True).first()
+
+        stored = self._stored_days(first_day, last_day)
+        needed = set(play_rollups.days(first_day, last_day))
+        dirty = needed - set(stored)
+        if watermark.last_updated_at:
+            dirty |= needed & self._changed_days(
+                watermark.last_updated_at, plays_watermark.last_updated_at, rollups_until, first_day, last_day
+            )
+        else:
+            dirty = needed
+
+        activity = dict(stored)
+        for run_start, run_end in self._contiguous_runs(dirty):
+            activity.update(analytics_aggregator.admin_day_activity(run_start, run_end))
+
+        platform_sections = analytics_aggregator.admin_platform_sections(now)
+        with transaction.atomic():
+            self._save_days({day: activity[day] for day in dirty})
+            for range_key, (start, end) in bounds.items():
+                range_days = play_rollups.days(play_rollups.local_date(start), last_day)
+                data = analytics_aggregator.assemble_admin_analytics(
+                    start,
+                    end,
+                    {day: activity[day] for day in range_days},
+                    analytics_aggregator.admin_range_sections(start, end),
+                    platform_sections
+                )
+                data['date_range']['range'] = range_key
+                # Stored exactly as the API renders it, so serving is a single read
+                data = json.loads(json.dumps(data, cls=JSONEncoder))
+                AnalyticsSnapshot.objects.update_or_create(
+                    snapshot_type='admin_range',
+                    metric_type='admin_dashboard',
+                    range_key=range_key,
+                    defaults={
+                        'period_start': start,
+                        'period_end': end,
+                        'value': data['period_summary']['total_revenue'],
+                        'count': data['period_summary']['total_plays'],
+                        'metadata': {'data': data, 'watermark': now.isoformat()},
+                    }
+                )
+
+            # Days that have aged out of every range are no longer needed
+            self._day_snapshots().filter(period_start__lt=play_rollups.day_bounds(keep_from)[0]).delete()
+
+            watermark.last_updated_at = now
+            watermark.cells_refreshed += len(dirty)
+            watermark.last_run_at = timezone.now()
+            watermark.save()
+            if rollups_until:
+                plays_watermark.last_updated_at = rollups_until
+                plays_watermark.save(update_fields=['last_updated_at', 'updated_at'])
+
+        return {'ranges': len(bounds), 'days_refreshed': len(dirty), 'watermark': now.isoformat()}
+
+    def _day_snapshots(self):
+        return AnalyticsSnapshot.objects.filter(snapshot_type='daily', metric_type='platform_activity')
+
+    def _stored_days(self, first_day: date, last_day: date) -> Dict[date, Dict]:
+        range_start = play_rollups.day_bounds(first_day)[0]
+        range_end = play_rollups.day_bounds(last_day)[1]
+        return {
+            play_rollups.local_date(period_start): metadata
+            for period_start, metadata in self._day_snapshots().filter(
+                period_start__gte=range_start, period_start__lt=range_end
+            ).values_list('period_start', 'metadata')
+        }
+
+    def _changed_days(self, since: datetime, plays_since: Optional[datetime], rollups_until: Optional[datetime],
+                      first_day: date, last_day: date) -> Set[date]:
+        """Days whose source rows changed after ``since``"""
+        range_start = play_rollups.day_bounds(first_day)[0]
+        # Rows created since the last run can only land on the watermark's day or later
+        changed = set(play_rollups.days(max(first_day, play_rollups.local_date(since)), last_day))
+
+        changed.update(
+            DailyPlayRollup.objects.filter(updated_at__gt=since, day__gte=first_day)
+            .order_by().values_list('day', flat=True).distinct()
+        )
+        if plays_since and rollups_until and rollups_until > plays_since:
+            changed.update(self._days_of(
+                PlayLog.objects.filter(
+                    updated_at__gt=plays_since, updated_at__lte=rollups_until, played_at__gte=range_start
+                ),
+                'played_at'
+            ))
+        for model, field in ((AudioDetection, 'detected_at'), (RoyaltyDistribution, 'calculated_at')):
+            changed.update(self._days_of(
+                model.objects.filter(updated_at__gt=since, **{f"{field}__gte": range_start}), field
+            ))
+        return changed
+
+    def _days_of(self, queryset, field: str) -> Set[date]:
+        return set(
+            queryset.order_by().annotate(day=TruncDate(field)).values_list('day', flat=True).distinct()
+        )
+
+    def _contiguous_runs(self, days: Iterable[date]):
+        """Group days into (first, last) runs so each run is one set of grouped queries"""
+        run_start = previous = None
+        for day in sorted(days):
+            if previous is not None and day - previous > timedelta(days=1):
+                yield run_start, previous
+                run_start = None
+            if run_start is None:
+                run_start = day
+            previous = day
+        if run_start is not None:
+            yield run_start, previous
+
+    def _save_days(self, activity: Dict[date, Dict]):
+        for day, day_activity in activity.items():
+            period_start, period_end = play_rollups.day_bounds(day)
+            self._day_snapshots().update_or_create(
+                snapshot_type='daily',
+                metric_type='platform_activity',
+                period_start=period_start,
+                defaults={
+                    'period_end': period_end,
+                    'value': day_activity['revenue'],
+                    'count': day_activity['plays'],
+                    'metadata': day_activity,
+                }
+            )
+
+
+# Singleton instance
+admin_snapshots = AdminSnapshotService()
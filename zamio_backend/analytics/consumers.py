@@ -6,6 +6,8 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .services import analytics_aggregator
+from .admin_snapshots import admin_snapshots
+from .tasks import refresh_admin_snapshots
 
 User = get_user_model()
 
@@ -197,13 +199,17 @@ class AnalyticsConsumer(AsyncWebsocketConsumer):
                 }))
             
             elif self.user_type == 'admin':
-                # Send basic admin metrics
-                end_date = timezone.now()
-                start_date = end_date - timedelta(days=30)
-                
-                analytics_data = await database_sync_to_async(
-                    analytics_aggregator.get_admin_analytics
-                )((start_date, end_date))
+                # Send basic admin metrics from the 30 day snapshot
+                analytics_data = await database_sync_to_async(self.get_admin_snapshot)('30d')
+                if analytics_data is None:
+                    await self.send(text_data=json.dumps({
+                        'type': 'initial_data',
+                        'user_type': 'admin',
+                        'status': 'pending',
+                        'detail': 'Admin analytics are being built; updates will follow',
+                        'data': None
+                    }))
+                    return
                 
                 await self.send(text_data=json.dumps({
                     'type': 'initial_data',
@@ -217,6 +223,15 @@ class AnalyticsConsumer(AsyncWebsocketConsumer):
                 'message': f'Failed to load initial data: {str(e)}'
             }))
     
+    def get_admin_snapshot(self, range_key):
+        """Read an admin snapshot; on a cold start queue one refresh, as the admin view does"""
+        analytics_data = admin_snapshots.get(range_key)
+        if analytics_data is None:
+            if admin_snapshots.claim_cold_start():
+                refresh_admin_snapshots.delay()
+            analytics_data = admin_snapshots.get(range_key)
+        return analytics_data
+    
     # WebSocket message handlers for group messages
     async def analytics_update(self, event):
         """Handle analytics update messages from groups"""
@@ -226,6 +241,16 @@ class AnalyticsConsumer(AsyncWebsocketConsumer):
             'timestamp': event.get('timestamp', timezone.now().isoformat())
         }))
     
+    async def analytics_batch(self, event):
+        """Handle a coalesced batch of analytics events from the fan-out publisher"""
+        await self.send(text_data=json.dumps({
+            'type': 'analytics_batch',
+            'events': event['events'],
+            'counts': event.get('counts', {}),
+            'dropped': event.get('dropped', 0),
+            'timestamp': event.get('timestamp', timezone.now().isoformat())
+        }))
+    
     async def metric_update(self, event):
         """Handle metric update messages"""
         await self.send(text_data=json.dumps({
@@ -351,4 +376,12 @@ class RealtimeMetricsConsumer(AsyncWebsocketConsumer):
             'metric': event['metric'],
             'value': event['value'],
             'timestamp': event.get('timestamp', timezone.now().isoformat())
-        }))
\ No newline at end of file
+        }))
+    
+    async def realtime_batch(self, event):
+        """Handle coalesced metric increments from the fan-out publisher"""
+        await self.send(text_data=json.dumps({
+            'type': 'realtime_batch',
+            'metrics': event['metrics'],
+            'timestamp': event.get('timestamp', timezone.now().isoformat())
+        }))
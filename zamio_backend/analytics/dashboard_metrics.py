@@ -0,0 +1,155 @@
+"""
+Shared dashboard metrics
+
+Dashboards compare a period with the one before it. Instead of a separate
+COUNT/SUM/DISTINCT query per card and per period, the helpers here narrow
+PlayLog to the union of both windows once and compute every card with
+conditional aggregation (``Count(..., filter=Q(...))``), so a summary is one
+query however many cards it feeds. Publisher summaries are cached under the
+publisher's analytics namespace.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q
+
+from .services import analytics_aggregator, sum_amount
+
+
+@dataclass
+class PeriodWindow:
+    """A reporting window and the equally long window just before it"""
+    start: Optional[datetime]
+    end: Optional[datetime]
+    inclusive_end: bool = False
+    minimum_lookback: Optional[timedelta] = None
+
+    @property
+    def previous_start(self) -> Optional[datetime]:
+        if not self.start or not self.end:
+            return None
+        lookback = self.end - self.start
+        if self.minimum_lookback and lookback.total_seconds() <= 0:
+            lookback = self.minimum_lookback
+        return self.start - lookback
+
+    def current_q(self, field: str = 'played_at') -> Q:
+        q = Q()
+        if self.start:
+            q &= Q(**{f"{field}__gte": self.start})
+        if self.end:
+            q &= Q(**{f"{field}__{'lte' if self.inclusive_end else 'lt'}": self.end})
+        return q
+
+    def previous_q(self, field: str = 'played_at') -> Optional[Q]:
+        if not self.start or not self.end:
+            return None
+        return Q(**{f"{field}__gte": self.previous_start, f"{field}__lt": self.start})
+
+    def narrow(self, queryset, field: str = 'played_at'):
+        """Restrict to both windows so the aggregate scans only what it needs"""
+        lower = self.previous_start or self.start
+        if lower:
+            queryset = queryset.filter(**{f"{field}__gte": lower})
+        if self.end:
+            queryset = queryset.filter(**{f"{field}__{'lte' if self.inclusive_end else 'lt'}": self.end})
+        return queryset
+
+    def cache_params(self) -> Dict[str, Any]:
+        # Rolling windows move every request; minute resolution lets
+        # dashboards opened within the same minute share a cache entry
+        def minute(value):
+            return value.replace(second=0, microsecond=0).isoformat() if value else 'open'
+        return {'start': minute(self.start), 'end': minute(self.end)}
+
+
+def play_metrics(q: Q, prefix: str = '') -> Dict[str, Any]:
+    """Plays, earnings, distinct stations and distinct works for one window"""
+    return {
+        f"{prefix}plays": Count('id', filter=q),
+        f"{prefix}earnings": sum_amount('royalty_amount', filter=q),
+        f"{prefix}stations": Count('station_id', distinct=True, filter=q),
+        f"{prefix}works": Count('track_id', distinct=True, filter=q),
+    }
+
+
+def with_previous_plays(aggregates: Dict[str, Any], window: PeriodWindow) -> Dict[str, Any]:
+    """Add the previous window's play count to per-group current aggregates"""
+    previous = window.previous_q()
+    if previous is not None:
+        aggregates['previous_plays'] = Count('id', filter=previous)
+    return aggregates
+
+
+def summarize_plays(playlogs, window: PeriodWindow,
+                    extra: Optional[Callable[[Q], Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    One aggregate query returning ``{'current': {...}, 'previous': {...}}``.
+    ``extra`` adds window-specific aggregates for the current period only.
+    """
+    current = window.current_q()
+    previous = window.previous_q()
+
+    aggregates = play_metrics(current)
+    if previous is not None:
+        aggregates.update(play_metrics(previous, prefix='previous_'))
+    if extra:
+        aggregates.update(extra(current))
+
+    row = window.narrow(playlogs).order_by().aggregate(**aggregates)
+
+    summary = {'current': {}, 'previous': {'plays': 0, 'earnings': Decimal('0'), 'stations': 0, 'works': 0}}
+    for key, value in row.items():
+        if key.startswith('previous_'):
+            summary['previous'][key[len('previous_'):]] = value
+        else:
+            summary['current'][key] = value
+    return summary
+
+
+def catalog_summary(agreements, window: PeriodWindow) -> Dict[str, int]:
+    """Works and agreements in a catalog now and at the start of the window"""
+    aggregates = {
+        'works': Count('track_id', distinct=True),
+        'agreements': Count('id'),
+    }
+    if window.start:
+        aggregates['previous_works'] = Count('track_id', distinct=True, filter=Q(created_at__lt=window.start))
+    row = agreements.order_by().aggregate(**aggregates)
+    row.setdefault('previous_works', 0)
+    return row
+
+
+def artist_play_summary(playlogs, window: PeriodWindow) -> Dict[str, Dict[str, Any]]:
+    return summarize_plays(playlogs, window, extra=lambda q: {
+        'avg_confidence': Avg('avg_confidence_score', filter=q),
+        'regions': Count('station__region', distinct=True, filter=q),
+    })
+
+
+def publisher_summary(publisher, playlogs, agreements, window: PeriodWindow) -> Dict[str, Any]:
+    """Plays, earnings, catalog and claim counts for a publisher dashboard, cached"""
+    namespaces = analytics_aggregator.entity_namespaces('publisher', publisher.id)
+    cache_key = analytics_aggregator.generate_cache_key(
+        'publisher_dashboard_summary', namespaces=namespaces, publisher=publisher.id, **window.cache_params()
+    )
+    cached = analytics_aggregator.get_cached_data(cache_key)
+    if cached:
+        return cached
+
+    plays = summarize_plays(playlogs, window, extra=lambda q: {
+        'unclaimed': Count('id', filter=q & Q(claimed=False)),
+    })
+    summary = {
+        'current': {**plays['current'], 'earnings': float(plays['current']['earnings'])},
+        'previous': {**plays['previous'], 'earnings': float(plays['previous']['earnings'])},
+        'catalog': catalog_summary(agreements, window),
+    }
+    analytics_aggregator.set_cached_data(
+        cache_key, summary, timeout=getattr(settings, 'ANALYTICS_DASHBOARD_CACHE_SECONDS', 120)
+    )
+    return summary
@@ -0,0 +1,339 @@
+"""
+Streaming analytics exports
+
+Each export type is described by an ``ExportDataset``: a header plus a row
+generator that walks a queryset with ``.iterator(chunk_size=...)`` (a
+server-side cursor on PostgreSQL). Writers consume rows one at a time -- CSV
+via ``csv.writer``, JSON as newline-delimited records, Excel through a
+write-only openpyxl workbook -- so an export of any size runs in constant
+memory. Progress is written to ``AnalyticsExport`` as rows go out.
+"""
+
+import csv
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from artists.models import Artist
+from music_monitor.models import AudioDetection, PlayLog, RoyaltyDistribution
+from publishers.models import PublisherProfile
+from stations.models import Station
+
+from .models import AnalyticsExport, DailyArtistRollup, DailyPlayRollup
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = 'exports'
+DEFAULT_CHUNK_SIZE = 2000
+PROGRESS_EVERY = 5000
+EXCEL_MAX_ROWS = 1048576
+
+# Progress bands reported while rows are written; setup and finalisation
+# take the remainder
+PROGRESS_START = 10
+PROGRESS_END = 95
+
+
+@dataclass
+class ExportDataset:
+    """Header and a lazily evaluated row source for one export"""
+    columns: List[str]
+    rows: Callable[[], Iterator[Sequence]]
+    count: Callable[[], int]
+
+    @classmethod
+    def empty(cls, columns: List[str]) -> 'ExportDataset':
+        return cls(columns=columns, rows=lambda: iter(()), count=lambda: 0)
+
+
+def export_chunk_size() -> int:
+    return getattr(settings, 'ANALYTICS_EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def export_date_range(export_request: AnalyticsExport, default_days: int = 30) -> Tuple[datetime, datetime]:
+    if export_request.date_range_start and export_request.date_range_end:
+        return export_request.date_range_start, export_request.date_range_end
+    end_date = timezone.now()
+    return end_date - timedelta(days=default_days), end_date
+
+
+def _local_day(value: datetime) -> date:
+    if timezone.is_aware(value):
+        return timezone.localtime(value).date()
+    return value.date()
+
+
+def _queryset_dataset(columns: List[str], queryset, fields: Sequence[str],
+                      transform: Optional[Callable[[tuple], Sequence]] = None) -> ExportDataset:
+    """Stream ``fields`` of ``queryset`` as rows through a server-side cursor"""
+    def rows():
+        values = queryset.values_list(*fields).iterator(chunk_size=export_chunk_size())
+        return (transform(row) if transform else row for row in values)
+
+    return ExportDataset(columns=columns, rows=rows, count=queryset.order_by().count)
+
+
+def _is_admin(user) -> bool:
+    return bool(getattr(user, 'is_staff', False) or getattr(user, 'is_admin', False))
+
+
+# Datasets -------------------------------------------------------------------
+
+def artist_dataset(export_request: AnalyticsExport) -> ExportDataset:
+    columns = ['Date', 'Plays', 'Revenue', 'Tracks Played', 'Stations']
+    artist_id = export_request.parameters.get('artist_id')
+    user = export_request.user
+    artists = Artist.objects.all() if _is_admin(user) else Artist.objects.filter(user=user)
+    artist = (
+        artists.filter(artist_id=artist_id).first() if artist_id
+        else artists.order_by('-active', 'id').first()
+    )
+    if not artist:
+        return ExportDataset.empty(columns)
+
+    start, end = export_date_range(export_request)
+    queryset = DailyArtistRollup.objects.filter(
+        artist=artist, day__gte=_local_day(start), day__lte=_local_day(end)
+    ).order_by('day')
+    return _queryset_dataset(columns, queryset, ('day', 'plays', 'revenue', 'tracks_played', 'stations'))
+
+
+def publisher_dataset(export_request: AnalyticsExport) -> ExportDataset:
+    columns = ['Date', 'Artist ID', 'Artist', 'Plays', 'Revenue', 'Tracks Played', 'Stations']
+    user = export_request.user
+    publisher_id = export_request.parameters.get('publisher_id')
+    if _is_admin(user) and publisher_id:
+        publisher = PublisherProfile.objects.filter(id=publisher_id).first()
+    else:
+        publisher = PublisherProfile.objects.filter(user=user).first()
+    if not publisher:
+        return ExportDataset.empty(columns)
+
+    start, end = export_date_range(export_request)
+    queryset = DailyArtistRollup.objects.filter(
+        artist__publisher=publisher, day__gte=_local_day(start), day__lte=_local_day(end)
+    ).order_by('day', 'artist_id')
+    return _queryset_dataset(columns, queryset, (
+        'day', 'artist__artist_id', 'artist__stage_name', 'plays', 'revenue', 'tracks_played', 'stations'
+    ))
+
+
+def station_dataset(export_request: AnalyticsExport) -> ExportDataset:
+    columns = ['Played At', 'Track', 'Artist', 'Source', 'Status', 'Confidence', 'Duration (s)', 'Royalty Amount']
+    user = export_request.user
+    station_id = export_request.parameters.get('station_id')
+    stations = Station.objects.all() if _is_admin(user) else Station.objects.filter(user=user)
+    station = (
+        stations.filter(station_id=station_id).first() if station_id
+        else stations.order_by('-active', 'id').first()
+    )
+    if not station:
+        return ExportDataset.empty(columns)
+
+    start, end = export_date_range(export_request)
+    queryset = PlayLog.objects.filter(
+        station=station, played_at__gte=start, played_at__lte=end
+    ).order_by('played_at', 'id')
+    return _queryset_dataset(
+        columns,
+        queryset,
+        ('played_at', 'track__title', 'track__artist__stage_name', 'source', 'verification_status',
+         'avg_confidence_score', 'duration', 'royalty_amount'),
+        transform=lambda row: row[:6] + (row[6].total_seconds() if row[6] else None, row[7]),
+    )
+
+
+def admin_dataset(export_request: AnalyticsExport) -> ExportDataset:
+    columns = ['Date', 'Station ID', 'Station', 'Track', 'Artist', 'Plays', 'Revenue']
+    if not _is_admin(export_request.user):
+        return ExportDataset.empty(columns)
+
+    start, end = export_date_range(export_request)
+    queryset = DailyPlayRollup.objects.filter(
+        day__gte=_local_day(start), day__lte=_local_day(end)
+    ).order_by('day', 'station_id', 'track_id')
+    return _queryset_dataset(columns, queryset, (
+        'day', 'station__station_id', 'station__name', 'track__title', 'track__artist__stage_name',
+        'plays', 'revenue'
+    ))
+
+
+def royalty_dataset(export_request: AnalyticsExport) -> ExportDataset:
+    columns = [
+        'Distribution ID', 'Calculated At', 'Recipient', 'Recipient Type', 'Track', 'Station',
+        'Gross Amount', 'Net Amount', 'Currency', 'Split %', 'Status', 'Paid At'
+    ]
+    start, end = export_date_range(export_request)
+    queryset = RoyaltyDistribution.objects.filter(calculated_at__gte=start, calculated_at__lte=end)
+    if not _is_admin(export_request.user):
+        queryset = queryset.filter(recipient=export_request.user)
+    return _queryset_dataset(columns, queryset.order_by('calculated_at', 'id'), (
+        'distribution_id', 'calculated_at', 'recipient__email', 'recipient_type', 'play_log__track__title',
+        'play_log__station__name', 'gross_amount', 'net_amount', 'currency', 'percentage_split', 'status',
+        'paid_at'
+    ))
+
+
+def detection_dataset(export_request: AnalyticsExport) -> ExportDataset:
+    columns = [
+        'Detection ID', 'Detected At', 'Station', 'Track', 'Detected Title', 'Detected Artist', 'Source',
+        'Confidence', 'Status', 'ISRC', 'Processing Time (ms)'
+    ]
+    start, end = export_date_range(export_request)
+    queryset = AudioDetection.objects.filter(detected_at__gte=start, detected_at__lte=end)
+    if not _is_admin(export_request.user):
+        queryset = queryset.filter(station__user=export_request.user)
+    return _queryset_dataset(columns, queryset.order_by('detected_at', 'id'), (
+        'detection_id', 'detected_at', 'station__name', 'track__title', 'detected_title', 'detected_artist',
+        'detection_source', 'confidence_score', 'processing_status', 'isrc', 'processing_time_ms'
+    ))
+
+
+DATASETS = {
+    'artist_analytics': artist_dataset,
+    'publisher_analytics': publisher_dataset,
+    'station_analytics': station_dataset,
+    'admin_analytics': admin_dataset,
+    'royalty_report': royalty_dataset,
+    'detection_report': detection_dataset,
+}
+
+
+def build_dataset(export_request: AnalyticsExport) -> ExportDataset:
+    try:
+        builder = DATASETS[export_request.export_type]
+    except KeyError:
+        raise ValueError(f"Unknown export type: {export_request.export_type}")
+    return builder(export_request)
+
+
+# Writers --------------------------------------------------------------------
+
+def _text_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _excel_cell(value):
+    # Excel has no timezone support and openpyxl rejects aware datetimes
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    if isinstance(value, (str, int, float, Decimal, date, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def write_csv(path: str, columns: List[str], rows: Iterator[Sequence]) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([_text_cell(value) for value in row])
+
+
+def write_ndjson(path: str, columns: List[str], rows: Iterator[Sequence]) -> None:
+    with open(path, 'w', encoding='utf-8') as jsonfile:
+        for row in rows:
+            jsonfile.write(json.dumps(dict(zip(columns, row)), default=str))
+            jsonfile.write('\n')
+
+
+def write_excel(path: str, columns: List[str], rows: Iterator[Sequence]) -> None:
+    from openpyxl import Workbook
+
+    # Write-only workbooks stream rows to disk instead of keeping cells in memory
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheet_number = None, EXCEL_MAX_ROWS, 0
+    for row in rows:
+        if sheet_rows >= EXCEL_MAX_ROWS:
+            sheet_number += 1
+            sheet = workbook.create_sheet(title=f"Export {sheet_number}" if sheet_number > 1 else 'Export')
+            sheet.append(columns)
+            sheet_rows = 1
+        sheet.append([_excel_cell(value) for value in row])
+        sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet(title='Export').append(columns)
+    workbook.save(path)
+
+
+def _excel_available() -> bool:
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+WRITERS = {
+    'csv': ('csv', write_csv),
+    'json': ('ndjson', write_ndjson),
+    'excel': ('xlsx', write_excel),
+    # PDF rendering is not implemented; PDF requests get CSV as before
+    'pdf': ('csv', write_csv),
+}
+
+
+class StreamingExport:
+    """Writes one AnalyticsExport to MEDIA_ROOT/exports, reporting progress"""
+
+    def __init__(self, export_request: AnalyticsExport, progress_callback: Optional[Callable[[int], None]] = None,
+                 progress_every: int = PROGRESS_EVERY):
+        self.export_request = export_request
+        self.progress_callback = progress_callback
+        self.progress_every = progress_every
+        self.rows_written = 0
+
+    def _writer(self):
+        export_format = self.export_request.export_format
+        if export_format == 'excel' and not _excel_available():
+            logger.warning("openpyxl is not installed; writing Excel export as CSV")
+            export_format = 'csv'
+        return WRITERS.get(export_format, WRITERS['csv'])
+
+    def _tracked(self, rows: Iterator[Sequence], total: int) -> Iterator[Sequence]:
+        for row in rows:
+            yield row
+            self.rows_written += 1
+            if self.rows_written % self.progress_every == 0:
+                self._report(PROGRESS_START + (PROGRESS_END - PROGRESS_START) * min(self.rows_written / max(total, 1), 1))
+
+    def _report(self, percentage: float):
+        percentage = int(percentage)
+        self.export_request.update_progress(percentage)
+        if self.progress_callback:
+            self.progress_callback(percentage)
+
+    def run(self) -> Tuple[str, int]:
+        """Write the export; returns (path relative to MEDIA_ROOT, size in bytes)"""
+        dataset = build_dataset(self.export_request)
+        total = dataset.count()
+        self._report(PROGRESS_START)
+
+        extension, writer = self._writer()
+        file_path = f"{EXPORT_DIR}/analytics_export_{self.export_request.export_id}.{extension}"
+        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        # Written under a temporary name so a failed export never leaves a
+        # truncated file behind the final path
+        partial_path = f"{full_path}.partial"
+        try:
+            writer(partial_path, dataset.columns, self._tracked(dataset.rows(), total))
+            os.replace(partial_path, full_path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        self._report(PROGRESS_END)
+        return file_path, os.path.getsize(full_path)
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.services import play_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily play/revenue rollups from PlayLog for a range of days (default: all days with plays)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=str, default=None, help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", type=str, default=None, help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            first_day = date.fromisoformat(options["start"]) if options["start"] else None
+            last_day = date.fromisoformat(options["end"]) if options["end"] else None
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD")
+
+        if first_day and last_day and first_day > last_day:
+            raise CommandError("--start must not be after --end")
+
+        summary = play_rollups.backfill(first_day, last_day)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt play rollups days={summary['days']}, cells={summary['cells_refreshed']}"
+        ))
@@ -0,0 +1,28 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from analytics.realtime import RealtimeFanoutPublisher, realtime_bus
+
+
+class Command(BaseCommand):
+    help = "Drain the realtime analytics stream and send one coalesced websocket message per group per window."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window-ms", type=int, default=None, help="Coalescing window (default ANALYTICS_FANOUT_WINDOW_MS)")
+
+    def handle(self, *args, **options):
+        if not realtime_bus.uses_stream:
+            self.stderr.write(self.style.WARNING(
+                "Default cache is not django-redis; events stay in each web process and are flushed there"
+            ))
+            return
+
+        stop_event = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop_event.set())
+
+        publisher = RealtimeFanoutPublisher(realtime_bus, window_ms=options["window_ms"])
+        self.stdout.write(self.style.SUCCESS(f"Realtime fan-out running every {publisher.window * 1000:.0f}ms"))
+        publisher.run_forever(stop_event)
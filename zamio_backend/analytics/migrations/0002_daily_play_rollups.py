@@ -0,0 +1,92 @@
+# Generated by Django 5.1.15 on 2026-10-19 01:01
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('artists', '0006_alter_uploadprocessingstatus_upload_type'),
+        ('publishers', '0002_publisheraccountsettings'),
+        ('stations', '0003_stationstaff_can_manage_compliance_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('cells_refreshed', models.BigIntegerField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyArtistRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('plays', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=15)),
+                ('tracks_played', models.IntegerField(default=0)),
+                ('stations', models.IntegerField(default=0)),
+                ('artist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_play_rollups', to='artists.artist')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['artist', 'day'], name='analytics_d_artist__ec32e2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'artist'), name='uniq_daily_artist_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPlayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('plays', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=15)),
+                ('confidence_sum', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=15)),
+                ('confidence_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_play_rollups', to='stations.station')),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_play_rollups', to='artists.track')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['track', 'day'], name='analytics_d_track_i_1f289f_idx'), models.Index(fields=['station', 'day'], name='analytics_d_station_552704_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'track', 'station'), name='uniq_daily_play_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPublisherRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('plays', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=15)),
+                ('artists_played', models.IntegerField(default=0)),
+                ('publisher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_play_rollups', to='publishers.publisherprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['publisher', 'day'], name='analytics_d_publish_15917f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'publisher'), name='uniq_daily_publisher_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StationHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('plays', models.IntegerField(default=0)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_play_rollups', to='stations.station')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['station', 'day'], name='analytics_s_station_27aed1_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'station', 'hour'), name='uniq_station_hourly_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-19 01:16
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_daily_play_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric_name', models.CharField(db_index=True, max_length=50)),
+                ('resolution', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket_start', models.DateTimeField(db_index=True)),
+                ('value', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=20)),
+                ('station_id', models.CharField(blank=True, default='', max_length=255)),
+                ('artist_id', models.CharField(blank=True, default='', max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric_name', 'resolution', 'bucket_start'], name='analytics_m_metric__8cef0b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric_name', 'resolution', 'bucket_start', 'station_id', 'artist_id'), name='uniq_metric_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-19 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_metric_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analyticssnapshot',
+            name='range_key',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='analyticssnapshot',
+            name='metric_type',
+            field=models.CharField(choices=[('plays', 'Play Count'), ('revenue', 'Revenue'), ('detections', 'Detection Count'), ('confidence', 'Average Confidence'), ('unique_tracks', 'Unique Tracks'), ('unique_stations', 'Unique Stations'), ('system_health', 'System Health'), ('platform_activity', 'Platform Activity'), ('admin_dashboard', 'Admin Dashboard')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='analyticssnapshot',
+            name='snapshot_type',
+            field=models.CharField(choices=[('hourly', 'Hourly'), ('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly'), ('admin_range', 'Admin Dashboard Range')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='analyticssnapshot',
+            index=models.Index(fields=['snapshot_type', 'range_key'], name='analytics_a_snapsho_5345f2_idx'),
+        ),
+    ]
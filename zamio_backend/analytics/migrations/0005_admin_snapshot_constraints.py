@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:38
+
+from django.db import migrations, models
+
+
+def delete_duplicate_admin_snapshots(apps, schema_editor):
+    """Keep the newest row of each admin range and platform day before constraining them"""
+    AnalyticsSnapshot = apps.get_model('analytics', 'AnalyticsSnapshot')
+
+    for queryset, key_fields in (
+        (AnalyticsSnapshot.objects.filter(snapshot_type='admin_range'), ('snapshot_type', 'metric_type', 'range_key')),
+        (AnalyticsSnapshot.objects.filter(metric_type='platform_activity'), ('snapshot_type', 'metric_type', 'period_start')),
+    ):
+        seen = set()
+        for row in queryset.order_by('-created_at', '-id').values('id', *key_fields):
+            key = tuple(row[field] for field in key_fields)
+            if key in seen:
+                AnalyticsSnapshot.objects.filter(id=row['id']).delete()
+            seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_admin_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_admin_snapshots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='analyticssnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('snapshot_type', 'admin_range')), fields=('snapshot_type', 'metric_type', 'range_key'), name='uniq_admin_range_snapshot'),
+        ),
+        migrations.AddConstraint(
+            model_name='analyticssnapshot',
+            constraint=models.UniqueConstraint(condition=models.Q(('metric_type', 'platform_activity')), fields=('snapshot_type', 'metric_type', 'period_start'), name='uniq_platform_activity_snapshot'),
+        ),
+    ]
@@ -14,6 +14,7 @@ class AnalyticsSnapshot(models.Model):
         ('daily', 'Daily'),
         ('weekly', 'Weekly'),
         ('monthly', 'Monthly'),
+        ('admin_range', 'Admin Dashboard Range'),
     ]
     
     METRIC_TYPES = [
@@ -24,6 +25,8 @@ class AnalyticsSnapshot(models.Model):
         ('unique_tracks', 'Unique Tracks'),
         ('unique_stations', 'Unique Stations'),
         ('system_health', 'System Health'),
+        ('platform_activity', 'Platform Activity'),
+        ('admin_dashboard', 'Admin Dashboard'),
     ]
     
     snapshot_id = models.UUIDField(default=uuid.uuid4, unique=True, db_index=True)
@@ -45,12 +48,15 @@ class AnalyticsSnapshot(models.Model):
     publisher_id = models.IntegerField(null=True, blank=True, db_index=True)
     track_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
     region = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    # Named rolling range (e.g. '7d', 'mtd') for admin dashboard snapshots
+    range_key = models.CharField(max_length=20, blank=True, default='')
     
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         indexes = [
             models.Index(fields=['snapshot_type', 'metric_type', 'period_start']),
+            models.Index(fields=['snapshot_type', 'range_key']),
             models.Index(fields=['artist_id', 'metric_type', 'period_start']),
             models.Index(fields=['station_id', 'metric_type', 'period_start']),
             models.Index(fields=['publisher_id', 'metric_type', 'period_start']),
@@ -59,6 +65,20 @@ class AnalyticsSnapshot(models.Model):
         unique_together = [
             ('snapshot_type', 'metric_type', 'period_start', 'artist_id', 'station_id', 'publisher_id', 'track_id', 'region')
         ]
+        # The dimension columns are NULL on platform-wide snapshots, so
+        # unique_together does not cover them; admin snapshots are keyed here
+        constraints = [
+            models.UniqueConstraint(
+                fields=['snapshot_type', 'metric_type', 'range_key'],
+                condition=models.Q(snapshot_type='admin_range'),
+                name='uniq_admin_range_snapshot',
+            ),
+            models.UniqueConstraint(
+                fields=['snapshot_type', 'metric_type', 'period_start'],
+                condition=models.Q(metric_type='platform_activity'),
+                name='uniq_platform_activity_snapshot',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_metric_type_display()} - {self.get_snapshot_type_display()} ({self.period_start.date()})"
@@ -109,7 +129,7 @@ class AnalyticsCache(models.Model):
 
 
 class RealtimeMetric(models.Model):
-    """Real-time metrics for WebSocket updates"""
+    """Legacy per-event realtime metric rows; new values live in the time-series buckets (see MetricBucket)"""
     METRIC_NAMES = [
         ('active_detections', 'Active Detections'),
         ('processing_queue', 'Processing Queue Size'),
@@ -228,6 +248,10 @@ class AnalyticsExport(models.Model):
         self.error_message = error_message
         self.save(update_fields=['status', 'error_message'])
     
+    def update_progress(self, percentage):
+        self.progress_percentage = percentage
+        self.save(update_fields=['progress_percentage'])
+    
     def increment_download(self):
         self.download_count += 1
         self.save(update_fields=['download_count'])
@@ -281,4 +305,137 @@ class UserAnalyticsPreference(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"Analytics Preferences for {self.user.email}"
\ No newline at end of file
+        return f"Analytics Preferences for {self.user.email}"
+
+class DailyPlayRollup(models.Model):
+    """Active plays and revenue per (day, track, station), maintained from PlayLog"""
+    day = models.DateField(db_index=True)
+    track = models.ForeignKey('artists.Track', on_delete=models.CASCADE, related_name='daily_play_rollups')
+    station = models.ForeignKey('stations.Station', on_delete=models.CASCADE, related_name='daily_play_rollups')
+
+    plays = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0'))
+    # Sum and count of non-null confidence scores so averages can be re-derived over any range
+    confidence_sum = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0'))
+    confidence_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'track', 'station'], name='uniq_daily_play_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['track', 'day']),
+            models.Index(fields=['station', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} track={self.track_id} station={self.station_id}: {self.plays} plays"
+
+
+class StationHourlyRollup(models.Model):
+    """Active plays per (day, station, hour) for peak-hour charts"""
+    day = models.DateField(db_index=True)
+    station = models.ForeignKey('stations.Station', on_delete=models.CASCADE, related_name='hourly_play_rollups')
+    hour = models.PositiveSmallIntegerField()
+    plays = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'station', 'hour'], name='uniq_station_hourly_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['station', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.hour:02d}:00 station={self.station_id}: {self.plays} plays"
+
+
+class DailyArtistRollup(models.Model):
+    """DailyPlayRollup rolled up per artist"""
+    day = models.DateField(db_index=True)
+    artist = models.ForeignKey('artists.Artist', on_delete=models.CASCADE, related_name='daily_play_rollups')
+    plays = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0'))
+    tracks_played = models.IntegerField(default=0)
+    stations = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'artist'], name='uniq_daily_artist_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['artist', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} artist={self.artist_id}: {self.plays} plays"
+
+
+class DailyPublisherRollup(models.Model):
+    """DailyPlayRollup rolled up per publisher of the playing artist"""
+    day = models.DateField(db_index=True)
+    publisher = models.ForeignKey(
+        'publishers.PublisherProfile', on_delete=models.CASCADE, related_name='daily_play_rollups'
+    )
+    plays = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0'))
+    artists_played = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'publisher'], name='uniq_daily_publisher_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['publisher', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} publisher={self.publisher_id}: {self.plays} plays"
+
+
+class RollupWatermark(models.Model):
+    """How far (by PlayLog.updated_at) the rollup job has folded changes in"""
+    name = models.CharField(max_length=50, unique=True)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    cells_refreshed = models.BigIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_updated_at}"
+
+
+class MetricBucket(models.Model):
+    """Hourly/daily downsample of a realtime metric series persisted from the cache buckets"""
+    RESOLUTION_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    metric_name = models.CharField(max_length=50, db_index=True)
+    resolution = models.CharField(max_length=10, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField(db_index=True)
+    value = models.DecimalField(max_digits=20, decimal_places=4, default=Decimal('0'))
+
+    # Dimensions; blank means the platform-wide series
+    station_id = models.CharField(max_length=255, blank=True, default='')
+    artist_id = models.CharField(max_length=255, blank=True, default='')
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric_name', 'resolution', 'bucket_start', 'station_id', 'artist_id'],
+                name='uniq_metric_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['metric_name', 'resolution', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.metric_name} {self.resolution} {self.bucket_start}: {self.value}"
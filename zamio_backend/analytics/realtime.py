@@ -0,0 +1,261 @@
+"""
+Realtime analytics event bus and coalescing websocket fan-out.
+
+Signal handlers only append small JSON events to the bus (a Redis stream when
+the default cache is django-redis, an in-process queue otherwise). A separate
+publisher drains the bus every ``ANALYTICS_FANOUT_WINDOW_MS`` and sends one
+combined message per channel group per tick, so the DB write path never waits
+on the channel layer or on the number of websocket subscribers.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REALTIME_METRICS_GROUP = 'realtime_metrics'
+
+
+class RealtimeEventBus:
+    """Append-only queue of realtime analytics events."""
+
+    STREAM_KEY = 'analytics:realtime:events'
+    CONSUMER_GROUP = 'analytics-fanout'
+
+    def __init__(self, max_length: Optional[int] = None):
+        self.max_length = max_length or getattr(settings, 'ANALYTICS_REALTIME_STREAM_MAXLEN', 10000)
+        self.consumer_name = f"fanout-{threading.get_native_id()}-{id(self)}"
+        self._queue = deque(maxlen=self.max_length)
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_resolved = False
+        self._group_ready = False
+        self._flusher = None
+
+    def _connection(self):
+        if not self._redis_resolved:
+            self._redis_resolved = True
+            try:
+                from django_redis import get_redis_connection
+                self._redis = get_redis_connection('default')
+            except Exception:
+                # Non-redis cache backend (NotImplementedError) or django-redis
+                # missing: keep events in this process instead
+                self._redis = None
+        return self._redis
+
+    @property
+    def uses_stream(self) -> bool:
+        return self._connection() is not None
+
+    def publish(self, groups: Iterable[str], data: Dict, metrics: Optional[List[Dict]] = None):
+        """Queue one event for ``groups``; never raises into the caller."""
+        event = {
+            'groups': [group for group in groups if group],
+            'data': data,
+            'metrics': metrics or [],
+            'ts': timezone.now().isoformat(),
+        }
+        try:
+            payload = json.dumps(event, default=str)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Dropping unserialisable realtime event: {e}")
+            return
+
+        redis_conn = self._connection()
+        if redis_conn is not None:
+            try:
+                redis_conn.xadd(
+                    self.STREAM_KEY, {'event': payload}, maxlen=self.max_length, approximate=True
+                )
+                return
+            except Exception as e:
+                logger.warning(f"Realtime stream unavailable, queueing in-process: {e}")
+
+        with self._lock:
+            self._queue.append(payload)
+        self._ensure_flusher()
+
+    def drain(self, count: int = 1000) -> List[Dict]:
+        """Remove and return up to ``count`` pending events, oldest first."""
+        payloads = []
+        with self._lock:
+            while self._queue and len(payloads) < count:
+                payloads.append(self._queue.popleft())
+
+        redis_conn = self._connection()
+        if redis_conn is not None and len(payloads) < count:
+            payloads.extend(self._drain_stream(redis_conn, count - len(payloads)))
+
+        events = []
+        for payload in payloads:
+            try:
+                events.append(json.loads(payload))
+            except (TypeError, ValueError):
+                continue
+        return events
+
+    def _drain_stream(self, redis_conn, count: int) -> List[str]:
+        try:
+            if not self._group_ready:
+                try:
+                    redis_conn.xgroup_create(self.STREAM_KEY, self.CONSUMER_GROUP, id='0', mkstream=True)
+                except Exception as e:
+                    if 'BUSYGROUP' not in str(e):
+                        raise
+                self._group_ready = True
+
+            response = redis_conn.xreadgroup(
+                self.CONSUMER_GROUP, self.consumer_name, {self.STREAM_KEY: '>'}, count=count
+            )
+        except Exception as e:
+            logger.error(f"Failed to read realtime stream: {e}")
+            return []
+
+        payloads, entry_ids = [], []
+        for _stream, entries in response or []:
+            for entry_id, fields in entries:
+                entry_ids.append(entry_id)
+                payload = fields.get(b'event') or fields.get('event')
+                if payload is not None:
+                    payloads.append(payload.decode('utf-8') if isinstance(payload, bytes) else payload)
+
+        if entry_ids:
+            try:
+                redis_conn.xack(self.STREAM_KEY, self.CONSUMER_GROUP, *entry_ids)
+                redis_conn.xdel(self.STREAM_KEY, *entry_ids)
+            except Exception as e:
+                logger.warning(f"Failed to acknowledge realtime stream entries: {e}")
+        return payloads
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def _ensure_flusher(self):
+        """Without a shared stream nobody else can see this queue, so flush it here."""
+        if not getattr(settings, 'ANALYTICS_REALTIME_INPROCESS_FANOUT', True):
+            return
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            publisher = RealtimeFanoutPublisher(self)
+            self._flusher = threading.Thread(
+                target=publisher.run_forever, name='analytics-realtime-fanout', daemon=True
+            )
+            self._flusher.start()
+
+
+class RealtimeFanoutPublisher:
+    """Coalesces bus events into one channel-layer message per group per tick."""
+
+    def __init__(self, bus: RealtimeEventBus = None, window_ms: Optional[int] = None,
+                 max_events_per_message: Optional[int] = None, batch_size: int = 5000):
+        self.bus = bus or realtime_bus
+        self.window = (window_ms or getattr(settings, 'ANALYTICS_FANOUT_WINDOW_MS', 500)) / 1000
+        self.max_events_per_message = max_events_per_message or getattr(
+            settings, 'ANALYTICS_FANOUT_MAX_EVENTS', 50
+        )
+        self.batch_size = batch_size
+
+    def build_messages(self, events: List[Dict]) -> Dict[str, Dict]:
+        """Group events by channel group and fold metric increments together."""
+        by_group = defaultdict(list)
+        metric_totals = defaultdict(Decimal)
+        for event in events:
+            for group in event.get('groups', []):
+                by_group[group].append(event.get('data', {}))
+            for metric in event.get('metrics', []):
+                try:
+                    value = Decimal(str(metric.get('value', 0)))
+                except (InvalidOperation, ValueError):
+                    continue
+                metric_totals[(metric.get('name'), metric.get('station_id'), metric.get('artist_id'))] += value
+
+        timestamp = timezone.now().isoformat()
+        messages = {}
+        for group, items in by_group.items():
+            messages[group] = {
+                'type': 'analytics_batch',
+                'events': items[-self.max_events_per_message:],
+                'counts': dict(Counter(item.get('type', 'unknown') for item in items)),
+                'dropped': max(len(items) - self.max_events_per_message, 0),
+                'timestamp': timestamp,
+            }
+
+        if metric_totals:
+            self._record_metrics(metric_totals)
+            totals = defaultdict(float)
+            for (name, _station_id, _artist_id), value in metric_totals.items():
+                totals[name] += float(value)
+            messages[REALTIME_METRICS_GROUP] = {
+                'type': 'realtime_batch',
+                'metrics': dict(totals),
+                'timestamp': timestamp,
+            }
+        return messages
+
+    def _record_metrics(self, metric_totals):
+        from .services import analytics_aggregator
+
+        for (name, station_id, artist_id), value in metric_totals.items():
+            try:
+                analytics_aggregator.update_realtime_metric(
+                    name, value, station_id=station_id, artist_id=artist_id
+                )
+            except Exception as e:
+                logger.error(f"Failed to record realtime metric {name}: {e}")
+
+    def tick(self) -> Dict:
+        """Drain the bus once and send the coalesced messages."""
+        events = self.bus.drain(self.batch_size)
+        if not events:
+            return {'events': 0, 'groups': 0}
+
+        messages = self.build_messages(events)
+        channel_layer = get_channel_layer()
+        if channel_layer and messages:
+            try:
+                async_to_sync(self._send_all)(channel_layer, messages)
+            except Exception as e:
+                logger.error(f"Realtime fan-out failed: {e}")
+        return {'events': len(events), 'groups': len(messages)}
+
+    async def _send_all(self, channel_layer, messages: Dict[str, Dict]):
+        groups = list(messages)
+        results = await asyncio.gather(
+            *(channel_layer.group_send(group, messages[group]) for group in groups),
+            return_exceptions=True,
+        )
+        for group, result in zip(groups, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Realtime fan-out to {group} failed: {result}")
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Realtime fan-out tick failed: {e}")
+            finally:
+                close_old_connections()
+            stop_event.wait(max(self.window - (time.monotonic() - started), 0))
+
+
+realtime_bus = RealtimeEventBus()
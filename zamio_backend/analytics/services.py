@@ -1,18 +1,23 @@
 import json
-import redis
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import date, datetime, timedelta
 from decimal import Decimal, InvalidOperation
-from typing import Dict, List, Optional, Any, Tuple
-from django.db import models
-from django.db.models import Count, Sum, Avg, Q, F
-from django.db.models.functions import Coalesce
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+from django.db import models, transaction
+from django.db.models import Count, Sum, Avg, Q, F, Value
+from django.db.models.functions import Coalesce, ExtractHour, TruncDate, TruncMonth
 from django.utils import timezone
 from django.utils.timesince import timesince
 from django.core.cache import cache
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
-from .models import AnalyticsSnapshot, AnalyticsCache, RealtimeMetric
+from core.caching_service import AnalyticsCacheService, CacheNamespace
+from .timeseries import metric_store
+from .models import (
+    AnalyticsSnapshot, AnalyticsCache, DailyPlayRollup, StationHourlyRollup,
+    DailyArtistRollup, DailyPublisherRollup, RollupWatermark
+)
 from music_monitor.models import PlayLog, AudioDetection, RoyaltyDistribution, Dispute
 from artists.models import Artist, Track, Genre
 from stations.models import Station
@@ -21,17 +26,22 @@ from royalties.models import PartnerPRO, ReciprocalAgreement
 
 User = get_user_model()
 
+ROLLUP_AMOUNT = models.DecimalField(max_digits=15, decimal_places=2)
+
+
+def sum_amount(field: str, **kwargs):
+    """Decimal Sum that yields 0 instead of None for empty groups"""
+    return Coalesce(Sum(field, **kwargs), Value(Decimal('0')), output_field=ROLLUP_AMOUNT)
+
+
+def sum_count(field: str, **kwargs):
+    return Coalesce(Sum(field, **kwargs), Value(0))
+
 
 class AnalyticsAggregator:
     """Service for efficient analytics data processing and aggregation"""
 
     def __init__(self):
-        self.redis_client = redis.Redis(
-            host=getattr(settings, 'REDIS_HOST', 'localhost'),
-            port=getattr(settings, 'REDIS_PORT', 6379),
-            db=getattr(settings, 'REDIS_ANALYTICS_DB', 1),
-            decode_responses=True
-        )
         self.cache_prefix = 'analytics:'
         self.default_cache_timeout = 3600  # 1 hour
 
@@ -46,44 +56,73 @@ class AnalyticsAggregator:
         except (InvalidOperation, TypeError, ValueError):
             return default
 
-    def generate_cache_key(self, key_type: str, **params) -> str:
-        """Generate consistent cache keys"""
+    def _rollup_days(self, start_date: datetime, end_date: datetime) -> Tuple[date, date]:
+        """Map a datetime range onto the (inclusive) rollup days it covers"""
+        return play_rollups.local_date(start_date), play_rollups.local_date(end_date)
+
+    def _average_confidence(self, row: Dict) -> float:
+        if not row.get('confidence_count'):
+            return 0.0
+        return round(float(row['confidence_sum']) / row['confidence_count'], 2)
+
+    def _with_avg_confidence(self, rows) -> List[Dict]:
+        """Replace rollup confidence sums/counts with the average they describe"""
+        results = []
+        for row in rows:
+            row = dict(row)
+            row['avg_confidence'] = self._average_confidence(row)
+            row.pop('confidence_sum', None)
+            row.pop('confidence_count', None)
+            results.append(row)
+        return results
+
+    def entity_namespaces(self, entity_type: Optional[str] = None, entity_id: Any = None) -> List[CacheNamespace]:
+        """
+        Namespaces a cached analytics payload depends on: all analytics, plus
+        one entity. Shared with AnalyticsCacheService, so CacheInvalidator
+        reaches the dashboards cached here.
+        """
+        return AnalyticsCacheService.namespaces(entity_type, entity_id)
+
+    def generate_cache_key(self, key_type: str, namespaces: Optional[List[CacheNamespace]] = None, **params) -> str:
+        """Generate consistent cache keys, versioned by the namespaces they belong to"""
         param_str = '_'.join([f"{k}:{v}" for k, v in sorted(params.items()) if v is not None])
-        return f"{self.cache_prefix}{key_type}:{param_str}"
+        return CacheNamespace.versioned_key(f"{self.cache_prefix}{key_type}:{param_str}", namespaces or [])
     
     def get_cached_data(self, cache_key: str) -> Optional[Dict]:
-        """Get data from Redis cache"""
+        """Get data from the cache"""
         try:
-            cached_data = self.redis_client.get(cache_key)
+            cached_data = cache.get(cache_key)
             if cached_data:
                 return json.loads(cached_data)
-        except (redis.RedisError, json.JSONDecodeError):
+        except Exception:
             pass
         return None
     
     def set_cached_data(self, cache_key: str, data: Dict, timeout: int = None) -> bool:
-        """Set data in Redis cache"""
+        """Set data in the cache"""
         try:
             timeout = timeout or self.default_cache_timeout
             serialized_data = json.dumps(data, default=str)
-            return self.redis_client.setex(cache_key, timeout, serialized_data)
-        except (redis.RedisError, TypeError, ValueError):
+            cache.set(cache_key, serialized_data, timeout)
+            return True
+        except Exception:
             return False
     
-    def invalidate_cache_pattern(self, pattern: str):
-        """Invalidate cache entries matching pattern"""
-        try:
-            keys = self.redis_client.keys(f"{self.cache_prefix}{pattern}")
-            if keys:
-                self.redis_client.delete(*keys)
-        except redis.RedisError:
-            pass
+    def invalidate_namespace(self, entity_type: Optional[str] = None, entity_id: Any = None) -> bool:
+        """
+        Invalidate cached analytics for one entity, or for everything when no
+        entity is given. This is a single counter increment, whatever the
+        number of cached date ranges.
+        """
+        return AnalyticsCacheService.invalidate_analytics(entity_type, entity_id)
     
     def get_artist_analytics(self, artist_id: str, date_range: Tuple[datetime, datetime]) -> Dict:
         """Get comprehensive analytics for an artist"""
         start_date, end_date = date_range
         cache_key = self.generate_cache_key(
             'artist_analytics',
+            namespaces=self.entity_namespaces('artist', artist_id),
             artist_id=artist_id,
             start=start_date.date(),
             end=end_date.date()
@@ -98,105 +137,94 @@ class AnalyticsAggregator:
         try:
             artist = Artist.objects.get(artist_id=artist_id)
             tracks = Track.objects.filter(artist=artist, active=True)
-            track_ids = list(tracks.values_list('track_id', flat=True))
         except Artist.DoesNotExist:
             return {}
         
-        # Base queryset for the date range
-        play_logs = PlayLog.objects.filter(
-            track__track_id__in=track_ids,
-            played_at__range=(start_date, end_date),
-            active=True
-        )
-        
+        # Read from the daily rollups rather than scanning PlayLog
+        first_day, last_day = self._rollup_days(start_date, end_date)
+        rollups = DailyPlayRollup.objects.filter(track__artist=artist, day__range=(first_day, last_day))
+
         # Aggregate basic metrics
-        basic_metrics = play_logs.aggregate(
-            total_plays=Count('id'),
-            total_revenue=Sum('royalty_amount') or Decimal('0'),
-            avg_confidence=Avg('avg_confidence_score') or Decimal('0'),
+        basic_metrics = rollups.aggregate(
+            total_plays=sum_count('plays'),
+            total_revenue=sum_amount('revenue'),
+            confidence_sum=sum_amount('confidence_sum'),
+            confidence_count=sum_count('confidence_count'),
             unique_stations=Count('station', distinct=True)
         )
-        
+
         # Top performing tracks
-        top_tracks = play_logs.values(
+        top_tracks = rollups.values(
             'track__title', 'track__track_id'
         ).annotate(
-            play_count=Count('id'),
-            revenue=Sum('royalty_amount') or Decimal('0')
+            play_count=sum_count('plays'),
+            revenue=sum_amount('revenue')
         ).order_by('-play_count')[:10]
-        
+
         # Geographic distribution
-        geographic_data = play_logs.values(
+        geographic_data = rollups.values(
             'station__region', 'station__city'
         ).annotate(
-            play_count=Count('id'),
-            revenue=Sum('royalty_amount') or Decimal('0')
+            play_count=sum_count('plays'),
+            revenue=sum_amount('revenue')
         ).order_by('-play_count')[:20]
-        
+
         # Time series data (daily aggregation)
+        daily_totals = {
+            row['day']: row for row in DailyArtistRollup.objects.filter(
+                artist=artist, day__range=(first_day, last_day)
+            ).values('day', 'plays', 'revenue')
+        }
         daily_data = []
-        current_date = start_date.date()
-        while current_date <= end_date.date():
-            day_start = timezone.make_aware(datetime.combine(current_date, datetime.min.time()))
-            day_end = day_start + timedelta(days=1)
-            
-            day_metrics = play_logs.filter(
-                played_at__range=(day_start, day_end)
-            ).aggregate(
-                plays=Count('id'),
-                revenue=Sum('royalty_amount') or Decimal('0')
-            )
-            
+        for day in play_rollups.days(first_day, last_day):
+            day_metrics = daily_totals.get(day, {'plays': 0, 'revenue': Decimal('0')})
             daily_data.append({
-                'date': current_date.isoformat(),
+                'date': day.isoformat(),
                 'plays': day_metrics['plays'],
                 'revenue': float(day_metrics['revenue'])
             })
-            current_date += timedelta(days=1)
-        
+
         # Station performance
-        station_performance = play_logs.values(
+        station_performance = self._with_avg_confidence(rollups.values(
             'station__name', 'station__station_id', 'station__station_class'
         ).annotate(
-            play_count=Count('id'),
-            revenue=Sum('royalty_amount') or Decimal('0'),
-            avg_confidence=Avg('avg_confidence_score') or Decimal('0')
-        ).order_by('-play_count')[:15]
-        
-        # Trend analysis (compare with previous period)
-        previous_start = start_date - (end_date - start_date)
-        previous_end = start_date
-        
-        previous_metrics = PlayLog.objects.filter(
-            track__track_id__in=track_ids,
-            played_at__range=(previous_start, previous_end),
-            active=True
+            play_count=sum_count('plays'),
+            revenue=sum_amount('revenue'),
+            confidence_sum=sum_amount('confidence_sum'),
+            confidence_count=sum_count('confidence_count')
+        ).order_by('-play_count')[:15])
+
+        # Trend analysis (compare with the same number of days before the range)
+        period = (last_day - first_day) + timedelta(days=1)
+        previous_metrics = DailyArtistRollup.objects.filter(
+            artist=artist,
+            day__range=(first_day - period, first_day - timedelta(days=1))
         ).aggregate(
-            total_plays=Count('id'),
-            total_revenue=Sum('royalty_amount') or Decimal('0')
+            total_plays=sum_count('plays'),
+            total_revenue=sum_amount('revenue')
         )
-        
+
         # Calculate trends
         plays_trend = self._calculate_trend(
-            basic_metrics['total_plays'], 
+            basic_metrics['total_plays'],
             previous_metrics['total_plays']
         )
         revenue_trend = self._calculate_trend(
-            float(basic_metrics['total_revenue']), 
+            float(basic_metrics['total_revenue']),
             float(previous_metrics['total_revenue'])
         )
-        
+
         analytics_data = {
             'artist_info': {
                 'artist_id': artist_id,
                 'stage_name': artist.stage_name,
                 'total_tracks': tracks.count(),
-                'verified': artist.verified
+                'verified': artist.verification_status == 'verified'
             },
             'summary': {
                 'total_plays': basic_metrics['total_plays'],
                 'total_revenue': float(basic_metrics['total_revenue']),
-                'avg_confidence_score': float(basic_metrics['avg_confidence']),
+                'avg_confidence_score': self._average_confidence(basic_metrics),
                 'unique_stations': basic_metrics['unique_stations'],
                 'plays_trend': plays_trend,
                 'revenue_trend': revenue_trend
@@ -222,6 +250,7 @@ class AnalyticsAggregator:
         start_date, end_date = date_range
         cache_key = self.generate_cache_key(
             'publisher_analytics',
+            namespaces=self.entity_namespaces('publisher', publisher_id),
             publisher_id=publisher_id,
             start=start_date.date(),
             end=end_date.date()
@@ -235,43 +264,35 @@ class AnalyticsAggregator:
         try:
             publisher = PublisherProfile.objects.get(id=publisher_id)
             artists = Artist.objects.filter(publisher=publisher, active=True)
-            artist_ids = list(artists.values_list('artist_id', flat=True))
         except PublisherProfile.DoesNotExist:
             return {}
-        
-        # Get all tracks for publisher's artists
-        tracks = Track.objects.filter(artist__artist_id__in=artist_ids, active=True)
-        track_ids = list(tracks.values_list('track_id', flat=True))
-        
-        # Base queryset
-        play_logs = PlayLog.objects.filter(
-            track__track_id__in=track_ids,
-            played_at__range=(start_date, end_date),
-            active=True
+
+        tracks = Track.objects.filter(artist__in=artists, active=True)
+
+        first_day, last_day = self._rollup_days(start_date, end_date)
+        rollups = DailyPlayRollup.objects.filter(
+            track__artist__publisher=publisher, day__range=(first_day, last_day)
         )
-        
+
         # Portfolio overview
-        portfolio_metrics = play_logs.aggregate(
-            total_plays=Count('id'),
-            total_revenue=Sum('royalty_amount') or Decimal('0'),
+        portfolio_metrics = rollups.aggregate(
+            total_plays=sum_count('plays'),
+            total_revenue=sum_amount('revenue'),
             unique_stations=Count('station', distinct=True),
             unique_tracks=Count('track', distinct=True)
         )
-        
+
         # Artist performance comparison
-        artist_performance = []
-        for artist in artists:
-            artist_tracks = tracks.filter(artist=artist)
-            artist_track_ids = list(artist_tracks.values_list('track_id', flat=True))
-            
-            artist_metrics = play_logs.filter(
-                track__track_id__in=artist_track_ids
-            ).aggregate(
-                plays=Count('id'),
-                revenue=Sum('royalty_amount') or Decimal('0'),
+        per_artist = {
+            row['track__artist_id']: row for row in rollups.values('track__artist_id').annotate(
+                plays=sum_count('plays'),
+                revenue=sum_amount('revenue'),
                 tracks_count=Count('track', distinct=True)
             )
-            
+        }
+        artist_performance = []
+        for artist in artists:
+            artist_metrics = per_artist.get(artist.id, {'plays': 0, 'revenue': Decimal('0'), 'tracks_count': 0})
             artist_performance.append({
                 'artist_id': artist.artist_id,
                 'stage_name': artist.stage_name,
@@ -280,44 +301,46 @@ class AnalyticsAggregator:
                 'tracks_count': artist_metrics['tracks_count'],
                 'avg_revenue_per_track': float(artist_metrics['revenue']) / max(artist_metrics['tracks_count'], 1)
             })
-        
+
         # Sort by revenue
         artist_performance.sort(key=lambda x: x['revenue'], reverse=True)
-        
+
         # Revenue distribution by artist
-        revenue_distribution = play_logs.values(
+        revenue_distribution = rollups.values(
             'track__artist__stage_name', 'track__artist__artist_id'
         ).annotate(
-            revenue=Sum('royalty_amount') or Decimal('0'),
-            plays=Count('id')
+            revenue=sum_amount('revenue'),
+            plays=sum_count('plays')
         ).order_by('-revenue')[:10]
-        
+
         # Monthly trends
-        monthly_data = []
-        current_month = start_date.replace(day=1)
-        while current_month <= end_date:
-            next_month = (current_month.replace(day=28) + timedelta(days=4)).replace(day=1)
-            month_end = min(next_month - timedelta(days=1), end_date)
-            
-            month_metrics = play_logs.filter(
-                played_at__range=(current_month, month_end)
-            ).aggregate(
-                plays=Count('id'),
-                revenue=Sum('royalty_amount') or Decimal('0'),
-                unique_artists=Count('track__artist', distinct=True)
+        monthly_totals = {
+            row['month']: row for row in DailyPublisherRollup.objects.filter(
+                publisher=publisher, day__range=(first_day, last_day)
+            ).annotate(month=TruncMonth('day')).values('month').annotate(
+                plays=sum_count('plays'),
+                revenue=sum_amount('revenue')
             )
-            
+        }
+        # Distinct artists are not additive across days, so count them on the cells
+        monthly_artists = dict(
+            rollups.annotate(month=TruncMonth('day')).values('month').annotate(
+                unique_artists=Count('track__artist', distinct=True)
+            ).values_list('month', 'unique_artists')
+        )
+
+        monthly_data = []
+        current_month = first_day.replace(day=1)
+        while current_month <= last_day:
+            month_metrics = monthly_totals.get(current_month, {'plays': 0, 'revenue': Decimal('0')})
             monthly_data.append({
                 'month': current_month.strftime('%Y-%m'),
                 'plays': month_metrics['plays'],
                 'revenue': float(month_metrics['revenue']),
-                'unique_artists': month_metrics['unique_artists']
+                'unique_artists': monthly_artists.get(current_month, 0)
             })
-            
-            current_month = next_month
-            if current_month > end_date:
-                break
-        
+            current_month = (current_month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
         analytics_data = {
             'publisher_info': {
                 'publisher_id': publisher_id,
@@ -352,6 +375,7 @@ class AnalyticsAggregator:
         start_date, end_date = date_range
         cache_key = self.generate_cache_key(
             'station_analytics',
+            namespaces=self.entity_namespaces('station', station_id),
             station_id=station_id,
             start=start_date.date(),
             end=end_date.date()
@@ -367,28 +391,25 @@ class AnalyticsAggregator:
         except Station.DoesNotExist:
             return {}
         
-        # Play logs for this station
-        play_logs = PlayLog.objects.filter(
-            station=station,
-            played_at__range=(start_date, end_date),
-            active=True
-        )
-        
+        first_day, last_day = self._rollup_days(start_date, end_date)
+        rollups = DailyPlayRollup.objects.filter(station=station, day__range=(first_day, last_day))
+
         # Detection data
         detections = AudioDetection.objects.filter(
             station=station,
             detected_at__range=(start_date, end_date)
         )
-        
+
         # Basic metrics
-        basic_metrics = play_logs.aggregate(
-            total_plays=Count('id'),
-            total_revenue_generated=Sum('royalty_amount') or Decimal('0'),
-            avg_confidence=Avg('avg_confidence_score') or Decimal('0'),
+        basic_metrics = rollups.aggregate(
+            total_plays=sum_count('plays'),
+            total_revenue_generated=sum_amount('revenue'),
+            confidence_sum=sum_amount('confidence_sum'),
+            confidence_count=sum_count('confidence_count'),
             unique_tracks=Count('track', distinct=True),
             unique_artists=Count('track__artist', distinct=True)
         )
-        
+
         # Detection accuracy metrics
         detection_metrics = detections.aggregate(
             total_detections=Count('id'),
@@ -405,47 +426,50 @@ class AnalyticsAggregator:
                                 detection_metrics['total_detections']) * 100
         
         # Top played tracks
-        top_tracks = play_logs.values(
+        top_tracks = self._with_avg_confidence(rollups.values(
             'track__title', 'track__artist__stage_name', 'track__track_id'
         ).annotate(
-            play_count=Count('id'),
-            avg_confidence=Avg('avg_confidence_score') or Decimal('0')
-        ).order_by('-play_count')[:15]
-        
+            play_count=sum_count('plays'),
+            confidence_sum=sum_amount('confidence_sum'),
+            confidence_count=sum_count('confidence_count')
+        ).order_by('-play_count')[:15])
+
         # Hourly distribution (to see peak hours)
-        hourly_distribution = []
-        for hour in range(24):
-            hour_plays = play_logs.filter(
-                played_at__hour=hour
-            ).count()
-            hourly_distribution.append({
-                'hour': hour,
-                'plays': hour_plays
-            })
-        
+        plays_by_hour = dict(
+            StationHourlyRollup.objects.filter(
+                station=station, day__range=(first_day, last_day)
+            ).values('hour').annotate(hour_plays=sum_count('plays')).values_list('hour', 'hour_plays')
+        )
+        hourly_distribution = [
+            {'hour': hour, 'plays': plays_by_hour.get(hour, 0)}
+            for hour in range(24)
+        ]
+
         # Daily compliance (submission vs detection)
+        plays_by_day = dict(
+            rollups.values('day').annotate(day_plays=sum_count('plays')).values_list('day', 'day_plays')
+        )
+        detections_by_day = dict(
+            detections.order_by().annotate(day=TruncDate('detected_at')).values('day').annotate(
+                day_detections=Count('id')
+            ).values_list('day', 'day_detections')
+        )
         daily_compliance = []
-        current_date = start_date.date()
-        while current_date <= end_date.date():
-            day_start = timezone.make_aware(datetime.combine(current_date, datetime.min.time()))
-            day_end = day_start + timedelta(days=1)
-            
-            day_plays = play_logs.filter(played_at__range=(day_start, day_end)).count()
-            day_detections = detections.filter(detected_at__range=(day_start, day_end)).count()
-            
+        for day in play_rollups.days(first_day, last_day):
+            day_plays = plays_by_day.get(day, 0)
+            day_detections = detections_by_day.get(day, 0)
+
             compliance_rate = 0
             if day_detections > 0:
                 compliance_rate = (day_plays / day_detections) * 100
-            
+
             daily_compliance.append({
-                'date': current_date.isoformat(),
+                'date': day.isoformat(),
                 'submitted_plays': day_plays,
                 'detected_plays': day_detections,
                 'compliance_rate': min(compliance_rate, 100)  # Cap at 100%
             })
-            
-            current_date += timedelta(days=1)
-        
+
         # Detection source breakdown
         detection_source_breakdown = {
             'local': detection_metrics['local_detections'],
@@ -465,7 +489,7 @@ class AnalyticsAggregator:
             'summary': {
                 'total_plays': basic_metrics['total_plays'],
                 'total_revenue_generated': float(basic_metrics['total_revenue_generated']),
-                'avg_confidence_score': float(basic_metrics['avg_confidence']),
+                'avg_confidence_score': self._average_confidence(basic_metrics),
                 'unique_tracks': basic_metrics['unique_tracks'],
                 'unique_artists': basic_metrics['unique_artists'],
                 'detection_accuracy_rate': round(detection_accuracy, 2)
@@ -473,7 +497,7 @@ class AnalyticsAggregator:
             'detection_metrics': {
                 'total_detections': detection_metrics['total_detections'],
                 'high_confidence_detections': detection_metrics['high_confidence_detections'],
-                'avg_detection_confidence': float(detection_metrics['avg_detection_confidence']),
+                'avg_detection_confidence': float(self._coerce_decimal(detection_metrics['avg_detection_confidence'])),
                 'detection_source_breakdown': detection_source_breakdown
             },
             'top_tracks': list(top_tracks),
@@ -492,10 +516,15 @@ class AnalyticsAggregator:
         return analytics_data
     
     def get_admin_analytics(self, date_range: Tuple[datetime, datetime]) -> Dict:
-        """Get platform-wide analytics for administrators"""
+        """Get platform-wide analytics for administrators
+
+        Standard ranges are served from precomputed snapshots (see
+        analytics.admin_snapshots); this computes arbitrary ranges on demand.
+        """
         start_date, end_date = date_range
         cache_key = self.generate_cache_key(
             'admin_analytics',
+            namespaces=self.entity_namespaces(),
             start=start_date.date(),
             end=end_date.date()
         )
@@ -504,56 +533,97 @@ class AnalyticsAggregator:
         cached_data = self.get_cached_data(cache_key)
         if cached_data:
             return cached_data
-        
-        # Platform-wide metrics
-        platform_metrics = {
-            'total_users': User.objects.filter(is_active=True).count(),
-            'total_artists': Artist.objects.filter(active=True).count(),
-            'total_stations': Station.objects.filter(active=True).count(),
-            'total_publishers': PublisherProfile.objects.filter(active=True).count(),
-            'total_tracks': Track.objects.filter(active=True).count()
-        }
-        
-        # Play and revenue metrics for date range
-        play_metrics = PlayLog.objects.filter(
-            played_at__range=(start_date, end_date),
-            active=True
-        ).aggregate(
-            total_plays=Count('id'),
-            total_revenue=Sum('royalty_amount'),
-            unique_tracks=Count('track', distinct=True),
-            unique_stations=Count('station', distinct=True)
-        )
 
-        # Detection metrics
-        detection_metrics = AudioDetection.objects.filter(
-            detected_at__range=(start_date, end_date)
-        ).aggregate(
-            total_detections=Count('id'),
-            successful_detections=Count('id', filter=Q(processing_status='completed')),
-            failed_detections=Count('id', filter=Q(processing_status='failed')),
-            avg_confidence=Avg('confidence_score')
+        first_day, last_day = self._rollup_days(start_date, end_date)
+        analytics_data = self.assemble_admin_analytics(
+            start_date,
+            end_date,
+            self.admin_day_activity(first_day, last_day),
+            self.admin_range_sections(start_date, end_date),
+            self.admin_platform_sections(end_date)
         )
-        
-        # System health indicators
-        processing_success_rate = 0
-        if detection_metrics['total_detections'] > 0:
-            processing_success_rate = (
-                detection_metrics['successful_detections'] /
-                detection_metrics['total_detections']
-            ) * 100
 
-        royalty_distributions = RoyaltyDistribution.objects.filter(
-            calculated_at__range=(start_date, end_date)
-        )
+        # Cache the results
+        self.set_cached_data(cache_key, analytics_data, timeout=900)  # 15 minutes
 
-        total_royalties = royalty_distributions.aggregate(
-            total=Sum('net_amount')
-        )['total']
+        return analytics_data
 
-        pending_payments_amount = royalty_distributions.filter(
-            status__in=['pending', 'approved', 'withheld']
-        ).aggregate(total=Sum('net_amount'))['total']
+    def admin_day_activity(self, first_day: date, last_day: date) -> Dict[date, Dict[str, Any]]:
+        """
+        Additive platform figures per local day, one grouped query per source
+
+        Amounts are kept as strings so days can be stored in JSON snapshots and
+        summed back exactly.
+        """
+        range_start = play_rollups.day_bounds(first_day)[0]
+        range_end = play_rollups.day_bounds(last_day)[1]
+
+        activity = {
+            day: {
+                'plays': 0, 'revenue': '0', 'detections': 0, 'successful_detections': 0,
+                'failed_detections': 0, 'confidence_sum': '0', 'confidence_count': 0,
+                'royalties': '0', 'pending_payments': '0', 'paid_by_type': {},
+                'new_users': 0, 'new_tracks': 0,
+            }
+            for day in play_rollups.days(first_day, last_day)
+        }
+
+        for row in DailyPlayRollup.objects.filter(day__range=(first_day, last_day)).values('day').annotate(
+            day_plays=sum_count('plays'), day_revenue=sum_amount('revenue')
+        ).order_by():
+            activity[row['day']].update(plays=row['day_plays'], revenue=str(row['day_revenue']))
+
+        for row in AudioDetection.objects.filter(
+            detected_at__gte=range_start, detected_at__lt=range_end
+        ).annotate(day=TruncDate('detected_at')).values('day').annotate(
+            total=Count('id'),
+            successful=Count('id', filter=Q(processing_status='completed')),
+            failed=Count('id', filter=Q(processing_status='failed')),
+            confidence_total=Sum('confidence_score'),
+            confidence_n=Count('confidence_score')
+        ).order_by():
+            activity[row['day']].update(
+                detections=row['total'],
+                successful_detections=row['successful'],
+                failed_detections=row['failed'],
+                confidence_sum=str(self._coerce_decimal(row['confidence_total'])),
+                confidence_count=row['confidence_n']
+            )
+
+        distributions = RoyaltyDistribution.objects.filter(
+            calculated_at__gte=range_start, calculated_at__lt=range_end
+        ).annotate(day=TruncDate('calculated_at'))
+        for row in distributions.values('day').annotate(
+            total=sum_amount('net_amount'),
+            pending=sum_amount('net_amount', filter=Q(status__in=['pending', 'approved', 'withheld']))
+        ).order_by():
+            activity[row['day']].update(royalties=str(row['total']), pending_payments=str(row['pending']))
+        for row in distributions.filter(status='paid').values('day', 'recipient_type').annotate(
+            total=sum_amount('net_amount'), paid=Count('id')
+        ).order_by():
+            activity[row['day']]['paid_by_type'][row['recipient_type']] = {
+                'amount': str(row['total']), 'count': row['paid']
+            }
+
+        for day, count in self._count_by_day(
+            User.objects.filter(timestamp__gte=range_start, timestamp__lt=range_end), 'timestamp'
+        ).items():
+            activity[day]['new_users'] = count
+        for day, count in self._count_by_day(
+            Track.objects.filter(created_at__gte=range_start, created_at__lt=range_end, active=True), 'created_at'
+        ).items():
+            activity[day]['new_tracks'] = count
+
+        return activity
+
+    def admin_range_sections(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """Admin dashboard sections for a range that cannot be summed day by day"""
+        first_day, last_day = self._rollup_days(start_date, end_date)
+        rollups = DailyPlayRollup.objects.filter(day__range=(first_day, last_day))
+        distinct_counts = rollups.aggregate(
+            unique_tracks=Count('track', distinct=True),
+            unique_stations=Count('station', distinct=True)
+        )
 
         # Growth calculations
         current_month_start = start_date.replace(day=1)
@@ -570,113 +640,113 @@ class AnalyticsAggregator:
             created_at__lt=previous_month_end
         ).count()
 
-        monthly_growth = self._calculate_percentage_change(
-            current_month_artists,
-            previous_month_artists
-        )
-
-        pending_disputes = Dispute.objects.filter(
-            dispute_status__in=['Pending', 'Flagged', 'Review', 'Resolving']
-        ).count()
-
-        active_distributors = PartnerPRO.objects.filter(is_active=True).count()
-
-        # Recent activity feed
-        recent_activity = self._build_recent_activity_feed(start_date, end_date)
-
-        # Top earner summary
-        top_earners = self._collect_top_earners(start_date, end_date)
-
-        revenue_trends = self._build_revenue_trends(end_date)
-
-        genre_distribution = self._build_genre_distribution(start_date, end_date)
-
         publisher_stats, publisher_performance = self._collect_publisher_insights(
             start_date,
             end_date
         )
-        
+
         # Top performing regions
-        regional_performance = PlayLog.objects.filter(
-            played_at__range=(start_date, end_date),
-            active=True
-        ).values(
+        regional_performance = rollups.values(
             'station__region'
         ).annotate(
-            plays=Count('id'),
-            revenue=Sum('royalty_amount') or Decimal('0'),
+            plays=sum_count('plays'),
+            revenue=sum_amount('revenue'),
             unique_stations=Count('station', distinct=True)
         ).order_by('-plays')[:10]
-        
-        # Revenue distribution by user type
-        revenue_by_type = RoyaltyDistribution.objects.filter(
-            calculated_at__range=(start_date, end_date),
-            status='paid'
-        ).values(
-            'recipient_type'
-        ).annotate(
-            total_amount=Sum('net_amount'),
-            count=Count('id')
-        )
 
-        total_revenue_value = self._coerce_decimal(play_metrics.get('total_revenue'))
-        avg_confidence_value = self._coerce_decimal(detection_metrics.get('avg_confidence'))
-        total_royalties_value = self._coerce_decimal(total_royalties)
-        pending_payments_value = self._coerce_decimal(pending_payments_amount)
+        return {
+            'unique_tracks': distinct_counts['unique_tracks'],
+            'unique_stations': distinct_counts['unique_stations'],
+            'monthly_growth': self._calculate_percentage_change(current_month_artists, previous_month_artists),
+            'regional_performance': [
+                {**entry, 'revenue': float(entry['revenue'])} for entry in regional_performance
+            ],
+            'recent_activity': self._build_recent_activity_feed(start_date, end_date),
+            'top_earners': self._collect_top_earners(start_date, end_date),
+            'genre_distribution': self._build_genre_distribution(start_date, end_date),
+            'publisher_stats': publisher_stats,
+            'publisher_performance': publisher_performance,
+        }
 
-        revenue_distribution = [
-            {
-                'recipient_type': entry['recipient_type'],
-                'total_amount': float(self._coerce_decimal(entry.get('total_amount'))),
-                'count': entry['count'],
-            }
-            for entry in revenue_by_type
-        ]
-        
-        # Daily system activity
-        daily_activity = []
-        current_date = start_date.date()
-        while current_date <= end_date.date():
-            day_start = timezone.make_aware(datetime.combine(current_date, datetime.min.time()))
-            day_end = day_start + timedelta(days=1)
-            
-            day_metrics = {
-                'date': current_date.isoformat(),
-                'plays': PlayLog.objects.filter(
-                    played_at__range=(day_start, day_end), active=True
-                ).count(),
-                'detections': AudioDetection.objects.filter(
-                    detected_at__range=(day_start, day_end)
-                ).count(),
-                'new_users': User.objects.filter(
-                    timestamp__range=(day_start, day_end)
-                ).count(),
-                'new_tracks': Track.objects.filter(
-                    created_at__range=(day_start, day_end), active=True
-                ).count()
-            }
-            
-            daily_activity.append(day_metrics)
-            current_date += timedelta(days=1)
-        
-        analytics_data = {
+    def admin_platform_sections(self, end_date: datetime) -> Dict[str, Any]:
+        """Admin dashboard figures that do not depend on the selected range"""
+        return {
+            'platform_overview': {
+                'total_users': User.objects.filter(is_active=True).count(),
+                'total_artists': Artist.objects.filter(active=True).count(),
+                'total_stations': Station.objects.filter(active=True).count(),
+                'total_publishers': PublisherProfile.objects.filter(active=True).count(),
+                'total_tracks': Track.objects.filter(active=True).count()
+            },
+            'pending_disputes': Dispute.objects.filter(
+                dispute_status__in=['Pending', 'Flagged', 'Review', 'Resolving']
+            ).count(),
+            'active_distributors': PartnerPRO.objects.filter(is_active=True).count(),
+            'revenue_trends': self._build_revenue_trends(end_date),
+        }
+
+    def assemble_admin_analytics(self, start_date: datetime, end_date: datetime,
+                                 activity: Dict[date, Dict[str, Any]],
+                                 range_sections: Dict[str, Any],
+                                 platform_sections: Dict[str, Any]) -> Dict:
+        """Build the admin analytics payload from per-day activity and the range/platform sections"""
+        totals = defaultdict(int)
+        amounts = defaultdict(Decimal)
+        paid_by_type = defaultdict(lambda: {'total_amount': Decimal('0'), 'count': 0})
+        for day_activity in activity.values():
+            for field in ('plays', 'detections', 'successful_detections', 'failed_detections', 'confidence_count'):
+                totals[field] += day_activity[field]
+            for field in ('revenue', 'confidence_sum', 'royalties', 'pending_payments'):
+                amounts[field] += Decimal(day_activity[field])
+            for recipient_type, paid in day_activity['paid_by_type'].items():
+                paid_by_type[recipient_type]['total_amount'] += Decimal(paid['amount'])
+                paid_by_type[recipient_type]['count'] += paid['count']
+
+        # System health indicators
+        processing_success_rate = 0
+        if totals['detections'] > 0:
+            processing_success_rate = (totals['successful_detections'] / totals['detections']) * 100
+
+        avg_confidence_value = Decimal('0')
+        if totals['confidence_count']:
+            avg_confidence_value = amounts['confidence_sum'] / totals['confidence_count']
+
+        platform_metrics = platform_sections['platform_overview']
+
+        return {
             'platform_overview': platform_metrics,
             'period_summary': {
-                'total_plays': play_metrics['total_plays'],
-                'total_revenue': float(total_revenue_value),
-                'unique_tracks_played': play_metrics['unique_tracks'],
-                'active_stations': play_metrics['unique_stations'],
+                'total_plays': totals['plays'],
+                'total_revenue': float(amounts['revenue']),
+                'unique_tracks_played': range_sections['unique_tracks'],
+                'active_stations': range_sections['unique_stations'],
                 'processing_success_rate': round(processing_success_rate, 2)
             },
             'detection_health': {
-                'total_detections': detection_metrics['total_detections'],
-                'successful_detections': detection_metrics['successful_detections'],
-                'failed_detections': detection_metrics['failed_detections'],
+                'total_detections': totals['detections'],
+                'successful_detections': totals['successful_detections'],
+                'failed_detections': totals['failed_detections'],
                 'avg_confidence_score': float(avg_confidence_value)
             },
-            'regional_performance': list(regional_performance),
-            'revenue_distribution': revenue_distribution,
-            'daily_activity': daily_activity,
+            'regional_performance': range_sections['regional_performance'],
+            'revenue_distribution': [
+                {
+                    'recipient_type': recipient_type,
+                    'total_amount': float(paid['total_amount']),
+                    'count': paid['count'],
+                }
+                for recipient_type, paid in paid_by_type.items()
+            ],
+            'daily_activity': [
+                {
+                    'date': day.isoformat(),
+                    'plays': activity[day]['plays'],
+                    'detections': activity[day]['detections'],
+                    'new_users': activity[day]['new_users'],
+                    'new_tracks': activity[day]['new_tracks']
+                }
+                for day in sorted(activity)
+            ],
             'date_range': {
                 'start': start_date.isoformat(),
                 'end': end_date.isoformat()
@@ -686,84 +756,53 @@ class AnalyticsAggregator:
                 'totalStations': platform_metrics['total_stations'],
                 'totalArtists': platform_metrics['total_artists'],
                 'totalSongs': platform_metrics['total_tracks'],
-                'totalPlays': play_metrics['total_plays'],
-                'totalRoyalties': float(total_royalties_value),
-                'pendingPayments': float(pending_payments_value),
-                'activeDistributors': active_distributors,
-                'monthlyGrowth': monthly_growth,
+                'totalPlays': totals['plays'],
+                'totalRoyalties': float(amounts['royalties']),
+                'pendingPayments': float(amounts['pending_payments']),
+                'activeDistributors': platform_sections['active_distributors'],
+                'monthlyGrowth': range_sections['monthly_growth'],
                 'systemHealth': round(processing_success_rate, 2),
-                'pendingDisputes': pending_disputes
+                'pendingDisputes': platform_sections['pending_disputes']
             },
-            'recentActivity': recent_activity,
-            'topEarners': top_earners,
-            'revenueTrends': revenue_trends,
-            'genreDistribution': genre_distribution,
-            'publisherStats': publisher_stats,
-            'publisherPerformance': publisher_performance
+            'recentActivity': range_sections['recent_activity'],
+            'topEarners': range_sections['top_earners'],
+            'revenueTrends': platform_sections['revenue_trends'],
+            'genreDistribution': range_sections['genre_distribution'],
+            'publisherStats': range_sections['publisher_stats'],
+            'publisherPerformance': range_sections['publisher_performance']
         }
-
-        # Cache the results
-        self.set_cached_data(cache_key, analytics_data, timeout=900)  # 15 minutes
-
-        return analytics_data
     
     def update_realtime_metric(self, metric_name: str, value: Decimal, **dimensions):
-        """Update a real-time metric"""
-        metadata = self._sanitize_metadata(dimensions.get('metadata', {}))
-
-        RealtimeMetric.objects.create(
-            metric_name=metric_name,
-            value=value,
+        """Add to a realtime counter (or set a gauge) in the time-series buckets"""
+        metric_store.record(
+            metric_name,
+            value,
             station_id=dimensions.get('station_id'),
-            artist_id=dimensions.get('artist_id'),
-            metadata=metadata
+            artist_id=dimensions.get('artist_id')
         )
-        
-        # Also update Redis for immediate access
-        redis_key = f"{self.cache_prefix}realtime:{metric_name}"
-        if dimensions.get('station_id'):
-            redis_key += f":station:{dimensions['station_id']}"
-        if dimensions.get('artist_id'):
-            redis_key += f":artist:{dimensions['artist_id']}"
-        
-        metric_data = {
-            'value': float(value),
-            'timestamp': timezone.now().isoformat(),
-            'metadata': metadata
-        }
-        
-        self.set_cached_data(redis_key, metric_data, timeout=300)  # 5 minutes
     
     def get_realtime_metrics(self, metric_names: List[str], **filters) -> Dict:
-        """Get current real-time metrics"""
+        """Get current real-time metrics from the time-series buckets"""
         metrics = {}
         
         for metric_name in metric_names:
-            redis_key = f"{self.cache_prefix}realtime:{metric_name}"
-            if filters.get('station_id'):
-                redis_key += f":station:{filters['station_id']}"
-            if filters.get('artist_id'):
-                redis_key += f":artist:{filters['artist_id']}"
-            
-            cached_metric = self.get_cached_data(redis_key)
-            if cached_metric:
-                metrics[metric_name] = cached_metric
-            else:
-                # Fallback to database
-                latest_metric = RealtimeMetric.objects.filter(
-                    metric_name=metric_name,
-                    **{k: v for k, v in filters.items() if v is not None}
-                ).order_by('-timestamp').first()
-                
-                if latest_metric:
-                    metrics[metric_name] = {
-                        'value': float(latest_metric.value),
-                        'timestamp': latest_metric.timestamp.isoformat(),
-                        'metadata': latest_metric.metadata
-                    }
+            metric = metric_store.current(
+                metric_name,
+                station_id=filters.get('station_id'),
+                artist_id=filters.get('artist_id')
+            )
+            if metric:
+                metrics[metric_name] = metric
         
         return metrics
     
+    def _count_by_day(self, queryset, field: str) -> Dict[date, int]:
+        return dict(
+            queryset.order_by().annotate(day=TruncDate(field)).values('day').annotate(
+                day_count=Count('id')
+            ).values_list('day', 'day_count')
+        )
+
     def _calculate_trend(self, current_value: float, previous_value: float) -> Dict:
         """Calculate trend percentage and direction"""
         if previous_value == 0:
@@ -919,6 +958,15 @@ class AnalyticsAggregator:
         ).values('recipient').annotate(total=Sum('net_amount'))
         previous_map = {item['recipient']: item['total'] or Decimal('0') for item in previous_totals}
 
+        first_day, last_day = self._rollup_days(start_date, end_date)
+        plays_by_user = dict(
+            DailyArtistRollup.objects.filter(
+                artist__user_id__in=recipient_ids, day__range=(first_day, last_day)
+            ).values('artist__user_id').annotate(artist_plays=sum_count('plays')).values_list(
+                'artist__user_id', 'artist_plays'
+            )
+        )
+
         results = []
         for entry in aggregated:
             recipient_id = entry['recipient']
@@ -930,11 +978,7 @@ class AnalyticsAggregator:
             previous_total = float(previous_map.get(recipient_id, Decimal('0')))
             growth = self._calculate_percentage_change(total_earnings, previous_total)
 
-            plays = PlayLog.objects.filter(
-                track__artist__user_id=recipient_id,
-                played_at__range=(start_date, end_date),
-                active=True
-            ).count()
+            plays = plays_by_user.get(recipient_id, 0)
 
             results.append({
                 'name': name,
@@ -976,12 +1020,12 @@ class AnalyticsAggregator:
         return trends
 
     def _build_genre_distribution(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        genre_counts = PlayLog.objects.filter(
-            played_at__range=(start_date, end_date),
-            track__genre__name__isnull=False,
-            active=True
+        first_day, last_day = self._rollup_days(start_date, end_date)
+        genre_counts = DailyPlayRollup.objects.filter(
+            day__range=(first_day, last_day),
+            track__genre__name__isnull=False
         ).values('track__genre__name').annotate(
-            value=Count('id')
+            value=sum_count('plays')
         ).order_by('-value')[:6]
 
         palette = ['#8B5CF6', '#EC4899', '#10B981', '#F59E0B', '#EF4444', '#6366F1']
@@ -1074,34 +1118,6 @@ class AnalyticsAggregator:
 
         return publisher_stats, performance
 
-    def _stringify_non_json(self, value: Any) -> Any:
-        if isinstance(value, (str, int, float, bool)) or value is None:
-            return value
-        return str(value)
-
-    def _sanitize_metadata(self, metadata: Any) -> Dict[str, Any]:
-        if metadata is None:
-            return {}
-        if isinstance(metadata, dict):
-            sanitized: Dict[str, Any] = {}
-            for key, value in metadata.items():
-                if isinstance(value, dict):
-                    sanitized[key] = self._sanitize_metadata(value)
-                elif isinstance(value, (list, tuple)):
-                    sanitized[key] = [
-                        self._sanitize_metadata(item) if isinstance(item, dict) else self._stringify_non_json(item)
-                        for item in value
-                    ]
-                else:
-                    sanitized[key] = self._stringify_non_json(value)
-            return sanitized
-        if isinstance(metadata, (list, tuple)):
-            return [
-                self._sanitize_metadata(item) if isinstance(item, dict) else self._stringify_non_json(item)
-                for item in metadata
-            ]
-        return {}
-
     def create_analytics_snapshot(self, snapshot_type: str, metric_type: str,
                                 period_start: datetime, period_end: datetime,
                                 **dimensions):
@@ -1111,25 +1127,228 @@ class AnalyticsAggregator:
     
     def cleanup_expired_cache(self):
         """Clean up expired cache entries"""
-        try:
-            # Clean up Redis cache
-            expired_keys = []
-            for key in self.redis_client.scan_iter(match=f"{self.cache_prefix}*"):
-                ttl = self.redis_client.ttl(key)
-                if ttl == -1:  # No expiration set
-                    continue
-                if ttl <= 0:  # Expired
-                    expired_keys.append(key)
-            
-            if expired_keys:
-                self.redis_client.delete(*expired_keys)
-            
-            # Clean up database cache entries
-            AnalyticsCache.objects.filter(expires_at__lt=timezone.now()).delete()
-            
-        except redis.RedisError:
-            pass
+        # Cache entries expire on their own TTL (stale namespace generations
+        # included); only the database-backed entries need sweeping
+        AnalyticsCache.objects.filter(expires_at__lt=timezone.now()).delete()
+
+
+class PlayRollupService:
+    """
+    Maintains the daily play/revenue rollup tables from PlayLog
+
+    Each run picks up PlayLogs whose updated_at moved past the watermark
+    (new plays as well as active/royalty changes) and recomputes only the
+    (day, track) and (day, station) cells they touch, followed by the artist
+    and publisher rollups above them. Recomputing a cell from PlayLog is
+    idempotent, so overlapping runs and backfills are safe. Hard-deleted
+    plays, or plays moved to another day or track, need a backfill of the
+    affected days.
+    """
+
+    WATERMARK_NAME = 'daily_play_rollups'
+    # Above this many dirty tracks in one day, recompute the whole day instead
+    FULL_DAY_THRESHOLD = 500
+
+    def __init__(self, lag_seconds: Optional[int] = None):
+        # Rows committed late with an older updated_at are still caught as long
+        # as their transaction finished within the lag window
+        self.lag_seconds = lag_seconds if lag_seconds is not None else getattr(
+            settings, 'ANALYTICS_ROLLUP_LAG_SECONDS', 60
+        )
+
+    @staticmethod
+    def local_date(value: datetime) -> date:
+        if timezone.is_naive(value):
+            return value.date()
+        return timezone.localtime(value).date()
+
+    @staticmethod
+    def day_bounds(day: date) -> Tuple[datetime, datetime]:
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        return start, start + timedelta(days=1)
+
+    @staticmethod
+    def days(first_day: date, last_day: date) -> Iterable[date]:
+        current = first_day
+        while current <= last_day:
+            yield current
+            current += timedelta(days=1)
+
+    def refresh_day(self, day: date, track_ids=None, station_ids=None) -> int:
+        """
+        Recompute rollups for one day from PlayLog
+
+        track_ids/station_ids limit the recompute to those cells; None
+        recomputes the whole day. Returns the number of track cells written.
+        """
+        if track_ids is not None and len(track_ids) > self.FULL_DAY_THRESHOLD:
+            track_ids = station_ids = None
+
+        start, end = self.day_bounds(day)
+        plays = PlayLog.objects.filter(played_at__gte=start, played_at__lt=end, active=True).order_by()
+        track_plays = plays if track_ids is None else plays.filter(track_id__in=track_ids)
+        station_plays = plays if station_ids is None else plays.filter(station_id__in=station_ids)
+
+        stale_cells = DailyPlayRollup.objects.filter(day=day)
+        stale_hours = StationHourlyRollup.objects.filter(day=day)
+        artist_ids = None
+        if track_ids is not None:
+            stale_cells = stale_cells.filter(track_id__in=track_ids)
+            artist_ids = set(
+                Track.objects.filter(id__in=track_ids, artist__isnull=False).values_list('artist_id', flat=True)
+            )
+        if station_ids is not None:
+            stale_hours = stale_hours.filter(station_id__in=station_ids)
+
+        with transaction.atomic():
+            stale_cells.delete()
+            cells = DailyPlayRollup.objects.bulk_create([
+                DailyPlayRollup(
+                    day=day,
+                    track_id=row['track_id'],
+                    station_id=row['station_id'],
+                    plays=row['play_count'],
+                    revenue=row['revenue_total'],
+                    confidence_sum=row['confidence_total'],
+                    confidence_count=row['confidence_samples'],
+                )
+                for row in track_plays.values('track_id', 'station_id').annotate(
+                    play_count=Count('id'),
+                    revenue_total=sum_amount('royalty_amount'),
+                    confidence_total=sum_amount('avg_confidence_score'),
+                    confidence_samples=Count('avg_confidence_score'),
+                )
+            ])
+
+            stale_hours.delete()
+            StationHourlyRollup.objects.bulk_create([
+                StationHourlyRollup(day=day, station_id=row['station_id'], hour=row['hour'], plays=row['play_count'])
+                for row in station_plays.annotate(hour=ExtractHour('played_at')).values(
+                    'station_id', 'hour'
+                ).annotate(play_count=Count('id'))
+            ])
+
+            self._refresh_artists(day, artist_ids)
+
+        return len(cells)
+
+    def _refresh_artists(self, day: date, artist_ids=None):
+        cells = DailyPlayRollup.objects.filter(day=day, track__artist__isnull=False)
+        stale = DailyArtistRollup.objects.filter(day=day)
+        publisher_ids = None
+        if artist_ids is not None:
+            cells = cells.filter(track__artist_id__in=artist_ids)
+            stale = stale.filter(artist_id__in=artist_ids)
+            publisher_ids = set(
+                Artist.objects.filter(id__in=artist_ids, publisher__isnull=False).values_list('publisher_id', flat=True)
+            )
+
+        stale.delete()
+        DailyArtistRollup.objects.bulk_create([
+            DailyArtistRollup(
+                day=day,
+                artist_id=row['track__artist_id'],
+                plays=row['play_count'],
+                revenue=row['revenue_total'],
+                tracks_played=row['track_count'],
+                stations=row['station_count'],
+            )
+            for row in cells.values('track__artist_id').annotate(
+                play_count=sum_count('plays'),
+                revenue_total=sum_amount('revenue'),
+                track_count=Count('track', distinct=True),
+                station_count=Count('station', distinct=True),
+            )
+        ])
+
+        self._refresh_publishers(day, publisher_ids)
+
+    def _refresh_publishers(self, day: date, publisher_ids=None):
+        cells = DailyPlayRollup.objects.filter(day=day, track__artist__publisher__isnull=False)
+        stale = DailyPublisherRollup.objects.filter(day=day)
+        if publisher_ids is not None:
+            cells = cells.filter(track__artist__publisher_id__in=publisher_ids)
+            stale = stale.filter(publisher_id__in=publisher_ids)
+
+        stale.delete()
+        DailyPublisherRollup.objects.bulk_create([
+            DailyPublisherRollup(
+                day=day,
+                publisher_id=row['track__artist__publisher_id'],
+                plays=row['play_count'],
+                revenue=row['revenue_total'],
+                artists_played=row['artist_count'],
+            )
+            for row in cells.values('track__artist__publisher_id').annotate(
+                play_count=sum_count('plays'),
+                revenue_total=sum_amount('revenue'),
+                artist_count=Count('track__artist', distinct=True),
+            )
+        ])
+
+    def run(self) -> Dict[str, Any]:
+        """Fold PlayLog changes since the watermark into the rollups"""
+        watermark, _ = RollupWatermark.objects.get_or_create(name=self.WATERMARK_NAME)
+        until = timezone.now() - timedelta(seconds=self.lag_seconds)
+
+        changed = PlayLog.objects.filter(updated_at__lte=until, played_at__isnull=False).order_by()
+        if watermark.last_updated_at:
+            changed = changed.filter(updated_at__gt=watermark.last_updated_at)
+
+        dirty = defaultdict(lambda: (set(), set()))
+        for played_day, track_id, station_id in changed.annotate(
+            played_day=TruncDate('played_at')
+        ).values_list('played_day', 'track_id', 'station_id').distinct():
+            dirty[played_day][0].add(track_id)
+            dirty[played_day][1].add(station_id)
+
+        cells = 0
+        for day in sorted(dirty):
+            track_ids, station_ids = dirty[day]
+            cells += self.refresh_day(day, track_ids, station_ids)
+
+        if dirty:
+            # Dashboards are served from these rollups; one INCR retires every cached payload
+            analytics_aggregator.invalidate_namespace()
+
+        watermark.last_updated_at = until
+        watermark.cells_refreshed += cells
+        watermark.last_run_at = timezone.now()
+        watermark.save()
+
+        return {'days': len(dirty), 'cells_refreshed': cells, 'watermark': until.isoformat()}
+
+    def backfill(self, first_day: Optional[date] = None, last_day: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Recompute whole days from PlayLog, defaulting to every day with plays
+
+        When no watermark exists yet it is set to the backfill start, so the
+        incremental job only picks up changes made while the backfill ran.
+        """
+        started = timezone.now()
+        if first_day is None or last_day is None:
+            bounds = PlayLog.objects.filter(played_at__isnull=False).aggregate(
+                first=models.Min('played_at'), last=models.Max('played_at')
+            )
+            if bounds['first'] is None:
+                return {'days': 0, 'cells_refreshed': 0}
+            first_day = first_day or self.local_date(bounds['first'])
+            last_day = last_day or self.local_date(bounds['last'])
+
+        days = cells = 0
+        for day in self.days(first_day, last_day):
+            cells += self.refresh_day(day)
+            days += 1
+        analytics_aggregator.invalidate_namespace()
+
+        watermark, _ = RollupWatermark.objects.get_or_create(name=self.WATERMARK_NAME)
+        if watermark.last_updated_at is None:
+            watermark.last_updated_at = started - timedelta(seconds=self.lag_seconds)
+            watermark.save(update_fields=['last_updated_at', 'updated_at'])
+
+        return {'days': days, 'cells_refreshed': cells}
 
 
 # Singleton instance
 analytics_aggregator = AnalyticsAggregator()
+play_rollups = PlayRollupService()
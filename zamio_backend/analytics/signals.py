@@ -1,186 +1,191 @@
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from decimal import Decimal
 
 from music_monitor.models import PlayLog, AudioDetection, RoyaltyDistribution
+from publishers.models import PublishingAgreement
+from .realtime import realtime_bus
 from .services import analytics_aggregator
 
 
-def _safe_group_send(channel_layer, group_name, payload):
-    if not channel_layer:
-        return
-    try:
-        async_to_sync(channel_layer.group_send)(group_name, payload)
-    except Exception:
-        pass
+def _publish_on_commit(groups, data, metrics=None):
+    """Queue a realtime event once the surrounding transaction commits.
+
+    The fan-out publisher coalesces these per group, so nothing here touches
+    the channel layer or waits on websocket subscribers.
+    """
+    transaction.on_commit(lambda: realtime_bus.publish(groups, data, metrics))
 
 
 @receiver(post_save, sender=PlayLog)
 def handle_playlog_created(sender, instance, created, **kwargs):
     """Handle new play log creation for real-time updates"""
     if created and instance.active:
-        # Update real-time metrics
-        analytics_aggregator.update_realtime_metric(
-            'plays_today',
-            Decimal('1'),
-            metadata={'station_id': instance.station.station_id if instance.station else None}
+        # Cached dashboards are invalidated by the rollup job once this play
+        # has been folded into the daily rollups they read from
+        track = instance.track
+        station = instance.station
+        artist = track.artist if track else None
+        station_id = station.station_id if station else None
+        artist_id = artist.artist_id if artist else None
+
+        groups = []
+        if artist_id:
+            groups.append(f"analytics_artist_{artist_id}")
+        if station_id:
+            groups.append(f"analytics_station_{station_id}")
+
+        _publish_on_commit(
+            groups,
+            {
+                'type': 'new_play',
+                'track_title': track.title if track else 'Unknown',
+                'artist_name': artist.stage_name if artist else 'Unknown',
+                'station_name': station.name if station else 'Unknown',
+                'royalty_amount': float(instance.royalty_amount or 0)
+            },
+            metrics=[
+                {'name': name, 'value': value, 'station_id': station_id, 'artist_id': artist_id}
+                for name, value in (('plays_today', 1), ('revenue_today', instance.royalty_amount or 0))
+            ]
+        )
+
+
+def publish_imported_plays(station, track_counts):
+    """Publish the realtime updates for plays inserted with bulk_create.
+
+    bulk_create does not send post_save, so bulk importers call this with
+    ``{track_id: play_count}`` instead; one event per artist carries the
+    combined counts that handle_playlog_created would have sent per play.
+    """
+    from artists.models import Track
+
+    station_id = station.station_id if station else None
+    by_artist = {}
+    for track in Track.objects.filter(id__in=list(track_counts)).select_related('artist'):
+        artist = track.artist
+        key = artist.artist_id if artist else None
+        entry = by_artist.setdefault(key, {'artist': artist, 'count': 0, 'tracks': []})
+        entry['count'] += track_counts[track.id]
+        entry['tracks'].append(track.title)
+
+    for artist_id, entry in by_artist.items():
+        groups = []
+        if artist_id:
+            groups.append(f"analytics_artist_{artist_id}")
+        if station_id:
+            groups.append(f"analytics_station_{station_id}")
+
+        _publish_on_commit(
+            groups,
+            {
+                'type': 'imported_plays',
+                'play_count': entry['count'],
+                'track_titles': entry['tracks'][:10],
+                'artist_name': entry['artist'].stage_name if entry['artist'] else 'Unknown',
+                'station_name': station.name if station else 'Unknown',
+            },
+            metrics=[{'name': 'plays_today', 'value': entry['count'],
+                      'station_id': station_id, 'artist_id': artist_id}]
         )
-        
-        # Invalidate relevant cache
-        if instance.track and instance.track.artist:
-            analytics_aggregator.invalidate_cache_pattern(f"artist_analytics:artist_id:{instance.track.artist.artist_id}*")
-        
-        if instance.station:
-            analytics_aggregator.invalidate_cache_pattern(f"station_analytics:station_id:{instance.station.station_id}*")
-        
-        # Send WebSocket update to relevant groups
-        channel_layer = get_channel_layer()
-        
-        # Update artist analytics
-        if instance.track and instance.track.artist:
-            _safe_group_send(
-                channel_layer,
-                f"analytics_artist_{instance.track.artist.artist_id}",
-                {
-                    'type': 'analytics_update',
-                    'data': {
-                        'type': 'new_play',
-                        'track_title': instance.track.title,
-                        'station_name': instance.station.name if instance.station else 'Unknown',
-                        'royalty_amount': float(instance.royalty_amount or 0)
-                    }
-                }
-            )
-        
-        # Update station analytics
-        if instance.station:
-            _safe_group_send(
-                channel_layer,
-                f"analytics_station_{instance.station.station_id}",
-                {
-                    'type': 'analytics_update',
-                    'data': {
-                        'type': 'new_play',
-                        'track_title': instance.track.title if instance.track else 'Unknown',
-                        'artist_name': instance.track.artist.stage_name if instance.track and instance.track.artist else 'Unknown'
-                    }
-                }
-            )
 
 
 @receiver(post_save, sender=AudioDetection)
 def handle_detection_created(sender, instance, created, **kwargs):
     """Handle new audio detection for real-time updates"""
     if created:
-        # Update detection metrics
-        analytics_aggregator.update_realtime_metric(
-            'active_detections',
-            Decimal('1'),
-            station_id=instance.station.station_id if instance.station else None
+        station_id = instance.station.station_id if instance.station else None
+        _publish_on_commit(
+            [f"analytics_station_{station_id}"] if station_id else [],
+            {
+                'type': 'new_detection',
+                'confidence_score': float(instance.confidence_score),
+                'detection_source': instance.detection_source,
+                'processing_status': instance.processing_status
+            },
+            metrics=[{'name': 'detections', 'value': 1, 'station_id': station_id}]
         )
-        
-        # Send WebSocket update for processing status
-        channel_layer = get_channel_layer()
-        
-        if instance.station:
-            _safe_group_send(
-                channel_layer,
-                f"analytics_station_{instance.station.station_id}",
-                {
-                    'type': 'analytics_update',
-                    'data': {
-                        'type': 'new_detection',
-                        'confidence_score': float(instance.confidence_score),
-                        'detection_source': instance.detection_source,
-                        'processing_status': instance.processing_status
-                    }
-                }
-            )
 
 
 @receiver(post_save, sender=RoyaltyDistribution)
 def handle_royalty_distribution_created(sender, instance, created, **kwargs):
     """Handle new royalty distribution for real-time updates"""
     if created:
-        # Update revenue metrics
-        analytics_aggregator.update_realtime_metric(
-            'revenue_today',
-            instance.net_amount,
-            metadata={'recipient_type': instance.recipient_type}
-        )
-        
         # Invalidate cache for recipient
         if instance.recipient_type == 'artist':
             try:
                 artist = instance.recipient.artists.filter(active=True).first()
                 if artist:
-                    analytics_aggregator.invalidate_cache_pattern(f"artist_analytics:artist_id:{artist.artist_id}*")
+                    analytics_aggregator.invalidate_namespace('artist', artist.artist_id)
             except:
                 pass
-        
-        # Send WebSocket update
-        channel_layer = get_channel_layer()
 
-        _safe_group_send(
-            channel_layer,
-            f"analytics_user_{instance.recipient.id}",
+        _publish_on_commit(
+            [f"analytics_user_{instance.recipient_id}"],
             {
-                'type': 'analytics_update',
-                'data': {
-                    'type': 'new_royalty',
-                    'amount': float(instance.net_amount),
-                    'currency': instance.currency,
-                    'status': instance.status
-                }
+                'type': 'new_royalty',
+                'amount': float(instance.net_amount),
+                'currency': instance.currency,
+                'status': instance.status
             }
         )
 
 
+@receiver(pre_save, sender=AudioDetection)
+def remember_detection_status(sender, instance, update_fields=None, **kwargs):
+    """Load the stored status so a failure is only counted on the transition"""
+    instance._previous_processing_status = None
+    if instance.pk and (update_fields is None or 'processing_status' in update_fields):
+        instance._previous_processing_status = sender.objects.filter(pk=instance.pk).values_list(
+            'processing_status', flat=True
+        ).first()
+
+
 @receiver(post_save, sender=AudioDetection)
-def handle_detection_status_update(sender, instance, created, **kwargs):
+def handle_detection_status_update(sender, instance, created, update_fields=None, **kwargs):
     """Handle detection status updates"""
     if not created:  # Only for updates
-        # Send processing status update
-        channel_layer = get_channel_layer()
-        
-        if instance.station:
-            _safe_group_send(
-                channel_layer,
-                f"analytics_station_{instance.station.station_id}",
-                {
-                    'type': 'analytics_update',
-                    'data': {
-                        'type': 'detection_status_update',
-                        'detection_id': str(instance.detection_id),
-                        'processing_status': instance.processing_status,
-                        'confidence_score': float(instance.confidence_score),
-                        'error_message': instance.error_message
-                    }
-                }
-            )
-        
-        # Update error rate if detection failed
-        if instance.processing_status == 'failed':
-            analytics_aggregator.update_realtime_metric(
-                'error_rate',
-                Decimal('1'),
-                metadata={'error_type': 'detection_failed'}
-            )
+        station_id = instance.station.station_id if instance.station else None
+        # Failures feed the error rate computed by update_realtime_metrics;
+        # re-saving an already failed detection is not a new failure
+        metrics = []
+        status_changed = update_fields is None or 'processing_status' in update_fields
+        if (status_changed and instance.processing_status == 'failed'
+                and getattr(instance, '_previous_processing_status', None) != 'failed'):
+            metrics.append({'name': 'detection_failures', 'value': 1, 'station_id': station_id})
+
+        _publish_on_commit(
+            [f"analytics_station_{station_id}"] if station_id else [],
+            {
+                'type': 'detection_status_update',
+                'detection_id': str(instance.detection_id),
+                'processing_status': instance.processing_status,
+                'confidence_score': float(instance.confidence_score),
+                'error_message': instance.error_message
+            },
+            metrics=metrics
+        )
+
+
+@receiver(post_save, sender=PublishingAgreement)
+@receiver(post_delete, sender=PublishingAgreement)
+def handle_publishing_agreement_changed(sender, instance, **kwargs):
+    """Agreements decide which plays a publisher dashboard counts"""
+    publisher_id = instance.publisher_id
+    transaction.on_commit(lambda: invalidate_analytics_cache_for_publisher(publisher_id))
 
 
 # Cache invalidation helpers
 def invalidate_analytics_cache_for_artist(artist_id):
     """Invalidate all analytics cache for an artist"""
-    analytics_aggregator.invalidate_cache_pattern(f"artist_analytics:artist_id:{artist_id}*")
+    analytics_aggregator.invalidate_namespace('artist', artist_id)
 
 
 def invalidate_analytics_cache_for_station(station_id):
     """Invalidate all analytics cache for a station"""
-    analytics_aggregator.invalidate_cache_pattern(f"station_analytics:station_id:{station_id}*")
+    analytics_aggregator.invalidate_namespace('station', station_id)
 
 
 def invalidate_analytics_cache_for_publisher(publisher_id):
     """Invalidate all analytics cache for a publisher"""
-    analytics_aggregator.invalidate_cache_pattern(f"publisher_analytics:publisher_id:{publisher_id}*")
+    analytics_aggregator.invalidate_namespace('publisher', publisher_id)
@@ -1,65 +1,34 @@
-import os
-import csv
-import json
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal
 from celery import shared_task
 from django.utils import timezone
-from django.conf import settings
-from django.core.files.storage import default_storage
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
 from .models import AnalyticsExport, AnalyticsSnapshot, RealtimeMetric
-from .services import analytics_aggregator
-from music_monitor.models import PlayLog, AudioDetection
+from .services import analytics_aggregator, play_rollups
+from .timeseries import metric_store
+from .exports import StreamingExport
+from .admin_snapshots import admin_snapshots
+from music_monitor.models import AudioDetection
 
 
 @shared_task(bind=True)
 def generate_analytics_export(self, export_id):
-    """Generate analytics export file"""
+    """Stream an analytics export to disk in constant memory"""
     try:
         export_request = AnalyticsExport.objects.get(export_id=export_id)
         export_request.mark_processing()
         
-        # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 10})
-        
-        # Generate data based on export type
-        if export_request.export_type == 'artist_analytics':
-            data = generate_artist_export_data(export_request)
-        elif export_request.export_type == 'publisher_analytics':
-            data = generate_publisher_export_data(export_request)
-        elif export_request.export_type == 'station_analytics':
-            data = generate_station_export_data(export_request)
-        elif export_request.export_type == 'admin_analytics':
-            data = generate_admin_export_data(export_request)
-        elif export_request.export_type == 'royalty_report':
-            data = generate_royalty_export_data(export_request)
-        elif export_request.export_type == 'detection_report':
-            data = generate_detection_export_data(export_request)
-        else:
-            raise ValueError(f"Unknown export type: {export_request.export_type}")
-        
-        # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 50})
-        
-        # Generate file based on format
-        file_path = None
-        if export_request.export_format == 'csv':
-            file_path = generate_csv_file(data, export_request)
-        elif export_request.export_format == 'excel':
-            file_path = generate_excel_file(data, export_request)
-        elif export_request.export_format == 'pdf':
-            file_path = generate_pdf_file(data, export_request)
-        elif export_request.export_format == 'json':
-            file_path = generate_json_file(data, export_request)
-        
-        # Update progress
-        self.update_state(state='PROGRESS', meta={'progress': 90})
-        
-        # Get file size
-        file_size = default_storage.size(file_path) if file_path else 0
+        # Progress is written to the export row as rows go out; eager runs
+        # have no result backend to mirror it to
+        export = StreamingExport(
+            export_request,
+            progress_callback=None if self.request.is_eager else (
+                lambda progress: self.update_state(state='PROGRESS', meta={'progress': progress})
+            )
+        )
+        file_path, file_size = export.run()
         
         # Mark as completed
         export_request.mark_completed(file_path, file_size)
@@ -75,7 +44,7 @@ def generate_analytics_export(self, export_id):
             }
         )
         
-        return {'status': 'completed', 'file_path': file_path}
+        return {'status': 'completed', 'file_path': file_path, 'rows_written': export.rows_written}
         
     except AnalyticsExport.DoesNotExist:
         return {'status': 'error', 'message': 'Export request not found'}
@@ -114,9 +83,29 @@ def create_analytics_snapshots():
         return {'status': 'error', 'message': str(e)}
 
 
+@shared_task
+def refresh_play_rollups():
+    """Fold recently inserted or changed PlayLogs into the daily rollup tables"""
+    try:
+        summary = play_rollups.run()
+        return {'status': 'completed', **summary}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+
+@shared_task
+def refresh_admin_snapshots():
+    """Refresh the materialized admin dashboard snapshots from the days changed since the last run"""
+    try:
+        summary = admin_snapshots.run()
+        return {'status': 'completed', **summary}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+
 @shared_task
 def update_realtime_metrics():
-    """Update real-time metrics"""
+    """Refresh realtime gauges and push a metrics snapshot to websocket clients"""
     try:
         now = timezone.now()
         
@@ -141,49 +130,22 @@ def update_realtime_metrics():
             Decimal(queue_size)
         )
         
-        # Revenue today
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        revenue_today = PlayLog.objects.filter(
-            played_at__gte=today_start,
-            active=True
-        ).aggregate(
-            total=models.Sum('royalty_amount')
-        )['total'] or Decimal('0')
+        # Plays and revenue today are counters kept by the realtime fan-out,
+        # so they are read from today's bucket instead of counting PlayLog
+        revenue_today = metric_store.total('revenue_today')
+        plays_today = int(metric_store.total('plays_today'))
         
-        analytics_aggregator.update_realtime_metric(
-            'revenue_today',
-            revenue_today
-        )
+        # Error rate (last hour) from the per-minute detection counters
+        total_detections = metric_store.window_sum('detections', 60)
+        failed_detections = metric_store.window_sum('detection_failures', 60)
         
-        # Plays today
-        plays_today = PlayLog.objects.filter(
-            played_at__gte=today_start,
-            active=True
-        ).count()
-        
-        analytics_aggregator.update_realtime_metric(
-            'plays_today',
-            Decimal(plays_today)
-        )
-        
-        # Error rate (last hour)
-        hour_ago = now - timedelta(hours=1)
-        total_detections = AudioDetection.objects.filter(
-            detected_at__gte=hour_ago
-        ).count()
-        
-        failed_detections = AudioDetection.objects.filter(
-            detected_at__gte=hour_ago,
-            processing_status='failed'
-        ).count()
-        
-        error_rate = 0
+        error_rate = Decimal('0')
         if total_detections > 0:
-            error_rate = (failed_detections / total_detections) * 100
+            error_rate = min(failed_detections / total_detections * 100, Decimal('100'))
         
         analytics_aggregator.update_realtime_metric(
             'error_rate',
-            Decimal(str(error_rate))
+            error_rate
         )
         
         # Send WebSocket updates
@@ -191,7 +153,7 @@ def update_realtime_metrics():
         async_to_sync(channel_layer.group_send)(
             "realtime_metrics",
             {
-                'type': 'realtime_update',
+                'type': 'realtime_batch',
                 'metrics': {
                     'active_detections': active_detections,
                     'processing_queue': queue_size,
@@ -209,6 +171,16 @@ def update_realtime_metrics():
         return {'status': 'error', 'message': str(e)}
 
 
+@shared_task
+def persist_metric_buckets():
+    """Downsample realtime metric buckets into hourly/daily MetricBucket rows"""
+    try:
+        summary = metric_store.persist()
+        return {'status': 'completed', **summary}
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+
 @shared_task
 def cleanup_analytics_data():
     """Clean up old analytics data and cache"""
@@ -219,6 +191,9 @@ def cleanup_analytics_data():
         cutoff_date = now - timedelta(days=7)
         RealtimeMetric.objects.filter(timestamp__lt=cutoff_date).delete()
         
+        # Hourly metric buckets past retention (daily buckets are kept)
+        metric_store.prune()
+        
         # Clean up expired exports
         AnalyticsExport.objects.filter(
             expires_at__lt=now,
@@ -241,110 +216,6 @@ def cleanup_analytics_data():
         return {'status': 'error', 'message': str(e)}
 
 
-def generate_artist_export_data(export_request):
-    """Generate artist analytics export data"""
-    # Get date range
-    if export_request.date_range_start and export_request.date_range_end:
-        date_range = (export_request.date_range_start, export_request.date_range_end)
-    else:
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=30)
-        date_range = (start_date, end_date)
-    
-    # Get artist ID from parameters or user
-    artist_id = export_request.parameters.get('artist_id')
-    if not artist_id:
-        artist = export_request.user.artists.filter(active=True).first()
-        artist_id = artist.artist_id if artist else None
-    
-    if not artist_id:
-        return []
-    
-    # Get analytics data
-    analytics_data = analytics_aggregator.get_artist_analytics(artist_id, date_range)
-    
-    # Convert to export format
-    export_data = []
-    for day_data in analytics_data.get('daily_trends', []):
-        export_data.append({
-            'Date': day_data['date'],
-            'Plays': day_data['plays'],
-            'Revenue': day_data['revenue']
-        })
-    
-    return export_data
-
-
-def generate_csv_file(data, export_request):
-    """Generate CSV file from data"""
-    if not data:
-        return None
-    
-    filename = f"analytics_export_{export_request.export_id}.csv"
-    file_path = f"exports/{filename}"
-    
-    # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(os.path.join(settings.MEDIA_ROOT, file_path)), exist_ok=True)
-    
-    full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-    
-    with open(full_path, 'w', newline='', encoding='utf-8') as csvfile:
-        if data:
-            fieldnames = data[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
-    
-    return file_path
-
-
-def generate_json_file(data, export_request):
-    """Generate JSON file from data"""
-    filename = f"analytics_export_{export_request.export_id}.json"
-    file_path = f"exports/{filename}"
-    
-    # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(os.path.join(settings.MEDIA_ROOT, file_path)), exist_ok=True)
-    
-    full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-    
-    with open(full_path, 'w', encoding='utf-8') as jsonfile:
-        json.dump(data, jsonfile, indent=2, default=str)
-    
-    return file_path
-
-
-def generate_excel_file(data, export_request):
-    """Generate Excel file from data"""
-    try:
-        import pandas as pd
-        
-        filename = f"analytics_export_{export_request.export_id}.xlsx"
-        file_path = f"exports/{filename}"
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(os.path.join(settings.MEDIA_ROOT, file_path)), exist_ok=True)
-        
-        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-        
-        # Convert data to DataFrame and save as Excel
-        df = pd.DataFrame(data)
-        df.to_excel(full_path, index=False)
-        
-        return file_path
-        
-    except ImportError:
-        # Fallback to CSV if pandas not available
-        return generate_csv_file(data, export_request)
-
-
-def generate_pdf_file(data, export_request):
-    """Generate PDF file from data"""
-    # This would require a PDF generation library like ReportLab
-    # For now, fallback to CSV
-    return generate_csv_file(data, export_request)
-
-
 def create_hourly_snapshots(now):
     """Create hourly analytics snapshots"""
     hour_start = now.replace(minute=0, second=0, microsecond=0)
@@ -375,34 +246,3 @@ def create_monthly_snapshots(now):
     """Create monthly analytics snapshots"""
     # Implementation for monthly snapshots
     pass
-
-
-# Additional export data generators
-def generate_publisher_export_data(export_request):
-    """Generate publisher analytics export data"""
-    # Implementation for publisher export
-    return []
-
-
-def generate_station_export_data(export_request):
-    """Generate station analytics export data"""
-    # Implementation for station export
-    return []
-
-
-def generate_admin_export_data(export_request):
-    """Generate admin analytics export data"""
-    # Implementation for admin export
-    return []
-
-
-def generate_royalty_export_data(export_request):
-    """Generate royalty report export data"""
-    # Implementation for royalty export
-    return []
-
-
-def generate_detection_export_data(export_request):
-    """Generate detection report export data"""
-    # Implementation for detection export
-    return []
\ No newline at end of file
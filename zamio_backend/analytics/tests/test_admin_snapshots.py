@@ -0,0 +1,152 @@
+import json
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from analytics.admin_snapshots import ADMIN_SNAPSHOT_RANGES, AdminSnapshotService, admin_range_bounds
+from analytics.consumers import AnalyticsConsumer
+from analytics.models import AnalyticsSnapshot
+from analytics.tasks import refresh_admin_snapshots
+from artists.models import Artist, Track
+from music_monitor.models import AudioDetection, PlayLog, RoyaltyDistribution
+from stations.models import Station
+
+
+class AdminSnapshotTests(APITestCase):
+    def setUp(self):
+        self.service = AdminSnapshotService()
+        self.admin_user = User.objects.create_user(
+            email='snapshot-admin@example.com', password='testpass123', is_staff=True
+        )
+        self.station = Station.objects.create(
+            user=User.objects.create_user(email='snapshot-station@example.com', password='testpass123'),
+            name='Snapshot FM',
+            station_id='STSNAP',
+            active=True
+        )
+        artist_user = User.objects.create_user(email='snapshot-artist@example.com', password='testpass123')
+        artist = Artist.objects.create(user=artist_user, stage_name='Snapshot Artist', artist_id='SNAP1')
+        self.track = Track.objects.create(artist=artist, title='Snapshot Song')
+
+        self.detection = AudioDetection.objects.create(
+            session_id=uuid.uuid4(),
+            station=self.station,
+            track=self.track,
+            detection_source='local',
+            confidence_score=0.9,
+            processing_status='completed',
+            audio_timestamp=timezone.now()
+        )
+        AudioDetection.objects.filter(pk=self.detection.pk).update(
+            detected_at=timezone.now() - timedelta(days=3)
+        )
+        play_log = PlayLog.objects.create(
+            track=self.track, station=self.station, source='Radio', played_at=timezone.now()
+        )
+        RoyaltyDistribution.objects.create(
+            play_log=play_log,
+            recipient=artist_user,
+            recipient_type='artist',
+            gross_amount=Decimal('10.00'),
+            net_amount=Decimal('8.50'),
+            percentage_split=100,
+            status='paid'
+        )
+
+    def test_ranges_start_at_local_midnight(self):
+        now = timezone.now()
+        start, end = admin_range_bounds('7d', now)
+
+        self.assertEqual(end, now)
+        self.assertEqual(timezone.localtime(start).hour, 0)
+        self.assertEqual((timezone.localtime(now).date() - timezone.localtime(start).date()).days, 6)
+
+    def test_task_materializes_every_range_and_endpoint_reads_one_row(self):
+        result = refresh_admin_snapshots.apply().get()
+
+        self.assertEqual(result['status'], 'completed')
+        self.assertEqual(result['ranges'], len(ADMIN_SNAPSHOT_RANGES))
+        self.assertEqual(
+            AnalyticsSnapshot.objects.filter(snapshot_type='admin_range').count(), len(ADMIN_SNAPSHOT_RANGES)
+        )
+
+        self.client.force_authenticate(user=self.admin_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('analytics:admin_analytics'), {'range': '7d'})
+
+        self.assertEqual(response.status_code, 200)
+        # Request audit logging aside, serving is a single snapshot read
+        reads = [query['sql'] for query in queries if 'accounts_auditlog' not in query['sql']]
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(response.data['date_range']['range'], '7d')
+        self.assertEqual(response.data['detection_health']['total_detections'], 1)
+        self.assertEqual(response.data['platformStats']['totalRoyalties'], 8.5)
+        self.assertEqual(response.data['revenue_distribution'][0]['recipient_type'], 'artist')
+
+        today = self.service.get('today')
+        self.assertEqual(today['detection_health']['total_detections'], 0)
+
+    def test_refresh_only_recomputes_days_changed_since_watermark(self):
+        first = self.service.run(now=timezone.now())
+        self.assertEqual(first['days_refreshed'], 365)
+
+        self.detection.refresh_from_db()
+        self.detection.processing_status = 'failed'
+        self.detection.save()
+
+        second = self.service.run(now=timezone.now())
+
+        # Today, plus the day of the detection whose status changed
+        self.assertEqual(second['days_refreshed'], 2)
+        health = self.service.get('30d')['detection_health']
+        self.assertEqual(health['failed_detections'], 1)
+        self.assertEqual(health['successful_detections'], 0)
+
+    def test_partial_run_keeps_day_snapshots_other_ranges_need(self):
+        self.service.run(now=timezone.now())
+        days = AnalyticsSnapshot.objects.filter(snapshot_type='daily', metric_type='platform_activity').count()
+
+        self.service.run(ranges=['7d'], now=timezone.now())
+
+        self.assertEqual(
+            AnalyticsSnapshot.objects.filter(snapshot_type='daily', metric_type='platform_activity').count(), days
+        )
+
+    def test_cold_start_queues_the_refresh_instead_of_building_inline(self):
+        self.client.force_authenticate(user=self.admin_user)
+
+        with mock.patch('analytics.views.refresh_admin_snapshots') as refresh:
+            response = self.client.get(reverse('analytics:admin_analytics'), {'range': '7d'})
+
+        self.assertEqual(response.status_code, 202)
+        refresh.delay.assert_called_once_with()
+        self.assertFalse(AnalyticsSnapshot.objects.filter(snapshot_type='admin_range').exists())
+
+    def test_admin_socket_cold_start_queues_the_refresh_and_sends_pending(self):
+        consumer = AnalyticsConsumer()
+        consumer.user_type = 'admin'
+        sent = []
+
+        async def send(text_data):
+            sent.append(json.loads(text_data))
+        consumer.send = send
+
+        with mock.patch('analytics.consumers.refresh_admin_snapshots') as refresh, \
+                mock.patch('analytics.consumers.analytics_aggregator') as aggregator:
+            async_to_sync(consumer.send_initial_data)()
+
+        refresh.delay.assert_called_once_with()
+        aggregator.get_admin_analytics.assert_not_called()
+        self.assertEqual(sent, [{
+            'type': 'initial_data', 'user_type': 'admin', 'status': 'pending',
+            'detail': 'Admin analytics are being built; updates will follow', 'data': None,
+        }])
@@ -0,0 +1,118 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from analytics.services import AnalyticsAggregator
+from artists.models import Artist
+from core.caching_service import CacheInvalidator, CacheNamespace, RoyaltyCacheService
+from core.performance_monitoring import PerformanceMetrics
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cache-namespace-tests',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheNamespaceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.aggregator = AnalyticsAggregator()
+
+    def _artist_key(self, artist_id):
+        return self.aggregator.generate_cache_key(
+            'artist_analytics',
+            namespaces=self.aggregator.entity_namespaces('artist', artist_id),
+            artist_id=artist_id,
+            start='2025-01-01',
+            end='2025-01-31',
+        )
+
+    def test_entity_invalidation_only_retires_that_entity(self):
+        self.aggregator.set_cached_data(self._artist_key('ART1'), {'plays': 1})
+        self.aggregator.set_cached_data(self._artist_key('ART2'), {'plays': 2})
+
+        self.aggregator.invalidate_namespace('artist', 'ART1')
+
+        self.assertIsNone(self.aggregator.get_cached_data(self._artist_key('ART1')))
+        self.assertEqual(self.aggregator.get_cached_data(self._artist_key('ART2')), {'plays': 2})
+
+        self.aggregator.invalidate_namespace()
+        self.assertIsNone(self.aggregator.get_cached_data(self._artist_key('ART2')))
+
+    def test_evicted_counter_restarts_above_previous_generations(self):
+        namespace = CacheNamespace('artist_analytics', 'ART1')
+        first = namespace.generation()
+        namespace.invalidate()
+        self.assertEqual(namespace.generation(), first + 1)
+
+        cache.delete(namespace.counter_key)
+        namespace.invalidate()
+
+        self.assertGreater(namespace.generation(), first + 1)
+
+    def test_royalty_summary_invalidated_by_namespace(self):
+        RoyaltyCacheService.cache_user_royalty_summary(7, '2025-01', {'total': '10.00'})
+
+        RoyaltyCacheService.invalidate_namespace('royalty_user', 7)
+
+        self.assertIsNone(RoyaltyCacheService.get_user_royalty_summary(7, '2025-01'))
+
+    def test_task_metrics_listed_from_registry(self):
+        PerformanceMetrics.record_task_execution('royalties.tasks.close_royalty_cycle', 1.5, True)
+        PerformanceMetrics.record_task_execution('analytics.tasks.refresh_play_rollups', 0.5, False)
+
+        metrics = PerformanceMetrics.get_all_task_metrics()
+
+        self.assertEqual(
+            sorted(metrics), ['analytics.tasks.refresh_play_rollups', 'royalties.tasks.close_royalty_cycle']
+        )
+        self.assertEqual(metrics['analytics.tasks.refresh_play_rollups']['failed_executions'], 1)
+
+    def test_task_names_are_registered_once(self):
+        for _ in range(3):
+            PerformanceMetrics.record_task_execution('royalties.tasks.close_royalty_cycle', 1.0, True)
+
+        self.assertEqual(cache.get(PerformanceMetrics._make_key('task_count')), 1)
+        self.assertEqual(
+            PerformanceMetrics.get_all_task_metrics()['royalties.tasks.close_royalty_cycle']['total_executions'], 3
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheInvalidatorReachesAggregatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.aggregator = AnalyticsAggregator()
+        user = get_user_model().objects.create_user(email='ns-artist@example.com', password='strong-password')
+        self.artist = Artist.objects.create(user=user, stage_name='Namespace Artist', artist_id='ART-NS-1')
+
+    def _artist_key(self):
+        return self.aggregator.generate_cache_key(
+            'artist_analytics',
+            namespaces=self.aggregator.entity_namespaces('artist', self.artist.artist_id),
+            artist_id=self.artist.artist_id,
+        )
+
+    def test_track_update_invalidates_the_artist_dashboard(self):
+        self.aggregator.set_cached_data(self._artist_key(), {'plays': 1})
+
+        CacheInvalidator.invalidate_on_track_update(
+            track_id=1, artist_id=self.artist.pk, artist_public_id=self.artist.artist_id
+        )
+
+        self.assertIsNone(self.aggregator.get_cached_data(self._artist_key()))
+
+    def test_playlog_create_invalidates_the_artist_dashboard(self):
+        self.aggregator.set_cached_data(self._artist_key(), {'plays': 1})
+
+        CacheInvalidator.invalidate_on_playlog_create(
+            station_id=None, track_id=None, artist_id=self.artist.pk, artist_public_id=self.artist.artist_id
+        )
+
+        self.assertIsNone(self.aggregator.get_cached_data(self._artist_key()))
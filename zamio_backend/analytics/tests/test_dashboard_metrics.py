@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from analytics.dashboard_metrics import PeriodWindow, publisher_summary, summarize_plays
+from artists.models import Artist, Track
+from music_monitor.models import PlayLog
+from publishers.models import PublisherProfile, PublishingAgreement
+from stations.models import Station
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard-metrics-tests',
+    }
+})
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.now = timezone.now()
+
+        self.publisher = PublisherProfile.objects.create(
+            user=User.objects.create_user(email='metrics-publisher@example.com', password='testpass123'),
+            company_name='Metrics Publishing'
+        )
+        artist = Artist.objects.create(
+            user=User.objects.create_user(email='metrics-artist@example.com', password='testpass123'),
+            stage_name='Metrics Artist',
+            artist_id='MET1'
+        )
+        stations = [
+            Station.objects.create(
+                user=User.objects.create_user(email=f"metrics-station{index}@example.com", password='testpass123'),
+                name=f"Metrics FM {index}",
+                station_id=f"STMET{index}"
+            )
+            for index in range(2)
+        ]
+        self.tracks = [Track.objects.create(artist=artist, title=f"Metrics Song {index}") for index in range(2)]
+        for track in self.tracks:
+            # Two accepted agreements on one track must not double its plays
+            for _ in range(2):
+                PublishingAgreement.objects.create(
+                    publisher=self.publisher, songwriter=artist, track=track, status='accepted',
+                    writer_share=Decimal('50.0'), publisher_share=Decimal('50.0')
+                )
+
+        def play(track, station, days_ago, amount, claimed=True):
+            PlayLog.objects.create(
+                track=track,
+                station=station,
+                source='Radio',
+                played_at=self.now - timedelta(days=days_ago),
+                royalty_amount=Decimal(amount),
+                claimed=claimed
+            )
+
+        play(self.tracks[0], stations[0], 1, '2.00')
+        play(self.tracks[1], stations[1], 2, '3.00', claimed=False)
+        play(self.tracks[0], stations[0], 10, '1.50')
+        play(self.tracks[0], stations[0], 30, '9.00')
+
+        self.window = PeriodWindow(self.now - timedelta(days=7), self.now)
+        self.agreements = PublishingAgreement.objects.filter(publisher=self.publisher, status='accepted')
+        self.playlogs = PlayLog.objects.filter(track_id__in=self.agreements.values('track_id'))
+
+    def test_current_and_previous_period_come_from_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            summary = summarize_plays(self.playlogs, self.window)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(summary['current'], {'plays': 2, 'earnings': Decimal('5.00'), 'stations': 2, 'works': 2})
+        self.assertEqual(summary['previous'], {'plays': 1, 'earnings': Decimal('1.50'), 'stations': 1, 'works': 1})
+
+    def test_open_window_has_no_previous_period(self):
+        summary = summarize_plays(self.playlogs, PeriodWindow(None, self.now))
+
+        self.assertEqual(summary['current']['plays'], 4)
+        self.assertEqual(summary['previous']['plays'], 0)
+
+    def test_publisher_summary_is_cached_until_agreements_change(self):
+        with CaptureQueriesContext(connection) as queries:
+            summary = publisher_summary(self.publisher, self.playlogs, self.agreements, self.window)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(summary['current']['unclaimed'], 1)
+        self.assertEqual(summary['current']['earnings'], 5.0)
+        self.assertEqual(summary['catalog'], {'works': 2, 'agreements': 4, 'previous_works': 0})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(publisher_summary(self.publisher, self.playlogs, self.agreements, self.window), summary)
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.agreements.filter(track=self.tracks[1]).first().delete()
+
+        refreshed = publisher_summary(self.publisher, self.playlogs, self.agreements, self.window)
+        self.assertEqual(refreshed['catalog']['agreements'], 3)
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from analytics.models import MetricBucket
+from analytics.services import analytics_aggregator
+from analytics.tasks import update_realtime_metrics
+from analytics.timeseries import MetricTimeSeries
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'metric-timeseries-tests',
+    }
+})
+class MetricTimeSeriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.store = MetricTimeSeries()
+
+    def test_counters_accumulate_per_dimension_and_bucket(self):
+        now = timezone.now()
+        self.store.record('plays_today', 2, station_id='ST1', artist_id='ART1', at=now)
+        self.store.record('plays_today', 1, station_id='ST2', at=now)
+        self.store.record('revenue_today', Decimal('1.2345'), station_id='ST1', at=now)
+        self.store.record('revenue_today', Decimal('0.50'), station_id='ST1', at=now)
+
+        self.assertEqual(self.store.total('plays_today', at=now), Decimal('3'))
+        self.assertEqual(self.store.total('plays_today', station_id='ST1', at=now), Decimal('2'))
+        self.assertEqual(self.store.total('plays_today', artist_id='ART1', at=now), Decimal('2'))
+        self.assertEqual(self.store.total('revenue_today', 'hour', station_id='ST1', at=now), Decimal('1.7345'))
+        minutes = self.store.series('plays_today', 'minute', 5, end=now)
+        self.assertEqual([value for _start, value in minutes], [0, 0, 0, 0, 3])
+
+    def test_gauges_keep_latest_value(self):
+        self.store.record('processing_queue', 7)
+        self.store.record('processing_queue', 4)
+
+        self.assertEqual(self.store.current('processing_queue')['value'], 4.0)
+        self.assertEqual(self.store.total('processing_queue', 'minute'), Decimal('4'))
+
+    def test_persist_downsamples_hours_into_days_and_survives_cache_loss(self):
+        now = timezone.now()
+        earlier = now - timedelta(hours=1)
+        self.store.record('plays_today', 3, station_id='ST1', at=earlier)
+        self.store.record('plays_today', 2, station_id='ST1', at=now)
+        self.store.persist(now=earlier)
+
+        summary = self.store.persist(now=now)
+
+        self.assertEqual(summary['hour_buckets'], 4)
+        hourly = MetricBucket.objects.filter(metric_name='plays_today', resolution='hour', station_id='')
+        self.assertEqual(sorted(hourly.values_list('value', flat=True)), [Decimal('2'), Decimal('3')])
+        for row in MetricBucket.objects.filter(resolution='day', station_id='ST1'):
+            expected = sum(
+                value for start, value in hourly.values_list('bucket_start', 'value')
+                if self.store.bucket_start('day', start) == row.bucket_start
+            )
+            self.assertEqual(row.value, expected)
+
+        cache.clear()
+        self.assertEqual(
+            self.store.total('plays_today', 'hour', station_id='ST1', at=earlier), Decimal('3')
+        )
+
+    def test_realtime_task_reads_buckets_for_today_and_error_rate(self):
+        analytics_aggregator.update_realtime_metric('plays_today', Decimal('5'))
+        analytics_aggregator.update_realtime_metric('revenue_today', Decimal('2.50'))
+        analytics_aggregator.update_realtime_metric('detections', Decimal('4'))
+        analytics_aggregator.update_realtime_metric('detection_failures', Decimal('1'))
+
+        self.assertEqual(update_realtime_metrics(), {'status': 'completed'})
+
+        metrics = analytics_aggregator.get_realtime_metrics(
+            ['plays_today', 'revenue_today', 'error_rate', 'processing_queue']
+        )
+        self.assertEqual(metrics['plays_today']['value'], 5.0)
+        self.assertEqual(metrics['revenue_today']['value'], 2.5)
+        self.assertEqual(metrics['error_rate']['value'], 25.0)
+        self.assertEqual(metrics['processing_queue']['value'], 0.0)
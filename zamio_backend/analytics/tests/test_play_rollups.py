@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from analytics.models import (
+    DailyArtistRollup, DailyPlayRollup, DailyPublisherRollup, RollupWatermark, StationHourlyRollup
+)
+from analytics.services import PlayRollupService, analytics_aggregator
+from artists.models import Artist, Track
+from music_monitor.models import PlayLog
+from publishers.models import PublisherProfile
+from stations.models import Station
+
+
+class PlayRollupServiceTests(TestCase):
+    def setUp(self):
+        self.publisher = PublisherProfile.objects.create(
+            user=User.objects.create_user(email='rollup-publisher@example.com', password='testpass123'),
+            company_name='Rollup Publishing'
+        )
+        self.artist = Artist.objects.create(
+            user=User.objects.create_user(email='rollup-artist@example.com', password='testpass123'),
+            stage_name='Rollup Artist',
+            artist_id='ROLL1',
+            publisher=self.publisher
+        )
+        self.track = Track.objects.create(artist=self.artist, title='Rollup Song')
+        self.other_track = Track.objects.create(artist=self.artist, title='Other Song')
+        self.station = Station.objects.create(
+            user=User.objects.create_user(email='rollup-station@example.com', password='testpass123'),
+            name='Rollup FM',
+            station_id='STROLL'
+        )
+        self.day = timezone.localdate() - timedelta(days=2)
+        self.service = PlayRollupService(lag_seconds=0)
+
+    def _play(self, track, hour, amount, confidence=None):
+        played_at = timezone.make_aware(datetime.combine(self.day, datetime.min.time()) + timedelta(hours=hour))
+        return PlayLog.objects.create(
+            track=track,
+            station=self.station,
+            source='Radio',
+            played_at=played_at,
+            royalty_amount=Decimal(amount),
+            avg_confidence_score=confidence
+        )
+
+    def test_run_builds_cell_hourly_artist_and_publisher_rollups(self):
+        self._play(self.track, 8, '1.50', confidence=Decimal('90'))
+        self._play(self.track, 8, '2.00', confidence=Decimal('80'))
+        self._play(self.other_track, 14, '0.50')
+
+        summary = self.service.run()
+
+        self.assertEqual(summary['days'], 1)
+        cell = DailyPlayRollup.objects.get(day=self.day, track=self.track, station=self.station)
+        self.assertEqual(cell.plays, 2)
+        self.assertEqual(cell.revenue, Decimal('3.50'))
+        self.assertEqual(cell.confidence_count, 2)
+        self.assertEqual(
+            dict(StationHourlyRollup.objects.filter(station=self.station).values_list('hour', 'plays')),
+            {8: 2, 14: 1}
+        )
+        artist_day = DailyArtistRollup.objects.get(day=self.day, artist=self.artist)
+        self.assertEqual((artist_day.plays, artist_day.revenue, artist_day.tracks_played), (3, Decimal('4.00'), 2))
+        publisher_day = DailyPublisherRollup.objects.get(day=self.day, publisher=self.publisher)
+        self.assertEqual((publisher_day.plays, publisher_day.artists_played), (3, 1))
+
+    def test_status_change_is_folded_in_on_next_run(self):
+        play = self._play(self.track, 9, '1.00')
+        self._play(self.track, 10, '2.00')
+        self.service.run()
+
+        play.active = False
+        play.save()
+        self.service.run()
+
+        cell = DailyPlayRollup.objects.get(day=self.day, track=self.track)
+        self.assertEqual((cell.plays, cell.revenue), (1, Decimal('2.00')))
+        self.assertEqual(DailyArtistRollup.objects.get(day=self.day).plays, 1)
+        self.assertEqual(StationHourlyRollup.objects.get(day=self.day).hour, 10)
+
+    def test_artist_analytics_reads_rollups(self):
+        self._play(self.track, 8, '1.50', confidence=Decimal('90'))
+        self._play(self.other_track, 9, '0.50', confidence=Decimal('70'))
+        self.service.run()
+
+        end = timezone.now()
+        data = analytics_aggregator.get_artist_analytics('ROLL1', (end - timedelta(days=7), end))
+
+        self.assertEqual(data['summary']['total_plays'], 2)
+        self.assertEqual(data['summary']['total_revenue'], 2.0)
+        self.assertEqual(data['summary']['avg_confidence_score'], 80.0)
+        self.assertEqual(len(data['daily_trends']), 8)
+        trend = next(item for item in data['daily_trends'] if item['date'] == self.day.isoformat())
+        self.assertEqual(trend['plays'], 2)
+
+    def test_backfill_command_rebuilds_days_and_sets_watermark(self):
+        self._play(self.track, 8, '1.00')
+        DailyPlayRollup.objects.create(day=self.day, track=self.other_track, station=self.station, plays=99)
+
+        out = StringIO()
+        call_command('backfill_play_rollups', stdout=out)
+
+        self.assertIn('days=1', out.getvalue())
+        self.assertEqual(list(DailyPlayRollup.objects.values_list('track_id', 'plays')), [(self.track.id, 1)])
+        self.assertIsNotNone(RollupWatermark.objects.get().last_updated_at)
@@ -0,0 +1,115 @@
+import uuid
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from analytics import signals
+from analytics.realtime import RealtimeEventBus, RealtimeFanoutPublisher
+from artists.models import Artist, Track
+from music_monitor.models import AudioDetection, PlayLog
+from stations.models import Station
+
+
+class RealtimeFanoutTests(TestCase):
+    def setUp(self):
+        self.bus = RealtimeEventBus()
+        self.publisher = RealtimeFanoutPublisher(self.bus, max_events_per_message=2)
+        self.channel_layer = get_channel_layer()
+
+    def _join(self, group):
+        channel = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)(group, channel)
+        return channel
+
+    def _receive(self, channel):
+        return async_to_sync(self.channel_layer.receive)(channel)
+
+    def test_events_are_coalesced_into_one_message_per_group(self):
+        artist_channel = self._join('analytics_artist_ART1')
+        metrics_channel = self._join('realtime_metrics')
+        for index in range(3):
+            self.bus.publish(
+                ['analytics_artist_ART1', 'analytics_station_ST1'],
+                {'type': 'new_play', 'track_title': f"Song {index}"},
+                metrics=[{'name': 'plays_today', 'value': 1}]
+            )
+        self.bus.publish(['analytics_artist_ART1'], {'type': 'new_royalty', 'amount': 2.5})
+
+        summary = self.publisher.tick()
+
+        self.assertEqual(summary, {'events': 4, 'groups': 3})
+        message = self._receive(artist_channel)
+        self.assertEqual(message['type'], 'analytics_batch')
+        self.assertEqual(message['counts'], {'new_play': 3, 'new_royalty': 1})
+        self.assertEqual(len(message['events']), 2)
+        self.assertEqual(message['dropped'], 2)
+        self.assertEqual(message['events'][-1]['type'], 'new_royalty')
+        self.assertEqual(self._receive(metrics_channel)['metrics'], {'plays_today': 3.0})
+        self.assertEqual(self.publisher.tick(), {'events': 0, 'groups': 0})
+
+    def test_playlog_save_only_queues_event_after_commit(self):
+        artist = Artist.objects.create(
+            user=User.objects.create_user(email='fanout-artist@example.com', password='testpass123'),
+            stage_name='Fanout Artist',
+            artist_id='FAN1'
+        )
+        station = Station.objects.create(
+            user=User.objects.create_user(email='fanout-station@example.com', password='testpass123'),
+            name='Fanout FM',
+            station_id='STFAN'
+        )
+        track = Track.objects.create(artist=artist, title='Fanout Song')
+
+        original_bus = signals.realtime_bus
+        signals.realtime_bus = self.bus
+        self.addCleanup(setattr, signals, 'realtime_bus', original_bus)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            PlayLog.objects.create(track=track, station=station, source='Radio', royalty_amount=Decimal('1.25'))
+        self.assertEqual(self.bus.pending(), 0)
+
+        for callback in callbacks:
+            callback()
+
+        events = self.bus.drain()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['groups'], ['analytics_artist_FAN1', 'analytics_station_STFAN'])
+        self.assertEqual(events[0]['data']['royalty_amount'], 1.25)
+        self.assertEqual(
+            [(metric['name'], metric['value'], metric['station_id']) for metric in events[0]['metrics']],
+            [('plays_today', 1, 'STFAN'), ('revenue_today', '1.25', 'STFAN')]
+        )
+
+    def test_detection_failure_is_counted_once_per_transition(self):
+        station = Station.objects.create(
+            user=User.objects.create_user(email='failure-station@example.com', password='testpass123'),
+            name='Failure FM',
+            station_id='STFAIL'
+        )
+        detection = AudioDetection.objects.create(
+            session_id=uuid.uuid4(), station=station, detection_source='local', audio_timestamp=timezone.now(),
+            confidence_score=Decimal('0.10'), processing_status='processing'
+        )
+
+        original_bus = signals.realtime_bus
+        signals.realtime_bus = self.bus
+        self.addCleanup(setattr, signals, 'realtime_bus', original_bus)
+
+        def failures_after(save):
+            with self.captureOnCommitCallbacks(execute=True):
+                save()
+            events = self.bus.drain()
+            return sum(
+                metric['value'] for event in events for metric in event['metrics']
+                if metric['name'] == 'detection_failures'
+            )
+
+        detection.processing_status = 'failed'
+        self.assertEqual(failures_after(detection.save), 1)
+        detection.error_message = 'still failing'
+        self.assertEqual(failures_after(detection.save), 0)
+        self.assertEqual(failures_after(lambda: detection.save(update_fields=['error_message'])), 0)
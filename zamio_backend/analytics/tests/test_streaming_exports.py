@@ -0,0 +1,111 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from analytics.exports import StreamingExport, _excel_available
+from analytics.models import AnalyticsExport
+from analytics.tasks import generate_analytics_export
+from artists.models import Artist, Track
+from music_monitor.models import PlayLog
+from stations.models import Station
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, ANALYTICS_EXPORT_CHUNK_SIZE=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.station_user = User.objects.create_user(email='export-station@example.com', password='testpass123')
+        self.station = Station.objects.create(user=self.station_user, name='Export FM', station_id='STEXP')
+        artist = Artist.objects.create(
+            user=User.objects.create_user(email='export-artist@example.com', password='testpass123'),
+            stage_name='Export Artist',
+            artist_id='EXP1'
+        )
+        self.track = Track.objects.create(artist=artist, title='Export Song')
+        self.start = timezone.make_aware(datetime(2025, 3, 1, 8, 0))
+        for minute in range(5):
+            PlayLog.objects.create(
+                track=self.track,
+                station=self.station,
+                source='Radio',
+                played_at=self.start + timedelta(minutes=minute),
+                duration=timedelta(minutes=3),
+                royalty_amount=Decimal('0.25')
+            )
+
+    def _export(self, export_format, export_type='station_analytics', user=None):
+        return AnalyticsExport.objects.create(
+            user=user or self.station_user,
+            export_type=export_type,
+            export_format=export_format,
+            date_range_start=self.start - timedelta(hours=1),
+            date_range_end=self.start + timedelta(hours=1)
+        )
+
+    def test_csv_export_streams_every_row_through_the_task(self):
+        export_request = self._export('csv')
+
+        result = generate_analytics_export.apply(args=(export_request.export_id,)).get()
+
+        export_request.refresh_from_db()
+        self.assertEqual(result['rows_written'], 5)
+        self.assertEqual(export_request.status, 'completed')
+        self.assertEqual(export_request.progress_percentage, 100)
+        full_path = os.path.join(self.media_root, export_request.file_path)
+        self.assertEqual(export_request.file_size_bytes, os.path.getsize(full_path))
+        with open(full_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['Track'], 'Export Song')
+        self.assertEqual(rows[0]['Duration (s)'], '180.0')
+        self.assertEqual(rows[4]['Royalty Amount'], '0.25')
+
+    def test_json_export_is_newline_delimited_and_reports_progress(self):
+        export_request = self._export('json')
+        progress = []
+
+        export = StreamingExport(export_request, progress_callback=progress.append, progress_every=2)
+        file_path, _size = export.run()
+
+        self.assertTrue(file_path.endswith('.ndjson'))
+        with open(os.path.join(self.media_root, file_path), encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['Artist'] for record in records], ['Export Artist'] * 5)
+        self.assertEqual(progress, [10, 44, 78, 95])
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'exports')), [os.path.basename(file_path)])
+
+    def test_admin_export_is_empty_for_non_staff(self):
+        export_request = self._export('csv', export_type='admin_analytics')
+
+        file_path, _size = StreamingExport(export_request).run()
+
+        with open(os.path.join(self.media_root, file_path), encoding='utf-8') as f:
+            self.assertEqual(f.read().splitlines(), ['Date,Station ID,Station,Track,Artist,Plays,Revenue'])
+
+    @unittest.skipUnless(_excel_available(), 'openpyxl not installed')
+    def test_excel_export_uses_write_only_workbook(self):
+        from openpyxl import load_workbook
+
+        export_request = self._export('excel')
+
+        file_path, _size = StreamingExport(export_request).run()
+
+        sheet = load_workbook(os.path.join(self.media_root, file_path), read_only=True)['Export']
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], 'Played At')
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][1], 'Export Song')
+        self.assertEqual(rows[1][0], timezone.localtime(self.start).replace(tzinfo=None))
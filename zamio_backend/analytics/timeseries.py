@@ -0,0 +1,336 @@
+"""
+Fixed-resolution time-series store for realtime analytics metrics.
+
+Every metric write lands in minute, hour and day buckets in the default cache
+(one atomic INCR each for counters, a SET for gauges), optionally split by
+station or artist. Reads touch a bounded number of bucket keys instead of
+counting today's PlayLog/AudioDetection rows, and ``persist()`` downsamples
+the hour buckets into ``MetricBucket`` rows so history survives cache expiry.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MetricBucket, RollupWatermark
+
+logger = logging.getLogger(__name__)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+
+# Counters accumulate increments per bucket; gauges keep the last value seen
+METRIC_KINDS = {
+    'plays_today': COUNTER,
+    'revenue_today': COUNTER,
+    'detections': COUNTER,
+    'detection_failures': COUNTER,
+    'active_detections': GAUGE,
+    'processing_queue': GAUGE,
+    'system_load': GAUGE,
+    'error_rate': GAUGE,
+}
+
+# Bucket width in seconds and how long each resolution stays in the cache
+RESOLUTIONS = {
+    'minute': (60, 3 * 3600),
+    'hour': (3600, 3 * 86400),
+    'day': (86400, 8 * 86400),
+}
+
+# Values are stored as integers so the cache can INCR them atomically
+SCALE = 10000
+
+
+class MetricTimeSeries:
+    """Atomic minute/hour/day buckets per metric and dimension"""
+
+    KEY_PREFIX = 'zamio:ts'
+    REGISTRY_KEY = 'zamio:ts:series'
+    REGISTRY_RECHECK_SECONDS = 3600
+    WATERMARK_NAME = 'metric_buckets'
+
+    def __init__(self):
+        self._registered = {}
+
+    # Keys -------------------------------------------------------------------
+
+    @staticmethod
+    def kind(metric_name: str) -> str:
+        return METRIC_KINDS.get(metric_name, GAUGE)
+
+    @staticmethod
+    def dimensions(station_id=None, artist_id=None) -> List[Tuple[str, str]]:
+        """Series a write fans out to: platform-wide plus any given dimension"""
+        dims = [('', '')]
+        if station_id:
+            dims.append((str(station_id), ''))
+        if artist_id:
+            dims.append(('', str(artist_id)))
+        return dims
+
+    @staticmethod
+    def bucket_start(resolution: str, moment: datetime) -> datetime:
+        moment = timezone.localtime(moment)
+        if resolution == 'minute':
+            return moment.replace(second=0, microsecond=0)
+        if resolution == 'hour':
+            return moment.replace(minute=0, second=0, microsecond=0)
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def bucket_key(self, metric_name: str, station_id: str, artist_id: str, resolution: str,
+                   start: datetime) -> str:
+        return (
+            f"{self.KEY_PREFIX}:{metric_name}:{station_id or '-'}:{artist_id or '-'}:"
+            f"{resolution}:{int(start.timestamp())}"
+        )
+
+    def latest_key(self, metric_name: str, station_id: str, artist_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{metric_name}:{station_id or '-'}:{artist_id or '-'}:latest"
+
+    # Writes -----------------------------------------------------------------
+
+    def record(self, metric_name: str, value, station_id=None, artist_id=None, at: Optional[datetime] = None):
+        """Add ``value`` to a counter or set a gauge in every resolution"""
+        at = at or timezone.now()
+        scaled = self._scale(value)
+        is_counter = self.kind(metric_name) == COUNTER
+
+        for dim_station, dim_artist in self.dimensions(station_id, artist_id):
+            self._register(metric_name, dim_station, dim_artist)
+            for resolution, (_width, timeout) in RESOLUTIONS.items():
+                key = self.bucket_key(
+                    metric_name, dim_station, dim_artist, resolution, self.bucket_start(resolution, at)
+                )
+                if is_counter:
+                    self._incr(key, scaled, timeout)
+                else:
+                    cache.set(key, scaled, timeout)
+            cache.set(
+                self.latest_key(metric_name, dim_station, dim_artist),
+                {'value': scaled, 'timestamp': at.isoformat()},
+                RESOLUTIONS['day'][1]
+            )
+
+    @staticmethod
+    def _incr(key: str, amount: int, timeout: int):
+        try:
+            return cache.incr(key, amount)
+        except ValueError:
+            if cache.add(key, amount, timeout):
+                return amount
+            return cache.incr(key, amount)
+
+    def _register(self, metric_name: str, station_id: str, artist_id: str):
+        """
+        Remember series so persist() can find them without scanning keys.
+        Each process re-checks the shared registry hourly, which heals the
+        occasional lost update from two processes registering at once.
+        """
+        series = f"{metric_name}|{station_id}|{artist_id}"
+        now = time.monotonic()
+        if now - self._registered.get(series, float('-inf')) < self.REGISTRY_RECHECK_SECONDS:
+            return
+        registry = cache.get(self.REGISTRY_KEY) or []
+        if series not in registry:
+            cache.set(self.REGISTRY_KEY, sorted(set(registry) | {series}), timeout=None)
+        self._registered[series] = now
+
+    def registered_series(self) -> List[Tuple[str, str, str]]:
+        return [tuple(series.split('|', 2)) for series in cache.get(self.REGISTRY_KEY) or []]
+
+    # Reads ------------------------------------------------------------------
+
+    def series(self, metric_name: str, resolution: str, count: int, station_id=None, artist_id=None,
+               end: Optional[datetime] = None) -> List[Tuple[datetime, Decimal]]:
+        """The last ``count`` buckets ending with the one containing ``end``"""
+        width = RESOLUTIONS[resolution][0]
+        last = self.bucket_start(resolution, end or timezone.now())
+        starts = [
+            self.bucket_start(resolution, last - timedelta(seconds=width * offset))
+            for offset in range(count - 1, -1, -1)
+        ]
+        dim_station, dim_artist = str(station_id or ''), str(artist_id or '')
+        keys = {
+            start: self.bucket_key(metric_name, dim_station, dim_artist, resolution, start)
+            for start in starts
+        }
+        cached = cache.get_many(list(keys.values()))
+
+        missing = [start for start in starts if keys[start] not in cached]
+        persisted = {}
+        if missing and resolution in ('hour', 'day'):
+            persisted = dict(MetricBucket.objects.filter(
+                metric_name=metric_name,
+                resolution=resolution,
+                station_id=dim_station,
+                artist_id=dim_artist,
+                bucket_start__in=missing,
+            ).values_list('bucket_start', 'value'))
+
+        values = []
+        for start in starts:
+            if keys[start] in cached:
+                values.append((start, self._unscale(cached[keys[start]])))
+            else:
+                values.append((start, persisted.get(start, Decimal('0'))))
+        return values
+
+    def total(self, metric_name: str, resolution: str = 'day', station_id=None, artist_id=None,
+              at: Optional[datetime] = None) -> Decimal:
+        return self.series(metric_name, resolution, 1, station_id, artist_id, end=at)[0][1]
+
+    def window_sum(self, metric_name: str, minutes: int, station_id=None, artist_id=None) -> Decimal:
+        return sum(
+            (value for _start, value in self.series(metric_name, 'minute', minutes, station_id, artist_id)),
+            Decimal('0')
+        )
+
+    def current(self, metric_name: str, station_id=None, artist_id=None) -> Optional[Dict]:
+        """Today's counter total or the latest gauge reading"""
+        if self.kind(metric_name) == COUNTER:
+            return {
+                'value': float(self.total(metric_name, 'day', station_id, artist_id)),
+                'timestamp': timezone.now().isoformat(),
+                'metadata': {'resolution': 'day'},
+            }
+
+        latest = cache.get(self.latest_key(metric_name, str(station_id or ''), str(artist_id or '')))
+        if latest:
+            return {
+                'value': float(self._unscale(latest['value'])),
+                'timestamp': latest['timestamp'],
+                'metadata': {},
+            }
+
+        row = MetricBucket.objects.filter(
+            metric_name=metric_name,
+            resolution='hour',
+            station_id=str(station_id or ''),
+            artist_id=str(artist_id or ''),
+        ).order_by('-bucket_start').first()
+        if row:
+            return {'value': float(row.value), 'timestamp': row.updated_at.isoformat(), 'metadata': {}}
+        return None
+
+    # Persistence ------------------------------------------------------------
+
+    def persist(self, now: Optional[datetime] = None) -> Dict:
+        """Upsert hour buckets since the watermark and re-derive their day rows"""
+        now = now or timezone.now()
+        current_hour = self.bucket_start('hour', now)
+        oldest_cached = self.bucket_start('hour', now - timedelta(seconds=RESOLUTIONS['hour'][1]))
+
+        watermark, _ = RollupWatermark.objects.get_or_create(name=self.WATERMARK_NAME)
+        # The hour containing the watermark may have grown since, so start there
+        first_hour = self.bucket_start('hour', watermark.last_updated_at) if watermark.last_updated_at else current_hour
+        first_hour = max(first_hour, oldest_cached)
+        hour_count = int((current_hour - first_hour).total_seconds() // 3600) + 1
+
+        hour_rows = []
+        for metric_name, station_id, artist_id in self.registered_series():
+            is_counter = self.kind(metric_name) == COUNTER
+            for start, value in self.series(metric_name, 'hour', hour_count, station_id, artist_id, end=now):
+                if is_counter and not value:
+                    # Sparse series (most stations, most hours) stay sparse in the DB
+                    continue
+                hour_rows.append(MetricBucket(
+                    metric_name=metric_name,
+                    resolution='hour',
+                    bucket_start=start,
+                    value=value,
+                    station_id=station_id,
+                    artist_id=artist_id,
+                ))
+
+        with transaction.atomic():
+            MetricBucket.objects.bulk_create(
+                hour_rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['metric_name', 'resolution', 'bucket_start', 'station_id', 'artist_id'],
+                update_fields=['value', 'updated_at'],
+            )
+            day_rows = self._downsample_days(
+                {(row.metric_name, row.station_id, row.artist_id) for row in hour_rows},
+                self.bucket_start('day', first_hour),
+                now,
+            )
+            watermark.last_updated_at = now
+            watermark.cells_refreshed += len(hour_rows) + day_rows
+            watermark.last_run_at = timezone.now()
+            watermark.save(update_fields=['last_updated_at', 'cells_refreshed', 'last_run_at', 'updated_at'])
+
+        return {'hour_buckets': len(hour_rows), 'day_buckets': day_rows}
+
+    def _downsample_days(self, series: Iterable[Tuple[str, str, str]], first_day: datetime, now: datetime) -> int:
+        """Counters sum their hours; gauges keep the day's last hourly value"""
+        series = set(series)
+        if not series:
+            return 0
+
+        hours = MetricBucket.objects.filter(
+            resolution='hour',
+            bucket_start__gte=first_day,
+            metric_name__in={name for name, _station, _artist in series},
+        ).order_by('bucket_start')
+
+        totals = defaultdict(Decimal)
+        for row in hours.values('metric_name', 'station_id', 'artist_id', 'bucket_start', 'value'):
+            key = (row['metric_name'], row['station_id'], row['artist_id'])
+            if key not in series:
+                continue
+            day = self.bucket_start('day', row['bucket_start'])
+            if self.kind(row['metric_name']) == COUNTER:
+                totals[key + (day,)] += row['value']
+            else:
+                totals[key + (day,)] = row['value']
+
+        MetricBucket.objects.bulk_create(
+            [
+                MetricBucket(
+                    metric_name=metric_name,
+                    resolution='day',
+                    bucket_start=day,
+                    value=value,
+                    station_id=station_id,
+                    artist_id=artist_id,
+                )
+                for (metric_name, station_id, artist_id, day), value in totals.items()
+            ],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['metric_name', 'resolution', 'bucket_start', 'station_id', 'artist_id'],
+            update_fields=['value', 'updated_at'],
+        )
+        return len(totals)
+
+    def prune(self, hourly_retention_days: Optional[int] = None) -> int:
+        """Drop persisted hour rows past retention; day rows are kept"""
+        days = hourly_retention_days or getattr(settings, 'ANALYTICS_METRIC_HOURLY_RETENTION_DAYS', 35)
+        deleted, _ = MetricBucket.objects.filter(
+            resolution='hour',
+            bucket_start__lt=timezone.now() - timedelta(days=days),
+        ).delete()
+        return deleted
+
+    # Helpers ----------------------------------------------------------------
+
+    @staticmethod
+    def _scale(value) -> int:
+        return int((Decimal(str(value)) * SCALE).to_integral_value(rounding=ROUND_HALF_UP))
+
+    @staticmethod
+    def _unscale(value) -> Decimal:
+        return (Decimal(int(value)) / SCALE).quantize(Decimal('0.0001'))
+
+
+metric_store = MetricTimeSeries()
@@ -13,8 +13,9 @@ from rest_framework import status
 import json
 
 from .services import analytics_aggregator
+from .admin_snapshots import ADMIN_SNAPSHOT_RANGES, admin_snapshots
 from .models import AnalyticsExport, UserAnalyticsPreference
-from .tasks import generate_analytics_export
+from .tasks import generate_analytics_export, refresh_admin_snapshots
 from artists.models import Artist
 from stations.models import Station
 from publishers.models import PublisherProfile
@@ -160,6 +161,24 @@ def admin_analytics(request):
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        # Standard ranges come straight from the materialized snapshot
+        range_preset = request.GET.get('range', '30d')
+        custom_range = request.GET.get('start_date') and request.GET.get('end_date')
+        if not custom_range and range_preset in ADMIN_SNAPSHOT_RANGES:
+            analytics_data = admin_snapshots.get(range_preset)
+            if analytics_data is None:
+                # Not built yet (fresh deploy): queue one refresh rather than
+                # aggregating the platform inside the request
+                if admin_snapshots.claim_cold_start():
+                    refresh_admin_snapshots.delay()
+                analytics_data = admin_snapshots.get(range_preset)
+            if analytics_data is None:
+                return Response(
+                    {'status': 'pending', 'detail': 'Admin analytics are being built; retry shortly'},
+                    status=status.HTTP_202_ACCEPTED
+                )
+            return Response(analytics_data)
+
         # Parse date range
         date_range = parse_date_range(request)
         
@@ -178,7 +178,8 @@ def secure_media_download_view(request, resource_type, resource_id, file_type):
             resource_type=resource_type,
             resource_id=resource_id,
             file_type=file_type,
-            token=token
+            token=token,
+            request=request
         )
         
         return response
@@ -246,7 +247,8 @@ def public_media_download_view(request, resource_type, resource_id, file_type):
             resource_type=resource_type,
             resource_id=resource_id,
             file_type=file_type,
-            token=None
+            token=None,
+            request=request
         )
         
         # Add public cache headers
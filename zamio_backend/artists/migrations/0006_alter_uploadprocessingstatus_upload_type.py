@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0005_alter_track_active'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadprocessingstatus',
+            name='upload_type',
+            field=models.CharField(choices=[('track_audio', 'Track Audio'), ('track_cover', 'Track Cover Art'), ('album_cover', 'Album Cover Art'), ('partner_repertoire', 'Partner Repertoire')], max_length=20),
+        ),
+    ]
@@ -1,6 +1,5 @@
 """Enhanced models for artists with comprehensive media file processing and contributor management"""
 import os
-import hashlib
 from decimal import Decimal
 from django.db import models
 from django.contrib.auth import get_user_model
@@ -13,6 +12,7 @@ from django.conf import settings
 from accounts.models import AuditLog
 from fan.models import Fan
 from publishers.models import PublisherProfile
+from core.services.file_integrity import file_integrity, hash_stream
 from core.utils import unique_artist_id_generator
 
 User = get_user_model()
@@ -140,6 +140,7 @@ class UploadProcessingStatus(models.Model):
         ('track_audio', 'Track Audio'),
         ('track_cover', 'Track Cover Art'),
         ('album_cover', 'Album Cover Art'),
+        ('partner_repertoire', 'Partner Repertoire'),
     ]
     
     upload_id = models.CharField(max_length=64, unique=True, db_index=True)
@@ -415,15 +416,18 @@ class Album(models.Model):
         # Generate cover art hash if not present
         if self.cover_art and not self.cover_art_hash:
             try:
-                self.cover_art.seek(0)
-                file_content = self.cover_art.read()
-                self.cover_art_hash = hashlib.sha256(file_content).hexdigest()
-                self.cover_art.seek(0)
+                self.cover_art_hash = hash_stream(self.cover_art)
             except Exception:
                 pass
         
         super().save(*args, **kwargs)
 
+    def verify_cover_art_integrity(self):
+        """Verify cover art integrity using stored hash"""
+        if not self.cover_art or not self.cover_art_hash:
+            return False
+        return file_integrity.verify(self.cover_art, self.cover_art_hash)
+
 
 class Track(models.Model):
     STATUS_CHOICES = [
@@ -540,15 +544,13 @@ class Track(models.Model):
         """Verify audio file integrity using stored hash"""
         if not self.audio_file or not self.audio_file_hash:
             return False
-        
-        try:
-            self.audio_file.seek(0)
-            file_content = self.audio_file.read()
-            current_hash = hashlib.sha256(file_content).hexdigest()
-            self.audio_file.seek(0)
-            return current_hash == self.audio_file_hash
-        except Exception:
+        return file_integrity.verify(self.audio_file, self.audio_file_hash)
+    
+    def verify_cover_art_integrity(self):
+        """Verify cover art integrity using stored hash"""
+        if not self.cover_art or not self.cover_art_hash:
             return False
+        return file_integrity.verify(self.cover_art, self.cover_art_hash)
     
     def get_contributor_splits_summary(self):
         """Get summary of contributor splits for this track"""
@@ -562,19 +564,13 @@ class Track(models.Model):
         # Generate file hashes if not present
         if self.audio_file and not self.audio_file_hash:
             try:
-                self.audio_file.seek(0)
-                file_content = self.audio_file.read()
-                self.audio_file_hash = hashlib.sha256(file_content).hexdigest()
-                self.audio_file.seek(0)
+                self.audio_file_hash = hash_stream(self.audio_file)
             except Exception:
                 pass
         
         if self.cover_art and not self.cover_art_hash:
             try:
-                self.cover_art.seek(0)
-                file_content = self.cover_art.read()
-                self.cover_art_hash = hashlib.sha256(file_content).hexdigest()
-                self.cover_art.seek(0)
+                self.cover_art_hash = hash_stream(self.cover_art)
             except Exception:
                 pass
         
@@ -0,0 +1,160 @@
+"""
+Single-invocation ffmpeg transcoding for track ingest
+
+Track ingest used to copy the upload to a temp file, run ffmpeg once per
+output format, decode the archival WAV again with librosa, hash both outputs
+by reading them back, and finally read each output fully into memory to hand
+it to storage. ``IngestTranscoder`` replaces all of that with one ffmpeg
+process:
+
+* the upload is streamed from storage into ffmpeg's stdin, so there is no
+  source temp copy;
+* one filter graph splits the decoded audio into the archival WAV, the MP3
+  and a mono 44.1 kHz float32 PCM stream on stdout for fingerprinting and
+  duration (whichever of WAV/MP3 matches the upload is stream-copied rather
+  than re-encoded);
+* the outputs are then streamed to storage through ``HashingFile``, which
+  computes their SHA-256 from the same reads.
+"""
+import hashlib
+import logging
+import os
+import subprocess
+import threading
+from typing import List
+
+import numpy as np
+from django.core.files import File
+
+from core.services.file_integrity import hash_path
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_SAMPLE_RATE = 44100
+CHUNK_SIZE = 1024 * 1024
+
+SUPPORTED_FORMATS = ('.wav', '.mp3')
+
+
+class HashingFile(File):
+    """File that hashes whatever storage reads from it"""
+
+    def __init__(self, file, name=None):
+        super().__init__(file, name)
+        self._reset()
+
+    def _reset(self):
+        self._digest = hashlib.sha256()
+        self.bytes_hashed = 0
+
+    def read(self, *args):
+        data = self.file.read(*args)
+        self._digest.update(data)
+        self.bytes_hashed += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        # Storage backends rewind before they read; the digest starts over with them
+        if offset == 0 and whence == os.SEEK_SET:
+            self._reset()
+        return self.file.seek(offset, whence)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def save_with_digest(field_file, name: str, path: str) -> str:
+    """Stream a local file into ``field_file``'s storage and return its SHA-256"""
+    with open(path, 'rb') as handle:
+        content = HashingFile(handle, name=name)
+        field_file.save(name, content, save=False)
+
+    if content.bytes_hashed != os.path.getsize(path):
+        # The backend did not read the file front to back in one pass
+        return hash_path(path)
+    return content.hexdigest()
+
+
+class IngestTranscoder:
+    """Runs the ingest filter graph for one uploaded track"""
+
+    def __init__(self, ffmpeg: str = 'ffmpeg', mp3_bitrate: str = '192k'):
+        self.ffmpeg = ffmpeg
+        self.mp3_bitrate = mp3_bitrate
+
+    def build_command(self, source_format: str, wav_path: str, mp3_path: str) -> List[str]:
+        if source_format not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported file type: {source_format}")
+
+        graph = (
+            '[0:a]asplit=2[encode][fingerprint];'
+            f'[fingerprint]aformat=sample_fmts=flt:sample_rates={FINGERPRINT_SAMPLE_RATE}'
+            ':channel_layouts=mono[pcm]'
+        )
+        if source_format == '.wav':
+            outputs = [
+                '-map', '0:a', '-c:a', 'copy', '-f', 'wav', wav_path,
+                '-map', '[encode]', '-c:a', 'libmp3lame', '-b:a', self.mp3_bitrate, '-f', 'mp3', mp3_path,
+            ]
+        else:
+            outputs = [
+                '-map', '[encode]', '-ar', '44100', '-ac', '2', '-c:a', 'pcm_s16le', '-f', 'wav', wav_path,
+                '-map', '0:a', '-c:a', 'copy', '-f', 'mp3', mp3_path,
+            ]
+
+        return [
+            self.ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', source_format.lstrip('.'), '-i', 'pipe:0',
+            '-filter_complex', graph,
+            *outputs,
+            '-map', '[pcm]', '-f', 'f32le', 'pipe:1',
+        ]
+
+    def transcode(self, source, source_format: str, wav_path: str, mp3_path: str) -> np.ndarray:
+        """
+        Write the WAV and MP3 renditions of ``source`` (an open binary file)
+        and return its mono float32 samples at ``FINGERPRINT_SAMPLE_RATE``.
+        Raises ``subprocess.CalledProcessError`` if ffmpeg fails.
+        """
+        command = self.build_command(source_format, wav_path, mp3_path)
+        process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+        stderr = bytearray()
+        feeder = threading.Thread(target=self._feed, args=(source, process.stdin), daemon=True)
+        drainer = threading.Thread(target=lambda: stderr.extend(process.stderr.read()), daemon=True)
+        feeder.start()
+        drainer.start()
+
+        pcm = bytearray()
+        for chunk in iter(lambda: process.stdout.read(CHUNK_SIZE), b''):
+            pcm += chunk
+        process.stdout.close()
+
+        returncode = process.wait()
+        feeder.join()
+        drainer.join()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command, stderr=bytes(stderr))
+
+        usable = len(pcm) - len(pcm) % 4
+        return np.frombuffer(pcm, dtype='<f4', count=usable // 4)
+
+    @staticmethod
+    def _feed(source, stdin):
+        try:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            # ffmpeg exited early; its exit status and stderr explain why
+            pass
+        finally:
+            try:
+                stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+
+# Singleton instance
+ingest_transcoder = IngestTranscoder()
@@ -8,11 +8,13 @@ import hashlib
 from typing import Optional, Dict, Any
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.http import HttpResponse, Http404
+from django.http import HttpRequest, HttpResponse, Http404
 from django.core.files.storage import default_storage
 from django.utils import timezone
 from artists.models import Track, Album
-from accounts.models import User, AuditLog
+from accounts.models import User
+from core.services.audit_writer import audit_writer
+from core.services.media_delivery import deliver_file, guess_content_type
 
 
 class MediaAccessService:
@@ -130,7 +132,8 @@ class MediaAccessService:
         resource_type: str,
         resource_id: int,
         file_type: str,  # 'audio', 'cover_art'
-        token: Optional[str] = None
+        token: Optional[str] = None,
+        request: Optional[HttpRequest] = None
     ) -> HttpResponse:
         """
         Serve a media file securely with access controls
@@ -141,9 +144,10 @@ class MediaAccessService:
             resource_id: ID of the resource
             file_type: Type of file to serve ('audio', 'cover_art')
             token: Optional secure token for additional verification
+            request: The HTTP request, for Range and If-None-Match handling
             
         Returns:
-            HttpResponse with file content or error
+            Streaming (or 206 partial / 304) response for the file
             
         Raises:
             Http404: If resource not found
@@ -169,11 +173,13 @@ class MediaAccessService:
                 if file_type == 'audio':
                     file_field = track.audio_file
                     filename = f"{track.title}.{file_field.name.split('.')[-1]}"
-                    content_type = 'audio/mpeg'  # Default, could be detected
+                    content_type = guess_content_type(file_field.name, 'audio/mpeg')
+                    content_hash = track.audio_file_hash
                 elif file_type == 'cover_art':
                     file_field = track.cover_art
                     filename = f"{track.title}_cover.{file_field.name.split('.')[-1]}"
-                    content_type = 'image/jpeg'  # Default, could be detected
+                    content_type = guess_content_type(file_field.name, 'image/jpeg')
+                    content_hash = track.cover_art_hash
                 else:
                     raise Http404("Invalid file type")
                 
@@ -189,7 +195,8 @@ class MediaAccessService:
                 if file_type == 'cover_art':
                     file_field = album.cover_art
                     filename = f"{album.title}_cover.{file_field.name.split('.')[-1]}"
-                    content_type = 'image/jpeg'  # Default, could be detected
+                    content_type = guess_content_type(file_field.name, 'image/jpeg')
+                    content_hash = album.cover_art_hash
                 else:
                     raise Http404("Invalid file type for album")
                 
@@ -235,7 +242,7 @@ class MediaAccessService:
                 'album_active': album.active
             })
         
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action='media_file_access',
             resource_type=resource_type.title(),
@@ -243,15 +250,17 @@ class MediaAccessService:
             request_data=audit_data
         )
         
-        # Serve the file
+        # Stream the file (or the requested byte range) without buffering it
         try:
-            file_content = file_field.read()
-            
-            response = HttpResponse(file_content, content_type=content_type)
+            response = deliver_file(
+                request,
+                file_field,
+                filename,
+                content_type=content_type,
+                content_hash=content_hash
+            )
             
             # Set security headers
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            response['Content-Length'] = len(file_content)
             response['X-Content-Type-Options'] = 'nosniff'
             response['X-Frame-Options'] = 'DENY'
             response['Cache-Control'] = 'private, max-age=3600'  # Cache for 1 hour
@@ -261,12 +270,14 @@ class MediaAccessService:
             if file_type == 'audio':
                 response['Access-Control-Allow-Origin'] = '*'
                 response['Access-Control-Allow-Methods'] = 'GET'
+                response['Access-Control-Allow-Headers'] = 'Range, If-None-Match, If-Range'
+                response['Access-Control-Expose-Headers'] = 'Content-Length, Content-Range, Accept-Ranges, ETag'
             
             return response
             
         except Exception as e:
             # Log the error
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='media_file_access_error',
                 resource_type=resource_type.title(),
@@ -2,7 +2,6 @@
 Enhanced media file service for artists with security and Celery integration
 """
 import os
-import hashlib
 import mimetypes
 import logging
 from typing import Dict, Any, Optional, List
@@ -12,8 +11,10 @@ from django.utils import timezone
 from django.conf import settings
 from django.db import models
 from celery import shared_task
-from accounts.models import AuditLog
 from artists.models import Track, Album
+from core.services.audit_writer import audit_writer
+from core.services.file_integrity import hash_stream
+from core.services.threat_scanner import EXECUTABLE_HEADERS, SIGNATURE_GROUPS, get_scanner
 
 logger = logging.getLogger(__name__)
 
@@ -109,93 +110,23 @@ class MediaFileService:
     @classmethod
     def _validate_file_content(cls, file: UploadedFile, file_type: str, errors: List[str]):
         """Validate file content for security"""
-        file.seek(0)
-        content = file.read(10240)  # Read first 10KB
-        file.seek(0)
+        # For audio/image files, skip script detection as metadata can contain these patterns;
+        # only actual executable code patterns are checked there
+        groups = ('embedded_code',) if file_type in ['audio', 'image'] else ('code_execution',)
+        report = get_scanner(*groups).scan_stream(file, limit=10240)  # First 10KB
         
         # Check for executable headers first
-        if content.startswith(b'MZ') or content.startswith(b'\x7fELF'):
+        if report.executable_type(EXECUTABLE_HEADERS[:2]):
             errors.append('Executable files are not allowed')
             return
         
-        # For audio/image files, skip script detection as metadata can contain these patterns
-        if file_type in ['audio', 'image']:
-            # Only check for actual executable code patterns, not metadata
-            dangerous_patterns = [
-                b'<?php',
-                b'#!/bin/sh',
-                b'#!/bin/bash',
-                b'#!/usr/bin/python',
-                b'powershell.exe',
-                b'cmd.exe /c',
-            ]
-            
-            content_lower = content.lower()
-            for pattern in dangerous_patterns:
-                if pattern in content_lower:
-                    errors.append(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
-            return
-        
-        # For other file types, do full malware pattern check
-        malware_patterns = [
-            b'eval(', b'exec(', b'system(', b'shell_exec(',
-            b'<script', b'javascript:', b'vbscript:',
-            b'<?php', b'<%', b'#!/bin/sh', b'#!/bin/bash'
-        ]
-        
-        content_lower = content.lower()
-        for pattern in malware_patterns:
-            if pattern in content_lower:
-                errors.append(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
-        
-        # Validate image files
-        if file_type == 'image':
-            try:
-                from PIL import Image
-                file.seek(0)
-                img = Image.open(file)
-                img.verify()
-                file.seek(0)
-                
-                # Check image dimensions (reasonable limits)
-                if hasattr(img, 'size'):
-                    width, height = img.size
-                    if width > 5000 or height > 5000:
-                        errors.append('Image dimensions too large (max 5000x5000)')
-                        
-            except Exception as e:
-                errors.append(f'Invalid image file: {str(e)}')
-        
-        # Validate audio files (basic checks)
-        elif file_type == 'audio':
-            # Check for common audio file signatures
-            audio_signatures = {
-                b'ID3': 'MP3',
-                b'\xff\xfb': 'MP3',
-                b'\xff\xf3': 'MP3',
-                b'\xff\xf2': 'MP3',
-                b'RIFF': 'WAV',
-                b'fLaC': 'FLAC',
-                b'OggS': 'OGG'
-            }
-            
-            valid_signature = False
-            for signature, format_name in audio_signatures.items():
-                if content.startswith(signature) or signature in content[:100]:
-                    valid_signature = True
-                    break
-            
-            if not valid_signature:
-                errors.append('Invalid audio file format or corrupted file')
+        for pattern, _description in report.threats():
+            errors.append(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
     
     @classmethod
     def calculate_file_hash(cls, file: UploadedFile) -> str:
         """Calculate SHA-256 hash of file content"""
-        file.seek(0)
-        file_content = file.read()
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        file.seek(0)
-        return file_hash
+        return hash_stream(file)
     
     @classmethod
     def initiate_media_upload(
@@ -320,7 +251,7 @@ class MediaFileService:
             )
         
         # Log the upload initiation
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action='media_upload_initiated',
             resource_type=entity_type,
@@ -427,7 +358,7 @@ class MediaFileService:
         )
         
         # Log the upload
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action='track_upload',
             resource_type='Track',
@@ -532,94 +463,47 @@ class MediaFileService:
             file_size = os.path.getsize(file_path)
             scan_result['scan_details']['file_size'] = file_size
             
+            deep_scan = file_size > 1024 * 1024  # Files larger than 1MB
+            scanner = get_scanner('code_execution', 'media_metadata')
             with open(file_path, 'rb') as f:
-                # Read more content for thorough scanning
-                initial_content = f.read(50 * 1024)  # First 50KB
-                f.seek(-min(10 * 1024, file_size), 2)  # Last 10KB
-                final_content = f.read()
-                
-                # Combine content for analysis
-                content_to_scan = initial_content + final_content
-                content_lower = content_to_scan.lower()
-                
-                # Enhanced script detection patterns
-                script_patterns = [
-                    (b'<script', 'HTML script tag'),
-                    (b'javascript:', 'JavaScript protocol'),
-                    (b'vbscript:', 'VBScript protocol'),
-                    (b'eval(', 'JavaScript eval function'),
-                    (b'exec(', 'Code execution function'),
-                    (b'system(', 'System command execution'),
-                    (b'shell_exec(', 'Shell execution function'),
-                    (b'<?php', 'PHP code block'),
-                    (b'<%', 'Server-side script tag'),
-                    (b'#!/bin/sh', 'Shell script shebang'),
-                    (b'#!/bin/bash', 'Bash script shebang'),
-                    (b'powershell', 'PowerShell command'),
-                    (b'cmd.exe', 'Windows command prompt'),
-                    (b'CreateObject(', 'ActiveX object creation'),
-                    (b'WScript.Shell', 'Windows Script Host'),
-                ]
-                
-                scan_result['scan_details']['signatures_checked'] = len(script_patterns)
-                
-                for pattern, description in script_patterns:
-                    if pattern in content_lower:
-                        scan_result['is_safe'] = False
-                        scan_result['threats_found'].append(f'{description}: {pattern.decode("utf-8", errors="ignore")}')
-                
-                # Enhanced executable detection
-                executable_signatures = [
-                    (b'MZ', 'Windows PE executable'),
-                    (b'\x7fELF', 'Linux ELF executable'),
-                    (b'\xca\xfe\xba\xbe', 'Java class file'),
-                    (b'\xfe\xed\xfa\xce', 'Mach-O executable'),
-                    (b'\xfe\xed\xfa\xcf', 'Mach-O 64-bit executable'),
-                    (b'PK\x03\x04', 'ZIP archive (potential executable)'),
-                ]
-                
-                for signature, description in executable_signatures:
-                    if content_to_scan.startswith(signature):
-                        scan_result['is_safe'] = False
-                        scan_result['threats_found'].append(f'{description} detected')
-                
-                # Check for suspicious metadata and embedded content
-                suspicious_patterns = [
-                    (b'<metadata>', 'Suspicious metadata tag'),
-                    (b'<script>', 'Script in metadata'),
-                    (b'javascript', 'JavaScript reference'),
-                    (b'onload=', 'Event handler'),
-                    (b'onerror=', 'Error handler'),
-                    (b'document.write', 'DOM manipulation'),
-                    (b'window.location', 'Location redirect'),
-                    (b'XMLHttpRequest', 'AJAX request'),
-                    (b'ActiveXObject', 'ActiveX object'),
-                    (b'WScript', 'Windows Script Host'),
-                    (b'Shell.Application', 'Shell application'),
-                    (b'ADODB.Stream', 'ADO stream object'),
-                ]
-                
-                for pattern, description in suspicious_patterns:
-                    if pattern in content_lower:
-                        scan_result['is_safe'] = False
-                        scan_result['threats_found'].append(f'{description}: {pattern.decode("utf-8", errors="ignore")}')
-                
-                # Deep scan for larger files
-                if file_size > 1024 * 1024:  # Files larger than 1MB
-                    scan_result['scan_details']['deep_scan_performed'] = True
-                    cls._perform_deep_malware_scan(f, scan_result)
-                
-                # Detect file type for additional validation
-                if content_to_scan.startswith(b'ID3') or b'\xff\xfb' in content_to_scan[:100]:
-                    scan_result['scan_details']['file_type'] = 'MP3'
-                elif content_to_scan.startswith(b'RIFF'):
-                    scan_result['scan_details']['file_type'] = 'WAV'
-                elif content_to_scan.startswith(b'fLaC'):
-                    scan_result['scan_details']['file_type'] = 'FLAC'
-                elif content_to_scan.startswith(b'\xff\xd8\xff'):
-                    scan_result['scan_details']['file_type'] = 'JPEG'
-                elif content_to_scan.startswith(b'\x89PNG'):
-                    scan_result['scan_details']['file_type'] = 'PNG'
+                # Script and metadata patterns only matter in the first 50KB and
+                # last 10KB, where tags and metadata live; read nothing in between
+                report = scanner.scan_sampled(f, head=50 * 1024, tail=10 * 1024, size=file_size)
+                # Shellcode and eval() counts still need every byte of larger files
+                deep_report = get_scanner('shellcode', 'obfuscation').scan_stream(f) if deep_scan else None
+            
+            script_patterns = SIGNATURE_GROUPS['code_execution']
+            suspicious_patterns = SIGNATURE_GROUPS['media_metadata']
+            scan_result['scan_details']['signatures_checked'] = len(scanner.signatures)
+            scan_result['scan_details']['entropy'] = round((deep_report or report).entropy, 3)
+            
+            for pattern, description in report.threats(script_patterns) + report.threats(suspicious_patterns):
+                scan_result['is_safe'] = False
+                scan_result['threats_found'].append(f'{description}: {pattern.decode("utf-8", errors="ignore")}')
+            
+            # Enhanced executable detection
+            executable_type = report.executable_type()
+            if executable_type:
+                scan_result['is_safe'] = False
+                scan_result['threats_found'].append(f'{executable_type} detected')
+            
+            # Deep scan for larger files
+            if deep_scan:
+                scan_result['scan_details']['deep_scan_performed'] = True
+                cls._perform_deep_malware_scan(deep_report, scan_result)
+            
+            # Detect file type for additional validation
+            header = report.header
+            if header.startswith(b'ID3') or b'\xff\xfb' in header[:100]:
+                scan_result['scan_details']['file_type'] = 'MP3'
+            elif header.startswith(b'RIFF'):
+                scan_result['scan_details']['file_type'] = 'WAV'
+            elif header.startswith(b'fLaC'):
+                scan_result['scan_details']['file_type'] = 'FLAC'
+            elif header.startswith(b'\xff\xd8\xff'):
+                scan_result['scan_details']['file_type'] = 'JPEG'
+            elif header.startswith(b'\x89PNG'):
+                scan_result['scan_details']['file_type'] = 'PNG'
                 
         except Exception as e:
             scan_result['is_safe'] = False
@@ -628,40 +512,17 @@ class MediaFileService:
         return scan_result
     
     @classmethod
-    def _perform_deep_malware_scan(cls, file_handle, scan_result: Dict[str, Any]):
-        """Perform deep malware scan for larger files"""
-        try:
-            # Scan file in chunks
-            chunk_size = 64 * 1024  # 64KB chunks
-            file_handle.seek(0)
-            
-            suspicious_byte_sequences = [
-                b'\x90\x90\x90\x90',  # NOP sled
-                b'\xcc\xcc\xcc\xcc',  # INT3 instructions
-                b'\x31\xc0\x50\x68',  # Common shellcode pattern
-                b'\x6a\x0b\x58\x99',  # Another shellcode pattern
-            ]
-            
-            while True:
-                chunk = file_handle.read(chunk_size)
-                if not chunk:
-                    break
-                
-                chunk_lower = chunk.lower()
-                
-                # Check for shellcode patterns
-                for pattern in suspicious_byte_sequences:
-                    if pattern in chunk:
-                        scan_result['is_safe'] = False
-                        scan_result['threats_found'].append(f'Suspicious byte sequence detected: {pattern.hex()}')
-                
-                # Check for repeated suspicious strings
-                if b'eval' in chunk_lower and chunk_lower.count(b'eval') > 5:
-                    scan_result['is_safe'] = False
-                    scan_result['threats_found'].append('Multiple eval() calls detected (potential obfuscation)')
-                
-        except Exception as e:
-            scan_result['threats_found'].append(f'Deep scan error: {str(e)}')
+    def _perform_deep_malware_scan(cls, report, scan_result: Dict[str, Any]):
+        """Apply findings from the whole-file shellcode and obfuscation scan of a larger file"""
+        # Check for shellcode patterns
+        for pattern, _description in report.threats(SIGNATURE_GROUPS['shellcode']):
+            scan_result['is_safe'] = False
+            scan_result['threats_found'].append(f'Suspicious byte sequence detected: {pattern.hex()}')
+        
+        # Check for repeated suspicious strings
+        if report.counts.get(b'eval(', 0) > 5:
+            scan_result['is_safe'] = False
+            scan_result['threats_found'].append('Multiple eval() calls detected (potential obfuscation)')
     
     @classmethod
     def quarantine_media_file(cls, track: Track, reason: str) -> bool:
@@ -683,7 +544,7 @@ class MediaFileService:
             track.save()
             
             # Log quarantine action
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=track.artist.user,
                 action='media_file_quarantined',
                 resource_type='Track',
@@ -719,7 +580,7 @@ def process_track_media(self, track_id: int):
         result = MediaFileService._process_track_media_sync(track)
         
         # Log the processing completion
-        AuditLog.objects.create(
+        audit_writer.log(
             user=track.artist.user,
             action='track_processing_completed',
             resource_type='Track',
@@ -840,7 +701,7 @@ def scan_media_files_for_malware():
             scan_results['threats_found'] += 1
             
             # Log security threat
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=track.artist.user,
                 action='malware_detected',
                 resource_type='Track',
@@ -887,7 +748,7 @@ def scan_media_files_for_malware():
                     scan_results['threats_found'] += 1
                     
                     # Log security threat for album
-                    AuditLog.objects.create(
+                    audit_writer.log(
                         user=album.artist.user,
                         action='malware_detected',
                         resource_type='Album',
@@ -919,7 +780,7 @@ def scan_media_files_for_malware():
         scan_results['total_scanned'] += 1
     
     # Log scan completion
-    AuditLog.objects.create(
+    audit_writer.log(
         user=None,  # System task
         action='malware_scan_completed',
         resource_type='System',
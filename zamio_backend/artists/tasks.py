@@ -1,16 +1,16 @@
 """
 Celery tasks for artist-related background processing with non-blocking upload processing
 """
+import logging
 import os
 import subprocess
 import shutil
 import uuid
-import hashlib
 from datetime import timedelta
 from decimal import Decimal
+from itertools import islice
 from typing import Dict, Any, List
 
-import librosa
 from celery import shared_task
 from django.conf import settings
 from django.core.files.base import ContentFile
@@ -19,10 +19,18 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from artists.models import Track, Fingerprint, UploadProcessingStatus, Contributor, Album
-from accounts.models import AuditLog
+from artists.services.ingest_transcoder import (
+    FINGERPRINT_SAMPLE_RATE,
+    SUPPORTED_FORMATS,
+    ingest_transcoder,
+    save_with_digest,
+)
 from artists.utils.fingerprint_tracks import simple_fingerprint
+from core.services.audit_writer import audit_writer
+from core.services.file_integrity import file_integrity, hash_path
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 def _handle_processing_error(upload_id: str, track_id: int, user_id: int, error_msg: str, error_type: str) -> Dict[str, Any]:
@@ -43,7 +51,7 @@ def _handle_processing_error(upload_id: str, track_id: int, user_id: int, error_
         track.save(update_fields=['processing_status', 'processing_error', 'processed_at', 'fingerprinted'])
         
         # Create audit log
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action="track_processing_failed",
             resource_type="track",
@@ -76,7 +84,7 @@ def process_track_upload(
     """
     Process uploaded track file in background with progress tracking.
     """
-    source_temp_path = wav_path = mp3_path = None
+    wav_path = mp3_path = None
     try:
         status = UploadProcessingStatus.objects.get(upload_id=upload_id)
         status.mark_started()
@@ -91,65 +99,41 @@ def process_track_upload(
         ext = os.path.splitext(original_filename)[1].lower()
         if not ext:
             ext = os.path.splitext(source_file_path)[1].lower()
+        if ext not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported file type: {ext}")
         base = uuid.uuid4().hex
         temp_dir = os.path.join(settings.MEDIA_ROOT, "temp")
         os.makedirs(temp_dir, exist_ok=True)
 
-        source_suffix = ext if ext else ".upload"
-        source_temp_path = os.path.join(temp_dir, f"{base}_source{source_suffix}")
-        try:
-            with default_storage.open(source_file_path, "rb") as stored_file, open(source_temp_path, "wb") as temp_file:
-                shutil.copyfileobj(stored_file, temp_file)
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Stored upload {source_file_path} could not be located for processing")
-
         wav_path = os.path.join(temp_dir, f"{base}.wav")
         mp3_path = os.path.join(temp_dir, f"{base}.mp3")
 
         status.update_progress(30, "Converting audio formats")
 
-        # Convert audio formats with FFmpeg
-        if ext == ".mp3":
-            subprocess.run(
-                ["ffmpeg", "-i", source_temp_path, "-ar", "44100", "-ac", "2", wav_path],
-                check=True,
-                capture_output=True,
-            )
-            shutil.copyfile(source_temp_path, mp3_path)
-        elif ext == ".wav":
-            subprocess.run(
-                ["ffmpeg", "-i", source_temp_path, "-b:a", "192k", mp3_path],
-                check=True,
-                capture_output=True,
-            )
-            shutil.copyfile(source_temp_path, wav_path)
-        else:
-            raise ValueError(f"Unsupported file type: {ext}")
+        # One ffmpeg pass reads the upload straight from storage and writes
+        # both renditions plus the PCM used for fingerprinting
+        try:
+            stored_file = default_storage.open(source_file_path, "rb")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Stored upload {source_file_path} could not be located for processing")
+        with stored_file:
+            samples = ingest_transcoder.transcode(stored_file, ext, wav_path, mp3_path)
+        sr = FINGERPRINT_SAMPLE_RATE
 
         status.update_progress(50, "Extracting audio features")
 
-        # Extract audio features
-        samples, sr = librosa.load(wav_path, sr=None)
-        duration = librosa.get_duration(y=samples, sr=sr)
+        duration = len(samples) / sr
         track.duration = timedelta(seconds=round(duration))
 
         status.update_progress(60, "Generating fingerprints")
         fingerprints = simple_fingerprint(samples, sr, plot=False)
-
-        status.update_progress(70, "Calculating file hashes")
-
-        def file_hash(path):
-            with open(path, "rb") as f:
-                return hashlib.sha256(f.read()).hexdigest()
-
-        wav_hash = file_hash(wav_path)
-        mp3_hash = file_hash(mp3_path)
+        del samples
 
         status.update_progress(80, "Saving audio files")
 
-        with open(wav_path, "rb") as wav_file, open(mp3_path, "rb") as mp3_file:
-            track.audio_file_wav.save(f"{base}.wav", ContentFile(wav_file.read()), save=False)
-            track.audio_file_mp3.save(f"{base}.mp3", ContentFile(mp3_file.read()), save=False)
+        # Hashes are computed from the same reads that stream the files to storage
+        wav_hash = save_with_digest(track.audio_file_wav, f"{base}.wav", wav_path)
+        mp3_hash = save_with_digest(track.audio_file_mp3, f"{base}.mp3", mp3_path)
 
         track.audio_file_hash = wav_hash
         track.fingerprinted = True
@@ -182,7 +166,7 @@ def process_track_upload(
         status.mark_completed(entity_id=track.id, entity_type='track')
 
         # Audit log
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action="track_processed",
             resource_type="track",
@@ -196,6 +180,7 @@ def process_track_upload(
                 "duration_seconds": float(track.duration.total_seconds()) if track.duration else 0,
                 "fingerprints_created": len(fingerprints),
                 "file_hash": wav_hash,
+                "mp3_hash": mp3_hash,
             },
             status_code=200,
         )
@@ -223,7 +208,7 @@ def process_track_upload(
 
     finally:
         # Clean up temporary files
-        for path in [source_temp_path, wav_path, mp3_path]:
+        for path in [wav_path, mp3_path]:
             if path and os.path.exists(path):
                 try:
                     os.remove(path)
@@ -262,7 +247,7 @@ def update_contributor_splits(self, track_id: int, contributors_data: list, user
             for c in contributors_data
         ]
 
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action="contributor_splits_updated",
             resource_type="track",
@@ -365,8 +350,7 @@ def process_cover_art_upload(
         status.update_progress(70, "Calculating file hash")
 
         # Calculate file hash
-        with open(optimized_path, "rb") as f:
-            file_hash = hashlib.sha256(f.read()).hexdigest()
+        file_hash = hash_path(optimized_path)
 
         status.update_progress(80, "Saving cover art")
 
@@ -385,7 +369,7 @@ def process_cover_art_upload(
         status.mark_completed(entity_id=track.id, entity_type='track')
 
         # Audit log
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action="cover_art_processed",
             resource_type="track",
@@ -434,6 +418,83 @@ def process_cover_art_upload(
                 pass
 
 
+def _media_integrity_entries():
+    """(key, stored file, expected hash) for every hashed track and album file"""
+    tracks = Track.objects.exclude(audio_file_hash__isnull=True, cover_art_hash__isnull=True).only(
+        'id', 'audio_file', 'audio_file_wav', 'audio_file_hash', 'cover_art', 'cover_art_hash'
+    )
+    for track in tracks.iterator(chunk_size=500):
+        # Processed uploads record the hash of the WAV master they produce
+        audio = track.audio_file_wav or track.audio_file
+        if audio and track.audio_file_hash:
+            yield ('track', track.id, 'audio'), audio, track.audio_file_hash
+        if track.cover_art and track.cover_art_hash:
+            yield ('track', track.id, 'cover_art'), track.cover_art, track.cover_art_hash
+
+    albums = Album.objects.exclude(cover_art_hash__isnull=True).only('id', 'cover_art', 'cover_art_hash')
+    for album in albums.iterator(chunk_size=500):
+        if album.cover_art and album.cover_art_hash:
+            yield ('album', album.id, 'cover_art'), album.cover_art, album.cover_art_hash
+
+
+@shared_task(bind=True, max_retries=2)
+def verify_media_file_integrity(self) -> Dict[str, Any]:
+    """
+    Re-verify stored track and album media against their recorded hashes.
+
+    Files whose size, mtime and inode are unchanged since they were last hashed
+    are skipped; the rest are hashed in a worker pool, one batch at a time.
+    """
+    try:
+        batch_size = getattr(settings, 'FILE_INTEGRITY_SWEEP_BATCH_SIZE', 500)
+        totals: Dict[str, Any] = {}
+        failures = []
+
+        entries = _media_integrity_entries()
+        while True:
+            batch = list(islice(entries, batch_size))
+            if not batch:
+                break
+            report = file_integrity.verify_batch(batch)
+            for key, value in report['metrics'].items():
+                if key != 'workers':
+                    totals[key] = totals.get(key, 0) + value
+            totals['workers'] = report['metrics']['workers']
+            failures.extend(
+                (key, result) for key, result in report['results'].items() if result != 'verified'
+            )
+
+        for (resource_type, resource_id, file_kind), result in failures:
+            logger.warning(f"Media integrity check {result} for {resource_type} {resource_id} {file_kind}")
+            audit_writer.log(
+                user=None,
+                action="media_integrity_failure",
+                resource_type=resource_type,
+                resource_id=str(resource_id),
+                request_data={
+                    "file": file_kind,
+                    "result": result,
+                    "check_timestamp": timezone.now().isoformat(),
+                },
+            )
+
+        if totals.get('elapsed_seconds'):
+            totals['mb_per_second'] = round(
+                totals['bytes_hashed'] / (1024 * 1024) / totals['elapsed_seconds'], 2
+            )
+        return {
+            "success": True,
+            "metrics": totals,
+            "failures": len(failures),
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+        }
+
+
 @shared_task(bind=True, max_retries=2)
 def cleanup_failed_uploads(self) -> Dict[str, Any]:
     """
@@ -631,7 +692,7 @@ def delete_upload_artifacts(self, upload_id: str, user_id: int) -> Dict[str, Any
             ]
         )
 
-        AuditLog.objects.create(
+        audit_writer.log(
             user_id=user_id,
             action="upload_deletion_completed",
             resource_type="upload",
@@ -666,7 +727,7 @@ def delete_upload_artifacts(self, upload_id: str, user_id: int) -> Dict[str, Any
         except UploadProcessingStatus.DoesNotExist:
             pass
 
-        AuditLog.objects.create(
+        audit_writer.log(
             user_id=user_id,
             action="upload_deletion_failed",
             resource_type="upload",
@@ -693,7 +754,7 @@ def delete_track_record(self, track_id: int, user_id: int) -> Dict[str, Any]:
 
         deletion_summary = _delete_track_resources(track)
 
-        AuditLog.objects.create(
+        audit_writer.log(
             user_id=user_id,
             action="track_deletion_completed",
             resource_type="track",
@@ -712,7 +773,7 @@ def delete_track_record(self, track_id: int, user_id: int) -> Dict[str, Any]:
     except Exception as exc:
         summary["error"] = str(exc)
 
-        AuditLog.objects.create(
+        audit_writer.log(
             user_id=user_id,
             action="track_deletion_failed",
             resource_type="track",
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from accounts.models import AuditLog, FileDigest, User
+from artists.models import Artist, Track
+from artists.tasks import verify_media_file_integrity
+from core.services.file_integrity import file_integrity, hash_path, hash_stream
+
+
+class FileIntegrityServiceTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.files = {}
+        for index in range(3):
+            content = os.urandom(4096 + index)
+            path = os.path.join(self.directory, f"file{index}.bin")
+            with open(path, 'wb') as handle:
+                handle.write(content)
+            self.files[path] = hashlib.sha256(content).hexdigest()
+
+    def test_chunked_and_mapped_hashing_match_sha256(self):
+        path, expected = next(iter(self.files.items()))
+
+        self.assertEqual(hash_path(path, chunk_size=100), expected)
+        self.assertEqual(hash_path(path, mmap_threshold=1), expected)
+        with open(path, 'rb') as handle:
+            self.assertEqual(hash_stream(handle, chunk_size=100), expected)
+            self.assertEqual(handle.tell(), 0)
+
+    def test_batch_skips_unchanged_files_and_rehashes_modified_ones(self):
+        entries = [(path, path, digest) for path, digest in self.files.items()]
+
+        first = file_integrity.verify_batch(entries, workers=2)
+        self.assertEqual(set(first['results'].values()), {'verified'})
+        self.assertEqual(first['metrics']['hashed'], 3)
+        self.assertEqual(first['metrics']['bytes_hashed'], 3 * 4096 + 3)
+        self.assertEqual(FileDigest.objects.count(), 3)
+
+        tampered, missing = list(self.files)[:2]
+        with open(tampered, 'ab') as handle:
+            handle.write(b'tampered')
+        os.remove(missing)
+
+        second = file_integrity.verify_batch(entries, workers=1)
+        self.assertEqual(second['metrics']['memo_hits'], 1)
+        self.assertEqual(second['metrics']['hashed'], 1)
+        self.assertEqual(second['results'][tampered], 'mismatch')
+        self.assertEqual(second['results'][missing], 'missing')
+        self.assertEqual(second['metrics']['verified'], 1)
+
+    def test_memoised_digest_is_ignored_once_the_file_changes(self):
+        path, expected = next(iter(self.files.items()))
+        self.assertTrue(file_integrity.verify(path, expected))
+
+        with open(path, 'r+b') as handle:
+            handle.write(b'\x00' * 16)
+        os.utime(path, ns=(0, 0))
+
+        self.assertFalse(file_integrity.verify(path, expected))
+
+
+class MediaIntegritySweepTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = User.objects.create_user(email='integrity-artist@example.com', password='testpass123')
+        artist = Artist.objects.create(user=user, stage_name='Integrity Artist', artist_id='INT1')
+        self.tracks = [
+            Track.objects.create(
+                artist=artist,
+                title=f"Integrity Song {index}",
+                audio_file=ContentFile(os.urandom(2048), name=f"integrity{index}.mp3")
+            )
+            for index in range(2)
+        ]
+
+    def test_sweep_reports_metrics_and_audits_corrupted_media(self):
+        with open(self.tracks[1].audio_file.path, 'ab') as handle:
+            handle.write(b'corrupted')
+
+        result = verify_media_file_integrity.apply().get()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['failures'], 1)
+        self.assertEqual(result['metrics']['files'], 2)
+        self.assertEqual(result['metrics']['verified'], 1)
+        self.assertEqual(result['metrics']['mismatched'], 1)
+        failure = AuditLog.objects.get(action='media_integrity_failure')
+        self.assertEqual(failure.resource_id, str(self.tracks[1].id))
+        self.assertEqual(failure.request_data['result'], 'mismatch')
+
+        # Unchanged files are confirmed from the memo on the next sweep
+        rerun = verify_media_file_integrity.apply().get()
+        self.assertEqual(rerun['metrics']['memo_hits'], 2)
+        self.assertEqual(rerun['metrics']['bytes_hashed'], 0)
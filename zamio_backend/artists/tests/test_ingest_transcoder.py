@@ -0,0 +1,70 @@
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from artists.services.ingest_transcoder import IngestTranscoder, save_with_digest
+
+
+class IngestTranscoderCommandTests(SimpleTestCase):
+    def setUp(self):
+        self.transcoder = IngestTranscoder()
+
+    def test_wav_upload_is_copied_and_encoded_in_one_process(self):
+        command = self.transcoder.build_command('.wav', '/tmp/out.wav', '/tmp/out.mp3')
+
+        self.assertEqual(command[0], 'ffmpeg')
+        self.assertEqual(command.count('-i'), 1)
+        self.assertIn('pipe:0', command)
+        wav_output = command[:command.index('/tmp/out.wav')]
+        self.assertEqual(wav_output[-6:], ['-map', '0:a', '-c:a', 'copy', '-f', 'wav'])
+        self.assertIn('libmp3lame', command)
+        self.assertEqual(command[-5:], ['-map', '[pcm]', '-f', 'f32le', 'pipe:1'])
+
+    def test_mp3_upload_is_copied_and_decoded_to_wav(self):
+        command = self.transcoder.build_command('.mp3', '/tmp/out.wav', '/tmp/out.mp3')
+
+        mp3_output = command[command.index('/tmp/out.wav') + 1:command.index('/tmp/out.mp3')]
+        self.assertEqual(mp3_output[:4], ['-map', '0:a', '-c:a', 'copy'])
+        self.assertNotIn('libmp3lame', command)
+        graph = command[command.index('-filter_complex') + 1]
+        self.assertIn('sample_rates=44100:channel_layouts=mono', graph)
+
+    def test_unsupported_formats_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Unsupported file type: .flac'):
+            self.transcoder.build_command('.flac', 'out.wav', 'out.mp3')
+
+    def test_failed_transcode_raises_called_process_error(self):
+        transcoder = IngestTranscoder(ffmpeg=shutil.which('false') or '/bin/false')
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            transcoder.transcode(io.BytesIO(b'\x00' * 4 * 1024 * 1024), '.wav', 'out.wav', 'out.mp3')
+
+
+class SaveWithDigestTests(SimpleTestCase):
+    def test_file_is_hashed_while_it_is_stored(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        storage = FileSystemStorage(location=os.path.join(directory, 'media'))
+        content = os.urandom(3 * 1024 * 1024 + 17)
+        source = os.path.join(directory, 'render.wav')
+        with open(source, 'wb') as handle:
+            handle.write(content)
+
+        class FieldFile:
+            name = None
+
+            def save(self, name, file, save=True):
+                self.name = storage.save(name, file)
+
+        field_file = FieldFile()
+        digest = save_with_digest(field_file, 'render.wav', source)
+
+        self.assertEqual(digest, hashlib.sha256(content).hexdigest())
+        with storage.open(field_file.name, 'rb') as stored:
+            self.assertEqual(stored.read(), content)
@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, TestCase, override_settings
+
+from accounts.models import User
+from artists.models import Artist, Track
+from artists.services.media_access_service import MediaAccessService
+from core.services.media_delivery import UNSATISFIABLE, parse_range_header
+
+
+class RangeHeaderTests(TestCase):
+    def test_parses_single_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range_header('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=990-2000', 1000), (990, 999))
+
+    def test_falls_back_to_full_file_or_rejects_out_of_bounds(self):
+        self.assertIsNone(parse_range_header(None, 1000))
+        self.assertIsNone(parse_range_header('bytes=0-1,5-9', 1000))
+        self.assertIsNone(parse_range_header('items=0-1', 1000))
+        self.assertEqual(parse_range_header('bytes=1000-', 1000), UNSATISFIABLE)
+
+
+class SecureMediaDeliveryTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, SECURE_MEDIA_CHUNK_SIZE=4)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='delivery-artist@example.com', password='testpass123')
+        artist = Artist.objects.create(user=self.user, stage_name='Delivery Artist', artist_id='DLV1')
+        self.content = bytes(range(256)) * 4
+        self.track = Track.objects.create(
+            artist=artist,
+            title='Delivery Song',
+            audio_file=ContentFile(self.content, name='delivery.mp3')
+        )
+        self.factory = RequestFactory()
+
+    def _serve(self, **headers):
+        request = self.factory.get('/media/', **headers)
+        return MediaAccessService.serve_secure_media_file(
+            user=self.user, resource_type='track', resource_id=self.track.id, file_type='audio', request=request
+        )
+
+    def test_full_download_streams_in_chunks(self):
+        response = self._serve()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Delivery Song.mp3"')
+        chunks = list(response.streaming_content)
+        self.assertEqual(b''.join(chunks), self.content)
+        self.assertEqual(max(len(chunk) for chunk in chunks), 4)
+
+    def test_range_request_returns_partial_content(self):
+        response = self._serve(HTTP_RANGE='bytes=100-109')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f"bytes 100-109/{len(self.content)}")
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:110])
+
+    def test_unsatisfiable_range_is_rejected(self):
+        response = self._serve(HTTP_RANGE=f"bytes={len(self.content)}-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f"bytes */{len(self.content)}")
+
+    def test_etag_revalidation_and_if_range(self):
+        etag = self._serve()['ETag']
+        self.assertEqual(etag, f'"{self.track.audio_file_hash[:32]}"')
+
+        self.assertEqual(self._serve(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self._serve(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        self.assertEqual(self._serve(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"').status_code, 200)
+
+    @override_settings(SECURE_MEDIA_OFFLOAD='x-accel-redirect', SECURE_MEDIA_ACCEL_PREFIX='/protected/')
+    def test_offload_hands_the_file_to_the_front_end_server(self):
+        response = self._serve(HTTP_RANGE='bytes=0-9')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f"/protected/{self.track.audio_file.name}")
+        self.assertEqual(response.content, b'')
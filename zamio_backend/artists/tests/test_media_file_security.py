@@ -10,6 +10,7 @@ from django.contrib.auth import get_user_model
 from artists.models import Track, Album, Artist, Genre
 from artists.services.media_file_service import MediaFileService
 from artists.services.media_access_service import MediaAccessService
+from core.services.threat_scanner import get_scanner
 
 User = get_user_model()
 
@@ -196,6 +197,64 @@ class MediaFileServiceTestCase(TestCase):
             os.unlink(temp_file_path)
 
 
+class ThreatScannerTestCase(TestCase):
+    """Test the shared single-pass threat scanner"""
+    
+    def test_finds_overlapping_signatures_case_insensitively(self):
+        report = get_scanner('code_execution', 'script_tags').scan_bytes(b'<SCRIPT>Eval(x)</script>')
+        
+        self.assertTrue(report.matched(b'<script'))
+        self.assertTrue(report.matched(b'<script>'))
+        self.assertEqual(report.counts[b'eval('], 1)
+        self.assertFalse(report.matched(b'<?php'))
+    
+    def test_matches_across_chunk_boundaries_are_counted_once(self):
+        import io
+        data = b'x' * 100 + b'<?php system("id"); ?>' + b'y' * 100
+        scanner = get_scanner('code_execution')
+        
+        for chunk_size in (3, 7, 64, 1024):
+            report = scanner.scan_stream(io.BytesIO(data), chunk_size=chunk_size)
+            self.assertEqual(report.counts, {b'<?php': 1, b'system(': 1}, chunk_size)
+            self.assertEqual(report.first_offset[b'<?php'], 100)
+            self.assertEqual(report.bytes_scanned, len(data))
+    
+    def test_reports_entropy_and_executable_header_from_the_same_pass(self):
+        import io
+        scanner = get_scanner('code_execution')
+        
+        self.assertEqual(scanner.scan_bytes(b'a' * 1000).entropy, 0.0)
+        self.assertAlmostEqual(scanner.scan_stream(io.BytesIO(bytes(range(256)) * 8), chunk_size=100).entropy, 8.0)
+        self.assertEqual(scanner.scan_bytes(b'MZ\x90\x00').executable_type(), 'Windows PE executable')
+
+    def test_sampled_scan_reads_only_the_head_and_tail_windows(self):
+        import io
+        data = b'<?php' + b'x' * 1000 + b'system(' + b'y' * 1000 + b'eval('
+        scanner = get_scanner('code_execution')
+
+        report = scanner.scan_sampled(io.BytesIO(data), head=100, tail=100, chunk_size=7)
+
+        self.assertEqual(report.counts, {b'<?php': 1, b'eval(': 1})
+        self.assertEqual(report.first_offset[b'eval('], len(data) - 5)
+        self.assertEqual(report.bytes_scanned, 200)
+        self.assertEqual(scanner.scan_sampled(io.BytesIO(data), head=2000, tail=100).bytes_scanned, len(data))
+
+    def test_deep_scan_checks_the_whole_file_but_scripts_only_in_metadata_windows(self):
+        middle = b'<script>' + b'\x90' * 8
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            temp_file.write(b'ID3' + b'\x00' * (600 * 1024) + middle + b'\x00' * (600 * 1024))
+            temp_file_path = temp_file.name
+        
+        try:
+            scan_result = MediaFileService.scan_media_file_for_malware(temp_file_path)
+            
+            self.assertTrue(scan_result['scan_details']['deep_scan_performed'])
+            self.assertFalse(scan_result['is_safe'])
+            self.assertEqual(scan_result['threats_found'], ['Suspicious byte sequence detected: 90909090'])
+        finally:
+            os.unlink(temp_file_path)
+
+
 class MediaAccessServiceTestCase(TestCase):
     """Test MediaAccessService functionality"""
     
@@ -11,6 +11,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from analytics.dashboard_metrics import PeriodWindow, artist_play_summary, with_previous_plays
 from artists.models import Artist
 from music_monitor.models import PlayLog, StreamLog
 from stations.models import Station
@@ -58,68 +59,45 @@ def get_artist_homedata(request):
     if errors:
         return Response({'message': "Errors", 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
 
-    playlogs = PlayLog.objects.filter(track__artist=artist, active=True)
+    # Rolling periods run up to now; the comparison window is as long as the
+    # current one (at least a week) and ends where it starts
+    base_playlogs = PlayLog.objects.filter(track__artist=artist, active=True)
     if start_date:
-        if end_date:
-            playlogs = playlogs.filter(played_at__range=(start_date, end_date))
-        else:
-            playlogs = playlogs.filter(played_at__gte=start_date)
-
-    period_end = end_date or now
-
-    comparison_start = comparison_end = None
-    lookback_delta = None
-    prev_logs = PlayLog.objects.none()
-
-    if start_date:
-        comparison_end = start_date
-        comparison_start = start_date
-        if end_date:
-            lookback_delta = end_date - start_date
-        else:
-            lookback_delta = period_end - start_date
-
-        if not lookback_delta or lookback_delta.total_seconds() <= 0:
-            lookback_delta = timedelta(days=7)
+        window = PeriodWindow(start_date, end_date or now, inclusive_end=True, minimum_lookback=timedelta(days=7))
+    else:
+        window = PeriodWindow(None, None)
+    current_q = window.current_q()
+    playlogs = base_playlogs.filter(current_q)
+    compared_logs = window.narrow(base_playlogs).order_by()
 
-        comparison_start = start_date - lookback_delta
-        prev_logs = PlayLog.objects.filter(track__artist=artist, active=True)
-        prev_logs = prev_logs.filter(played_at__gte=comparison_start, played_at__lt=comparison_end)
+    summary = artist_play_summary(base_playlogs, window)
+    current = summary['current']
 
-    totalPlays = playlogs.count()
-    totalStations = playlogs.values('station').distinct().count()
-    totalEarnings = float(playlogs.aggregate(total=Sum('royalty_amount'))['total'] or 0)
-    confidence_score = float(playlogs.aggregate(avg=Avg('avg_confidence_score'))['avg'] or 0)
-    active_regions = playlogs.values('station__region').exclude(station__region__isnull=True).distinct().count()
-    active_tracks = playlogs.values('track').distinct().count()
+    totalPlays = current['plays']
+    totalStations = current['stations']
+    totalEarnings = float(current['earnings'])
+    confidence_score = float(current['avg_confidence'] or 0)
+    active_regions = current['regions']
+    active_tracks = current['works']
 
     # Top Songs
-    top_tracks = (
-        playlogs.values('track', 'track__title')
-        .annotate(
-            plays=Count('id'),
-            earnings=Sum('royalty_amount'),
-            confidence=Avg('avg_confidence_score'),
-            stations=Count('station', distinct=True)
-        )
+    top_tracks = list(
+        compared_logs.values('track', 'track__title')
+        .annotate(**with_previous_plays({
+            'plays': Count('id', filter=current_q),
+            'earnings': Sum('royalty_amount', filter=current_q),
+            'confidence': Avg('avg_confidence_score', filter=current_q),
+            'stations': Count('station', distinct=True, filter=current_q),
+        }, window))
+        .filter(plays__gt=0)
         .order_by('-plays')[:5]
     )
 
-    prev_track_map = {}
-    if start_date:
-        prev_track_map = {
-            entry['track']: entry['plays']
-            for entry in (
-                prev_logs.values('track')
-                .annotate(plays=Count('id'))
-            )
-        }
-
     topSongs = []
     for index, track in enumerate(top_tracks):
         trend = 'stable'
         if start_date:
-            prev_count = prev_track_map.get(track['track'], 0)
+            prev_count = track.get('previous_plays', 0)
             if prev_count:
                 change = track['plays'] - prev_count
                 if change > 0:
@@ -171,24 +149,21 @@ def get_artist_homedata(request):
     ]
 
     # Ghana Region Breakdown
-    region_qs = playlogs.values('station__region').annotate(
-        plays=Count('id'), earnings=Sum('royalty_amount'), stations=Count('station', distinct=True)
+    region_qs = (
+        compared_logs.values('station__region')
+        .annotate(**with_previous_plays({
+            'plays': Count('id', filter=current_q),
+            'earnings': Sum('royalty_amount', filter=current_q),
+            'stations': Count('station', distinct=True, filter=current_q),
+        }, window))
+        .filter(plays__gt=0)
     )
-    prev_region_map = {}
-    if start_date:
-        prev_region_map = {
-            entry['station__region']: entry['plays']
-            for entry in (
-                prev_logs.values('station__region')
-                .annotate(plays=Count('id'))
-            )
-        }
 
     ghanaRegions = []
     for r in region_qs:
         region_name = r['station__region'] or "Unknown"
         current_plays = r['plays']
-        previous_plays = prev_region_map.get(r['station__region'], 0) if start_date else None
+        previous_plays = r.get('previous_plays', 0) if start_date else None
         if start_date:
             if previous_plays:
                 growth_value = ((current_plays - previous_plays) / previous_plays) * 100
@@ -308,10 +283,7 @@ def get_artist_homedata(request):
                     "percentage": round((count / total_fans) * 100, 1) if total_fans else 0,
                 })
 
-    if start_date:
-        prev_plays = prev_logs.count()
-    else:
-        prev_plays = 0
+    prev_plays = summary['previous']['plays']
 
     if prev_plays:
         growth_rate = round(((totalPlays - prev_plays) / prev_plays) * 100, 1)
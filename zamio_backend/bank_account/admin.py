@@ -4,7 +4,9 @@ from bank_account.models import (
     BankAccount, 
     Transaction, 
     PlatformAccount, 
+    PlatformAccountShard,
     StationAccount,
+    StationSettlement,
     PlatformTransaction,
     StationTransaction,
     StationDepositRequest
@@ -29,14 +31,15 @@ class TransactionAdmin(admin.ModelAdmin):
 
 @admin.register(PlatformAccount)
 class PlatformAccountAdmin(admin.ModelAdmin):
-    list_display = ('account_id', 'balance', 'total_received', 'total_paid_out', 'currency', 'is_active', 'updated_at')
+    list_display = ('account_id', 'live_balance', 'total_received', 'total_paid_out', 'currency', 'is_active', 'updated_at')
     list_filter = ('is_active', 'currency')
     search_fields = ('account_id',)
-    readonly_fields = ('account_id', 'created_at', 'updated_at', 'total_received', 'total_paid_out')
+    # Balance moves through F() updates and shard folds only; never edit it here
+    readonly_fields = ('account_id', 'balance', 'live_balance', 'created_at', 'updated_at', 'total_received', 'total_paid_out')
     
     fieldsets = (
         ('Account Information', {
-            'fields': ('account_id', 'balance', 'currency', 'is_active')
+            'fields': ('account_id', 'balance', 'live_balance', 'currency', 'is_active')
         }),
         ('Statistics', {
             'fields': ('total_received', 'total_paid_out')
@@ -47,6 +50,28 @@ class PlatformAccountAdmin(admin.ModelAdmin):
     )
 
 
+    def live_balance(self, obj):
+        return obj.get_live_totals()['balance']
+    live_balance.short_description = "Live balance (incl. shards)"
+
+
+@admin.register(PlatformAccountShard)
+class PlatformAccountShardAdmin(admin.ModelAdmin):
+    list_display = ('platform_account', 'shard', 'balance', 'total_received', 'updated_at')
+    readonly_fields = ('platform_account', 'shard', 'balance', 'total_received', 'updated_at')
+
+
+@admin.register(StationSettlement)
+class StationSettlementAdmin(admin.ModelAdmin):
+    list_display = ('settlement_id', 'station_account', 'play_count', 'total_amount', 'failed_count', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('settlement_id', 'station_account__station__name')
+    readonly_fields = (
+        'settlement_id', 'station_account', 'play_count', 'total_amount', 'failed_count',
+        'first_play_log_id', 'last_play_log_id', 'created_at'
+    )
+
+
 @admin.register(StationAccount)
 class StationAccountAdmin(admin.ModelAdmin):
     list_display = ('station', 'account_id', 'balance', 'total_spent', 'total_plays', 'is_active', 'updated_at')
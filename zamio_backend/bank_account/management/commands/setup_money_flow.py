@@ -53,7 +53,7 @@ class Command(BaseCommand):
             self.stdout.write('Creating central platform account...')
             central_pool = PlatformAccount.get_central_pool()
             self.stdout.write(self.style.SUCCESS(
-                f'✓ Central pool created: {central_pool.account_id} - Balance: {central_pool.balance} {central_pool.currency}'
+                f'✓ Central pool created: {central_pool.account_id} - Balance: {central_pool.get_live_totals()["balance"]} {central_pool.currency}'
             ))
         
         # Create station accounts
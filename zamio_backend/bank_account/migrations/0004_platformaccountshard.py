@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_account', '0003_stationdepositrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformAccountShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('total_received', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('platform_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='bank_account.platformaccount')),
+            ],
+            options={
+                'verbose_name': 'Platform Account Shard',
+                'verbose_name_plural': 'Platform Account Shards',
+                'unique_together': {('platform_account', 'shard')},
+            },
+        ),
+    ]
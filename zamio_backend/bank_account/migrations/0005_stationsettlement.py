@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_account', '0004_platformaccountshard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StationSettlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('settlement_id', models.CharField(max_length=20, unique=True)),
+                ('play_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=15)),
+                ('failed_count', models.IntegerField(default=0, help_text='Plays marked failed for insufficient funds')),
+                ('first_play_log_id', models.BigIntegerField(blank=True, null=True)),
+                ('last_play_log_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('station_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='settlements', to='bank_account.stationaccount')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='stationtransaction',
+            name='settlement',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='bank_account.stationsettlement'),
+        ),
+        migrations.AddIndex(
+            model_name='stationsettlement',
+            index=models.Index(fields=['station_account', 'created_at'], name='bank_accoun_station_ee76e4_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Sum
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models.signals import pre_save
@@ -121,6 +123,11 @@ class PlatformAccount(models.Model):
     """
     Central ZamIO platform account that holds all station payments
     before distribution to artists/publishers
+
+    Station payments never write this row: they land on PlatformAccountShard
+    counter rows so concurrent plays don't serialize on the central pool.
+    The live balance is this row plus the sum of its shards; shards are
+    periodically folded back into this row (see fold_shards).
     """
     account_id = models.CharField(max_length=50, unique=True, default='ZAMIO-CENTRAL-POOL')
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
@@ -134,6 +141,8 @@ class PlatformAccount(models.Model):
     total_received = models.DecimalField(max_digits=15, decimal_places=2, default=0.00, help_text="Total money received from stations")
     total_paid_out = models.DecimalField(max_digits=15, decimal_places=2, default=0.00, help_text="Total money paid to artists/publishers")
     
+    DEFAULT_SHARD_COUNT = 16
+    
     class Meta:
         verbose_name = "Platform Central Account"
         verbose_name_plural = "Platform Central Accounts"
@@ -154,6 +163,84 @@ class PlatformAccount(models.Model):
         )
         return account
     
+    @classmethod
+    def shard_count(cls):
+        return getattr(settings, 'PLATFORM_POOL_SHARD_COUNT', cls.DEFAULT_SHARD_COUNT)
+    
+    def shard_for_station(self, station):
+        """Pick the counter shard a station's payments land on"""
+        station_id = station.pk if hasattr(station, 'pk') else station
+        return (station_id or 0) % self.shard_count()
+    
+    def _credit_shards(self, amounts_by_shard):
+        """Apply received amounts to counter shards with F() updates"""
+        now = timezone.now()
+        for shard, amount in amounts_by_shard.items():
+            updated = PlatformAccountShard.objects.filter(
+                platform_account=self, shard=shard
+            ).update(
+                balance=F('balance') + amount,
+                total_received=F('total_received') + amount,
+                updated_at=now
+            )
+            if not updated:
+                PlatformAccountShard.objects.bulk_create(
+                    [PlatformAccountShard(platform_account=self, shard=shard)],
+                    ignore_conflicts=True
+                )
+                PlatformAccountShard.objects.filter(
+                    platform_account=self, shard=shard
+                ).update(
+                    balance=F('balance') + amount,
+                    total_received=F('total_received') + amount,
+                    updated_at=now
+                )
+    
+    def get_live_totals(self):
+        """Balance and totals including amounts not yet folded from shards"""
+        shard_totals = self.shards.aggregate(
+            balance=Sum('balance'),
+            total_received=Sum('total_received')
+        )
+        row = PlatformAccount.objects.filter(pk=self.pk).values(
+            'balance', 'total_received', 'total_paid_out'
+        ).get()
+        return {
+            'balance': row['balance'] + (shard_totals['balance'] or Decimal('0.00')),
+            'total_received': row['total_received'] + (shard_totals['total_received'] or Decimal('0.00')),
+            'total_paid_out': row['total_paid_out'],
+        }
+    
+    @transaction.atomic
+    def fold_shards(self):
+        """Materialize shard counters into this row and reset them"""
+        PlatformAccount.objects.select_for_update().filter(pk=self.pk).first()
+        shards = list(self.shards.select_for_update().exclude(balance=0, total_received=0))
+        
+        now = timezone.now()
+        balance = Decimal('0.00')
+        received = Decimal('0.00')
+        
+        for shard in shards:
+            # Subtract exactly what was read so nothing credited meanwhile is lost
+            PlatformAccountShard.objects.filter(id=shard.id).update(
+                balance=F('balance') - shard.balance,
+                total_received=F('total_received') - shard.total_received,
+                updated_at=now
+            )
+            balance += shard.balance
+            received += shard.total_received
+        
+        if shards:
+            PlatformAccount.objects.filter(pk=self.pk).update(
+                balance=F('balance') + balance,
+                total_received=F('total_received') + received,
+                updated_at=now
+            )
+        
+        self.refresh_from_db(fields=['balance', 'total_received', 'total_paid_out', 'updated_at'])
+        return len(shards)
+    
     def receive_from_station(self, amount, station, play_log=None, description=None):
         """
         Receive payment from station for a play
@@ -161,22 +248,52 @@ class PlatformAccount(models.Model):
         if amount <= 0:
             raise ValidationError("Amount must be greater than zero")
         
-        self.balance += Decimal(str(amount))
-        self.total_received += Decimal(str(amount))
-        self.save()
+        return self.receive_station_payments([{
+            'amount': amount,
+            'station': station,
+            'play_log': play_log,
+            'description': description,
+        }])
+    
+    @transaction.atomic
+    def receive_station_payments(self, payments):
+        """
+        Journal a batch of station payments and credit the pool shards.
+
+        Each payment is a dict with amount, station, and optional play_log
+        and description. Journal rows are bulk inserted; shard counters get
+        one F() update per touched shard.
+        """
+        entries = []
+        amounts_by_shard = {}
         
-        # Create platform transaction record
-        PlatformTransaction.objects.create(
-            platform_account=self,
-            transaction_type='station_payment',
-            amount=amount,
-            station=station,
-            play_log=play_log,
-            description=description or f"Payment from {station.name} for play"
-        )
+        for payment in payments:
+            amount = Decimal(str(payment['amount']))
+            if amount <= 0:
+                raise ValidationError("Amount must be greater than zero")
+            
+            station = payment['station']
+            entries.append(PlatformTransaction(
+                platform_account=self,
+                transaction_id=unique_platform_transaction_id(),
+                transaction_type='station_payment',
+                amount=amount,
+                station=station,
+                play_log_id=getattr(payment.get('play_log'), 'pk', payment.get('play_log')),
+                description=payment.get('description') or f"Payment from {station.name} for play"
+            ))
+            shard = self.shard_for_station(station)
+            amounts_by_shard[shard] = amounts_by_shard.get(shard, Decimal('0.00')) + amount
+        
+        if not entries:
+            return True
+        
+        PlatformTransaction.objects.bulk_create(entries)
+        self._credit_shards(amounts_by_shard)
         
         return True
     
+    @transaction.atomic
     def pay_to_user(self, amount, user_account, withdrawal_request=None, description=None):
         """
         Pay out to artist/publisher from central pool
@@ -184,12 +301,21 @@ class PlatformAccount(models.Model):
         if amount <= 0:
             raise ValidationError("Amount must be greater than zero")
         
-        if amount > self.balance:
-            raise ValidationError(f"Insufficient funds in central pool. Available: {self.balance}, Requested: {amount}")
+        amount = Decimal(str(amount))
         
-        self.balance -= Decimal(str(amount))
-        self.total_paid_out += Decimal(str(amount))
-        self.save()
+        # Payouts serialize on the pool row; station payments don't touch it
+        PlatformAccount.objects.select_for_update().filter(pk=self.pk).first()
+        available = self.get_live_totals()['balance']
+        
+        if amount > available:
+            raise ValidationError(f"Insufficient funds in central pool. Available: {available}, Requested: {amount}")
+        
+        PlatformAccount.objects.filter(pk=self.pk).update(
+            balance=F('balance') - amount,
+            total_paid_out=F('total_paid_out') + amount,
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['balance', 'total_paid_out', 'updated_at'])
         
         # Create platform transaction record
         PlatformTransaction.objects.create(
@@ -210,6 +336,26 @@ class PlatformAccount(models.Model):
         return True
 
 
+class PlatformAccountShard(models.Model):
+    """
+    Counter shard for the central pool. Station payments are spread across
+    shards by station, so concurrent charges update different rows.
+    """
+    platform_account = models.ForeignKey(PlatformAccount, on_delete=models.CASCADE, related_name='shards')
+    shard = models.PositiveSmallIntegerField()
+    balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    total_received = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('platform_account', 'shard')
+        verbose_name = "Platform Account Shard"
+        verbose_name_plural = "Platform Account Shards"
+    
+    def __str__(self):
+        return f"{self.platform_account.account_id} shard {self.shard} - Balance: {self.balance}"
+
+
 class StationAccount(models.Model):
     """
     Account for radio stations to pay for plays
@@ -244,8 +390,11 @@ class StationAccount(models.Model):
         if amount <= 0:
             raise ValidationError("Amount must be greater than zero")
         
-        self.balance += Decimal(str(amount))
-        self.save()
+        StationAccount.objects.filter(pk=self.pk).update(
+            balance=F('balance') + Decimal(str(amount)),
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['balance', 'updated_at'])
         
         StationTransaction.objects.create(
             station_account=self,
@@ -256,32 +405,88 @@ class StationAccount(models.Model):
         
         return True
     
-    def charge_for_play(self, play_log, royalty_amount):
+    def _debit(self, amount, plays=1):
         """
-        Deduct cost when track is played and transfer to central pool
+        Atomically debit the account, respecting the funding rules.
+        The funds check is part of the UPDATE so concurrent charges can't
+        overdraw the account or lose updates.
         """
-        if royalty_amount <= 0:
-            raise ValidationError("Royalty amount must be greater than zero")
+        amount = Decimal(str(amount))
         
-        # Check if station has sufficient funds
-        if not self.allow_negative_balance and self.balance < royalty_amount:
-            raise ValidationError(
-                f"Insufficient funds. Balance: {self.balance}, Required: {royalty_amount}"
-            )
-        
-        # Check credit limit if negative balance allowed
         if self.allow_negative_balance:
-            potential_balance = self.balance - Decimal(str(royalty_amount))
-            if potential_balance < -self.credit_limit:
+            floor_filter = {'balance__gte': amount - self.credit_limit}
+        else:
+            floor_filter = {'balance__gte': amount}
+        
+        updated = StationAccount.objects.filter(pk=self.pk, **floor_filter).update(
+            balance=F('balance') - amount,
+            total_spent=F('total_spent') + amount,
+            total_plays=F('total_plays') + plays,
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['balance', 'total_spent', 'total_plays', 'updated_at'])
+        
+        if not updated:
+            if self.allow_negative_balance:
                 raise ValidationError(
                     f"Credit limit exceeded. Current: {self.balance}, Limit: {self.credit_limit}"
                 )
+            raise ValidationError(
+                f"Insufficient funds. Balance: {self.balance}, Required: {amount}"
+            )
+    
+    @transaction.atomic
+    def charge_for_plays(self, plays, settlement):
+        """
+        Charge a settled batch of plays with a single debit.
+
+        plays is a list of dicts with play_log_id, amount and track_title.
+        Station and platform journal rows are bulk inserted.
+        """
+        total = sum((play['amount'] for play in plays), Decimal('0.00'))
+        if total <= 0:
+            raise ValidationError("Royalty amount must be greater than zero")
+        
+        self._debit(total, plays=len(plays))
+        
+        now = timezone.now()
+        StationTransaction.objects.bulk_create([
+            StationTransaction(
+                station_account=self,
+                settlement=settlement,
+                transaction_id=unique_station_transaction_id(),
+                transaction_type='play_charge',
+                amount=play['amount'],
+                play_log_id=play['play_log_id'],
+                description=f"Charge for playing: {play['track_title'] or 'Unknown track'}",
+                timestamp=now
+            )
+            for play in plays
+        ])
+        
+        central_pool = PlatformAccount.get_central_pool()
+        central_pool.receive_station_payments([
+            {
+                'amount': play['amount'],
+                'station': self.station,
+                'play_log': play['play_log_id'],
+                'description': f"Payment from {self.station.name} for play",
+            }
+            for play in plays
+        ])
+        
+        return total
+    
+    @transaction.atomic
+    def charge_for_play(self, play_log, royalty_amount):
+        """
+        Deduct cost when track is played and transfer to central pool
+        """
+        if royalty_amount <= 0:
+            raise ValidationError("Royalty amount must be greater than zero")
         
         # Deduct from station account
-        self.balance -= Decimal(str(royalty_amount))
-        self.total_spent += Decimal(str(royalty_amount))
-        self.total_plays += 1
-        self.save()
+        self._debit(royalty_amount)
         
         # Create station transaction
         StationTransaction.objects.create(
@@ -311,6 +516,39 @@ def pre_save_station_account_id_receiver(sender, instance, *args, **kwargs):
 pre_save.connect(pre_save_station_account_id_receiver, sender=StationAccount)
 
 
+class StationSettlement(models.Model):
+    """
+    One batched settlement of a station's uncharged plays: a single debit
+    covering play_count plays, journaled as per-play StationTransactions.
+    """
+    settlement_id = models.CharField(max_length=20, unique=True)
+    station_account = models.ForeignKey(StationAccount, on_delete=models.CASCADE, related_name='settlements')
+    
+    play_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
+    failed_count = models.IntegerField(default=0, help_text="Plays marked failed for insufficient funds")
+    first_play_log_id = models.BigIntegerField(null=True, blank=True)
+    last_play_log_id = models.BigIntegerField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['station_account', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.settlement_id} - {self.play_count} plays - {self.total_amount}"
+
+
+def pre_save_station_settlement_id_receiver(sender, instance, *args, **kwargs):
+    if not instance.settlement_id:
+        instance.settlement_id = f"STL-{uuid.uuid4().hex[:10].upper()}"
+
+pre_save.connect(pre_save_station_settlement_id_receiver, sender=StationSettlement)
+
+
 class PlatformTransaction(models.Model):
     """
     Transaction records for the platform central account
@@ -345,11 +583,24 @@ class PlatformTransaction(models.Model):
     
     def __str__(self):
         return f"{self.transaction_id} - {self.transaction_type} - {self.amount}"
+    
+    def save(self, *args, **kwargs):
+        # Journal entries are append-only; corrections are new 'adjustment' entries
+        if not self._state.adding:
+            raise ValidationError("Platform transactions are immutable")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Platform transactions are immutable")
+
+
+def unique_platform_transaction_id():
+    return f"PLT-{uuid.uuid4().hex[:10].upper()}"
 
 
 def pre_save_platform_transaction_id_receiver(sender, instance, *args, **kwargs):
     if not instance.transaction_id:
-        instance.transaction_id = f"PLT-{uuid.uuid4().hex[:10].upper()}"
+        instance.transaction_id = unique_platform_transaction_id()
 
 pre_save.connect(pre_save_platform_transaction_id_receiver, sender=PlatformTransaction)
 
@@ -372,6 +623,7 @@ class StationTransaction(models.Model):
     
     # Related objects
     play_log = models.ForeignKey('music_monitor.PlayLog', on_delete=models.SET_NULL, null=True, blank=True)
+    settlement = models.ForeignKey(StationSettlement, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     
     description = models.TextField(blank=True)
     timestamp = models.DateTimeField(default=timezone.now)
@@ -387,9 +639,13 @@ class StationTransaction(models.Model):
         return f"{self.transaction_id} - {self.transaction_type} - {self.amount}"
 
 
+def unique_station_transaction_id():
+    return f"STX-{uuid.uuid4().hex[:10].upper()}"
+
+
 def pre_save_station_transaction_id_receiver(sender, instance, *args, **kwargs):
     if not instance.transaction_id:
-        instance.transaction_id = f"STX-{uuid.uuid4().hex[:10].upper()}"
+        instance.transaction_id = unique_station_transaction_id()
 
 pre_save.connect(pre_save_station_transaction_id_receiver, sender=StationTransaction)
 
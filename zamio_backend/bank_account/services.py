@@ -2,17 +2,25 @@
 Money flow services for ZamIO platform
 Handles all money transfers between stations, platform, and users
 """
+import logging
+from datetime import timedelta
 from decimal import Decimal
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Count, F, Min, Q, Sum
 from django.utils import timezone
 
 from bank_account.models import (
     PlatformAccount,
     StationAccount,
+    StationSettlement,
+    StationTransaction,
     BankAccount
 )
 
+logger = logging.getLogger(__name__)
+
 
 class MoneyFlowService:
     """Service for handling money transfers in the platform"""
@@ -157,7 +165,7 @@ class MoneyFlowService:
             'recipient': recipient_user.email,
             'recipient_type': recipient_type,
             'recipient_balance': user_account.balance,
-            'platform_balance': central_pool.balance,
+            'platform_balance': central_pool.get_live_totals()['balance'],
             'message': f'Paid {withdrawal_request.amount} GHS to {recipient_user.email}'
         }
     
@@ -165,11 +173,12 @@ class MoneyFlowService:
     def get_platform_balance():
         """Get current platform central pool balance"""
         central_pool = PlatformAccount.get_central_pool()
+        totals = central_pool.get_live_totals()
         return {
-            'balance': central_pool.balance,
+            'balance': totals['balance'],
             'currency': central_pool.currency,
-            'total_received': central_pool.total_received,
-            'total_paid_out': central_pool.total_paid_out,
+            'total_received': totals['total_received'],
+            'total_paid_out': totals['total_paid_out'],
             'updated_at': central_pool.updated_at
         }
     
@@ -230,3 +239,246 @@ class MoneyFlowService:
             'new_balance': station_account.balance,
             'message': f'Added {amount} GHS to {station.name} account'
         }
+
+
+class StationSettlementService:
+    """
+    Batched settlement of station play charges
+    
+    Play logs are recorded with a royalty_amount and payment_status='pending'.
+    Settlement claims a station's pending plays in one transaction, debits the
+    station once for the whole batch, bulk-writes the journal rows and flips
+    the plays to 'charged' with a single conditional UPDATE. A play can only
+    move out of 'pending' once, so every play is charged exactly once.
+    """
+    
+    DEFAULT_BATCH_SIZE = 500
+    DEFAULT_STALE_AFTER_HOURS = 24
+    
+    @staticmethod
+    def batch_size():
+        return getattr(settings, 'STATION_SETTLEMENT_BATCH_SIZE', StationSettlementService.DEFAULT_BATCH_SIZE)
+    
+    @staticmethod
+    def pending_plays():
+        """Plays that are priced but not yet charged to their station"""
+        from music_monitor.models import PlayLog
+        
+        return PlayLog.objects.filter(
+            payment_status='pending',
+            royalty_amount__gt=0,
+            station__isnull=False
+        )
+    
+    @staticmethod
+    def stations_with_pending_plays():
+        """Station ids that have at least one play waiting for settlement"""
+        return list(
+            StationSettlementService.pending_plays()
+            .order_by()
+            .values_list('station_id', flat=True)
+            .distinct()
+        )
+    
+    @staticmethod
+    @transaction.atomic
+    def settle_station(station, batch_size=None):
+        """
+        Settle up to batch_size pending plays for a station, oldest first
+        
+        Plays are charged in order while the station can afford them; once the
+        balance (plus any credit limit) runs out the remaining plays in the
+        batch are marked 'failed'.
+        
+        Returns:
+            StationSettlement, or None if there was nothing to settle
+            
+        Raises:
+            ValidationError if another worker claimed any of the plays first;
+            the whole settlement is rolled back and nothing is charged
+        """
+        from music_monitor.models import PlayLog
+        
+        batch_size = batch_size or StationSettlementService.batch_size()
+        account = MoneyFlowService.get_or_create_station_account(station)
+        account = StationAccount.objects.select_for_update().select_related('station').get(pk=account.pk)
+        
+        plays = list(
+            StationSettlementService.pending_plays()
+            .filter(station=station)
+            .order_by('id')
+            .values('id', 'royalty_amount', 'track__title')[:batch_size]
+        )
+        if not plays:
+            return None
+        
+        available = account.balance
+        if account.allow_negative_balance:
+            available += account.credit_limit
+        
+        charged, failed = [], []
+        running_total = Decimal('0.00')
+        for play in plays:
+            if not failed and running_total + play['royalty_amount'] <= available:
+                charged.append({
+                    'play_log_id': play['id'],
+                    'amount': play['royalty_amount'],
+                    'track_title': play['track__title'],
+                })
+                running_total += play['royalty_amount']
+            else:
+                failed.append(play['id'])
+        
+        settlement = StationSettlement.objects.create(
+            station_account=account,
+            play_count=len(charged),
+            total_amount=running_total,
+            failed_count=len(failed),
+            first_play_log_id=plays[0]['id'],
+            last_play_log_id=plays[-1]['id'],
+        )
+        
+        now = timezone.now()
+        if charged:
+            charged_ids = [play['play_log_id'] for play in charged]
+            claimed = PlayLog.objects.filter(
+                id__in=charged_ids,
+                payment_status='pending'
+            ).update(payment_status='charged', charged_at=now, payment_error=None, updated_at=now)
+            if claimed != len(charged_ids):
+                raise ValidationError(
+                    f"Settlement for {account.station.name} lost {len(charged_ids) - claimed} plays to a concurrent settlement"
+                )
+            
+            account.charge_for_plays(charged, settlement)
+        
+        if failed:
+            PlayLog.objects.filter(id__in=failed, payment_status='pending').update(
+                payment_status='failed',
+                payment_error='Insufficient funds at settlement',
+                updated_at=now
+            )
+        
+        logger.info(
+            f"Settled {len(charged)} plays ({running_total} GHS) for {account.station.name}, "
+            f"{len(failed)} failed"
+        )
+        return settlement
+    
+    @staticmethod
+    def settle_all(batch_size=None, max_batches_per_station=None):
+        """
+        Settle every station with pending plays. Each batch commits on its own,
+        so one station's failure does not hold back the others.
+        """
+        from stations.models import Station
+        
+        max_batches = max_batches_per_station or getattr(settings, 'STATION_SETTLEMENT_MAX_BATCHES', 20)
+        summary = {'stations': 0, 'settlements': 0, 'plays_charged': 0, 'plays_failed': 0,
+                   'total_amount': Decimal('0.00'), 'errors': []}
+        
+        station_ids = StationSettlementService.stations_with_pending_plays()
+        for station in Station.objects.filter(id__in=station_ids):
+            summary['stations'] += 1
+            for _ in range(max_batches):
+                try:
+                    settlement = StationSettlementService.settle_station(station, batch_size)
+                except ValidationError as e:
+                    logger.warning(f"Settlement skipped for station {station.id}: {e}")
+                    summary['errors'].append(f"Station {station.id}: {e}")
+                    break
+                if settlement is None:
+                    break
+                summary['settlements'] += 1
+                summary['plays_charged'] += settlement.play_count
+                summary['plays_failed'] += settlement.failed_count
+                summary['total_amount'] += settlement.total_amount
+                if settlement.play_count + settlement.failed_count < (batch_size or StationSettlementService.batch_size()):
+                    break
+        
+        return summary
+    
+    @staticmethod
+    def reconciliation_report(since=None, stale_after_hours=None):
+        """
+        Cross-check settlements against the play and transaction ledgers
+        
+        Reports settlements whose journal rows do not add up, charged plays
+        without a charge transaction, plays charged more than once, and plays
+        that have been waiting for settlement longer than stale_after_hours.
+        """
+        from music_monitor.models import PlayLog
+        
+        stale_after_hours = stale_after_hours or getattr(
+            settings, 'STATION_SETTLEMENT_STALE_HOURS', StationSettlementService.DEFAULT_STALE_AFTER_HOURS
+        )
+        
+        settlements = StationSettlement.objects.all()
+        if since:
+            settlements = settlements.filter(created_at__gte=since)
+        
+        totals = settlements.order_by().aggregate(
+            settlement_count=Count('id'),
+            plays_charged=Sum('play_count'),
+        )
+        
+        settlements = settlements.annotate(
+            journal_count=Count('transactions'),
+            journal_total=Sum('transactions__amount'),
+        )
+        mismatched = [
+            {
+                'settlement_id': row['settlement_id'],
+                'play_count': row['play_count'],
+                'journal_count': row['journal_count'],
+                'total_amount': row['total_amount'],
+                'journal_total': row['journal_total'] or Decimal('0.00'),
+            }
+            for row in settlements.filter(
+                ~Q(journal_count=F('play_count')) | ~Q(journal_total=F('total_amount'))
+            ).exclude(play_count=0).values(
+                'settlement_id', 'play_count', 'journal_count', 'total_amount', 'journal_total'
+            )
+        ]
+        charges = StationTransaction.objects.filter(transaction_type='play_charge', play_log__isnull=False)
+        charged_plays = PlayLog.objects.filter(payment_status='charged')
+        if since:
+            charged_plays = charged_plays.filter(charged_at__gte=since)
+            charges = charges.filter(timestamp__gte=since)
+        
+        unjournaled = charged_plays.exclude(
+            id__in=StationTransaction.objects.filter(
+                transaction_type='play_charge'
+            ).values('play_log_id')
+        ).count()
+        
+        double_charged = list(
+            charges.order_by().values('play_log_id')
+            .annotate(charge_count=Count('id'))
+            .filter(charge_count__gt=1)
+            .values_list('play_log_id', flat=True)
+        )
+        
+        pending = StationSettlementService.pending_plays().order_by().aggregate(
+            count=Count('id'),
+            amount=Sum('royalty_amount'),
+            oldest=Min('created_at'),
+        )
+        stale_count = StationSettlementService.pending_plays().filter(
+            created_at__lt=timezone.now() - timedelta(hours=stale_after_hours)
+        ).count()
+        
+        return {
+            'since': since,
+            'settlements': totals['settlement_count'] or 0,
+            'plays_charged': totals['plays_charged'] or 0,
+            'mismatched_settlements': mismatched,
+            'charged_without_transaction': unjournaled,
+            'double_charged_play_logs': double_charged,
+            'pending_plays': pending['count'] or 0,
+            'pending_amount': pending['amount'] or Decimal('0.00'),
+            'oldest_pending_at': pending['oldest'],
+            'stale_pending_plays': stale_count,
+            'is_consistent': not mismatched and not unjournaled and not double_charged,
+            'generated_at': timezone.now(),
+        }
@@ -0,0 +1,78 @@
+"""
+Celery tasks for platform money flow
+"""
+import logging
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def fold_platform_pool_shards():
+    """
+    Periodic task to materialize central pool shard counters into the pool row
+    """
+    from .models import PlatformAccount
+    
+    central_pool = PlatformAccount.get_central_pool()
+    folded = central_pool.fold_shards()
+    
+    logger.info(f"Folded {folded} central pool shards; balance now {central_pool.balance}")
+    
+    return {
+        'shards_folded': folded,
+        'balance': str(central_pool.balance),
+        'total_received': str(central_pool.total_received),
+    }
+
+
+@shared_task
+def settle_station_plays(batch_size=None):
+    """
+    Periodic task to charge stations for their pending plays in batches
+    """
+    from .services import StationSettlementService
+    
+    summary = StationSettlementService.settle_all(batch_size=batch_size)
+    
+    logger.info(
+        f"Station settlement: {summary['plays_charged']} plays charged "
+        f"({summary['total_amount']} GHS) across {summary['stations']} stations, "
+        f"{summary['plays_failed']} failed"
+    )
+    
+    summary['total_amount'] = str(summary['total_amount'])
+    return summary
+
+
+@shared_task
+def station_settlement_reconciliation_report():
+    """
+    Daily reconciliation of station settlements against the play and transaction ledgers
+    """
+    from django.utils import timezone
+    from datetime import timedelta
+    from .services import StationSettlementService
+    
+    report = StationSettlementService.reconciliation_report(since=timezone.now() - timedelta(days=1))
+    
+    if not report['is_consistent']:
+        logger.error(
+            f"Station settlement reconciliation failed: "
+            f"{len(report['mismatched_settlements'])} mismatched settlements, "
+            f"{report['charged_without_transaction']} charged plays without a transaction, "
+            f"{len(report['double_charged_play_logs'])} double-charged plays"
+        )
+    if report['stale_pending_plays']:
+        logger.warning(f"{report['stale_pending_plays']} plays are still waiting for settlement")
+    
+    return {
+        'is_consistent': report['is_consistent'],
+        'settlements': report['settlements'],
+        'plays_charged': report['plays_charged'],
+        'mismatched_settlements': [m['settlement_id'] for m in report['mismatched_settlements']],
+        'charged_without_transaction': report['charged_without_transaction'],
+        'double_charged_play_logs': report['double_charged_play_logs'],
+        'pending_plays': report['pending_plays'],
+        'stale_pending_plays': report['stale_pending_plays'],
+    }
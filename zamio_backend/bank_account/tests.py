@@ -1,3 +1,189 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from artists.models import Artist, Track
+from bank_account.models import (
+    BankAccount,
+    PlatformAccount,
+    PlatformAccountShard,
+    PlatformTransaction,
+    StationAccount,
+    StationSettlement,
+    StationTransaction,
+)
+from bank_account.services import StationSettlementService
+from music_monitor.models import PlayLog
+from stations.models import Station
+
+
+@override_settings(PLATFORM_POOL_SHARD_COUNT=4)
+class CentralPoolLedgerTestCase(TestCase):
+    def setUp(self) -> None:
+        user_model = get_user_model()
+        self.stations = []
+        for index in range(3):
+            user = user_model.objects.create_user(
+                email=f'ledger-station-{index}@example.com',
+                password='strong-password',
+            )
+            self.stations.append(Station.objects.create(user=user, name=f'Ledger FM {index}'))
+
+        artist_user = user_model.objects.create_user(
+            email='ledger-artist@example.com',
+            password='strong-password',
+        )
+        artist = Artist.objects.create(user=artist_user, stage_name='Ledger Artist')
+        self.track = Track.objects.create(artist=artist, title='Ledger Track', duration=timedelta(minutes=3))
+
+        self.payee = BankAccount.objects.create(user=artist_user, balance=Decimal('0.00'))
+        self.pool = PlatformAccount.get_central_pool()
+
+    def test_station_payments_do_not_write_pool_row(self):
+        updated_at = PlatformAccount.objects.get(pk=self.pool.pk).updated_at
+
+        self.pool.receive_station_payments([
+            {'amount': Decimal('1.50'), 'station': station}
+            for station in self.stations
+        ])
+
+        row = PlatformAccount.objects.get(pk=self.pool.pk)
+        self.assertEqual(row.balance, Decimal('0.00'))
+        self.assertEqual(row.updated_at, updated_at)
+        self.assertEqual(PlatformTransaction.objects.count(), 3)
+        self.assertEqual(PlatformAccountShard.objects.filter(platform_account=self.pool).count(), 3)
+        self.assertEqual(self.pool.get_live_totals()['balance'], Decimal('4.50'))
+
+    def test_fold_shards_materializes_balance(self):
+        self.pool.receive_from_station(Decimal('2.00'), self.stations[0])
+        self.pool.receive_from_station(Decimal('3.00'), self.stations[1])
+
+        folded = self.pool.fold_shards()
+
+        self.assertEqual(folded, 2)
+        self.assertEqual(self.pool.balance, Decimal('5.00'))
+        self.assertEqual(self.pool.total_received, Decimal('5.00'))
+        self.assertFalse(self.pool.shards.exclude(balance=0).exists())
+        self.assertEqual(self.pool.get_live_totals()['balance'], Decimal('5.00'))
+
+    def test_payout_checks_live_balance(self):
+        self.pool.receive_from_station(Decimal('10.00'), self.stations[0])
+
+        self.pool.pay_to_user(Decimal('4.00'), self.payee)
+
+        totals = self.pool.get_live_totals()
+        self.assertEqual(totals['balance'], Decimal('6.00'))
+        self.assertEqual(totals['total_paid_out'], Decimal('4.00'))
+        with self.assertRaises(ValidationError):
+            self.pool.pay_to_user(Decimal('7.00'), self.payee)
+
+    def test_journal_entries_are_immutable(self):
+        self.pool.receive_from_station(Decimal('1.00'), self.stations[0])
+        entry = PlatformTransaction.objects.get()
+
+        entry.amount = Decimal('100.00')
+        with self.assertRaises(ValidationError):
+            entry.save()
+        with self.assertRaises(ValidationError):
+            entry.delete()
+
+    def test_station_charge_respects_funds_atomically(self):
+        account = StationAccount.objects.create(station=self.stations[0], balance=Decimal('5.00'))
+        play_log = PlayLog.objects.create(
+            track=self.track,
+            station=self.stations[0],
+            source='Radio',
+            played_at=timezone.now(),
+        )
+
+        account.charge_for_play(play_log, Decimal('3.00'))
+
+        self.assertEqual(account.balance, Decimal('2.00'))
+        self.assertEqual(account.total_plays, 1)
+        with self.assertRaises(ValidationError):
+            account.charge_for_play(play_log, Decimal('3.00'))
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal('2.00'))
+        self.assertEqual(self.pool.get_live_totals()['balance'], Decimal('3.00'))
+
+
+class StationSettlementTestCase(TestCase):
+    def setUp(self) -> None:
+        user_model = get_user_model()
+        station_user = user_model.objects.create_user(
+            email='settlement-station@example.com',
+            password='strong-password',
+        )
+        self.station = Station.objects.create(user=station_user, name='Settlement FM')
+        artist_user = user_model.objects.create_user(
+            email='settlement-artist@example.com',
+            password='strong-password',
+        )
+        artist = Artist.objects.create(user=artist_user, stage_name='Settlement Artist')
+        self.track = Track.objects.create(artist=artist, title='Settlement Track', duration=timedelta(minutes=3))
+        self.account = StationAccount.objects.create(station=self.station, balance=Decimal('10.00'))
+        self.pool = PlatformAccount.get_central_pool()
+
+    def _create_plays(self, count, amount='2.00'):
+        return [
+            PlayLog.objects.create(
+                track=self.track,
+                station=self.station,
+                source='Radio',
+                played_at=timezone.now(),
+                royalty_amount=Decimal(amount),
+            )
+            for _ in range(count)
+        ]
+
+    def test_plays_are_not_charged_on_insert(self):
+        play = self._create_plays(1)[0]
+
+        play.refresh_from_db()
+        self.assertEqual(play.payment_status, 'pending')
+        self.assertFalse(StationTransaction.objects.exists())
+
+    def test_settlement_charges_batch_with_one_debit(self):
+        self._create_plays(3)
+
+        settlement = StationSettlementService.settle_station(self.station)
+
+        self.account.refresh_from_db()
+        self.assertEqual(settlement.play_count, 3)
+        self.assertEqual(settlement.total_amount, Decimal('6.00'))
+        self.assertEqual(self.account.balance, Decimal('4.00'))
+        self.assertEqual(self.account.total_plays, 3)
+        self.assertEqual(settlement.transactions.count(), 3)
+        self.assertEqual(PlayLog.objects.filter(payment_status='charged').count(), 3)
+        self.assertEqual(self.pool.get_live_totals()['balance'], Decimal('6.00'))
+
+    def test_settlement_is_exactly_once(self):
+        self._create_plays(2)
+        StationSettlementService.settle_station(self.station)
+
+        self.assertIsNone(StationSettlementService.settle_station(self.station))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('6.00'))
+        self.assertEqual(StationTransaction.objects.filter(transaction_type='play_charge').count(), 2)
+
+    def test_unaffordable_plays_fail_and_report_is_consistent(self):
+        self._create_plays(6)
+
+        summary = StationSettlementService.settle_all(batch_size=4)
+
+        self.assertEqual(summary['plays_charged'], 5)
+        self.assertEqual(summary['plays_failed'], 1)
+        self.assertEqual(StationSettlement.objects.count(), 2)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('0.00'))
+        failed = PlayLog.objects.get(payment_status='failed')
+        self.assertEqual(failed.payment_error, 'Insufficient funds at settlement')
+
+        report = StationSettlementService.reconciliation_report()
+        self.assertTrue(report['is_consistent'])
+        self.assertEqual(report['plays_charged'], 5)
+        self.assertEqual(report['pending_plays'], 0)
@@ -5,8 +5,9 @@ frequently accessed data using Redis.
 
 import json
 import logging
+import time
 from datetime import timedelta
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 from django.core.cache import cache
 from django.conf import settings
 from django.utils import timezone
@@ -17,6 +18,88 @@ from django.core.serializers.json import DjangoJSONEncoder
 logger = logging.getLogger(__name__)
 
 
+class CacheNamespace:
+    """
+    Generation-counter namespace for cache keys
+
+    Every namespace (e.g. one artist) has a counter that is embedded in the
+    keys written under it. Invalidating the namespace is a single INCR of
+    that counter: readers immediately build different keys, and the entries
+    written under the old generation are never read again and simply expire.
+    No keyspace scans are involved.
+    """
+
+    KEY_PREFIX = 'zamio:ns'
+
+    def __init__(self, name: str, entity_id: Any = None):
+        self.name = name
+        self.entity_id = entity_id
+
+    @property
+    def counter_key(self) -> str:
+        if self.entity_id is None:
+            return f"{self.KEY_PREFIX}:{self.name}"
+        return f"{self.KEY_PREFIX}:{self.name}:{self.entity_id}"
+
+    @staticmethod
+    def _seed() -> int:
+        # A counter that was evicted restarts above every generation it handed
+        # out before, so entries from before the eviction cannot be read again
+        return time.time_ns() // 1000
+
+    def generation(self) -> int:
+        return self.generations([self])[0]
+
+    @classmethod
+    def generations(cls, namespaces: Iterable['CacheNamespace']) -> List[int]:
+        """Current generation of each namespace, fetched in one round trip"""
+        namespaces = list(namespaces)
+        try:
+            current = cache.get_many([ns.counter_key for ns in namespaces])
+        except Exception as e:
+            logger.error(f"Failed to read cache namespace generations: {e}")
+            current = {}
+
+        result = []
+        for ns in namespaces:
+            value = current.get(ns.counter_key)
+            if value is None:
+                value = ns._seed()
+                try:
+                    if not cache.add(ns.counter_key, value, timeout=None):
+                        value = cache.get(ns.counter_key, value)
+                except Exception as e:
+                    logger.error(f"Failed to seed cache namespace {ns.counter_key}: {e}")
+            result.append(int(value))
+        return result
+
+    def invalidate(self) -> bool:
+        """Move the namespace to a new generation"""
+        try:
+            cache.incr(self.counter_key)
+        except ValueError:
+            # Counter not set (or evicted): start a fresh, strictly newer generation
+            try:
+                cache.set(self.counter_key, self._seed(), timeout=None)
+            except Exception as e:
+                logger.error(f"Failed to reset cache namespace {self.counter_key}: {e}")
+                return False
+        except Exception as e:
+            logger.error(f"Failed to invalidate cache namespace {self.counter_key}: {e}")
+            return False
+        logger.debug(f"Invalidated cache namespace: {self.counter_key}")
+        return True
+
+    @classmethod
+    def versioned_key(cls, base: str, namespaces: Iterable['CacheNamespace']) -> str:
+        """Embed the generations of all namespaces a cached value depends on"""
+        namespaces = list(namespaces)
+        if not namespaces:
+            return base
+        generations = '.'.join(str(generation) for generation in cls.generations(namespaces))
+        return f"{base}:g{generations}"
+
+
 class CacheService:
     """Centralized caching service for frequently accessed data"""
     
@@ -43,9 +126,9 @@ class CacheService:
     }
     
     @classmethod
-    def _make_key(cls, prefix: str, identifier: str) -> str:
-        """Create a standardized cache key"""
-        return f"zamio:{prefix}:{identifier}"
+    def _make_key(cls, prefix: str, identifier: str, namespaces: Optional[List[CacheNamespace]] = None) -> str:
+        """Create a standardized cache key, versioned by any namespaces it depends on"""
+        return CacheNamespace.versioned_key(f"zamio:{prefix}:{identifier}", namespaces or [])
     
     @classmethod
     def _serialize_data(cls, data: Any) -> str:
@@ -63,10 +146,11 @@ class CacheService:
             return data
     
     @classmethod
-    def set(cls, prefix: str, identifier: str, data: Any, timeout: str = 'medium') -> bool:
+    def set(cls, prefix: str, identifier: str, data: Any, timeout: str = 'medium',
+            namespaces: Optional[List[CacheNamespace]] = None) -> bool:
         """Set data in cache with specified timeout"""
         try:
-            key = cls._make_key(prefix, identifier)
+            key = cls._make_key(prefix, identifier, namespaces)
             serialized_data = cls._serialize_data(data)
             timeout_seconds = cls.TIMEOUTS.get(timeout, cls.TIMEOUTS['medium'])
             
@@ -78,10 +162,10 @@ class CacheService:
             return False
     
     @classmethod
-    def get(cls, prefix: str, identifier: str) -> Optional[Any]:
+    def get(cls, prefix: str, identifier: str, namespaces: Optional[List[CacheNamespace]] = None) -> Optional[Any]:
         """Get data from cache"""
         try:
-            key = cls._make_key(prefix, identifier)
+            key = cls._make_key(prefix, identifier, namespaces)
             cached_data = cache.get(key)
             
             if cached_data is not None:
@@ -95,10 +179,10 @@ class CacheService:
             return None
     
     @classmethod
-    def delete(cls, prefix: str, identifier: str) -> bool:
+    def delete(cls, prefix: str, identifier: str, namespaces: Optional[List[CacheNamespace]] = None) -> bool:
         """Delete data from cache"""
         try:
-            key = cls._make_key(prefix, identifier)
+            key = cls._make_key(prefix, identifier, namespaces)
             cache.delete(key)
             logger.debug(f"Deleted cache key: {key}")
             return True
@@ -106,9 +190,19 @@ class CacheService:
             logger.error(f"Failed to delete cached data: {e}")
             return False
     
+    @classmethod
+    def invalidate_namespace(cls, name: str, entity_id: Any = None) -> bool:
+        """Invalidate every entry cached under a namespace with one counter increment"""
+        return CacheNamespace(name, entity_id).invalidate()
+
     @classmethod
     def invalidate_pattern(cls, pattern: str) -> bool:
-        """Invalidate cache keys matching a pattern"""
+        """
+        Delete cache keys matching a pattern
+
+        This walks the keyspace, so it is meant for operators (manage_cache);
+        application code invalidates through namespaces instead.
+        """
         try:
             # This requires django-redis backend
             cache.delete_pattern(f"zamio:{pattern}*")
@@ -121,52 +215,64 @@ class CacheService:
 
 class AnalyticsCacheService(CacheService):
     """Specialized caching service for analytics data"""
-    
+
+    # Bumped to drop every analytics entry at once
+    GLOBAL_NAMESPACE = 'analytics'
+
+    @classmethod
+    def namespaces(cls, entity_type: str = None, entity_id: Any = None) -> List[CacheNamespace]:
+        """
+        Namespaces an analytics entry for one entity (or platform-wide) depends on.
+        The analytics aggregator caches under these too, so one invalidation
+        reaches both.
+        """
+        namespaces = [CacheNamespace(cls.GLOBAL_NAMESPACE)]
+        if entity_type and entity_id is not None:
+            namespaces.append(CacheNamespace(f"{entity_type}_analytics", entity_id))
+        return namespaces
+
     @classmethod
     def cache_station_analytics(cls, station_id: int, date_range: str, data: Dict) -> bool:
         """Cache station analytics data"""
         key = f"station_analytics:{station_id}:{date_range}"
-        return cls.set('analytics', key, data, 'long')
+        return cls.set('analytics', key, data, 'long', cls.namespaces('station', station_id))
     
     @classmethod
     def get_station_analytics(cls, station_id: int, date_range: str) -> Optional[Dict]:
         """Get cached station analytics data"""
         key = f"station_analytics:{station_id}:{date_range}"
-        return cls.get('analytics', key)
+        return cls.get('analytics', key, cls.namespaces('station', station_id))
     
     @classmethod
     def cache_artist_analytics(cls, artist_id: int, date_range: str, data: Dict) -> bool:
         """Cache artist analytics data"""
         key = f"artist_analytics:{artist_id}:{date_range}"
-        return cls.set('analytics', key, data, 'long')
+        return cls.set('analytics', key, data, 'long', cls.namespaces('artist', artist_id))
     
     @classmethod
     def get_artist_analytics(cls, artist_id: int, date_range: str) -> Optional[Dict]:
         """Get cached artist analytics data"""
         key = f"artist_analytics:{artist_id}:{date_range}"
-        return cls.get('analytics', key)
+        return cls.get('analytics', key, cls.namespaces('artist', artist_id))
     
     @classmethod
     def cache_platform_analytics(cls, date_range: str, data: Dict) -> bool:
         """Cache platform-wide analytics data"""
         key = f"platform_analytics:{date_range}"
-        return cls.set('analytics', key, data, 'medium')
+        return cls.set('analytics', key, data, 'medium', cls.namespaces())
     
     @classmethod
     def get_platform_analytics(cls, date_range: str) -> Optional[Dict]:
         """Get cached platform analytics data"""
         key = f"platform_analytics:{date_range}"
-        return cls.get('analytics', key)
+        return cls.get('analytics', key, cls.namespaces())
     
     @classmethod
-    def invalidate_analytics(cls, entity_type: str = None, entity_id: int = None):
+    def invalidate_analytics(cls, entity_type: str = None, entity_id: Any = None) -> bool:
         """Invalidate analytics cache for specific entity or all analytics"""
-        if entity_type and entity_id:
-            pattern = f"analytics:{entity_type}_analytics:{entity_id}"
-        else:
-            pattern = "analytics"
-        
-        cls.invalidate_pattern(pattern)
+        if entity_type and entity_id is not None:
+            return cls.invalidate_namespace(f"{entity_type}_analytics", entity_id)
+        return cls.invalidate_namespace(cls.GLOBAL_NAMESPACE)
 
 
 class UserCacheService(CacheService):
@@ -284,13 +390,13 @@ class RoyaltyCacheService(CacheService):
     def cache_user_royalty_summary(cls, user_id: int, period: str, summary: Dict) -> bool:
         """Cache user royalty summary"""
         key = f"user_summary:{user_id}:{period}"
-        return cls.set('royalty', key, summary, 'long')
+        return cls.set('royalty', key, summary, 'long', [CacheNamespace('royalty_user', user_id)])
     
     @classmethod
     def get_user_royalty_summary(cls, user_id: int, period: str) -> Optional[Dict]:
         """Get cached user royalty summary"""
         key = f"user_summary:{user_id}:{period}"
-        return cls.get('royalty', key)
+        return cls.get('royalty', key, [CacheNamespace('royalty_user', user_id)])
     
     @classmethod
     def cache_exchange_rates(cls, rates: Dict) -> bool:
@@ -384,26 +490,35 @@ class CacheInvalidator:
         UserCacheService.invalidate_user_cache(user_id)
         
         # Also invalidate analytics that might include this user
-        AnalyticsCacheService.invalidate_pattern(f"analytics:*")
+        AnalyticsCacheService.invalidate_analytics()
     
     @staticmethod
-    def invalidate_on_track_update(track_id: int, artist_id: int = None):
-        """Invalidate track-related caches when track data changes"""
+    def invalidate_on_track_update(track_id: int, artist_id: int = None, artist_public_id: str = None):
+        """
+        Invalidate track-related caches when track data changes. Dashboards are
+        cached under the artist's public id, so callers pass it alongside the pk.
+        """
         TrackCacheService.invalidate_track_cache(track_id)
         
         if artist_id:
             TrackCacheService.delete('track', f"artist:{artist_id}")
-            AnalyticsCacheService.invalidate_pattern(f"analytics:artist_analytics:{artist_id}")
+        if artist_public_id:
+            AnalyticsCacheService.invalidate_analytics('artist', artist_public_id)
     
     @staticmethod
-    def invalidate_on_playlog_create(station_id: int, track_id: int, artist_id: int):
-        """Invalidate relevant caches when new play log is created"""
-        # Invalidate analytics caches
+    def invalidate_on_playlog_create(station_id: int, track_id: int, artist_id: int,
+                                     station_public_id: str = None, artist_public_id: str = None):
+        """
+        Invalidate relevant caches when new play log is created. Analytics are
+        invalidated for the public ids the caller already holds.
+        """
+        # Invalidate analytics caches (every cached range for the station and artist)
         today = timezone.now().date().strftime('%Y-%m-%d')
         
-        AnalyticsCacheService.delete('analytics', f"station_analytics:{station_id}:{today}")
-        AnalyticsCacheService.delete('analytics', f"artist_analytics:{artist_id}:{today}")
-        AnalyticsCacheService.delete('analytics', f"platform_analytics:{today}")
+        for entity_type, entity_id in (('station', station_public_id), ('artist', artist_public_id)):
+            if entity_id:
+                AnalyticsCacheService.invalidate_analytics(entity_type, entity_id)
+        AnalyticsCacheService.delete('analytics', f"platform_analytics:{today}", AnalyticsCacheService.namespaces())
         
         # Invalidate detection caches
         DetectionCacheService.delete('detection', f"station:{station_id}:date:{today}")
@@ -411,7 +526,7 @@ class CacheInvalidator:
     @staticmethod
     def invalidate_on_royalty_calculation(user_id: int, cycle_id: int = None):
         """Invalidate royalty-related caches when calculations are updated"""
-        RoyaltyCacheService.invalidate_pattern(f"royalty:user_summary:{user_id}")
+        RoyaltyCacheService.invalidate_namespace('royalty_user', user_id)
         
         if cycle_id:
             RoyaltyCacheService.delete('royalty', f"cycle:{cycle_id}")
@@ -95,6 +95,11 @@ app.conf.update(
         'core.enhanced_tasks.warm_cache_task': {'queue': 'low'},
         'music_monitor.tasks.*': {'queue': 'normal'},
         'royalties.tasks.*': {'queue': 'normal'},
+        'bank_account.tasks.*': {'queue': 'normal'},
+        'analytics.tasks.refresh_play_rollups': {'queue': 'analytics'},
+        'analytics.tasks.refresh_admin_snapshots': {'queue': 'analytics'},
+        'analytics.tasks.update_realtime_metrics': {'queue': 'analytics'},
+        'analytics.tasks.persist_metric_buckets': {'queue': 'analytics'},
         # Email tasks routing
         'accounts.tasks.send_email_verification_task': {'queue': 'high'},
         'accounts.tasks.send_password_reset_email_task': {'queue': 'high'},
@@ -127,6 +132,8 @@ app.conf.update(
         'core.tasks.file_security_tasks.batch_scan_existing_files': {'queue': 'normal'},
         # Station complaint tasks routing
         'stations.tasks.send_complaint_notification': {'queue': 'high'},
+        'stations.tasks.import_station_playlog': {'queue': 'normal'},
+        'stations.tasks.requeue_stale_playlog_imports': {'queue': 'normal'},
         'stations.tasks.auto_escalate_old_complaints': {'queue': 'normal'},
         'stations.tasks.send_complaint_reminders': {'queue': 'normal'},
         'stations.tasks.cleanup_old_complaint_updates': {'queue': 'low'},
@@ -200,6 +207,46 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(hour=1, minute=0),  # daily at 1 AM
         'options': {'queue': 'normal'}
     },
+    'fold-platform-pool-shards': {
+        'task': 'bank_account.tasks.fold_platform_pool_shards',
+        'schedule': crontab(minute='*/5'),  # every 5 minutes
+        'options': {'queue': 'normal'}
+    },
+    'refresh-play-rollups': {
+        'task': 'analytics.tasks.refresh_play_rollups',
+        'schedule': crontab(minute='*/5'),  # every 5 minutes
+        'options': {'queue': 'analytics'}
+    },
+    'refresh-admin-snapshots': {
+        'task': 'analytics.tasks.refresh_admin_snapshots',
+        'schedule': crontab(minute='*/10'),  # every 10 minutes
+        'options': {'queue': 'analytics'}
+    },
+    'update-realtime-metrics': {
+        'task': 'analytics.tasks.update_realtime_metrics',
+        'schedule': crontab(minute='*'),  # every minute
+        'options': {'queue': 'analytics'}
+    },
+    'persist-metric-buckets': {
+        'task': 'analytics.tasks.persist_metric_buckets',
+        'schedule': crontab(minute='*/10'),  # every 10 minutes
+        'options': {'queue': 'analytics'}
+    },
+    'attribute-partner-usage': {
+        'task': 'royalties.tasks.attribute_partner_usage',
+        'schedule': crontab(minute='*/5'),  # every 5 minutes
+        'options': {'queue': 'normal'}
+    },
+    'settle-station-plays': {
+        'task': 'bank_account.tasks.settle_station_plays',
+        'schedule': crontab(minute='*/10'),  # every 10 minutes
+        'options': {'queue': 'normal'}
+    },
+    'station-settlement-reconciliation': {
+        'task': 'bank_account.tasks.station_settlement_reconciliation_report',
+        'schedule': crontab(hour=4, minute=30),  # daily at 4:30 AM
+        'options': {'queue': 'low'}
+    },
     'warm-cache-hourly': {
         'task': 'core.enhanced_tasks.warm_cache_task',
         'schedule': crontab(minute=0),  # every hour at minute 0
@@ -269,6 +316,18 @@ CELERY_BEAT_SCHEDULE = {
         'options': {'queue': 'normal'}
     },
     
+    # Token auth activity tracking
+    'flush-user-activity': {
+        'task': 'accounts.tasks.flush_user_activity',
+        'schedule': crontab(minute='*'),  # every minute (AUTH_ACTIVITY_FLUSH_INTERVAL)
+        'options': {'queue': 'low'}
+    },
+    'flush-audit-log': {
+        'task': 'accounts.tasks.flush_audit_log',
+        'schedule': crontab(minute='*'),  # every minute
+        'options': {'queue': 'normal'}
+    },
+    
     # File security monitoring tasks
     'monitor-file-security': {
         'task': 'core.services.file_security_monitor.monitor_file_security',
@@ -317,6 +376,11 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(hour='*/4', minute=0),  # every 4 hours
         'options': {'queue': 'normal'}
     },
+    'requeue-stale-playlog-imports': {
+        'task': 'stations.tasks.requeue_stale_playlog_imports',
+        'schedule': crontab(minute='*/15'),  # every 15 minutes
+        'options': {'queue': 'normal'}
+    },
 }
 
 app.conf.beat_schedule = CELERY_BEAT_SCHEDULE
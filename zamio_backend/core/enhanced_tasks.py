@@ -94,7 +94,8 @@ def enhanced_audio_detection_task(self, audio_data_b64: str, station_id: int,
         CacheInvalidator.invalidate_on_playlog_create(
             station_id, 
             match_result.get('song_id') if match_result else None,
-            None  # We don't have artist_id directly
+            None,  # We don't have artist_id directly
+            station_public_id=station.station_id,
         )
         
         self.update_state(state='PROGRESS', meta={'progress': 100, 'status': 'Detection completed'})
@@ -138,7 +139,7 @@ def batch_fingerprint_tracks_task(self, track_ids: List[int], config_name: str =
             
             for track_id in batch_track_ids:
                 try:
-                    track = Track.objects.get(id=track_id)
+                    track = Track.objects.select_related('artist').get(id=track_id)
                     success = service.fingerprint_track(track)
                     
                     if success:
@@ -147,7 +148,9 @@ def batch_fingerprint_tracks_task(self, track_ids: List[int], config_name: str =
                         batch_results['successful'] += 1
                         
                         # Invalidate track cache
-                        CacheInvalidator.invalidate_on_track_update(track_id, track.artist_id)
+                        CacheInvalidator.invalidate_on_track_update(
+                            track_id, track.artist_id, artist_public_id=track.artist.artist_id
+                        )
                     else:
                         batch_results['failed'] += 1
                         batch_results['errors'].append(f"Track {track_id}: Fingerprinting failed")
@@ -43,6 +43,11 @@ class Command(BaseCommand):
             type=str,
             help='Invalidate cache keys matching pattern',
         )
+        parser.add_argument(
+            '--invalidate-namespace',
+            type=str,
+            help='Invalidate a cache namespace without scanning keys, e.g. "analytics" or "artist_analytics:ART123"',
+        )
         parser.add_argument(
             '--warm-analytics',
             action='store_true',
@@ -94,6 +99,9 @@ class Command(BaseCommand):
             if options['invalidate_pattern']:
                 self._invalidate_pattern(options['invalidate_pattern'])
             
+            if options['invalidate_namespace']:
+                self._invalidate_namespace(options['invalidate_namespace'])
+            
             if options['test_cache']:
                 self._test_cache_operations()
             
@@ -250,6 +258,14 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Failed to invalidate pattern: {e}'))
             raise
     
+    def _invalidate_namespace(self, namespace):
+        """Bump a namespace generation (name or name:entity_id)"""
+        name, _, entity_id = namespace.partition(':')
+        if CacheService.invalidate_namespace(name, entity_id or None):
+            self.stdout.write(self.style.SUCCESS(f'✓ Invalidated namespace: {namespace}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Failed to invalidate namespace: {namespace}'))
+    
     def _test_cache_operations(self):
         """Test cache operations to ensure they're working"""
         self.stdout.write('Testing cache operations...')
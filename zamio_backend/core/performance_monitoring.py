@@ -10,7 +10,6 @@ from typing import Dict, List, Any, Optional
 from django.utils import timezone
 from django.core.cache import cache
 from django.conf import settings
-import json
 
 logger = logging.getLogger(__name__)
 
@@ -90,6 +89,28 @@ class PerformanceMetrics:
         )
         
         cache.set(metrics_key, current_metrics, timeout=86400)  # 24 hours
+        cls._register_task_name(task_name)
+    
+    @classmethod
+    def _register_task_name(cls, task_name: str):
+        """
+        Remember which tasks have aggregated metrics so they can be listed
+        without scanning the keyspace. Each name claims a numbered slot once,
+        through cache.add and cache.incr, so concurrent workers never
+        overwrite each other's registrations.
+        """
+        if not cache.add(cls._make_key('task_registered', task_name), True, timeout=None):
+            return
+        count_key = cls._make_key('task_count')
+        cache.add(count_key, 0, timeout=None)
+        slot = cache.incr(count_key)
+        cache.set(cls._make_key('task_slot', str(slot)), task_name, timeout=None)
+    
+    @classmethod
+    def _registered_task_names(cls) -> List[str]:
+        count = cache.get(cls._make_key('task_count')) or 0
+        slot_keys = [cls._make_key('task_slot', str(slot)) for slot in range(1, count + 1)]
+        return sorted(set(cache.get_many(slot_keys).values()))
     
     @classmethod
     def get_task_metrics(cls, task_name: str) -> Optional[Dict]:
@@ -101,22 +122,9 @@ class PerformanceMetrics:
     def get_all_task_metrics(cls) -> Dict[str, Dict]:
         """Get metrics for all tasks"""
         try:
-            from django_redis import get_redis_connection
-            redis_conn = get_redis_connection("default")
-            
-            pattern = cls._make_key('aggregated', '*')
-            keys = redis_conn.keys(pattern)
-            
-            all_metrics = {}
-            for key in keys:
-                key_str = key.decode('utf-8')
-                task_name = key_str.split(':')[-1]  # Extract task name from key
-                
-                metrics_json = redis_conn.get(key)
-                if metrics_json:
-                    all_metrics[task_name] = json.loads(metrics_json.decode('utf-8'))
-            
-            return all_metrics
+            keys = {cls._make_key('aggregated', task_name): task_name for task_name in cls._registered_task_names()}
+            found = cache.get_many(list(keys))
+            return {keys[key]: metrics for key, metrics in found.items()}
         except Exception as e:
             logger.error(f"Failed to get all task metrics: {e}")
             return {}
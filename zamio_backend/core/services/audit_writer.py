@@ -0,0 +1,256 @@
+"""
+Durable, asynchronous AuditLog writer
+
+Request middleware and hot-path services used to INSERT one ``AuditLog`` row
+per event, on the request thread. ``audit_writer.log(...)`` instead serialises
+the row and appends it to a Redis stream (when the default cache is
+django-redis). The ``accounts.tasks.flush_audit_log`` beat task drains the
+stream through a consumer group and persists it with one ``bulk_create`` per
+``AUDIT_LOG_BATCH_SIZE`` events.
+
+Nothing is dropped:
+
+* an event is durable once ``XADD`` returns, so a worker killed by SIGKILL,
+  the OOM killer or a gunicorn timeout loses nothing;
+* the drain runs in its own task, never inside a caller's ``atomic()`` block,
+  so a rolled-back request cannot take anyone's events with it;
+* stream entries are acknowledged only after their row is written; entries
+  left unacknowledged by a crashed drain are reclaimed after
+  ``AUDIT_LOG_CLAIM_IDLE_MS``;
+* a row that still fails after ``AUDIT_LOG_MAX_RETRIES`` deliveries is moved
+  to the ``audit:log:dead`` stream with its error, to be inspected and
+  replayed with ``requeue_dead_letters``.
+
+Without a Redis stream (or with ``AUDIT_LOG_ASYNC = False``, as in the test
+settings) ``log`` inserts the row immediately, exactly like
+``AuditLog.objects.create``.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """Queues AuditLog rows on a Redis stream and writes them in batches"""
+
+    STREAM_KEY = 'audit:log:events'
+    DEAD_LETTER_KEY = 'audit:log:dead'
+    CONSUMER_GROUP = 'audit-log-writer'
+    CONSUMER_NAME = 'drain'
+
+    def __init__(self):
+        self._redis = None
+        self._redis_resolved = False
+        self._group_ready = False
+
+    @property
+    def batch_size(self) -> int:
+        return getattr(settings, 'AUDIT_LOG_BATCH_SIZE', 200)
+
+    @property
+    def max_retries(self) -> int:
+        return getattr(settings, 'AUDIT_LOG_MAX_RETRIES', 3)
+
+    @property
+    def claim_idle_ms(self) -> int:
+        return getattr(settings, 'AUDIT_LOG_CLAIM_IDLE_MS', 5 * 60 * 1000)
+
+    @property
+    def is_async(self) -> bool:
+        return getattr(settings, 'AUDIT_LOG_ASYNC', True)
+
+    def _connection(self):
+        if not self._redis_resolved:
+            self._redis_resolved = True
+            try:
+                from django_redis import get_redis_connection
+                self._redis = get_redis_connection('default')
+            except Exception:
+                # Non-redis cache backend or django-redis missing
+                self._redis = None
+        return self._redis
+
+    def log(self, **fields):
+        """Queue one AuditLog row; takes the same keyword arguments as ``AuditLog.objects.create``"""
+        from accounts.models import AuditLog
+
+        # The timestamp default is evaluated here, at event time
+        entry = AuditLog(**fields)
+        redis_conn = self._connection() if self.is_async else None
+        if redis_conn is not None:
+            try:
+                redis_conn.xadd(self.STREAM_KEY, {'row': self._serialise(entry)})
+                return
+            except Exception as e:
+                logger.warning(f"Audit log stream unavailable, writing inline: {str(e)}")
+
+        # Only this event is written here, so a caller's rollback can only take its own row
+        entry.save(force_insert=True)
+
+    def pending(self) -> int:
+        """Events queued on the stream and not yet written"""
+        redis_conn = self._connection()
+        if redis_conn is None:
+            return 0
+        try:
+            return redis_conn.xlen(self.STREAM_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read audit log stream length: {str(e)}")
+            return 0
+
+    def flush(self) -> Dict[str, int]:
+        """Drain the stream into AuditLog; returns how many rows were saved and dead-lettered"""
+        result = {'saved': 0, 'dead_lettered': 0}
+        redis_conn = self._connection()
+        if redis_conn is None:
+            return result
+
+        self._ensure_group(redis_conn)
+        # Entries a crashed drain read but never acknowledged come first
+        entries = self._claim_stale(redis_conn)
+        while True:
+            if not entries:
+                response = redis_conn.xreadgroup(
+                    self.CONSUMER_GROUP, self.CONSUMER_NAME, {self.STREAM_KEY: '>'}, count=self.batch_size
+                )
+                entries = [entry for _stream, stream_entries in response or [] for entry in stream_entries]
+            if not entries:
+                break
+
+            saved, failed = self._write(entries)
+            result['saved'] += saved
+            if failed:
+                result['dead_lettered'] += self._handle_failures(redis_conn, failed)
+                # Retryable rows stay pending and are reclaimed on a later drain
+                break
+            entries = []
+        return result
+
+    def requeue_dead_letters(self) -> int:
+        """Move dead-lettered rows back onto the main stream once their cause is fixed"""
+        redis_conn = self._connection()
+        if redis_conn is None:
+            return 0
+
+        moved = 0
+        for entry_id, fields in redis_conn.xrange(self.DEAD_LETTER_KEY):
+            redis_conn.xadd(self.STREAM_KEY, {'row': self._field(fields, 'row')})
+            redis_conn.xdel(self.DEAD_LETTER_KEY, entry_id)
+            moved += 1
+        return moved
+
+    def _ensure_group(self, redis_conn):
+        if self._group_ready:
+            return
+        try:
+            redis_conn.xgroup_create(self.STREAM_KEY, self.CONSUMER_GROUP, id='0', mkstream=True)
+        except Exception as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_ready = True
+
+    def _claim_stale(self, redis_conn) -> List:
+        try:
+            response = redis_conn.xautoclaim(
+                self.STREAM_KEY, self.CONSUMER_GROUP, self.CONSUMER_NAME,
+                min_idle_time=self.claim_idle_ms, start_id='0-0', count=self.batch_size,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to reclaim stale audit log entries: {str(e)}")
+            return []
+        # Entries deleted while pending come back without fields
+        return [(entry_id, fields) for entry_id, fields in (response[1] if response else []) if fields]
+
+    def _write(self, entries: List):
+        """Persist stream entries; returns (rows saved, [(entry_id, row, error)] that failed)"""
+        from accounts.models import AuditLog
+
+        rows, failed = [], []
+        for entry_id, fields in entries:
+            row = self._field(fields, 'row')
+            try:
+                rows.append((entry_id, self._deserialise(row)))
+            except Exception as e:
+                failed.append((entry_id, row, str(e)))
+
+        written_ids = []
+        try:
+            with transaction.atomic():
+                AuditLog.objects.bulk_create([entry for _entry_id, entry in rows])
+            written_ids = [entry_id for entry_id, _entry in rows]
+        except Exception as e:
+            logger.warning(f"Audit log batch of {len(rows)} failed, retrying row by row: {str(e)}")
+            for entry_id, entry in rows:
+                try:
+                    with transaction.atomic():
+                        entry.save(force_insert=True)
+                    written_ids.append(entry_id)
+                except Exception as e:
+                    logger.error(f"Audit log write failed for {entry.action}: {str(e)}")
+                    failed.append((entry_id, self._serialise(entry), str(e)))
+
+        if written_ids:
+            self._acknowledge(self._connection(), written_ids)
+        return len(written_ids), failed
+
+    def _handle_failures(self, redis_conn, failed: List) -> int:
+        """Dead-letter rows that have used up their deliveries; the rest stay pending"""
+        deliveries = {}
+        for failed_id, _row, _error in failed:
+            for pending in redis_conn.xpending_range(
+                self.STREAM_KEY, self.CONSUMER_GROUP, min=failed_id, max=failed_id, count=1
+            ):
+                deliveries[pending['message_id']] = pending['times_delivered']
+
+        dead_ids = []
+        for entry_id, row, error in failed:
+            if deliveries.get(entry_id, self.max_retries) < self.max_retries:
+                continue
+            redis_conn.xadd(self.DEAD_LETTER_KEY, {'row': row, 'error': error, 'stream_id': entry_id})
+            logger.error(f"Audit log entry moved to {self.DEAD_LETTER_KEY} after {self.max_retries} attempts: {row}")
+            dead_ids.append(entry_id)
+        if dead_ids:
+            self._acknowledge(redis_conn, dead_ids)
+        return len(dead_ids)
+
+    def _acknowledge(self, redis_conn, entry_ids: List):
+        redis_conn.xack(self.STREAM_KEY, self.CONSUMER_GROUP, *entry_ids)
+        redis_conn.xdel(self.STREAM_KEY, *entry_ids)
+
+    @staticmethod
+    def _field(fields: Dict, name: str) -> Optional[str]:
+        value = fields.get(name.encode()) or fields.get(name)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    @staticmethod
+    def _serialise(entry) -> str:
+        values = {}
+        for field in entry._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            value = field.value_from_object(entry)
+            # DjangoJSONEncoder would truncate event times to milliseconds
+            values[field.attname] = value.isoformat() if isinstance(value, datetime) else value
+        return json.dumps(values, cls=DjangoJSONEncoder)
+
+    @staticmethod
+    def _deserialise(row: str):
+        from accounts.models import AuditLog
+
+        values = json.loads(row)
+        return AuditLog(**{
+            field.attname: field.to_python(values[field.attname])
+            for field in AuditLog._meta.concrete_fields
+            if field.attname in values
+        })
+
+
+# Singleton instance
+audit_writer = AuditLogWriter()
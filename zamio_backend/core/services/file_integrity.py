@@ -0,0 +1,264 @@
+"""
+Shared SHA-256 hashing and integrity verification for stored files
+
+Hashing never holds a whole file in memory: uploads and remote storage are
+read in fixed-size chunks and large local files are hashed through ``mmap``.
+Digests of local files are memoised in ``FileDigest`` keyed by
+(path, size, mtime, inode), so a sweep only re-reads files whose stat
+signature changed since they were last hashed. ``verify_batch`` fans the
+remaining files out over a process pool and reports throughput.
+"""
+import hashlib
+import logging
+import mmap
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+# Memo lookups and upserts are batched to stay under database parameter limits
+MEMO_BATCH_SIZE = 500
+
+
+def hash_stream(file_obj, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-256 of an open file or upload, read in chunks and rewound afterwards"""
+    digest = hashlib.sha256()
+    if hasattr(file_obj, 'seek'):
+        file_obj.seek(0)
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    if hasattr(file_obj, 'seek'):
+        file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def hash_path(path: str, chunk_size: int = CHUNK_SIZE, mmap_threshold: int = MMAP_THRESHOLD) -> str:
+    """SHA-256 of a local file, memory-mapped when it is larger than ``mmap_threshold``"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size and size >= mmap_threshold:
+            # The kernel pages the file in; hashlib releases the GIL while it reads
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            for chunk in iter(lambda: handle.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path: str) -> Tuple[int, int, int]:
+    """(size, mtime_ns, inode) - if any of these changed, the memoised digest is stale"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def _hash_worker(path: str, chunk_size: int, mmap_threshold: int):
+    """Pool entry point: hash one file without touching Django"""
+    try:
+        signature = file_signature(path)
+        return path, signature, hash_path(path, chunk_size, mmap_threshold), None
+    except OSError as e:
+        return path, None, None, str(e)
+
+
+def _local_path(file_field) -> Optional[str]:
+    """Filesystem path of a stored file, or None for remote storage"""
+    if isinstance(file_field, str):
+        return file_field
+    try:
+        return file_field.path
+    except (NotImplementedError, AttributeError, ValueError):
+        return None
+
+
+class FileIntegrityService:
+    """Hashes and verifies stored files against their recorded SHA-256"""
+
+    @property
+    def chunk_size(self) -> int:
+        return getattr(settings, 'FILE_INTEGRITY_CHUNK_SIZE', CHUNK_SIZE)
+
+    @property
+    def mmap_threshold(self) -> int:
+        return getattr(settings, 'FILE_INTEGRITY_MMAP_THRESHOLD', MMAP_THRESHOLD)
+
+    def digest(self, file_field, force: bool = False) -> str:
+        """Digest of a stored file, served from the memo table when it is unchanged"""
+        path = _local_path(file_field)
+        if path is None:
+            return self._hash_remote(file_field)
+
+        if not force:
+            memoised = self._memoised_digests([path]).get(path)
+            if memoised:
+                return memoised
+
+        path, signature, digest, error = _hash_worker(path, self.chunk_size, self.mmap_threshold)
+        if error:
+            raise OSError(error)
+        self._remember({path: (signature, digest)})
+        return digest
+
+    def verify(self, file_field, expected_hash: str, force: bool = False) -> bool:
+        """True when the stored file still hashes to ``expected_hash``"""
+        try:
+            return self.digest(file_field, force=force) == expected_hash
+        except Exception as e:
+            logger.warning(f"Integrity check of {getattr(file_field, 'name', file_field)} failed: {str(e)}")
+            return False
+
+    def verify_batch(
+        self,
+        entries: Iterable[Tuple[Any, Any, str]],
+        workers: Optional[int] = None,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Verify many files at once
+
+        ``entries`` are (key, file_field_or_path, expected_hash) tuples. Returns
+        ``results`` mapping each key to 'verified', 'mismatch', 'missing' or
+        'error', plus ``metrics`` with memo hits, bytes hashed and throughput.
+        """
+        started = time.monotonic()
+        workers = workers or getattr(settings, 'FILE_INTEGRITY_WORKERS', None) or os.cpu_count() or 1
+
+        results = {}
+        local = []
+        remote = []
+        for key, file_field, expected_hash in entries:
+            path = _local_path(file_field)
+            if path is None:
+                remote.append((key, file_field, expected_hash))
+            else:
+                local.append((key, path, expected_hash))
+
+        paths = list(dict.fromkeys(path for _key, path, _expected in local))
+        digests = {} if force else self._memoised_digests(paths)
+        memo_hits = len(digests)
+
+        hashed, failures = self._hash_paths([path for path in paths if path not in digests], workers)
+        self._remember(hashed)
+        digests.update({path: digest for path, (_signature, digest) in hashed.items()})
+        bytes_hashed = sum(signature[0] for signature, _digest in hashed.values())
+
+        for key, path, expected_hash in local:
+            if path in digests:
+                results[key] = 'verified' if digests[path] == expected_hash else 'mismatch'
+            else:
+                results[key] = 'missing' if failures.get(path) == 'missing' else 'error'
+
+        for key, file_field, expected_hash in remote:
+            try:
+                results[key] = 'verified' if self._hash_remote(file_field) == expected_hash else 'mismatch'
+                bytes_hashed += file_field.size
+            except FileNotFoundError:
+                results[key] = 'missing'
+            except Exception as e:
+                logger.error(f"Integrity check of {getattr(file_field, 'name', file_field)} failed: {str(e)}")
+                results[key] = 'error'
+
+        elapsed = time.monotonic() - started
+        statuses = list(results.values())
+        metrics = {
+            'files': len(results),
+            'memo_hits': memo_hits,
+            'hashed': len(hashed) + len(remote),
+            'bytes_hashed': bytes_hashed,
+            'verified': statuses.count('verified'),
+            'mismatched': statuses.count('mismatch'),
+            'missing': statuses.count('missing'),
+            'errors': statuses.count('error'),
+            'workers': workers,
+            'elapsed_seconds': round(elapsed, 3),
+            'mb_per_second': round(bytes_hashed / (1024 * 1024) / elapsed, 2) if elapsed else 0.0,
+        }
+        logger.info(
+            f"Verified {metrics['files']} files ({metrics['memo_hits']} unchanged) - "
+            f"{metrics['bytes_hashed']} bytes in {metrics['elapsed_seconds']}s"
+        )
+        return {'results': results, 'metrics': metrics}
+
+    def _hash_paths(self, paths: List[str], workers: int):
+        """Hash local files, in a worker pool when there is more than one"""
+        hashed = {}
+        failures = {}
+        if not paths:
+            return hashed, failures
+
+        args = (paths, repeat(self.chunk_size), repeat(self.mmap_threshold))
+        if workers <= 1 or len(paths) == 1:
+            outcomes = map(_hash_worker, *args)
+        else:
+            # Celery's prefork children are daemonic and may not fork a process
+            # pool; hashing releases the GIL, so threads still run in parallel there
+            executor_class = (
+                ThreadPoolExecutor if multiprocessing.current_process().daemon else ProcessPoolExecutor
+            )
+            with executor_class(max_workers=min(workers, len(paths))) as executor:
+                outcomes = list(executor.map(_hash_worker, *args, chunksize=8))
+
+        for path, signature, digest, error in outcomes:
+            if error is None:
+                hashed[path] = (signature, digest)
+            else:
+                failures[path] = 'missing' if not os.path.exists(path) else 'error'
+                if failures[path] == 'error':
+                    logger.error(f"Could not hash {path}: {error}")
+        return hashed, failures
+
+    def _hash_remote(self, file_field) -> str:
+        file_field.open('rb')
+        try:
+            return hash_stream(file_field, self.chunk_size)
+        finally:
+            file_field.close()
+
+    def _memoised_digests(self, paths: List[str]) -> Dict[str, str]:
+        """Memoised digests for the paths whose stat signature is unchanged"""
+        from accounts.models import FileDigest
+
+        digests = {}
+        for offset in range(0, len(paths), MEMO_BATCH_SIZE):
+            batch = paths[offset:offset + MEMO_BATCH_SIZE]
+            for memo in FileDigest.objects.filter(path__in=batch):
+                try:
+                    signature = file_signature(memo.path)
+                except OSError:
+                    continue
+                if signature == (memo.size, memo.mtime_ns, memo.inode):
+                    digests[memo.path] = memo.digest
+        return digests
+
+    def _remember(self, hashed: Dict[str, Tuple[Tuple[int, int, int], str]]):
+        from accounts.models import FileDigest
+
+        memos = [
+            FileDigest(path=path, size=size, mtime_ns=mtime_ns, inode=inode, digest=digest)
+            for path, ((size, mtime_ns, inode), digest) in hashed.items()
+        ]
+        if memos:
+            FileDigest.objects.bulk_create(
+                memos,
+                batch_size=MEMO_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['path'],
+                update_fields=['size', 'mtime_ns', 'inode', 'digest', 'hashed_at'],
+            )
+
+
+# Singleton instance
+file_integrity = FileIntegrityService()
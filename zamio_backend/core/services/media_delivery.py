@@ -0,0 +1,185 @@
+"""
+Range-aware delivery for protected media and evidence files
+
+Access checks (permissions, HMAC tokens, integrity) stay with the calling
+service; once they pass, ``deliver_file`` turns the stored file into a response
+without reading it into memory:
+
+* ``Range: bytes=...`` requests get a ``206 Partial Content`` streamed from the
+  requested offset, so web players can seek without re-downloading the track;
+* ``ETag`` / ``If-None-Match`` short-circuit repeat downloads with a 304, and
+  ``If-Range`` keeps a resumed download from mixing two versions of a file;
+* full downloads stream in fixed-size chunks via ``FileResponse``;
+* with ``SECURE_MEDIA_OFFLOAD`` set, the bytes are handed off to the front-end
+  server through ``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` (Apache), which
+  then also handles ranges itself.
+"""
+import hashlib
+import logging
+import mimetypes
+import re
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import quote_etag
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+UNSATISFIABLE = 'unsatisfiable'
+
+
+def parse_range_header(header: Optional[str], size: int):
+    """
+    Parse a single-range ``Range`` header into an inclusive (start, end) pair
+
+    Returns None when the whole file should be sent (no header, a malformed
+    header or a multi-range request, which RFC 9110 lets servers ignore) and
+    ``UNSATISFIABLE`` when the range lies entirely outside the file.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return UNSATISFIABLE
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        return UNSATISFIABLE
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def file_etag(file_field, content_hash: Optional[str] = None) -> str:
+    """Strong ETag from the stored content hash, else from name, size and mtime"""
+    if content_hash:
+        return quote_etag(content_hash[:32])
+    try:
+        modified = file_field.storage.get_modified_time(file_field.name).timestamp()
+    except (NotImplementedError, OSError, AttributeError):
+        modified = ''
+    seed = f"{file_field.name}:{file_field.size}:{modified}"
+    return quote_etag(hashlib.sha256(seed.encode('utf-8')).hexdigest()[:32])
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    # If-None-Match uses weak comparison
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def iter_file_range(file_obj, start: int, length: int, chunk_size: int) -> Iterator[bytes]:
+    """Yield ``length`` bytes from ``start`` in chunks, closing the file at the end"""
+    try:
+        file_obj.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file_obj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_obj.close()
+
+
+def guess_content_type(name: str, default: str = 'application/octet-stream') -> str:
+    content_type, _ = mimetypes.guess_type(name)
+    return content_type or default
+
+
+def _offload_response(file_field, content_type: str) -> Optional[HttpResponse]:
+    offload = getattr(settings, 'SECURE_MEDIA_OFFLOAD', None)
+    if not offload:
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    if offload == 'x-accel-redirect':
+        prefix = getattr(settings, 'SECURE_MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = f"{prefix.rstrip('/')}/{file_field.name.lstrip('/')}"
+    elif offload == 'x-sendfile':
+        response['X-Sendfile'] = file_field.path
+    else:
+        logger.warning(f"Unknown SECURE_MEDIA_OFFLOAD mode {offload!r}; streaming from Django")
+        return None
+    return response
+
+
+def deliver_file(
+    request,
+    file_field,
+    filename: str,
+    content_type: Optional[str] = None,
+    disposition: str = 'attachment',
+    content_hash: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+) -> HttpResponse:
+    """
+    Build a streaming, range-aware response for a stored file
+
+    ``request`` may be None (no conditional or range headers). Callers add
+    their own cache and security headers to the returned response.
+    """
+    content_type = content_type or guess_content_type(file_field.name)
+    chunk_size = chunk_size or getattr(settings, 'SECURE_MEDIA_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    headers = request.META if request is not None else {}
+
+    size = file_field.size
+    etag = file_etag(file_field, content_hash)
+
+    if _etag_matches(headers.get('HTTP_IF_NONE_MATCH'), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    response = _offload_response(file_field, content_type)
+    if response is None:
+        byte_range = parse_range_header(headers.get('HTTP_RANGE'), size)
+        if_range = headers.get('HTTP_IF_RANGE')
+        if byte_range and if_range and if_range.strip() != etag:
+            # The client's partial copy is of another version; send it all again
+            byte_range = None
+
+        if byte_range == UNSATISFIABLE:
+            response = HttpResponse(status=416, content_type=content_type)
+            response['Content-Range'] = f"bytes */{size}"
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            file_obj = file_field.storage.open(file_field.name, 'rb')
+            response = StreamingHttpResponse(
+                iter_file_range(file_obj, start, length, chunk_size),
+                status=206,
+                content_type=content_type
+            )
+            response['Content-Range'] = f"bytes {start}-{end}/{size}"
+            response['Content-Length'] = str(length)
+        else:
+            file_obj = file_field.storage.open(file_field.name, 'rb')
+            response = FileResponse(file_obj, content_type=content_type)
+            response.block_size = chunk_size
+            response['Content-Length'] = str(size)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    return response
+
@@ -0,0 +1,276 @@
+"""
+Single-pass multi-pattern threat scanning for uploaded and stored files
+
+Every upload path used to keep its own list of suspicious byte patterns and
+test them one by one against a lowercased copy of the content. Here the
+patterns live in one signature registry; a scanner is built once per group
+combination and streams the file in chunks:
+
+* each chunk is lowercased once, and every signature is located with
+  ``bytes.find``/``count``, which run in C at close to memory speed;
+* chunks are scanned with an overlap of the longest signature, so a match
+  split across a chunk boundary is still found, and found only once;
+* ``scan_sampled`` reads only a head and a tail window of large files, for
+  callers whose checks only look there;
+* the byte histogram for Shannon entropy is collected in the same pass.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+CHUNK_SIZE = 64 * 1024
+HEADER_SIZE = 512
+
+# Signature registry: pattern -> description. Signatures match
+# case-insensitively, except binary sequences and PDF names (EXACT_SIGNATURES).
+SIGNATURES: Dict[bytes, str] = {
+    # Script and command execution
+    b'<script': 'HTML script injection',
+    b'<script>': 'Script tag',
+    b'javascript:': 'JavaScript protocol',
+    b'vbscript:': 'VBScript protocol',
+    b'data:text/html': 'HTML data URI',
+    b'eval(': 'Code evaluation function',
+    b'exec(': 'Code execution function',
+    b'system(': 'System command execution',
+    b'shell_exec(': 'Shell execution function',
+    b'<?php': 'PHP code block',
+    b'<%': 'Server-side script tag',
+    b'#!/': 'Script shebang',
+    b'#!/bin/': 'Shell script',
+    b'#!/bin/sh': 'Shell script shebang',
+    b'#!/bin/bash': 'Bash script shebang',
+    b'#!/usr/bin/python': 'Python script shebang',
+    b'powershell': 'PowerShell command',
+    b'powershell.exe': 'PowerShell executable',
+    b'cmd.exe': 'Windows command prompt',
+    b'cmd.exe /c': 'Windows command execution',
+    b'CreateObject(': 'ActiveX object creation',
+    b'WScript.Shell': 'Windows Script Host',
+    # Active web content
+    b'onload=': 'Event handler',
+    b'onerror=': 'Error handler',
+    b'document.write': 'DOM manipulation',
+    b'window.location': 'Location redirect',
+    b'<iframe': 'Embedded frame',
+    b'<object': 'Embedded object',
+    b'<embed': 'Embedded plugin content',
+    b'<metadata>': 'Suspicious metadata tag',
+    b'javascript': 'JavaScript reference',
+    b'XMLHttpRequest': 'AJAX request',
+    b'ActiveXObject': 'ActiveX object',
+    b'WScript': 'Windows Script Host',
+    b'Shell.Application': 'Shell application',
+    b'ADODB.Stream': 'ADO stream object',
+    # SQL injection
+    b'union select': 'SQL injection attempt',
+    b'drop table': 'SQL drop command',
+    b'delete from': 'SQL delete command',
+    b'insert into': 'SQL insert command',
+    b'update set': 'SQL update command',
+    b'alter table': 'SQL alter command',
+    b'create table': 'SQL create command',
+    b'grant all': 'SQL privilege escalation',
+    b'revoke all': 'SQL privilege modification',
+    # Active PDF content
+    b'/JavaScript': 'PDF embedded JavaScript',
+    b'/JS': 'PDF embedded JavaScript',
+    b'/AcroForm': 'PDF interactive form',
+    b'/EmbeddedFile': 'PDF embedded file',
+    # Shellcode
+    b'\x90\x90\x90\x90': 'NOP sled',
+    b'\xcc\xcc\xcc\xcc': 'INT3 instructions',
+    b'\x31\xc0\x50\x68': 'Common shellcode pattern',
+    b'\x6a\x0b\x58\x99': 'Common shellcode pattern',
+}
+
+EXACT_SIGNATURES = frozenset({
+    b'/JavaScript', b'/JS', b'/AcroForm', b'/EmbeddedFile',
+    b'\x90\x90\x90\x90', b'\xcc\xcc\xcc\xcc', b'\x31\xc0\x50\x68', b'\x6a\x0b\x58\x99',
+})
+
+SIGNATURE_GROUPS: Dict[str, Tuple[bytes, ...]] = {
+    'code_execution': (
+        b'<script', b'javascript:', b'vbscript:', b'data:text/html', b'eval(', b'exec(', b'system(',
+        b'shell_exec(', b'<?php', b'<%', b'#!/bin/', b'#!/bin/sh', b'#!/bin/bash', b'powershell', b'cmd.exe',
+        b'CreateObject(', b'WScript.Shell',
+    ),
+    # Executable code that has no business in audio or image metadata
+    'embedded_code': (
+        b'<?php', b'#!/bin/sh', b'#!/bin/bash', b'#!/usr/bin/python', b'powershell.exe', b'cmd.exe /c',
+    ),
+    'script_tags': (b'<script>', b'<?php', b'<%', b'#!/'),
+    'active_content': (
+        b'<script', b'javascript:', b'vbscript:', b'onload=', b'onerror=', b'eval(',
+        b'document.write', b'window.location', b'<iframe', b'<object', b'<embed',
+    ),
+    'media_metadata': (
+        b'<metadata>', b'<script>', b'javascript', b'onload=', b'onerror=', b'document.write',
+        b'window.location', b'XMLHttpRequest', b'ActiveXObject', b'WScript', b'Shell.Application',
+        b'ADODB.Stream',
+    ),
+    'sql_injection': (
+        b'union select', b'drop table', b'delete from', b'insert into', b'update set', b'alter table',
+        b'create table', b'grant all', b'revoke all',
+    ),
+    'pdf_active': (b'/JavaScript', b'/JS', b'/AcroForm', b'/EmbeddedFile'),
+    'shellcode': (b'\x90\x90\x90\x90', b'\xcc\xcc\xcc\xcc', b'\x31\xc0\x50\x68', b'\x6a\x0b\x58\x99'),
+    # Repeated eval() calls across a whole file suggest obfuscated script
+    'obfuscation': (b'eval(',),
+}
+
+EXECUTABLE_HEADERS: Tuple[Tuple[bytes, str], ...] = (
+    (b'MZ', 'Windows PE executable'),
+    (b'\x7fELF', 'Linux ELF executable'),
+    (b'\xca\xfe\xba\xbe', 'Java class file'),
+    (b'\xfe\xed\xfa\xce', 'Mach-O executable'),
+    (b'\xfe\xed\xfa\xcf', 'Mach-O 64-bit executable'),
+    (b'PK\x03\x04', 'ZIP archive (potential executable)'),
+)
+
+
+class ScanReport:
+    """What one pass over a file found"""
+
+    def __init__(self, signatures: Tuple[bytes, ...]):
+        self.signatures = signatures
+        self.counts: Dict[bytes, int] = {}
+        self.first_offset: Dict[bytes, int] = {}
+        self.last_offset: Dict[bytes, int] = {}
+        self.bytes_scanned = 0
+        self.header = b''
+        self.byte_counts = np.zeros(256, dtype=np.int64)
+
+    def record(self, pattern: bytes, first: int, last: int, count: int = 1):
+        self.counts[pattern] = self.counts.get(pattern, 0) + count
+        self.first_offset.setdefault(pattern, first)
+        self.last_offset[pattern] = last
+
+    def matched(self, pattern: bytes) -> bool:
+        return pattern in self.counts
+
+    def threats(self, patterns: Optional[Iterable[bytes]] = None) -> List[Tuple[bytes, str]]:
+        """(pattern, description) for each matched signature, in the order given or registered"""
+        return [
+            (pattern, SIGNATURES[pattern])
+            for pattern in (patterns if patterns is not None else self.signatures)
+            if pattern in self.counts
+        ]
+
+    def executable_type(self, headers: Iterable[Tuple[bytes, str]] = EXECUTABLE_HEADERS) -> Optional[str]:
+        """Description of the executable format the file starts with, if any"""
+        for signature, description in headers:
+            if self.header.startswith(signature):
+                return description
+        return None
+
+    @property
+    def entropy(self) -> float:
+        """Shannon entropy of the scanned bytes, in bits per byte"""
+        if not self.bytes_scanned:
+            return 0.0
+        counts = self.byte_counts[self.byte_counts > 0]
+        probabilities = counts / self.bytes_scanned
+        return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+class ThreatScanner:
+    """Finds every registered signature from a set of groups in one streaming pass"""
+
+    def __init__(self, signatures: Iterable[bytes]):
+        self.signatures = tuple(dict.fromkeys(signatures))
+        # Case-insensitive signatures are searched in a lowercased copy of each
+        # chunk, exact ones (binary sequences, PDF names) in the chunk itself
+        self._folded = tuple(
+            (pattern, pattern.lower()) for pattern in self.signatures if pattern not in EXACT_SIGNATURES
+        )
+        self._exact = tuple(pattern for pattern in self.signatures if pattern in EXACT_SIGNATURES)
+        self.overlap = max((len(pattern) for pattern in self.signatures), default=1) - 1
+
+    @staticmethod
+    def _search(report: ScanReport, pattern: bytes, needle: bytes, window: bytes, base: int, carried: int):
+        # Matches that ended inside the carried-over bytes were counted with the previous chunk
+        start = max(0, carried - len(needle) + 1)
+        first = window.find(needle, start)
+        if first < 0:
+            return
+        report.record(pattern, base + first, base + window.rfind(needle, start), window.count(needle, start))
+
+    def _feed(self, report: ScanReport, chunk: bytes, tail: bytes, offset: int) -> bytes:
+        """Scan ``chunk`` read at file ``offset``, preceded by the previous chunk's ``tail``"""
+        window = tail + chunk
+        base = offset - len(tail)
+        if self._folded:
+            folded = window.lower()
+            for pattern, needle in self._folded:
+                self._search(report, pattern, needle, folded, base, len(tail))
+        for pattern in self._exact:
+            self._search(report, pattern, pattern, window, base, len(tail))
+
+        if offset < HEADER_SIZE:
+            report.header += chunk[:HEADER_SIZE - offset]
+        report.byte_counts += np.bincount(np.frombuffer(chunk, dtype=np.uint8), minlength=256)
+        report.bytes_scanned += len(chunk)
+        return window[-self.overlap:] if self.overlap else b''
+
+    def _scan_range(self, report: ScanReport, file_obj, offset: int, limit: Optional[int], chunk_size: int):
+        if offset and hasattr(file_obj, 'seek'):
+            file_obj.seek(offset)
+        tail = b''
+        remaining = limit
+        while remaining is None or remaining > 0:
+            chunk = file_obj.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            tail = self._feed(report, chunk, tail, offset)
+            offset += len(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+
+    def scan_bytes(self, data: bytes) -> ScanReport:
+        report = ScanReport(self.signatures)
+        self._feed(report, data, b'', 0)
+        return report
+
+    def scan_stream(self, file_obj, limit: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> ScanReport:
+        """Scan an open file (or upload) from the start, reading at most ``limit`` bytes"""
+        report = ScanReport(self.signatures)
+        if hasattr(file_obj, 'seek'):
+            file_obj.seek(0)
+        self._scan_range(report, file_obj, 0, limit, chunk_size)
+        if hasattr(file_obj, 'seek'):
+            file_obj.seek(0)
+        return report
+
+    def scan_sampled(self, file_obj, head: int, tail: int, size: Optional[int] = None,
+                     chunk_size: int = CHUNK_SIZE) -> ScanReport:
+        """
+        Scan only the first ``head`` and last ``tail`` bytes of a seekable
+        file; a file no larger than both windows together is scanned whole
+        """
+        if size is None:
+            size = getattr(file_obj, 'size', None)
+        if size is None:
+            file_obj.seek(0, 2)
+            size = file_obj.tell()
+        if size <= head + tail:
+            return self.scan_stream(file_obj, chunk_size=chunk_size)
+
+        report = ScanReport(self.signatures)
+        file_obj.seek(0)
+        self._scan_range(report, file_obj, 0, head, chunk_size)
+        self._scan_range(report, file_obj, size - tail, tail, chunk_size)
+        file_obj.seek(0)
+        return report
+
+    def scan_path(self, path: str, limit: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> ScanReport:
+        with open(path, 'rb') as handle:
+            return self.scan_stream(handle, limit=limit, chunk_size=chunk_size)
+
+
+@lru_cache(maxsize=None)
+def get_scanner(*groups: str) -> ThreatScanner:
+    """Scanner for the union of the named signature groups, compiled once per combination"""
+    return ThreatScanner(pattern for group in groups for pattern in SIGNATURE_GROUPS[group])
+
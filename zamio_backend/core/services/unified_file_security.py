@@ -3,7 +3,6 @@ Unified File Security Service for all ZamIO modules
 Provides comprehensive file validation, malware scanning, and secure storage
 """
 import os
-import hashlib
 import mimetypes
 import logging
 import tempfile
@@ -15,6 +14,8 @@ from django.utils import timezone
 from django.conf import settings
 from django.db import transaction
 from accounts.models import AuditLog
+from core.services.file_integrity import hash_stream
+from core.services.threat_scanner import EXECUTABLE_HEADERS, SIGNATURE_GROUPS, get_scanner
 
 logger = logging.getLogger(__name__)
 
@@ -82,15 +83,8 @@ class UnifiedFileSecurityService:
         '.html', '.htm', '.xml'  # Can contain scripts
     }
     
-    # Malware signature patterns
-    MALWARE_PATTERNS = [
-        b'<script', b'javascript:', b'vbscript:', b'eval(',
-        b'exec(', b'system(', b'shell_exec(', b'<?php',
-        b'<%', b'#!/bin/sh', b'#!/bin/bash', b'powershell',
-        b'cmd.exe', b'CreateObject(', b'WScript.Shell',
-        b'UNION SELECT', b'DROP TABLE', b'DELETE FROM',
-        b'INSERT INTO', b'UPDATE SET', b'ALTER TABLE'
-    ]
+    # Malware signature patterns (see core.services.threat_scanner.SIGNATURES)
+    MALWARE_PATTERNS = SIGNATURE_GROUPS['code_execution'] + SIGNATURE_GROUPS['sql_injection']
     
     @classmethod
     def validate_file(
@@ -218,28 +212,23 @@ class UnifiedFileSecurityService:
     def _validate_file_content(cls, file: UploadedFile, category: str, config: Dict, errors: List[str]):
         """Validate file content for malware and suspicious patterns"""
         try:
-            file.seek(0)
-            # Read content for analysis (limit to 1MB for large files)
-            content_size = min(file.size, 1024 * 1024)
-            content = file.read(content_size)
-            file.seek(0)
+            # Scan up to 1MB in one pass for malware and script patterns
+            report = get_scanner('code_execution', 'sql_injection', 'script_tags').scan_stream(
+                file, limit=1024 * 1024
+            )
             
             # Check for malware patterns
-            content_lower = content.lower()
-            for pattern in cls.MALWARE_PATTERNS:
-                if pattern in content_lower:
-                    errors.append(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
+            for pattern, _description in report.threats(cls.MALWARE_PATTERNS):
+                errors.append(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
             
             # Check for executable signatures
-            if content.startswith(b'MZ') or content.startswith(b'\x7fELF'):
+            if report.executable_type(EXECUTABLE_HEADERS[:2]):
                 errors.append('Executable file detected')
             
             # Check for script content in non-script files
             if category != 'document':  # Documents might legitimately contain code examples
-                script_patterns = [b'<script>', b'<?php', b'<%', b'#!/']
-                for pattern in script_patterns:
-                    if pattern in content_lower:
-                        errors.append(f'Script content detected: {pattern.decode("utf-8", errors="ignore")}')
+                for pattern, _description in report.threats(SIGNATURE_GROUPS['script_tags']):
+                    errors.append(f'Script content detected: {pattern.decode("utf-8", errors="ignore")}')
         
         except Exception as e:
             errors.append(f'Content validation error: {str(e)}')
@@ -411,11 +400,7 @@ class UnifiedFileSecurityService:
     @classmethod
     def calculate_file_hash(cls, file: UploadedFile) -> str:
         """Calculate SHA-256 hash of file content"""
-        file.seek(0)
-        file_content = file.read()
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        file.seek(0)
-        return file_hash
+        return hash_stream(file)
     
     @classmethod
     def generate_secure_filename(cls, original_filename: str, file_hash: str) -> str:
@@ -494,26 +479,24 @@ class UnifiedFileSecurityService:
             file_size = os.path.getsize(file_path)
             scan_result['scan_details']['file_size'] = file_size
             
-            with open(file_path, 'rb') as f:
-                # Read content for analysis
-                content = f.read(min(1024 * 1024, file_size))  # Read up to 1MB
-                content_lower = content.lower()
-                
-                # Check for malware patterns
-                for pattern in cls.MALWARE_PATTERNS:
-                    if pattern in content_lower:
-                        scan_result['is_safe'] = False
-                        scan_result['threats_found'].append(f'Malware pattern detected: {pattern.decode("utf-8", errors="ignore")}')
-                
-                # Check for executable signatures
-                if content.startswith(b'MZ') or content.startswith(b'\x7fELF'):
-                    scan_result['is_safe'] = False
-                    scan_result['threats_found'].append('Executable file signature detected')
-                
-                # Check file entropy (high entropy might indicate encryption/packing)
-                entropy = cls._calculate_entropy(content[:1024])  # Check first 1KB
-                if entropy > 7.5:  # High entropy threshold
-                    scan_result['threats_found'].append(f'High entropy detected: {entropy:.2f} (possible packed/encrypted content)')
+            # Stream up to 1MB through the scanner; entropy comes from the same pass
+            report = get_scanner('code_execution', 'sql_injection').scan_path(file_path, limit=1024 * 1024)
+            entropy = report.entropy
+            scan_result['scan_details']['entropy'] = round(entropy, 3)
+            
+            # Check for malware patterns
+            for pattern, _description in report.threats(cls.MALWARE_PATTERNS):
+                scan_result['is_safe'] = False
+                scan_result['threats_found'].append(f'Malware pattern detected: {pattern.decode("utf-8", errors="ignore")}')
+            
+            # Check for executable signatures
+            if report.executable_type(EXECUTABLE_HEADERS[:2]):
+                scan_result['is_safe'] = False
+                scan_result['threats_found'].append('Executable file signature detected')
+            
+            # Check file entropy (high entropy might indicate encryption/packing)
+            if entropy > 7.5:  # High entropy threshold
+                scan_result['threats_found'].append(f'High entropy detected: {entropy:.2f} (possible packed/encrypted content)')
         
         except Exception as e:
             scan_result['is_safe'] = False
@@ -522,27 +505,6 @@ class UnifiedFileSecurityService:
         
         return scan_result
     
-    @classmethod
-    def _calculate_entropy(cls, data: bytes) -> float:
-        """Calculate Shannon entropy of data"""
-        if not data:
-            return 0
-        
-        # Count byte frequencies
-        byte_counts = [0] * 256
-        for byte in data:
-            byte_counts[byte] += 1
-        
-        # Calculate entropy
-        entropy = 0
-        data_len = len(data)
-        for count in byte_counts:
-            if count > 0:
-                probability = count / data_len
-                entropy -= probability * (probability.bit_length() - 1)
-        
-        return entropy
-    
     @classmethod
     @transaction.atomic
     def process_secure_upload(
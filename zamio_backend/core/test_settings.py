@@ -48,6 +48,12 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Tests drive the realtime fan-out publisher explicitly
+ANALYTICS_REALTIME_INPROCESS_FANOUT = False
+
+# Write audit log entries inline; a flusher thread would use its own connection
+AUDIT_LOG_ASYNC = False
+
 # Disable logging during tests
 LOGGING = {
     'version': 1,
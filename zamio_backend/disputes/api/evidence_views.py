@@ -198,7 +198,8 @@ class EvidenceDownloadView(APIView):
             response = EvidenceAccessService.serve_evidence_file(
                 user=request.user,
                 evidence_id=evidence_id,
-                token=token
+                token=token,
+                request=request
             )
             
             # Increment access count
@@ -235,17 +235,8 @@ class DisputeEvidence(models.Model):
         if not self.file or not self.file_hash:
             return True  # No file or hash to verify
         
-        try:
-            import hashlib
-            self.file.seek(0)
-            content = self.file.read()
-            self.file.seek(0)
-            
-            current_hash = hashlib.sha256(content).hexdigest()
-            return current_hash == self.file_hash
-            
-        except Exception:
-            return False
+        from core.services.file_integrity import file_integrity
+        return file_integrity.verify(self.file, self.file_hash)
     
     def increment_access_count(self):
         """Increment access count and update last accessed time"""
@@ -12,10 +12,16 @@ from typing import Optional, Dict, Any, List
 from django.conf import settings
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.core.files.storage import default_storage
-from django.http import HttpResponse, Http404
+from django.http import HttpRequest, HttpResponse, Http404
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from PIL import Image
+
+from core.services.audit_writer import audit_writer
+from core.services.file_integrity import file_integrity, hash_stream
+from core.services.media_delivery import deliver_file
+from core.services.threat_scanner import SIGNATURE_GROUPS, ScanReport, get_scanner
+
 try:
     import magic
     HAS_MAGIC = True
@@ -123,13 +129,14 @@ class EvidenceFileValidator:
             cls._validate_filename(file.name)
             
             # Detect actual file type using python-magic
+            # (the first 64KB is enough for libmagic to recognise Office containers)
             file.seek(0)
-            file_content = file.read()
+            header = file.read(64 * 1024)
             file.seek(0)
             
             # Get MIME type from file content (more reliable than filename)
             if HAS_MAGIC:
-                mime_type = magic.from_buffer(file_content, mime=True)
+                mime_type = magic.from_buffer(header, mime=True)
             else:
                 # Fallback to mimetypes module
                 mime_type, _ = mimetypes.guess_type(file.name)
@@ -151,14 +158,17 @@ class EvidenceFileValidator:
                 raise ValidationError(f"File size exceeds maximum for {file_category} files ({max_size // (1024*1024)}MB)")
             
             # Generate file hash for integrity checking
-            sha256_hash = hashlib.sha256(file_content).hexdigest()
+            sha256_hash = hash_stream(file)
             validation_result['sha256_hash'] = sha256_hash
             
+            # One streaming pass feeds both the PDF checks and the malicious content scan
+            report = get_scanner('active_content', 'pdf_active').scan_stream(file)
+            
             # Perform content-specific validation
-            cls._validate_file_content(file, mime_type, file_content)
+            cls._validate_file_content(file, mime_type, report)
             
             # Check for malicious content
-            cls._scan_for_malicious_content(file_content, mime_type)
+            cls._scan_for_malicious_content(report, mime_type)
             
             validation_result['is_valid'] = True
             validation_result['file_type'] = mime_type
@@ -209,14 +219,14 @@ class EvidenceFileValidator:
             return 'document'
     
     @classmethod
-    def _validate_file_content(cls, file, mime_type: str, content: bytes):
+    def _validate_file_content(cls, file, mime_type: str, report: ScanReport):
         """Validate file content based on type"""
         file.seek(0)
         
         if mime_type.startswith('image/'):
             cls._validate_image_content(file)
         elif mime_type == 'application/pdf':
-            cls._validate_pdf_content(content)
+            cls._validate_pdf_content(report)
         elif mime_type.startswith('audio/'):
             cls._validate_audio_content(file)
         
@@ -241,18 +251,18 @@ class EvidenceFileValidator:
             raise ValidationError("Invalid or corrupted image file")
     
     @classmethod
-    def _validate_pdf_content(cls, content: bytes):
+    def _validate_pdf_content(cls, report: ScanReport):
         """Validate PDF file content for security"""
         # Check for JavaScript in PDF
-        if b'/JavaScript' in content or b'/JS' in content:
+        if report.matched(b'/JavaScript') or report.matched(b'/JS'):
             raise ValidationError("PDF files with embedded JavaScript are not allowed")
         
         # Check for forms that might be malicious
-        if b'/AcroForm' in content:
+        if report.matched(b'/AcroForm'):
             raise ValidationError("PDF files with interactive forms are not allowed")
         
         # Check for embedded files
-        if b'/EmbeddedFile' in content:
+        if report.matched(b'/EmbeddedFile'):
             raise ValidationError("PDF files with embedded files are not allowed")
     
     @classmethod
@@ -278,29 +288,10 @@ class EvidenceFileValidator:
             raise ValidationError("Invalid audio file format")
     
     @classmethod
-    def _scan_for_malicious_content(cls, content: bytes, mime_type: str):
-        """Scan file content for potentially malicious patterns"""
-        # Convert to lowercase for case-insensitive scanning
-        content_lower = content.lower()
-        
-        # Common malicious patterns
-        malicious_patterns = [
-            b'<script',
-            b'javascript:',
-            b'vbscript:',
-            b'onload=',
-            b'onerror=',
-            b'eval(',
-            b'document.write',
-            b'window.location',
-            b'<iframe',
-            b'<object',
-            b'<embed'
-        ]
-        
-        for pattern in malicious_patterns:
-            if pattern in content_lower:
-                raise ValidationError(f"File contains potentially malicious content: {pattern.decode('utf-8', errors='ignore')}")
+    def _scan_for_malicious_content(cls, report: ScanReport, mime_type: str):
+        """Raise on the first potentially malicious pattern the content scan found"""
+        for pattern, _description in report.threats(SIGNATURE_GROUPS['active_content']):
+            raise ValidationError(f"File contains potentially malicious content: {pattern.decode('utf-8', errors='ignore')}")
 
 
 class EvidenceAccessService:
@@ -404,7 +395,8 @@ class EvidenceAccessService:
         cls, 
         user: User, 
         evidence_id: int,
-        token: Optional[str] = None
+        token: Optional[str] = None,
+        request: Optional[HttpRequest] = None
     ) -> HttpResponse:
         """
         Serve an evidence file securely with access controls and audit logging
@@ -413,21 +405,21 @@ class EvidenceAccessService:
             user: The requesting user
             evidence_id: ID of the evidence file
             token: Optional secure token for additional verification
+            request: The HTTP request, for Range and If-None-Match handling
             
         Returns:
-            HttpResponse with file content
+            Streaming (or 206 partial / 304) response for the file
             
         Raises:
             Http404: If evidence not found
             PermissionDenied: If user doesn't have access
         """
         from disputes.models import DisputeEvidence
-        from accounts.models import AuditLog
         
         # Check basic access permission
         if not cls.check_evidence_access_permission(user, evidence_id):
             # Log unauthorized access attempt
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='evidence_access_denied',
                 resource_type='DisputeEvidence',
@@ -443,7 +435,7 @@ class EvidenceAccessService:
         
         # Verify token if provided
         if token and not cls.verify_evidence_access_token(token, user.id, evidence_id):
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='evidence_access_denied',
                 resource_type='DisputeEvidence',
@@ -467,7 +459,7 @@ class EvidenceAccessService:
         
         # Verify file integrity
         if not cls._verify_file_integrity(evidence):
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='evidence_integrity_failure',
                 resource_type='DisputeEvidence',
@@ -494,7 +486,7 @@ class EvidenceAccessService:
             'ip_address': getattr(user, 'ip_address', 'Unknown')
         }
         
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action='evidence_file_access',
             resource_type='DisputeEvidence',
@@ -502,10 +494,8 @@ class EvidenceAccessService:
             request_data=audit_data
         )
         
-        # Serve the file
+        # Stream the file (or the requested byte range) without buffering it
         try:
-            file_content = evidence.file.read()
-            
             # Determine content type
             content_type = evidence.file_type or 'application/octet-stream'
             if not content_type.startswith(('image/', 'audio/', 'video/', 'application/', 'text/')):
@@ -514,11 +504,15 @@ class EvidenceAccessService:
             # Generate safe filename
             safe_filename = cls._generate_safe_filename(evidence)
             
-            response = HttpResponse(file_content, content_type=content_type)
+            response = deliver_file(
+                request,
+                evidence.file,
+                safe_filename,
+                content_type=content_type,
+                content_hash=evidence.file_hash
+            )
             
             # Set security headers
-            response['Content-Disposition'] = f'attachment; filename="{safe_filename}"'
-            response['Content-Length'] = len(file_content)
             response['X-Content-Type-Options'] = 'nosniff'
             response['X-Frame-Options'] = 'DENY'
             response['Cache-Control'] = 'private, no-cache, no-store, must-revalidate'
@@ -533,7 +527,7 @@ class EvidenceAccessService:
             
         except Exception as e:
             # Log the error
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='evidence_file_access_error',
                 resource_type='DisputeEvidence',
@@ -552,16 +546,7 @@ class EvidenceAccessService:
         if not evidence.file_hash:
             return True  # No hash stored, assume valid (for legacy files)
         
-        try:
-            evidence.file.seek(0)
-            content = evidence.file.read()
-            evidence.file.seek(0)
-            
-            current_hash = hashlib.sha256(content).hexdigest()
-            return current_hash == evidence.file_hash
-            
-        except Exception:
-            return False
+        return file_integrity.verify(evidence.file, evidence.file_hash)
     
     @classmethod
     def _generate_safe_filename(cls, evidence) -> str:
@@ -737,7 +722,6 @@ class EvidenceRetentionService:
             bool: True if deletion was successful
         """
         from disputes.models import DisputeEvidence
-        from accounts.models import AuditLog
         
         try:
             evidence = DisputeEvidence.objects.get(id=evidence_id)
@@ -754,7 +738,7 @@ class EvidenceRetentionService:
                 'deletion_timestamp': timezone.now().isoformat()
             }
             
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=deleted_by,
                 action='evidence_file_deleted',
                 resource_type='DisputeEvidence',
@@ -775,7 +759,7 @@ class EvidenceRetentionService:
             return False
         except Exception as e:
             # Log deletion error
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=deleted_by,
                 action='evidence_file_deletion_error',
                 resource_type='DisputeEvidence',
@@ -1,4 +1,5 @@
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from datetime import timedelta
@@ -6,6 +7,7 @@ import logging
 
 from .models import Dispute, DisputeStatus, DisputeNotification
 from .workflow import DisputeWorkflow
+from core.services.audit_writer import audit_writer
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -306,21 +308,28 @@ def verify_evidence_file_integrity():
     Verify integrity of evidence files using stored hashes
     """
     from .models import DisputeEvidence
-    from accounts.models import AuditLog
+    from core.services.file_integrity import file_integrity
     
     # Get evidence files that have hashes and haven't been checked recently
     check_date = timezone.now() - timedelta(days=7)  # Check weekly
     
-    evidence_files = DisputeEvidence.objects.filter(
+    batch_size = getattr(settings, 'EVIDENCE_INTEGRITY_BATCH_SIZE', 1000)
+    evidence_files = list(DisputeEvidence.objects.filter(
         file__isnull=False,
         file_hash__isnull=False,
         is_quarantined=False,
         updated_at__lt=check_date
-    )[:100]  # Limit to 100 files per run
+    ).select_related('dispute')[:batch_size])
     
-    verified_count = 0
+    # Unchanged files are confirmed from the digest memo; the rest are hashed in a worker pool
+    report = file_integrity.verify_batch(
+        (evidence.id, evidence.file, evidence.file_hash) for evidence in evidence_files
+    )
+    results = report['results']
+    
+    verified_ids = [evidence_id for evidence_id, result in results.items() if result == 'verified']
     corrupted_count = 0
-    error_count = 0
+    error_count = sum(1 for result in results.values() if result == 'error')
     
     # Get system user for audit logging
     system_user, _ = User.objects.get_or_create(
@@ -332,57 +341,56 @@ def verify_evidence_file_integrity():
         }
     )
     
+    # Mark verified files as recently checked
+    DisputeEvidence.objects.filter(id__in=verified_ids).update(updated_at=timezone.now())
+    
     for evidence in evidence_files:
+        if results.get(evidence.id) not in ('mismatch', 'missing'):
+            continue
         try:
-            is_valid = evidence.verify_file_integrity()
+            corrupted_count += 1
+            # Quarantine corrupted file
+            evidence.quarantine_file("File integrity check failed - file may be corrupted")
+            
+            # Log corruption
+            audit_writer.log(
+                user=system_user,
+                action='evidence_integrity_failure',
+                resource_type='DisputeEvidence',
+                resource_id=str(evidence.id),
+                request_data={
+                    'dispute_id': str(evidence.dispute.dispute_id),
+                    'file_path': evidence.file.name,
+                    'stored_hash': evidence.file_hash,
+                    'result': results[evidence.id],
+                    'check_timestamp': timezone.now().isoformat(),
+                    'action_taken': 'quarantined'
+                }
+            )
+            
+            logger.warning(f"Evidence file {evidence.id} failed integrity check and was quarantined")
             
-            if is_valid:
-                verified_count += 1
-                # Update the updated_at field to mark as recently checked
-                evidence.save(update_fields=['updated_at'])
-                
-            else:
-                corrupted_count += 1
-                # Quarantine corrupted file
-                evidence.quarantine_file("File integrity check failed - file may be corrupted")
-                
-                # Log corruption
-                AuditLog.objects.create(
-                    user=system_user,
-                    action='evidence_integrity_failure',
-                    resource_type='DisputeEvidence',
-                    resource_id=str(evidence.id),
-                    request_data={
-                        'dispute_id': str(evidence.dispute.dispute_id),
-                        'file_path': evidence.file.name,
-                        'stored_hash': evidence.file_hash,
-                        'check_timestamp': timezone.now().isoformat(),
-                        'action_taken': 'quarantined'
-                    }
-                )
-                
-                logger.warning(f"Evidence file {evidence.id} failed integrity check and was quarantined")
-                
         except Exception as e:
             error_count += 1
-            logger.error(f"Error checking integrity of evidence {evidence.id}: {str(e)}")
+            logger.error(f"Error quarantining evidence {evidence.id}: {str(e)}")
     
     # Log summary
-    AuditLog.objects.create(
+    audit_writer.log(
         user=system_user,
         action='evidence_integrity_check_completed',
         resource_type='System',
         resource_id='integrity_check',
         request_data={
             'files_checked': len(evidence_files),
-            'verified': verified_count,
+            'verified': len(verified_ids),
             'corrupted': corrupted_count,
             'errors': error_count,
+            'metrics': report['metrics'],
             'timestamp': timezone.now().isoformat()
         }
     )
     
-    return f"Integrity check completed: {verified_count} verified, {corrupted_count} corrupted, {error_count} errors"
+    return f"Integrity check completed: {len(verified_ids)} verified, {corrupted_count} corrupted, {error_count} errors"
 
 
 @shared_task
@@ -391,7 +399,6 @@ def cleanup_expired_evidence_files():
     Clean up evidence files that have exceeded their retention period
     """
     from .services.evidence_security_service import EvidenceRetentionService
-    from accounts.models import AuditLog
     
     # Get system user for audit logging
     system_user, _ = User.objects.get_or_create(
@@ -439,7 +446,7 @@ def cleanup_expired_evidence_files():
                 logger.error(f"Error deleting evidence {evidence_id}: {str(e)}")
         
         # Log cleanup summary
-        AuditLog.objects.create(
+        audit_writer.log(
             user=system_user,
             action='evidence_retention_cleanup',
             resource_type='System',
@@ -467,7 +474,6 @@ def update_evidence_retention_policies():
     """
     from .models import DisputeEvidence
     from .services.evidence_security_service import EvidenceRetentionService
-    from accounts.models import AuditLog
     
     # Get system user for audit logging
     system_user, _ = User.objects.get_or_create(
@@ -509,7 +515,7 @@ def update_evidence_retention_policies():
                 logger.error(f"Error updating retention policy for evidence {evidence.id}: {str(e)}")
         
         # Log update summary
-        AuditLog.objects.create(
+        audit_writer.log(
             user=system_user,
             action='evidence_retention_policies_updated',
             resource_type='System',
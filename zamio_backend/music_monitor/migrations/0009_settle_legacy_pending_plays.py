@@ -0,0 +1,59 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:34
+# Data migration closing out play charges recorded before batched settlement
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def settle_legacy_pending_plays(apps, schema_editor):
+    """
+    Plays were charged by a post_save handler at insert time. Plays still
+    'pending' from that period were either charged by that handler without
+    their status being updated, or priced after insert (matchcache plays)
+    and never billed. Settlement must not pick either up:
+    - pending plays with a play_charge transaction are marked 'charged'
+    - the remaining pending plays are marked 'waived'
+    """
+    PlayLog = apps.get_model('music_monitor', 'PlayLog')
+    StationTransaction = apps.get_model('bank_account', 'StationTransaction')
+
+    charges = (
+        StationTransaction.objects.filter(
+            transaction_type='play_charge',
+            play_log__isnull=False,
+            play_log__payment_status='pending',
+        )
+        .values('play_log_id')
+        .annotate(charged_at=Min('timestamp'))
+    )
+    charged_count = 0
+    for charge in charges.iterator():
+        charged_count += PlayLog.objects.filter(
+            id=charge['play_log_id'], payment_status='pending'
+        ).update(payment_status='charged', charged_at=charge['charged_at'], payment_error=None)
+
+    waived_count = PlayLog.objects.filter(payment_status='pending').update(
+        payment_status='waived',
+        payment_error='Recorded before batched station settlement; not billed',
+    )
+
+    print(f"✓ Closed out legacy pending plays:")
+    print(f"  - {charged_count} set to 'charged'")
+    print(f"  - {waived_count} set to 'waived'")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_monitor', '0008_migrate_existing_status_data'),
+        ('bank_account', '0005_stationsettlement'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='playlog',
+            name='payment_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('charged', 'Charged'), ('failed', 'Failed'), ('refunded', 'Refunded'), ('waived', 'Waived')], default='pending', help_text='Status of station payment for this play', max_length=20),
+        ),
+        migrations.RunPython(settle_legacy_pending_plays, migrations.RunPython.noop),
+    ]
@@ -96,6 +96,7 @@ class PlayLog(models.Model):
         ('charged', 'Charged'),
         ('failed', 'Failed'),
         ('refunded', 'Refunded'),
+        ('waived', 'Waived'),
     ]
     payment_status = models.CharField(
         max_length=20, 
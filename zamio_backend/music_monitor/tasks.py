@@ -1041,6 +1041,9 @@ def run_matchcache_to_playlog(batch_size: int = 50) -> Dict[str, Any]:
                 'errors': []
             }
         
+        from royalties.services.rate_card import get_rate_card
+        rate_card = get_rate_card()
+        
         processed_count = 0
         failed_count = 0
         errors = []
@@ -1066,6 +1069,17 @@ def run_matchcache_to_playlog(batch_size: int = 50) -> Dict[str, Any]:
                     confidence = float(match.avg_confidence_score or 0)
                     verification_status = 'verified' if confidence >= 70.0 else 'pending'
                     
+                    # Estimate duration from the track or default to 3 minutes
+                    duration = timezone.timedelta(
+                        seconds=getattr(match.track, 'duration_seconds', 180)
+                    )
+                    
+                    # Price the play from the shared rate card so every path agrees;
+                    # the station is charged later by batched settlement
+                    price = rate_card.price_play(
+                        match.station, match.matched_at, duration.total_seconds()
+                    )
+                    
                     # Create new PlayLog entry
                     playlog = PlayLog.objects.create(
                         track=match.track,
@@ -1074,15 +1088,11 @@ def run_matchcache_to_playlog(batch_size: int = 50) -> Dict[str, Any]:
                         source='Radio',  # Default source for radio station matches
                         played_at=match.matched_at,
                         start_time=match.matched_at,
-                        # Estimate stop time based on track duration or default to 3 minutes
-                        stop_time=match.matched_at + timezone.timedelta(
-                            seconds=getattr(match.track, 'duration_seconds', 180)
-                        ),
-                        duration=timezone.timedelta(
-                            seconds=getattr(match.track, 'duration_seconds', 180)
-                        ),
+                        stop_time=match.matched_at + duration,
+                        duration=duration,
                         avg_confidence_score=match.avg_confidence_score,
                         verification_status=verification_status,
+                        royalty_amount=price.amount,
                         payment_status='pending',
                         royalty_status='pending',
                         claimed=True,  # Legacy field - kept for backward compatibility
@@ -1096,14 +1106,6 @@ def run_matchcache_to_playlog(batch_size: int = 50) -> Dict[str, Any]:
                     match.processed = True
                     match.save(update_fields=['status', 'processed'])
                     
-                    # Calculate basic royalty amount (this could be enhanced with more complex logic)
-                    base_royalty_rate = 0.10  # 10 pesewas per play as base rate
-                    confidence_multiplier = float(match.avg_confidence_score or 50) / 100.0
-                    royalty_amount = base_royalty_rate * max(confidence_multiplier, 0.5)  # Minimum 50% of base rate
-                    
-                    playlog.royalty_amount = royalty_amount
-                    playlog.save(update_fields=['royalty_amount'])
-                    
                     # Mark MatchCache as processed
                     match.processed = True
                     match.save(update_fields=['processed'])
@@ -16,6 +16,11 @@ from django.http import HttpResponse, Http404
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from PIL import Image
+
+from core.services.audit_writer import audit_writer
+from core.services.file_integrity import hash_stream
+from core.services.threat_scanner import SIGNATURE_GROUPS, ScanReport, get_scanner
+
 try:
     import magic
     HAS_MAGIC = True
@@ -100,13 +105,14 @@ class ContractFileValidator:
             cls._validate_filename(file.name)
             
             # Detect actual file type using python-magic
+            # (the first 64KB is enough for libmagic to recognise Office containers)
             file.seek(0)
-            file_content = file.read()
+            header = file.read(64 * 1024)
             file.seek(0)
             
             # Get MIME type from file content (more reliable than filename)
             if HAS_MAGIC:
-                mime_type = magic.from_buffer(file_content, mime=True)
+                mime_type = magic.from_buffer(header, mime=True)
             else:
                 # Fallback to mimetypes module
                 mime_type, _ = mimetypes.guess_type(file.name)
@@ -120,14 +126,17 @@ class ContractFileValidator:
                 raise ValidationError(f"File type '{mime_type}' is not allowed for contract files")
             
             # Generate file hash for integrity checking
-            sha256_hash = hashlib.sha256(file_content).hexdigest()
+            sha256_hash = hash_stream(file)
             validation_result['sha256_hash'] = sha256_hash
             
+            # One streaming pass feeds both the PDF checks and the malicious content scan
+            report = get_scanner('active_content', 'pdf_active').scan_stream(file)
+            
             # Perform content-specific validation
-            cls._validate_file_content(file, mime_type, file_content)
+            cls._validate_file_content(file, mime_type, report)
             
             # Check for malicious content
-            cls._scan_for_malicious_content(file_content, mime_type)
+            cls._scan_for_malicious_content(report, mime_type)
             
             validation_result['is_valid'] = True
             validation_result['file_type'] = mime_type
@@ -166,14 +175,14 @@ class ContractFileValidator:
             raise ValidationError("Filename contains control characters")
     
     @classmethod
-    def _validate_file_content(cls, file, mime_type: str, content: bytes):
+    def _validate_file_content(cls, file, mime_type: str, report: ScanReport):
         """Validate file content based on type"""
         file.seek(0)
         
         if mime_type.startswith('image/'):
             cls._validate_image_content(file)
         elif mime_type == 'application/pdf':
-            cls._validate_pdf_content(content)
+            cls._validate_pdf_content(report)
         
         file.seek(0)
     
@@ -196,44 +205,25 @@ class ContractFileValidator:
             raise ValidationError("Invalid or corrupted image file")
     
     @classmethod
-    def _validate_pdf_content(cls, content: bytes):
+    def _validate_pdf_content(cls, report: ScanReport):
         """Validate PDF file content for security"""
         # Check for JavaScript in PDF
-        if b'/JavaScript' in content or b'/JS' in content:
+        if report.matched(b'/JavaScript') or report.matched(b'/JS'):
             raise ValidationError("PDF files with embedded JavaScript are not allowed")
         
         # Check for forms that might be malicious
-        if b'/AcroForm' in content:
+        if report.matched(b'/AcroForm'):
             raise ValidationError("PDF files with interactive forms are not allowed")
         
         # Check for embedded files
-        if b'/EmbeddedFile' in content:
+        if report.matched(b'/EmbeddedFile'):
             raise ValidationError("PDF files with embedded files are not allowed")
     
     @classmethod
-    def _scan_for_malicious_content(cls, content: bytes, mime_type: str):
-        """Scan file content for potentially malicious patterns"""
-        # Convert to lowercase for case-insensitive scanning
-        content_lower = content.lower()
-        
-        # Common malicious patterns
-        malicious_patterns = [
-            b'<script',
-            b'javascript:',
-            b'vbscript:',
-            b'onload=',
-            b'onerror=',
-            b'eval(',
-            b'document.write',
-            b'window.location',
-            b'<iframe',
-            b'<object',
-            b'<embed'
-        ]
-        
-        for pattern in malicious_patterns:
-            if pattern in content_lower:
-                raise ValidationError(f"File contains potentially malicious content: {pattern.decode('utf-8', errors='ignore')}")
+    def _scan_for_malicious_content(cls, report: ScanReport, mime_type: str):
+        """Raise on the first potentially malicious pattern the content scan found"""
+        for pattern, _description in report.threats(SIGNATURE_GROUPS['active_content']):
+            raise ValidationError(f"File contains potentially malicious content: {pattern.decode('utf-8', errors='ignore')}")
 
 
 class ContractAccessService:
@@ -367,12 +357,11 @@ class ContractAccessService:
             PermissionDenied: If user doesn't have access
         """
         from publishers.models import PublisherArtistRelationship, PublishingAgreement
-        from accounts.models import AuditLog
         
         # Check basic access permission
         if not cls.check_contract_access_permission(user, contract_id):
             # Log unauthorized access attempt
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='contract_access_denied',
                 resource_type='Contract',
@@ -388,7 +377,7 @@ class ContractAccessService:
         
         # Verify token if provided
         if token and not cls.verify_contract_access_token(token, user.id, contract_id):
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='contract_access_denied',
                 resource_type='Contract',
@@ -432,7 +421,7 @@ class ContractAccessService:
         
         # Verify file integrity
         if not cls._verify_file_integrity(contract, file_field):
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='contract_integrity_failure',
                 resource_type='Contract',
@@ -472,7 +461,7 @@ class ContractAccessService:
                 'status': contract.status
             })
         
-        AuditLog.objects.create(
+        audit_writer.log(
             user=user,
             action='contract_file_access',
             resource_type='Contract',
@@ -511,7 +500,7 @@ class ContractAccessService:
             
         except Exception as e:
             # Log the error
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=user,
                 action='contract_file_access_error',
                 resource_type='Contract',
@@ -723,7 +712,6 @@ class ContractRetentionService:
             bool: True if deletion was successful
         """
         from publishers.models import PublisherArtistRelationship, PublishingAgreement
-        from accounts.models import AuditLog
         
         try:
             contract = None
@@ -763,7 +751,7 @@ class ContractRetentionService:
                     'status': contract.status
                 })
             
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=deleted_by,
                 action='contract_file_deleted',
                 resource_type='Contract',
@@ -783,7 +771,7 @@ class ContractRetentionService:
             
         except Exception as e:
             # Log the error
-            AuditLog.objects.create(
+            audit_writer.log(
                 user=deleted_by,
                 action='contract_file_deletion_error',
                 resource_type='Contract',
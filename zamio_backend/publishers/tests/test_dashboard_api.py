@@ -195,3 +195,31 @@ def test_publisher_dashboard_jwt_auth(publisher_dashboard_setup):
     payload = response.json()
     assert 'performanceScore' in payload['data']
     assert payload['data']['metadata']['period'] == 'weekly'
+
+
+def test_publisher_metrics_use_grouped_queries(publisher_dashboard_setup, django_assert_max_num_queries):
+    publisher = publisher_dashboard_setup['publisher']
+    user = publisher_dashboard_setup['user']
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    url = reverse('publishers:publisher-metrics')
+    client.get(url)
+
+    # A second publisher must not add queries: totals are grouped, not looped
+    other_user = get_user_model().objects.create_user(email='other-publisher@example.com', password='password123')
+    PublisherProfile.objects.create(user=other_user, publisher_id=str(uuid4()), company_name='Other Publishing')
+
+    with django_assert_max_num_queries(6):
+        response = client.get(url)
+
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert data['total_publishers'] == 2
+    metrics = data['publishers'][0]
+    assert metrics['publisher_id'] == publisher.publisher_id
+    assert metrics['total_earnings'] == 150.0
+    assert metrics['total_plays'] == 3
+    assert metrics['recent_plays'] == 3
+    assert metrics['agreement_count'] == 1
+    assert data['publishers'][1]['total_plays'] == 0
@@ -1,4 +1,3 @@
-from decimal import Decimal
 from datetime import datetime, timedelta
 
 from django.contrib.auth import get_user_model
@@ -12,6 +11,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from accounts.api.custom_jwt import CustomJWTAuthentication
+from analytics.dashboard_metrics import PeriodWindow, publisher_summary, with_previous_plays
+from analytics.services import sum_amount
 from artists.models import Track
 from publishers.models import PublisherProfile, PublishingAgreement, PublisherArtistRelationship
 from music_monitor.models import PlayLog, Dispute
@@ -42,37 +43,39 @@ def get_publisher_metrics_view(request):
     errors = {}
 
     try:
-        # Get all publishers with basic metrics
-        publishers = PublisherProfile.objects.filter(is_archived=False).annotate(
-            artist_count=Count('artist_relationships', filter=Q(artist_relationships__status='active')),
-            agreement_count=Count('publishingagreement'),
+        # Get all publishers with basic metrics; distinct counts keep the
+        # two joined relations from multiplying each other
+        publishers = PublisherProfile.objects.filter(is_archived=False).select_related('user').annotate(
+            artist_count=Count('artist_relationships', filter=Q(artist_relationships__status='active'), distinct=True),
+            agreement_count=Count('publishingagreement', distinct=True),
             total_tracks=Count('publishingagreement__track', distinct=True)
         )
 
-        publisher_metrics = []
-        for publisher in publishers:
-            # Calculate total earnings from royalty withdrawals
-            total_earnings = RoyaltyWithdrawal.objects.filter(
-                requester=publisher.user,
-                status__in=['approved', 'processed']
-            ).aggregate(total=Sum('amount'))['total'] or 0
+        # Earnings and plays for every publisher in one grouped query each
+        earnings_by_user = dict(
+            RoyaltyWithdrawal.objects.filter(status__in=['approved', 'processed'])
+            .values('requester_id')
+            .annotate(total=Sum('amount'))
+            .values_list('requester_id', 'total')
+        )
 
-            # Calculate total plays for publisher's tracks
-            publisher_tracks = Track.objects.filter(
-                publishingagreement__publisher=publisher,
-                publishingagreement__status='accepted'
+        thirty_days_ago = timezone.now() - timedelta(days=30)
+        plays_by_publisher = {
+            row['track__publishingagreement__publisher_id']: row
+            for row in (
+                PlayLog.objects.filter(track__publishingagreement__status='accepted')
+                .values('track__publishingagreement__publisher_id')
+                .annotate(
+                    total_plays=Count('id', distinct=True),
+                    recent_plays=Count('id', filter=Q(created_at__gte=thirty_days_ago), distinct=True),
+                )
+                .order_by()
             )
-            total_plays = PlayLog.objects.filter(
-                track__in=publisher_tracks
-            ).count()
-
-            # Get recent activity (last 30 days)
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            recent_plays = PlayLog.objects.filter(
-                track__in=publisher_tracks,
-                created_at__gte=thirty_days_ago
-            ).count()
+        }
 
+        publisher_metrics = []
+        for publisher in publishers:
+            plays = plays_by_publisher.get(publisher.id, {})
             publisher_data = {
                 'publisher_id': publisher.publisher_id,
                 'company_name': publisher.company_name or f"{publisher.user.first_name} {publisher.user.last_name}",
@@ -80,9 +83,9 @@ def get_publisher_metrics_view(request):
                 'artist_count': publisher.artist_count,
                 'agreement_count': publisher.agreement_count,
                 'total_tracks': publisher.total_tracks,
-                'total_earnings': float(total_earnings),
-                'total_plays': total_plays,
-                'recent_plays': recent_plays,
+                'total_earnings': float(earnings_by_user.get(publisher.user_id) or 0),
+                'total_plays': plays.get('total_plays', 0),
+                'recent_plays': plays.get('recent_plays', 0),
                 'region': publisher.region or 'Not specified',
                 'country': publisher.country or 'Ghana',
                 'created_at': publisher.created_at.isoformat(),
@@ -338,7 +341,7 @@ def get_publisher_dashboard_view(request):
         except PublisherProfile.DoesNotExist:
             errors['publisher'] = ['Publisher profile not found for user']
 
-    if publisher and request.user != publisher.user and not request.user.is_staff and not request.user.is_superuser:
+    if publisher and request.user != publisher.user and not request.user.is_staff and not getattr(request.user, 'is_admin', False):
         errors['publisher_id'] = ['You do not have permission to view this publisher']
 
     now = timezone.now()
@@ -372,78 +375,38 @@ def get_publisher_dashboard_view(request):
 
     agreements_qs = PublishingAgreement.objects.filter(publisher=publisher, status='accepted')
 
-    base_playlogs = (
-        PlayLog.objects.filter(
-            track__publishingagreement__publisher=publisher,
-            track__publishingagreement__status='accepted',
-        )
-        .select_related('track', 'track__artist', 'station')
-    )
-
-    if start_date:
-        playlogs = base_playlogs.filter(played_at__gte=start_date)
-    else:
-        playlogs = base_playlogs
+    # Filter through a subquery rather than joining agreements so a track
+    # with several accepted agreements is not counted once per agreement
+    base_playlogs = PlayLog.objects.filter(track_id__in=agreements_qs.values('track_id'))
 
-    if end_date:
-        playlogs = playlogs.filter(played_at__lt=end_date)
+    window = PeriodWindow(start_date, end_date)
+    current_q = window.current_q()
+    playlogs = base_playlogs.filter(current_q)
+    compared_logs = window.narrow(base_playlogs).order_by()
 
-    previous_logs = PlayLog.objects.none()
-    if start_date:
-        delta = end_date - start_date
-        previous_logs = base_playlogs.filter(
-            played_at__gte=start_date - delta,
-            played_at__lt=start_date,
-        )
-
-    total_performances = playlogs.count()
-    total_earnings = playlogs.aggregate(total=Sum('royalty_amount'))['total'] or Decimal('0')
-    
-    # Works in catalog should be ALL accepted agreements, not just those with plays
-    works_in_catalog = agreements_qs.values('track_id').distinct().count()
-    
-    # Calculate previous catalog size for growth comparison
-    # Get agreements that existed before the current period
-    if start_date:
-        previous_catalog_size = agreements_qs.filter(
-            created_at__lt=start_date
-        ).values('track_id').distinct().count()
-    else:
-        previous_catalog_size = 0
-    
-    active_stations = playlogs.values('station_id').distinct().count()
-
-    previous_performances = previous_logs.count()
-    previous_earnings = previous_logs.aggregate(total=Sum('royalty_amount'))['total'] or Decimal('0')
-    previous_station_count = previous_logs.values('station_id').distinct().count()
-
-    # Debug logging
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Publisher Dashboard Stats for {publisher.publisher_id}:")
-    logger.info(f"  - Total Performances: {total_performances} (change: {_calculate_growth(total_performances, previous_performances)}%)")
-    logger.info(f"  - Total Earnings: {total_earnings} (change: {_calculate_growth(total_earnings, previous_earnings)}%)")
-    logger.info(f"  - Works in Catalog: {works_in_catalog} (change: {_calculate_growth(works_in_catalog, previous_catalog_size)}%)")
-    logger.info(f"  - Active Stations: {active_stations} (change: {_calculate_growth(active_stations, previous_station_count)}%)")
-    logger.info(f"  - Total Agreements (accepted): {agreements_qs.count()}")
-    logger.info(f"  - Period: {period}, Start: {start_date}, End: {end_date}")
+    summary = publisher_summary(publisher, base_playlogs, agreements_qs, window)
+    current = summary['current']
+    previous = summary['previous']
+    catalog = summary['catalog']
+    total_performances = current['plays']
 
     stats = {
         'totalPerformances': {
             'value': total_performances,
-            'change': _calculate_growth(total_performances, previous_performances),
+            'change': _calculate_growth(total_performances, previous['plays']),
         },
         'totalEarnings': {
-            'value': float(total_earnings),
-            'change': _calculate_growth(total_earnings, previous_earnings),
+            'value': current['earnings'],
+            'change': _calculate_growth(current['earnings'], previous['earnings']),
         },
+        # Works in catalog counts every accepted agreement, not just those with plays
         'worksInCatalog': {
-            'value': works_in_catalog,
-            'change': _calculate_growth(works_in_catalog, previous_catalog_size),
+            'value': catalog['works'],
+            'change': _calculate_growth(catalog['works'], catalog['previous_works']),
         },
         'activeStations': {
-            'value': active_stations,
-            'change': _calculate_growth(active_stations, previous_station_count),
+            'value': current['stations'],
+            'change': _calculate_growth(current['stations'], previous['stations']),
         },
     }
 
@@ -498,31 +461,23 @@ def get_publisher_dashboard_view(request):
         )
     ]
 
-    previous_region_totals = {
-        entry['track__artist__region'] or 'Unknown': entry['plays']
-        for entry in (
-            previous_logs
-            .values('track__artist__region')
-            .annotate(plays=Count('id'))
-        )
-    }
-
     region_performance = [
         {
             'region': entry['track__artist__region'] or 'Unknown',
             'plays': entry['plays'],
             'earnings': float(entry['earnings'] or 0),
             'stations': entry['stations'],
-            'growth': _calculate_growth(entry['plays'], previous_region_totals.get(entry['track__artist__region'] or 'Unknown', 0)),
+            'growth': _calculate_growth(entry['plays'], entry.get('previous_plays', 0)),
         }
         for entry in (
-            playlogs
+            compared_logs
             .values('track__artist__region')
-            .annotate(
-                plays=Count('id'),
-                earnings=Sum('royalty_amount'),
-                stations=Count('station_id', distinct=True),
-            )
+            .annotate(**with_previous_plays({
+                'plays': Count('id', filter=current_q),
+                'earnings': sum_amount('royalty_amount', filter=current_q),
+                'stations': Count('station_id', distinct=True, filter=current_q),
+            }, window))
+            .filter(plays__gt=0)
             .order_by('-plays')
         )
     ]
@@ -546,7 +501,7 @@ def get_publisher_dashboard_view(request):
         })
 
     recent_activity = []
-    recent_logs = playlogs.order_by('-played_at', '-created_at')[:5]
+    recent_logs = playlogs.select_related('track', 'track__artist', 'station').order_by('-played_at', '-created_at')[:5]
     for log in recent_logs:
         timestamp = log.played_at or log.created_at
         timestamp_display = timezone.localtime(timestamp).strftime('%b %d, %Y %H:%M') if timestamp else None
@@ -559,7 +514,7 @@ def get_publisher_dashboard_view(request):
             'time': timestamp_display,
         })
 
-    for agreement in agreements_qs.order_by('-created_at')[:3]:
+    for agreement in agreements_qs.select_related('track', 'songwriter').order_by('-created_at')[:3]:
         recent_activity.append({
             'id': agreement.id,
             'type': 'agreement',
@@ -587,40 +542,34 @@ def get_publisher_dashboard_view(request):
 
     active_relationships = PublisherArtistRelationship.objects.filter(publisher=publisher, status='active')
     disputes_count = Dispute.objects.filter(playlog__in=playlogs).count()
-    unclaimed_logs = playlogs.filter(claimed=False).count()
 
     roster = {
         'writerCount': active_relationships.values('artist_id').distinct().count(),
-        'agreementCount': agreements_qs.count(),
+        'agreementCount': catalog['agreements'],
         'publisherSplit': float(publisher.publisher_split or 0),
         'writerSplit': float(publisher.writer_split or 0),
-        'unclaimedLogs': unclaimed_logs,
+        'unclaimedLogs': current['unclaimed'],
         'disputes': disputes_count,
     }
 
-    previous_artist_totals = {
-        entry['track__artist_id']: entry['plays']
-        for entry in previous_logs.values('track__artist_id').annotate(plays=Count('id'))
-    }
-
     top_artists_data = []
     for entry in (
-        playlogs
+        compared_logs
         .values('track__artist_id', 'track__artist__stage_name')
-        .annotate(
-            plays=Count('id'),
-            revenue=Sum('royalty_amount'),
-        )
+        .annotate(**with_previous_plays({
+            'plays': Count('id', filter=current_q),
+            'revenue': sum_amount('royalty_amount', filter=current_q),
+        }, window))
+        .filter(plays__gt=0)
         .order_by('-plays')[:10]
     ):
-        artist_id = entry['track__artist_id']
         plays = entry['plays']
         top_artists_data.append({
-            'artistId': artist_id,
+            'artistId': entry['track__artist_id'],
             'name': entry['track__artist__stage_name'],
             'plays': plays,
             'revenue': float(entry['revenue'] or 0),
-            'trend': _calculate_growth(plays, previous_artist_totals.get(artist_id, 0)),
+            'trend': _calculate_growth(plays, entry.get('previous_plays', 0)),
         })
 
     data['stats'] = stats
@@ -6,7 +6,10 @@ from .models import (
     ExternalWork,
     ExternalRecording,
     UsageAttribution,
+    AttributionCheckpoint,
     RoyaltyCycle,
+    RoyaltyCycleChunk,
+    RoyaltyCycleCloseJob,
     RoyaltyLineItem,
     PartnerRemittance,
     PartnerReportExport,
@@ -44,12 +47,29 @@ class UsageAttributionAdmin(admin.ModelAdmin):
     list_filter = ("match_method", "territory")
 
 
+@admin.register(AttributionCheckpoint)
+class AttributionCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_play_log_id", "plays_scanned", "attributions_created", "last_run_at")
+
+
 @admin.register(RoyaltyCycle)
 class RoyaltyCycleAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "territory", "period_start", "period_end", "status")
     list_filter = ("status", "territory")
 
 
+@admin.register(RoyaltyCycleChunk)
+class RoyaltyCycleChunkAdmin(admin.ModelAdmin):
+    list_display = ("id", "royalty_cycle", "sequence", "start_play_log_id", "end_play_log_id", "status", "attempts", "distributions_created", "total_amount")
+    list_filter = ("status", "royalty_cycle")
+
+
+@admin.register(RoyaltyCycleCloseJob)
+class RoyaltyCycleCloseJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "royalty_cycle", "status", "stage", "progress_percentage", "line_items_created", "gross_amount", "created_at")
+    list_filter = ("status",)
+
+
 @admin.register(RoyaltyLineItem)
 class RoyaltyLineItemAdmin(admin.ModelAdmin):
     list_display = ("id", "royalty_cycle", "partner", "usage_count", "gross_amount", "admin_fee_amount", "net_amount")
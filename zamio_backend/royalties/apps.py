@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RoyaltiesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'royalties'
+
+    def ready(self):
+        """Import signals when app is ready"""
+        import royalties.signals
@@ -10,20 +10,22 @@ This module implements sophisticated royalty calculation engine with:
 
 import logging
 from decimal import Decimal, ROUND_HALF_UP
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
 
 from django.conf import settings
 from django.utils import timezone
-from django.db import transaction
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
 from django.core.exceptions import ValidationError
 
 from .models import (
     PartnerPRO, 
     ReciprocalAgreement, 
     RoyaltyCycle,
+    RoyaltyCycleChunk,
     RoyaltyLineItem,
     PartnerRemittance
 )
@@ -33,6 +35,7 @@ from publishers.models import PublisherProfile
 from artists.models import Track, Contributor, Artist
 from stations.models import Station
 from publishers.models import PublisherProfile
+from .services.rate_card import RateCard, get_rate_card, get_time_of_day_period
 
 logger = logging.getLogger(__name__)
 
@@ -186,80 +189,47 @@ class RoyaltyCalculator:
         }
     }
     
-    def __init__(self, custom_rates: Optional[Dict] = None):
-        """Initialize calculator with optional custom rates"""
+    def __init__(self, custom_rates: Optional[Dict] = None, rate_card: Optional[RateCard] = None):
+        """Initialize calculator with optional custom rates or a fixed rate card"""
         self.rates = custom_rates or self.DEFAULT_RATES
         self.currency_converter = CurrencyConverter()
+        if rate_card is None and custom_rates:
+            rate_card = RateCard.from_rate_config(custom_rates)
+        self._rate_card = rate_card
+    
+    @property
+    def rate_card(self) -> RateCard:
+        """Fixed card if one was given, otherwise the shared process-wide card"""
+        return self._rate_card or get_rate_card()
     
     def get_station_class(self, station: Station) -> StationClass:
-        """
-        Determine station class based on station attributes
-        In production, this would be a field on the Station model
-        """
-        # For now, use a simple heuristic based on station name/location
-        # This should be replaced with actual station classification
-        station_name = station.name.lower()
-        
-        if any(keyword in station_name for keyword in ['online', 'web', 'internet']):
-            return StationClass.ONLINE
-        elif any(keyword in station_name for keyword in ['community', 'local', 'campus']):
-            return StationClass.COMMUNITY
-        elif station.city and station.city.lower() in ['accra', 'kumasi', 'takoradi']:
-            return StationClass.CLASS_A
-        elif station.region:
-            return StationClass.CLASS_B
-        else:
-            return StationClass.CLASS_C
+        """Determine station class from the rate card"""
+        return StationClass(self.rate_card.station_class_for(station))
     
     def get_time_of_day_period(self, played_at: datetime) -> TimeOfDayPeriod:
         """Determine time of day period for rate calculation"""
-        hour = played_at.hour
-        
-        # Prime time: 6 AM - 10 AM, 4 PM - 8 PM
-        if (6 <= hour < 10) or (16 <= hour < 20):
-            return TimeOfDayPeriod.PRIME_TIME
-        # Off-peak: 12 AM - 6 AM
-        elif 0 <= hour < 6:
-            return TimeOfDayPeriod.OFF_PEAK
-        # Regular time: everything else
-        else:
-            return TimeOfDayPeriod.REGULAR_TIME
+        return TimeOfDayPeriod(get_time_of_day_period(played_at))
     
     def calculate_base_royalty(self, play_log: PlayLog) -> Tuple[Decimal, Dict[str, Any]]:
         """
         Calculate base royalty amount before splits
         Returns: (amount, calculation_metadata)
         """
-        station_class = self.get_station_class(play_log.station)
-        time_period = self.get_time_of_day_period(play_log.played_at)
-        
-        rate_config = self.rates[station_class]
-        base_rate = rate_config['base_rate_per_second']
-        time_multiplier = rate_config['multipliers'][time_period]
-        
         # Calculate duration in seconds
         if play_log.duration:
             duration_seconds = Decimal(str(play_log.duration.total_seconds()))
         else:
             # Fallback to track duration or default
-            duration_seconds = Decimal('180')  # 3 minutes default
+            duration_seconds = None
             if play_log.track and play_log.track.duration:
                 duration_seconds = Decimal(str(play_log.track.duration.total_seconds()))
         
-        # Calculate gross amount
-        gross_amount = base_rate * duration_seconds * time_multiplier
-        gross_amount = gross_amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        price = self.rate_card.price_play(play_log.station, play_log.played_at, duration_seconds)
         
-        metadata = {
-            'station_class': station_class.value,
-            'time_period': time_period.value,
-            'base_rate_per_second': str(base_rate),
-            'time_multiplier': str(time_multiplier),
-            'duration_seconds': str(duration_seconds),
-            'calculation_timestamp': timezone.now().isoformat(),
-        }
+        metadata = price.as_metadata()
+        metadata['calculation_timestamp'] = timezone.now().isoformat()
         
-        return gross_amount, metadata
+        return price.amount, metadata
     
     def resolve_contributor_splits(self, track: Track) -> List[ContributorSplit]:
         """
@@ -596,52 +566,209 @@ class RoyaltyCalculator:
 class RoyaltyCycleManager:
     """
     Manager for royalty cycle operations and audit trails
+
+    Cycles are processed in keyset-bounded chunks of PlayLog ids. Every chunk
+    commits its distributions together with its RoyaltyCycleChunk checkpoint,
+    so processing is resumable, idempotent, and can be fanned out to
+    parallel workers (see royalties.tasks.dispatch_royalty_cycle).
     """
     
-    def __init__(self, calculator: Optional[RoyaltyCalculator] = None):
+    DEFAULT_CHUNK_SIZE = 500
+    # A chunk left 'Processing' this long is assumed to belong to a dead worker
+    DEFAULT_CHUNK_STALE_SECONDS = 1800
+    
+    def __init__(self, calculator: Optional[RoyaltyCalculator] = None, chunk_size: Optional[int] = None):
         self.calculator = calculator or RoyaltyCalculator()
+        self.chunk_size = chunk_size or getattr(settings, 'ROYALTY_CYCLE_CHUNK_SIZE', self.DEFAULT_CHUNK_SIZE)
     
-    @transaction.atomic
-    def process_royalty_cycle(self, cycle: RoyaltyCycle) -> Dict[str, Any]:
-        """
-        Process a complete royalty cycle with audit trails
-        """
-        logger.info(f"Processing royalty cycle: {cycle.name}")
-        
-        # Get play logs for the cycle period
-        play_logs = PlayLog.objects.filter(
+    def get_cycle_play_logs(self, cycle: RoyaltyCycle):
+        """Base queryset of play logs that belong to a cycle period"""
+        return PlayLog.objects.filter(
             played_at__date__gte=cycle.period_start,
             played_at__date__lte=cycle.period_end,
             track__isnull=False
-        ).select_related('track', 'station')
+        )
+    
+    def plan_chunks(self, cycle: RoyaltyCycle) -> List[RoyaltyCycleChunk]:
+        """
+        Create chunk checkpoints for play logs not yet covered by the cycle.
+        Planning resumes after the last planned id, so calling it again only
+        picks up play logs that arrived since the previous call.
+
+        The cycle row is locked while planning, so concurrent planners for the
+        same cycle run one after the other and the second only sees the chunks
+        the first committed.
+        """
+        with transaction.atomic():
+            RoyaltyCycle.objects.select_for_update().filter(pk=cycle.pk).first()
+            
+            last_chunk = cycle.chunks.order_by('-sequence').first()
+            last_id = last_chunk.end_play_log_id if last_chunk else 0
+            sequence = last_chunk.sequence + 1 if last_chunk else 0
+            
+            ids_query = self.get_cycle_play_logs(cycle).order_by('id').values_list('id', flat=True)
+            new_chunks = []
+            
+            while True:
+                ids = list(ids_query.filter(id__gt=last_id)[:self.chunk_size])
+                if not ids:
+                    break
+                
+                new_chunks.append(RoyaltyCycleChunk(
+                    royalty_cycle=cycle,
+                    sequence=sequence,
+                    start_play_log_id=ids[0],
+                    end_play_log_id=ids[-1],
+                    play_log_count=len(ids)
+                ))
+                last_id = ids[-1]
+                sequence += 1
+            
+            if new_chunks:
+                RoyaltyCycleChunk.objects.bulk_create(new_chunks)
+                logger.info(f"Planned {len(new_chunks)} chunks for royalty cycle: {cycle.name}")
+        
+        return new_chunks
+    
+    def claim_chunk(self, chunk_id: int) -> Optional[datetime]:
+        """
+        Move a chunk to 'Processing' in one conditional UPDATE, taking over
+        chunks whose worker stalled; returns the claim time, or None if the
+        chunk is completed or still owned by a live worker
+        """
+        claimed_at = timezone.now()
+        stale_before = claimed_at - timedelta(
+            seconds=getattr(settings, 'ROYALTY_CHUNK_STALE_SECONDS', self.DEFAULT_CHUNK_STALE_SECONDS)
+        )
+        claimed = RoyaltyCycleChunk.objects.filter(id=chunk_id).filter(
+            Q(status__in=['Pending', 'Failed'])
+            | Q(status='Processing', started_at__lt=stale_before)
+            | Q(status='Processing', started_at__isnull=True)
+        ).update(status='Processing', started_at=claimed_at)
+        return claimed_at if claimed else None
+    
+    def process_chunk(self, chunk_id: int) -> RoyaltyCycleChunk:
+        """
+        Calculate and persist distributions for a single chunk.
+        Completed chunks are skipped, so retries never duplicate distributions.
+        """
+        claimed_at = self.claim_chunk(chunk_id)
+        if claimed_at is None:
+            # Completed, or being processed by another worker
+            return RoyaltyCycleChunk.objects.get(id=chunk_id)
         
-        # Calculate royalties for all play logs
-        calculation_results = self.calculator.batch_calculate_royalties(list(play_logs))
+        try:
+            with transaction.atomic():
+                chunk = RoyaltyCycleChunk.objects.select_for_update().select_related(
+                    'royalty_cycle'
+                ).get(id=chunk_id)
+                
+                if chunk.status != 'Processing' or chunk.started_at != claimed_at:
+                    # Reclaimed as stale before this worker got the row lock
+                    return chunk
+                
+                play_logs = self.get_cycle_play_logs(chunk.royalty_cycle).filter(
+                    id__gte=chunk.start_play_log_id,
+                    id__lte=chunk.end_play_log_id
+                ).select_related('track', 'station').order_by('id')
+                
+                calculation_results = self.calculator.batch_calculate_royalties(list(play_logs))
+                
+                total_distributions = 0
+                total_amount = Decimal('0')
+                errors = []
+                
+                for result in calculation_results:
+                    if result.errors:
+                        errors.extend(result.errors)
+                        continue
+                    
+                    distributions = self.calculator.create_royalty_distributions(result)
+                    total_distributions += len(distributions)
+                    total_amount += result.total_gross_amount
+                
+                chunk.status = 'Completed'
+                chunk.attempts += 1
+                chunk.play_logs_processed = len(calculation_results)
+                chunk.distributions_created = total_distributions
+                chunk.total_amount = total_amount
+                chunk.errors = errors
+                chunk.completed_at = timezone.now()
+                chunk.save()
+                
+                return chunk
         
-        # Create distribution records
-        total_distributions = 0
-        total_amount = Decimal('0')
-        errors = []
+        except RoyaltyCycleChunk.DoesNotExist:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing royalty cycle chunk {chunk_id}: {str(e)}")
+            RoyaltyCycleChunk.objects.filter(id=chunk_id).update(
+                status='Failed',
+                attempts=models.F('attempts') + 1,
+                errors=[f"Chunk error: {str(e)}"]
+            )
+            return RoyaltyCycleChunk.objects.get(id=chunk_id)
+    
+    def finalize_cycle(self, cycle: RoyaltyCycle) -> Dict[str, Any]:
+        """
+        Reconcile a cycle and lock it once every chunk has completed.
+        Play logs that arrived after planning are chunked and processed here.
+        """
+        for chunk in self.plan_chunks(cycle):
+            self.process_chunk(chunk.id)
         
-        for result in calculation_results:
-            if result.errors:
-                errors.extend(result.errors)
-                continue
-            
-            distributions = self.calculator.create_royalty_distributions(result)
-            total_distributions += len(distributions)
-            total_amount += result.total_gross_amount
+        totals = cycle.chunks.aggregate(
+            chunks_total=Count('id'),
+            chunks_completed=Count('id', filter=Q(status='Completed')),
+            play_logs_processed=Sum('play_logs_processed'),
+            distributions_created=Sum('distributions_created'),
+            total_amount=Sum('total_amount'),
+        )
+        chunks_incomplete = totals['chunks_total'] - totals['chunks_completed']
+        play_logs_processed = totals['play_logs_processed'] or 0
+        play_logs_expected = self.get_cycle_play_logs(cycle).count()
         
-        # Update cycle status
-        cycle.status = 'Locked'
-        cycle.save()
+        if play_logs_processed != play_logs_expected:
+            logger.warning(
+                f"Royalty cycle {cycle.name}: processed {play_logs_processed} play logs, "
+                f"{play_logs_expected} currently in period"
+            )
+        
+        if chunks_incomplete == 0:
+            # Update cycle status
+            cycle.status = 'Locked'
+            cycle.save(update_fields=['status'])
+        else:
+            logger.warning(f"Royalty cycle {cycle.name} left open: {chunks_incomplete} chunks incomplete")
+        
+        errors = []
+        for chunk_errors in cycle.chunks.exclude(errors=[]).values_list('errors', flat=True).iterator():
+            errors.extend(chunk_errors)
         
         return {
             'cycle_id': cycle.id,
-            'play_logs_processed': len(play_logs),
-            'distributions_created': total_distributions,
-            'total_amount': str(total_amount),
+            'status': cycle.status,
+            'chunks_total': totals['chunks_total'],
+            'chunks_incomplete': chunks_incomplete,
+            'play_logs_processed': play_logs_processed,
+            'play_logs_expected': play_logs_expected,
+            'distributions_created': totals['distributions_created'] or 0,
+            'total_amount': str(totals['total_amount'] or Decimal('0')),
             'currency': 'GHS',
             'errors': errors,
             'processed_at': timezone.now().isoformat()
-        }
\ No newline at end of file
+        }
+    
+    def process_royalty_cycle(self, cycle: RoyaltyCycle) -> Dict[str, Any]:
+        """
+        Process a complete royalty cycle with audit trails
+        """
+        logger.info(f"Processing royalty cycle: {cycle.name}")
+        
+        self.plan_chunks(cycle)
+        
+        pending_chunk_ids = cycle.chunks.exclude(status='Completed').values_list('id', flat=True)
+        for chunk_id in list(pending_chunk_ids):
+            self.process_chunk(chunk_id)
+        
+        return self.finalize_cycle(cycle)
@@ -1,47 +1,40 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
 
-from music_monitor.models import PlayLog
-from royalties.models import ExternalRecording, UsageAttribution
+from royalties.services.attribution import IsrcAttributionEngine
 
 
 class Command(BaseCommand):
-    help = "Attribute PlayLogs to partner repertoire by ISRC when available."
+    help = "Attribute new PlayLogs to partner repertoire by ISRC, resuming from the last high-water mark."
 
     def add_arguments(self, parser):
-        parser.add_argument("--limit", type=int, default=1000, help="Max playlogs to process")
+        parser.add_argument("--chunk-size", type=int, default=None, help="PlayLogs per chunk")
+        parser.add_argument("--max-chunks", type=int, default=None, help="Stop after this many chunks")
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Also re-scan the latest N playlogs, whatever the high-water mark (e.g. after a manual recording edit)",
+        )
+        parser.add_argument(
+            "--reset-to",
+            type=int,
+            default=None,
+            help="Move the high-water mark back to this PlayLog id before running (e.g. after a repertoire import)",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
-        limit = options["limit"]
-        processed = 0
-        created = 0
-
-        qs = PlayLog.objects.select_related("track", "station").order_by("-created_at")
-        for pl in qs[:limit]:
-            # Skip if already attributed
-            if UsageAttribution.objects.filter(play_log=pl).exists():
-                continue
-            isrc = getattr(pl.track, "isrc_code", None)
-            if not isrc:
-                continue
-            rec = ExternalRecording.objects.filter(isrc=isrc).select_related("origin_partner").first()
-            if not rec:
-                continue
-
-            UsageAttribution.objects.create(
-                play_log=pl,
-                external_recording=rec,
-                origin_partner=rec.origin_partner,
-                confidence_score=95.0,
-                match_method="metadata",
-                territory="GH",
-                station_id=pl.station_id,
-                played_at=pl.played_at,
-                duration_seconds=int(pl.duration.total_seconds()) if pl.duration else None,
-            )
-            created += 1
-            processed += 1
-
-        self.stdout.write(self.style.SUCCESS(f"Attributed playlogs created={created}, scanned={processed}"))
+        engine = IsrcAttributionEngine(chunk_size=options["chunk_size"])
 
+        if options["reset_to"] is not None:
+            engine.reset(options["reset_to"])
+
+        summary = engine.run(max_chunks=options["max_chunks"])
+        if options["limit"]:
+            rescan = engine.rescan_latest(options["limit"])
+            summary["attributions_created"] += rescan["attributions_created"]
+            summary["plays_scanned"] += rescan["plays_scanned"]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Attributed playlogs created={summary['attributions_created']}, "
+            f"scanned={summary['plays_scanned']}, high_water_mark={engine.get_checkpoint().last_play_log_id}"
+        ))
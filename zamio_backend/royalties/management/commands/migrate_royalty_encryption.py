@@ -0,0 +1,56 @@
+"""
+Management command to rewrite Fernet-encrypted royalty files in the chunked streaming format
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from royalties.services.encryption_service import RoyaltyFileEncryption
+
+
+class Command(BaseCommand):
+    help = 'Re-encrypt legacy (whole-file Fernet) royalty files in the chunked streaming format'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            type=str,
+            default=None,
+            help='Directory to scan (default: MEDIA_ROOT/royalties/secure)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List legacy files without rewriting them',
+        )
+
+    def handle(self, *args, **options):
+        root = options['path'] or os.path.join(settings.MEDIA_ROOT, 'royalties', 'secure')
+        dry_run = options['dry_run']
+        if not os.path.isdir(root):
+            raise CommandError(f"Directory not found: {root}")
+
+        migrated = current = failed = 0
+        for directory, _subdirs, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.endswith('.enc'):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    if RoyaltyFileEncryption.is_stream_encrypted(path):
+                        current += 1
+                        continue
+                    if dry_run:
+                        self.stdout.write(f"Would migrate {path}")
+                    else:
+                        RoyaltyFileEncryption.migrate_legacy_file(path)
+                    migrated += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"Failed to migrate {path}: {str(e)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Encryption migration complete. migrated={migrated}, already_current={current}, "
+            f"failed={failed}, dry_run={dry_run}"
+        ))
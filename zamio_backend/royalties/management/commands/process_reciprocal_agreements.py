@@ -150,7 +150,7 @@ class Command(BaseCommand):
                 royalty_cycle=cycle,
                 format=report_data.partner_pro.reporting_standard,
                 file=report_path,
-                checksum=processor._calculate_file_checksum(report_path)
+                checksum=processor.report_generator.last_report.checksum
             )
             
             self.stdout.write(
@@ -272,7 +272,7 @@ class Command(BaseCommand):
                         royalty_cycle=remittance.royalty_cycle,
                         format=report_data.partner_pro.reporting_standard,
                         file=report_path,
-                        checksum=processor._calculate_file_checksum(report_path)
+                        checksum=processor.report_generator.last_report.checksum
                     )
                     
                     reports_generated += 1
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('royalties', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoyaltyCycleChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('start_play_log_id', models.BigIntegerField(help_text='First PlayLog id in the chunk (inclusive)')),
+                ('end_play_log_id', models.BigIntegerField(help_text='Last PlayLog id in the chunk (inclusive)')),
+                ('play_log_count', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Processing', 'Processing'), ('Completed', 'Completed'), ('Failed', 'Failed')], default='Pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('play_logs_processed', models.PositiveIntegerField(default=0)),
+                ('distributions_created', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('royalty_cycle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='royalties.royaltycycle')),
+            ],
+            options={
+                'ordering': ['royalty_cycle', 'sequence'],
+                'indexes': [models.Index(fields=['royalty_cycle', 'status'], name='royalties_r_royalty_ce844f_idx')],
+                'unique_together': {('royalty_cycle', 'sequence')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('royalties', '0002_royaltycyclechunk'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoyaltyCycleCloseJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Completed', 'Completed'), ('Failed', 'Failed')], default='Pending', max_length=20)),
+                ('stage', models.CharField(blank=True, default='', max_length=50)),
+                ('progress_percentage', models.PositiveIntegerField(default=0)),
+                ('attributions_count', models.PositiveIntegerField(default=0)),
+                ('line_items_created', models.PositiveIntegerField(default=0)),
+                ('line_items_replaced', models.PositiveIntegerField(default=0)),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('royalty_cycle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='close_jobs', to='royalties.royaltycycle')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['royalty_cycle', 'status'], name='royalties_r_royalty_0e3e7f_idx')],
+            },
+        ),
+    ]
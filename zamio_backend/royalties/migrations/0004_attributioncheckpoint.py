@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('royalties', '0003_royaltycycleclosejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttributionCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_play_log_id', models.BigIntegerField(default=0)),
+                ('plays_scanned', models.PositiveBigIntegerField(default=0)),
+                ('attributions_created', models.PositiveBigIntegerField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_recordings(apps, schema_editor):
+    """Keep the oldest recording per (partner, ISRC) and repoint references to it"""
+    ExternalRecording = apps.get_model('royalties', 'ExternalRecording')
+    UsageAttribution = apps.get_model('royalties', 'UsageAttribution')
+    RoyaltyLineItem = apps.get_model('royalties', 'RoyaltyLineItem')
+
+    duplicates = (
+        ExternalRecording.objects.filter(isrc__isnull=False)
+        .values('origin_partner_id', 'isrc')
+        .annotate(copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    for duplicate in duplicates:
+        ids = list(
+            ExternalRecording.objects.filter(
+                origin_partner_id=duplicate['origin_partner_id'], isrc=duplicate['isrc']
+            ).order_by('id').values_list('id', flat=True)
+        )
+        keep, extra = ids[0], ids[1:]
+        UsageAttribution.objects.filter(external_recording_id__in=extra).update(external_recording_id=keep)
+        RoyaltyLineItem.objects.filter(external_recording_id__in=extra).update(external_recording_id=keep)
+        ExternalRecording.objects.filter(id__in=extra).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('royalties', '0004_attributioncheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_recordings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='externalrecording',
+            constraint=models.UniqueConstraint(fields=('origin_partner', 'isrc'), name='uniq_external_recording_partner_isrc'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    """Keep only the newest active close job per cycle before constraining it"""
+    RoyaltyCycleCloseJob = apps.get_model('royalties', 'RoyaltyCycleCloseJob')
+
+    seen = set()
+    active = RoyaltyCycleCloseJob.objects.filter(status__in=['Pending', 'Running']).order_by('royalty_cycle_id', '-created_at')
+    for job_id, cycle_id in active.values_list('id', 'royalty_cycle_id'):
+        if cycle_id in seen:
+            RoyaltyCycleCloseJob.objects.filter(id=job_id).update(
+                status='Failed', error_message='Superseded by a newer close job'
+            )
+        seen.add(cycle_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('royalties', '0005_externalrecording_uniq_external_recording_partner_isrc'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='royaltycycleclosejob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='royaltycycleclosejob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['Pending', 'Running'])), fields=('royalty_cycle',), name='uniq_active_close_job_per_cycle'),
+        ),
+    ]
@@ -97,6 +97,12 @@ class ExternalRecording(models.Model):
     duration = models.PositiveIntegerField(blank=True, null=True, help_text="Duration in seconds")
     recording_metadata = models.JSONField(default=dict, blank=True)
 
+    class Meta:
+        constraints = [
+            # Repertoire imports upsert on this key
+            models.UniqueConstraint(fields=["origin_partner", "isrc"], name="uniq_external_recording_partner_isrc"),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.isrc or 'no-ISRC'})"
 
@@ -126,6 +132,24 @@ class UsageAttribution(models.Model):
 
     def __str__(self):
         return f"Attribution {self.id} → {self.origin_partner}"
+
+
+class AttributionCheckpoint(models.Model):
+    """
+    High-water mark for incremental usage attribution: every PlayLog with an
+    id up to last_play_log_id has been considered by the named engine.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_play_log_id = models.BigIntegerField(default=0)
+    plays_scanned = models.PositiveBigIntegerField(default=0)
+    attributions_created = models.PositiveBigIntegerField(default=0)
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ PlayLog {self.last_play_log_id}"
+
+
 class RoyaltyCycle(models.Model):
     STATUS = (
         ("Open", "Open"),
@@ -146,6 +170,101 @@ class RoyaltyCycle(models.Model):
         return f"{self.name} ({self.territory}) [{self.status}]"
 
 
+class RoyaltyCycleChunk(models.Model):
+    """
+    Checkpoint for one keyset-bounded slice of a royalty cycle's play logs.
+    Each chunk commits its distributions together with its own status, so a
+    cycle can be resumed (or fanned out to workers) without double-paying.
+    """
+    STATUS = (
+        ("Pending", "Pending"),
+        ("Processing", "Processing"),
+        ("Completed", "Completed"),
+        ("Failed", "Failed"),
+    )
+
+    royalty_cycle = models.ForeignKey(RoyaltyCycle, on_delete=models.CASCADE, related_name="chunks")
+    sequence = models.PositiveIntegerField()
+    start_play_log_id = models.BigIntegerField(help_text="First PlayLog id in the chunk (inclusive)")
+    end_play_log_id = models.BigIntegerField(help_text="Last PlayLog id in the chunk (inclusive)")
+    play_log_count = models.PositiveIntegerField(default=0)
+
+    status = models.CharField(max_length=20, choices=STATUS, default="Pending")
+    attempts = models.PositiveIntegerField(default=0)
+    play_logs_processed = models.PositiveIntegerField(default=0)
+    distributions_created = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    errors = models.JSONField(default=list, blank=True)
+
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("royalty_cycle", "sequence")
+        indexes = [
+            models.Index(fields=["royalty_cycle", "status"]),
+        ]
+        ordering = ["royalty_cycle", "sequence"]
+
+    def __str__(self):
+        return (
+            f"Chunk {self.sequence} of {self.royalty_cycle_id} "
+            f"[{self.start_play_log_id}-{self.end_play_log_id}] ({self.status})"
+        )
+
+
+class RoyaltyCycleCloseJob(models.Model):
+    """
+    Background close of a royalty cycle: aggregates usage attributions into
+    partner line items and locks the cycle. Re-running replaces the cycle's
+    line items, so a close can be retried safely.
+    """
+    STATUS = (
+        ("Pending", "Pending"),
+        ("Running", "Running"),
+        ("Completed", "Completed"),
+        ("Failed", "Failed"),
+    )
+
+    royalty_cycle = models.ForeignKey(RoyaltyCycle, on_delete=models.CASCADE, related_name="close_jobs")
+    requested_by = models.ForeignKey(
+        'accounts.User', on_delete=models.SET_NULL, blank=True, null=True
+    )
+    status = models.CharField(max_length=20, choices=STATUS, default="Pending")
+    stage = models.CharField(max_length=50, blank=True, default="")
+    progress_percentage = models.PositiveIntegerField(default=0)
+
+    attributions_count = models.PositiveIntegerField(default=0)
+    line_items_created = models.PositiveIntegerField(default=0)
+    line_items_replaced = models.PositiveIntegerField(default=0)
+    gross_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    net_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    error_message = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Heartbeat: bumped on every progress update, used to detect dead workers
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["royalty_cycle", "status"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["royalty_cycle"],
+                condition=models.Q(status__in=["Pending", "Running"]),
+                name="uniq_active_close_job_per_cycle",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Close job {self.id} for {self.royalty_cycle_id} ({self.status})"
+
+
 class RoyaltyLineItem(models.Model):
     royalty_cycle = models.ForeignKey(RoyaltyCycle, on_delete=models.CASCADE, related_name="line_items")
     partner = models.ForeignKey(PartnerPRO, on_delete=models.SET_NULL, blank=True, null=True)
@@ -8,12 +8,9 @@ This module handles:
 - Audit trails for all PRO-related transactions and reporting
 """
 
-import csv
-import json
-import xml.etree.ElementTree as ET
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -39,6 +36,7 @@ from .models import (
     RoyaltyCalculationAudit
 )
 from music_monitor.models import PlayLog, AudioDetection
+from .services.report_writers import ReportFile, UsageRows, write_report
 
 logger = logging.getLogger(__name__)
 
@@ -67,10 +65,10 @@ class PROStandard(Enum):
 
 @dataclass
 class PROReportData:
-    """Data structure for PRO reporting"""
+    """Data structure for PRO reporting; usage_data may be a streaming UsageRows source"""
     partner_pro: PartnerPRO
     royalty_cycle: RoyaltyCycle
-    usage_data: List[Dict[str, Any]]
+    usage_data: Iterable[Dict[str, Any]]
     total_amount: Decimal
     currency: str
     report_period_start: date
@@ -99,195 +97,54 @@ class PROReportGenerator:
         self.export_dir = getattr(settings, 'PRO_EXPORT_DIR', 
                                  os.path.join(settings.BASE_DIR, 'exports', 'pro_reports'))
         os.makedirs(self.export_dir, exist_ok=True)
+        self.last_report: Optional[ReportFile] = None
+    
+    # Format -> (filename label, extension)
+    FILE_NAMING = {
+        "CSV": ("", "csv"),
+        "CWR": ("CWR_", "cwr"),
+        "DDEX-DSR": ("DDEX_", "xml"),
+        "JSON": ("JSON_", "json"),
+    }
+    
+    def report_path(self, report_data: PROReportData, report_format: str, compress: bool = False) -> str:
+        label, extension = self.FILE_NAMING[report_format]
+        cycle_name = report_data.royalty_cycle.name if report_data.royalty_cycle else report_data.report_period_start
+        filename = f"{report_data.partner_pro.pro_code}_{label}{cycle_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        if compress:
+            filename += ".gz"
+        return os.path.join(self.export_dir, filename)
+    
+    def write_report(self, report_data: PROReportData, report_format: str, compress: bool = False,
+                     progress=None) -> ReportFile:
+        """
+        Stream a report to disk; usage_data may be a list or a lazily
+        evaluated source such as UsageRows. Returns path, checksum and row count.
+        """
+        self.last_report = write_report(
+            report_data,
+            report_format,
+            self.report_path(report_data, report_format, compress),
+            compress=compress,
+            progress=progress,
+        )
+        return self.last_report
     
     def generate_csv_report(self, report_data: PROReportData) -> str:
         """Generate CSV format report (most common)"""
-        filename = f"{report_data.partner_pro.pro_code}_{report_data.royalty_cycle.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        filepath = os.path.join(self.export_dir, filename)
-        
-        with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = [
-                'report_period_start',
-                'report_period_end',
-                'station_id',
-                'station_name',
-                'played_at_utc',
-                'isrc',
-                'iswc',
-                'work_title',
-                'recording_title',
-                'artist_name',
-                'duration_seconds',
-                'confidence_score',
-                'detection_source',
-                'pro_affiliation',
-                'gross_amount',
-                'admin_fee_amount',
-                'net_amount',
-                'currency',
-                'territory',
-                'usage_type'
-            ]
-            
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for usage in report_data.usage_data:
-                writer.writerow({
-                    'report_period_start': report_data.report_period_start.isoformat(),
-                    'report_period_end': report_data.report_period_end.isoformat(),
-                    'station_id': usage.get('station_id'),
-                    'station_name': usage.get('station_name'),
-                    'played_at_utc': usage.get('played_at_utc'),
-                    'isrc': usage.get('isrc'),
-                    'iswc': usage.get('iswc'),
-                    'work_title': usage.get('work_title'),
-                    'recording_title': usage.get('recording_title'),
-                    'artist_name': usage.get('artist_name'),
-                    'duration_seconds': usage.get('duration_seconds'),
-                    'confidence_score': usage.get('confidence_score'),
-                    'detection_source': usage.get('detection_source'),
-                    'pro_affiliation': usage.get('pro_affiliation'),
-                    'gross_amount': usage.get('gross_amount'),
-                    'admin_fee_amount': usage.get('admin_fee_amount'),
-                    'net_amount': usage.get('net_amount'),
-                    'currency': report_data.currency,
-                    'territory': 'GH',
-                    'usage_type': 'broadcast'
-                })
-        
-        return filepath
+        return self.write_report(report_data, "CSV").path
     
     def generate_cwr_report(self, report_data: PROReportData) -> str:
         """Generate CWR (Common Works Registration) format report"""
-        filename = f"{report_data.partner_pro.pro_code}_CWR_{report_data.royalty_cycle.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.cwr"
-        filepath = os.path.join(self.export_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as cwrfile:
-            # CWR Header
-            cwrfile.write(f"HDR01GHAMRO{datetime.now().strftime('%Y%m%d%H%M%S')}01.00CWR\n")
-            
-            # Group Header
-            cwrfile.write(f"GRH01{report_data.partner_pro.pro_code}0001\n")
-            
-            # Transaction sequence number
-            seq_num = 1
-            
-            for usage in report_data.usage_data:
-                # Work Registration Transaction
-                if usage.get('iswc'):
-                    cwrfile.write(f"WRK{seq_num:08d}00000000{usage.get('work_title', '')[:60]:<60}\n")
-                    seq_num += 1
-                
-                # Performance Data
-                cwrfile.write(
-                    f"PER{seq_num:08d}"
-                    f"{usage.get('played_at_utc', '')[:8]}"
-                    f"{usage.get('station_id', '')[:14]:<14}"
-                    f"{usage.get('recording_title', '')[:60]:<60}"
-                    f"{usage.get('duration_seconds', 0):06d}"
-                    f"{int(float(usage.get('gross_amount', 0)) * 100):012d}\n"
-                )
-                seq_num += 1
-            
-            # Group Trailer
-            cwrfile.write(f"GRT01{seq_num-1:08d}0001\n")
-            
-            # Transmission Trailer
-            cwrfile.write(f"TRL01{seq_num:08d}0001\n")
-        
-        return filepath
+        return self.write_report(report_data, "CWR").path
     
     def generate_ddex_dsr_report(self, report_data: PROReportData) -> str:
         """Generate DDEX DSR (Digital Sales Report) XML format"""
-        filename = f"{report_data.partner_pro.pro_code}_DDEX_{report_data.royalty_cycle.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
-        filepath = os.path.join(self.export_dir, filename)
-        
-        # Create XML structure
-        root = ET.Element("DigitalSalesReport")
-        root.set("xmlns", "http://ddex.net/xml/dsr/20120404")
-        root.set("MessageSchemaVersionId", "dsr/20120404")
-        
-        # Message Header
-        header = ET.SubElement(root, "MessageHeader")
-        ET.SubElement(header, "MessageThreadId").text = f"GHAMRO_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        ET.SubElement(header, "MessageId").text = f"DSR_{report_data.royalty_cycle.name}"
-        ET.SubElement(header, "MessageCreatedDateTime").text = datetime.now().isoformat()
-        
-        # Message Sender
-        sender = ET.SubElement(header, "MessageSender")
-        ET.SubElement(sender, "PartyId").text = "GHAMRO"
-        ET.SubElement(sender, "PartyName").text = "Ghana Music Rights Organization"
-        
-        # Message Recipient
-        recipient = ET.SubElement(header, "MessageRecipient")
-        ET.SubElement(recipient, "PartyId").text = report_data.partner_pro.pro_code
-        ET.SubElement(recipient, "PartyName").text = report_data.partner_pro.display_name
-        
-        # Report Details
-        report_details = ET.SubElement(root, "ReportDetails")
-        ET.SubElement(report_details, "ReportId").text = f"RPT_{report_data.royalty_cycle.name}"
-        ET.SubElement(report_details, "ReportType").text = "UsageReport"
-        ET.SubElement(report_details, "ReportPeriodStartDate").text = report_data.report_period_start.isoformat()
-        ET.SubElement(report_details, "ReportPeriodEndDate").text = report_data.report_period_end.isoformat()
-        
-        # Usage Data
-        for usage in report_data.usage_data:
-            usage_elem = ET.SubElement(root, "UsageRecord")
-            ET.SubElement(usage_elem, "ISRC").text = usage.get('isrc', '')
-            ET.SubElement(usage_elem, "RecordingTitle").text = usage.get('recording_title', '')
-            ET.SubElement(usage_elem, "ArtistName").text = usage.get('artist_name', '')
-            ET.SubElement(usage_elem, "UsageDateTime").text = usage.get('played_at_utc', '')
-            ET.SubElement(usage_elem, "Duration").text = str(usage.get('duration_seconds', 0))
-            ET.SubElement(usage_elem, "Territory").text = "GH"
-            ET.SubElement(usage_elem, "UsageType").text = "Broadcast"
-            
-            # Royalty Information
-            royalty_elem = ET.SubElement(usage_elem, "RoyaltyInformation")
-            ET.SubElement(royalty_elem, "GrossAmount").text = str(usage.get('gross_amount', 0))
-            ET.SubElement(royalty_elem, "NetAmount").text = str(usage.get('net_amount', 0))
-            ET.SubElement(royalty_elem, "Currency").text = report_data.currency
-        
-        # Write XML to file
-        tree = ET.ElementTree(root)
-        tree.write(filepath, encoding='utf-8', xml_declaration=True)
-        
-        return filepath
+        return self.write_report(report_data, "DDEX-DSR").path
     
     def generate_json_report(self, report_data: PROReportData) -> str:
         """Generate JSON format report for modern APIs"""
-        filename = f"{report_data.partner_pro.pro_code}_JSON_{report_data.royalty_cycle.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        filepath = os.path.join(self.export_dir, filename)
-        
-        report_json = {
-            "report_metadata": {
-                "report_id": f"RPT_{report_data.royalty_cycle.name}",
-                "partner_pro": report_data.partner_pro.pro_code,
-                "partner_name": report_data.partner_pro.display_name,
-                "reporting_organization": "GHAMRO",
-                "report_period": {
-                    "start_date": report_data.report_period_start.isoformat(),
-                    "end_date": report_data.report_period_end.isoformat()
-                },
-                "generated_at": datetime.now().isoformat(),
-                "currency": report_data.currency,
-                "territory": "GH",
-                "total_amount": str(report_data.total_amount),
-                "usage_count": len(report_data.usage_data)
-            },
-            "usage_data": report_data.usage_data,
-            "summary": {
-                "total_gross_amount": str(sum(Decimal(str(u.get('gross_amount', 0))) for u in report_data.usage_data)),
-                "total_net_amount": str(sum(Decimal(str(u.get('net_amount', 0))) for u in report_data.usage_data)),
-                "unique_works": len(set(u.get('iswc') for u in report_data.usage_data if u.get('iswc'))),
-                "unique_recordings": len(set(u.get('isrc') for u in report_data.usage_data if u.get('isrc')))
-            }
-        }
-        
-        with open(filepath, 'w', encoding='utf-8') as jsonfile:
-            json.dump(report_json, jsonfile, indent=2, ensure_ascii=False)
-        
-        return filepath
+        return self.write_report(report_data, "JSON").path
 
 
 class ReciprocalAgreementProcessor:
@@ -411,7 +268,7 @@ class ReciprocalAgreementProcessor:
                         royalty_cycle=royalty_cycle,
                         format=payment.partner_pro.reporting_standard,
                         file=report_path,
-                        checksum=self._calculate_file_checksum(report_path)
+                        checksum=self.report_generator.last_report.checksum
                     )
                     reports_generated.append(export_record)
                     
@@ -445,38 +302,15 @@ class ReciprocalAgreementProcessor:
         }
     
     def _prepare_report_data(self, payment: ReciprocalPayment, royalty_cycle: RoyaltyCycle) -> PROReportData:
-        """Prepare report data for partner"""
-        # Get detailed usage data
-        attributions = UsageAttribution.objects.filter(
-            origin_partner=payment.partner_pro,
+        """Prepare report data for partner; per-play rows are streamed when the report is written"""
+        admin_fee_percent = payment.agreement.admin_fee_percent or payment.partner_pro.default_admin_fee_percent
+        usage_data = UsageRows(
+            payment.partner_pro,
+            royalty_cycle.period_start,
+            royalty_cycle.period_end,
             territory=payment.agreement.territory,
-            played_at__date__gte=royalty_cycle.period_start,
-            played_at__date__lte=royalty_cycle.period_end
-        ).select_related('play_log', 'external_recording', 'external_work', 'play_log__station')
-        
-        usage_data = []
-        for attr in attributions:
-            play_log = attr.play_log
-            recording = attr.external_recording
-            work = attr.external_work
-            
-            usage_data.append({
-                'station_id': play_log.station.id if play_log and play_log.station else None,
-                'station_name': play_log.station.name if play_log and play_log.station else None,
-                'played_at_utc': play_log.played_at.isoformat() if play_log and play_log.played_at else None,
-                'isrc': recording.isrc if recording else None,
-                'iswc': work.iswc if work else None,
-                'work_title': work.title if work else None,
-                'recording_title': recording.title if recording else None,
-                'artist_name': None,  # Would need to be extracted from metadata
-                'duration_seconds': attr.duration_seconds,
-                'confidence_score': str(attr.confidence_score),
-                'detection_source': attr.match_method,
-                'pro_affiliation': payment.partner_pro.pro_code,
-                'gross_amount': str(play_log.royalty_amount) if play_log and play_log.royalty_amount else '0',
-                'admin_fee_amount': str(payment.admin_fee / payment.usage_count) if payment.usage_count > 0 else '0',
-                'net_amount': str((payment.net_payable / payment.usage_count)) if payment.usage_count > 0 else '0'
-            })
+            admin_fee_percent=admin_fee_percent,
+        )
         
         return PROReportData(
             partner_pro=payment.partner_pro,
@@ -0,0 +1,206 @@
+"""
+Incremental ISRC attribution of play logs to partner repertoire
+
+Walks PlayLogs forward from a high-water mark (AttributionCheckpoint) in
+keyset chunks. Each chunk resolves its ISRCs against ExternalRecording with
+one query and bulk-creates the UsageAttributions, then advances the mark in
+the same transaction, so a crashed run resumes where the last committed
+chunk ended.
+
+The mark is held ATTRIBUTION_CHECKPOINT_MARGIN ids behind the newest
+PlayLog, so every run re-scans that trailing window and picks up plays whose
+ids committed out of order. Plays the mark has passed are attributed to
+newly ingested recordings by ``attribute_isrcs``, which the repertoire
+ingest calls for every ISRC it adds.
+"""
+
+import logging
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+ISRC_CHECKPOINT = 'isrc'
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHECKPOINT_MARGIN = 1000
+ISRC_CONFIDENCE = 95.0
+PLAY_FIELDS = ('id', 'station_id', 'played_at', 'duration', 'track__isrc_code')
+
+
+class IsrcAttributionEngine:
+    """Attribute new play logs to partner recordings that share their track's ISRC"""
+
+    def __init__(self, chunk_size: Optional[int] = None, territory: Optional[str] = None):
+        self.chunk_size = chunk_size or getattr(settings, 'ATTRIBUTION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.territory = territory or getattr(settings, 'ROYALTY_RATE_TERRITORY', 'GH')
+        self.checkpoint_margin = getattr(settings, 'ATTRIBUTION_CHECKPOINT_MARGIN', DEFAULT_CHECKPOINT_MARGIN)
+
+    def get_checkpoint(self):
+        from royalties.models import AttributionCheckpoint
+
+        checkpoint, _ = AttributionCheckpoint.objects.get_or_create(name=ISRC_CHECKPOINT)
+        return checkpoint
+
+    def reset(self, last_play_log_id: int = 0):
+        """Move the high-water mark back, e.g. after importing older partner repertoire"""
+        checkpoint = self.get_checkpoint()
+        checkpoint.last_play_log_id = last_play_log_id
+        checkpoint.save(update_fields=['last_play_log_id', 'updated_at'])
+        return checkpoint
+
+    @staticmethod
+    def recordings_for_isrcs(isrcs) -> Dict[str, Tuple[int, int]]:
+        """ISRC -> (recording id, partner id); the oldest recording wins on duplicates"""
+        from royalties.models import ExternalRecording
+
+        recordings = {}
+        rows = ExternalRecording.objects.filter(isrc__in=isrcs).order_by('id').values_list(
+            'isrc', 'id', 'origin_partner_id'
+        )
+        for isrc, recording_id, partner_id in rows:
+            recordings.setdefault(isrc, (recording_id, partner_id))
+        return recordings
+
+    def attribute_plays(self, plays) -> int:
+        """
+        Create UsageAttributions for plays (dicts of id, station_id, played_at,
+        duration, track__isrc_code) that match a partner recording and are not
+        attributed yet; returns the number created
+        """
+        from royalties.models import UsageAttribution
+
+        play_ids = [play['id'] for play in plays]
+        already_attributed = set(
+            UsageAttribution.objects.filter(play_log_id__in=play_ids).values_list('play_log_id', flat=True)
+        )
+        isrcs = {play['track__isrc_code'] for play in plays if play['track__isrc_code']}
+        recordings = self.recordings_for_isrcs(isrcs) if isrcs else {}
+
+        attributions = []
+        for play in plays:
+            match = recordings.get(play['track__isrc_code'])
+            if match is None or play['id'] in already_attributed:
+                continue
+            recording_id, partner_id = match
+            attributions.append(UsageAttribution(
+                play_log_id=play['id'],
+                external_recording_id=recording_id,
+                origin_partner_id=partner_id,
+                confidence_score=ISRC_CONFIDENCE,
+                match_method='metadata',
+                territory=self.territory,
+                station_id=play['station_id'],
+                played_at=play['played_at'],
+                duration_seconds=int(play['duration'].total_seconds()) if play['duration'] else None,
+            ))
+        UsageAttribution.objects.bulk_create(attributions)
+        return len(attributions)
+
+    @transaction.atomic
+    def process_chunk(self, after_id: Optional[int] = None, ceiling_id: Optional[int] = None) -> Optional[Dict[str, int]]:
+        """
+        Attribute the next chunk of play logs past ``after_id`` (default: the
+        high-water mark) and move the mark up to the chunk's end, but never
+        past ``ceiling_id``
+
+        Returns chunk stats, or None when there are no new play logs.
+        """
+        from music_monitor.models import PlayLog
+        from royalties.models import AttributionCheckpoint
+
+        self.get_checkpoint()
+        checkpoint = AttributionCheckpoint.objects.select_for_update().get(name=ISRC_CHECKPOINT)
+        if after_id is None:
+            after_id = checkpoint.last_play_log_id
+
+        plays = list(
+            PlayLog.objects.filter(id__gt=after_id)
+            .order_by('id')
+            .values(*PLAY_FIELDS)[:self.chunk_size]
+        )
+        if not plays:
+            return None
+
+        created = self.attribute_plays(plays)
+
+        last_id = plays[-1]['id']
+        if ceiling_id is not None:
+            last_id = min(last_id, ceiling_id)
+        checkpoint.last_play_log_id = max(checkpoint.last_play_log_id, last_id)
+        checkpoint.plays_scanned += len(plays)
+        checkpoint.attributions_created += created
+        checkpoint.last_run_at = timezone.now()
+        checkpoint.save()
+
+        return {
+            'plays_scanned': len(plays),
+            'attributions_created': created,
+            'last_play_log_id': plays[-1]['id'],
+        }
+
+    def attribute_isrcs(self, isrcs) -> int:
+        """
+        Attribute plays of tracks with these ISRCs that are already behind the
+        high-water mark, e.g. after partner recordings for them were ingested
+        """
+        from music_monitor.models import PlayLog
+
+        isrcs = [isrc for isrc in isrcs if isrc]
+        if not isrcs:
+            return 0
+
+        created, after_id = 0, 0
+        ceiling_id = self.get_checkpoint().last_play_log_id
+        while True:
+            plays = list(
+                PlayLog.objects.filter(id__gt=after_id, id__lte=ceiling_id, track__isrc_code__in=isrcs)
+                .order_by('id')
+                .values(*PLAY_FIELDS)[:self.chunk_size]
+            )
+            if not plays:
+                break
+            with transaction.atomic():
+                created += self.attribute_plays(plays)
+            after_id = plays[-1]['id']
+        return created
+
+    def rescan_latest(self, limit: int) -> Dict[str, int]:
+        """Attribute the newest ``limit`` play logs, wherever the high-water mark is"""
+        from music_monitor.models import PlayLog
+
+        plays = list(PlayLog.objects.order_by('-id').values(*PLAY_FIELDS)[:limit])
+        with transaction.atomic():
+            created = self.attribute_plays(plays)
+        return {'plays_scanned': len(plays), 'attributions_created': created}
+
+    def run(self, max_chunks: Optional[int] = None) -> Dict[str, int]:
+        """Process chunks until caught up (or max_chunks is reached); each chunk commits on its own"""
+        from music_monitor.models import PlayLog
+
+        summary = {'chunks': 0, 'plays_scanned': 0, 'attributions_created': 0, 'last_play_log_id': None}
+        newest_id = PlayLog.objects.aggregate(newest_id=Max('id'))['newest_id'] or 0
+        ceiling_id = newest_id - self.checkpoint_margin
+        # The run walks to the newest play; only the saved mark stays behind the margin
+        cursor = min(self.get_checkpoint().last_play_log_id, max(ceiling_id, 0))
+
+        while max_chunks is None or summary['chunks'] < max_chunks:
+            result = self.process_chunk(after_id=cursor, ceiling_id=ceiling_id)
+            if result is None:
+                break
+            cursor = result['last_play_log_id']
+            summary['chunks'] += 1
+            summary['plays_scanned'] += result['plays_scanned']
+            summary['attributions_created'] += result['attributions_created']
+            summary['last_play_log_id'] = result['last_play_log_id']
+            if result['plays_scanned'] < self.chunk_size:
+                break
+
+        logger.info(
+            f"ISRC attribution: {summary['attributions_created']} attributions from "
+            f"{summary['plays_scanned']} plays in {summary['chunks']} chunks"
+        )
+        return summary
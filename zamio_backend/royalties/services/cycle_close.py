@@ -0,0 +1,246 @@
+"""
+Set-based royalty cycle close
+
+Aggregates a cycle's usage attributions per (partner, recording) with a
+single GROUP BY query and writes the partner line items with bulk_create.
+Money is summed and split in Decimal throughout. Closing replaces any line
+items a previous close wrote for the cycle, so a close can be re-run.
+
+A cycle has at most one active (Pending/Running) close job. Jobs record a
+heartbeat on every progress update; an active job without one for
+ROYALTY_CYCLE_CLOSE_STALE_SECONDS is treated as abandoned by a dead worker
+and replaced by the next close request, as is any job on a forced restart.
+Aggregation runs one partner at a time with a heartbeat after each, and a
+worker whose job was replaced stops at its next heartbeat and never writes
+line items.
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, IntegerField, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CLOSABLE_STATUSES = ("Open", "Locked")
+ACTIVE_JOB_STATUSES = ("Pending", "Running")
+DEFAULT_STALE_SECONDS = 1800
+DEFAULT_LINE_ITEM_BATCH_SIZE = 1000
+CENT = Decimal('0.01')
+
+
+def cycle_attributions(cycle):
+    """Usage attributions that fall inside a cycle's period and territory"""
+    from royalties.models import UsageAttribution
+
+    return UsageAttribution.objects.filter(
+        territory=cycle.territory,
+        played_at__date__gte=cycle.period_start,
+        played_at__date__lte=cycle.period_end,
+    )
+
+
+class CloseJobSuperseded(Exception):
+    """The close job was replaced while this worker was running it"""
+
+
+def cycle_partner_ids(cycle) -> List[int]:
+    """Partners with usage attributed inside the cycle, in id order"""
+    return list(
+        cycle_attributions(cycle)
+        .order_by('origin_partner_id')
+        .values_list('origin_partner_id', flat=True)
+        .distinct()
+    )
+
+
+def aggregate_cycle_usage(cycle, partner_id=None) -> List[Dict[str, Any]]:
+    """
+    One row per (partner, recording) with usage count, total duration and
+    gross amount (sum of the attributed plays' royalty_amount), optionally
+    for a single partner
+    """
+    attributions = cycle_attributions(cycle)
+    if partner_id is not None:
+        attributions = attributions.filter(origin_partner_id=partner_id)
+    return list(
+        attributions
+        .order_by()
+        .values('origin_partner_id', 'external_recording_id')
+        .annotate(
+            usage_count=Count('id'),
+            total_duration_seconds=Coalesce(
+                Sum('duration_seconds'), Value(0), output_field=IntegerField()
+            ),
+            gross_amount=Coalesce(
+                Sum('play_log__royalty_amount'),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+        .order_by('origin_partner_id', 'external_recording_id')
+    )
+
+
+def build_line_items(cycle, rows):
+    """Turn aggregate rows into unsaved RoyaltyLineItem instances"""
+    from royalties.models import RoyaltyLineItem
+
+    admin_percent = Decimal(str(cycle.admin_fee_percent_default))
+    items = []
+    for row in rows:
+        gross = Decimal(row['gross_amount']).quantize(CENT, rounding=ROUND_HALF_UP)
+        admin_fee = (gross * admin_percent / Decimal('100')).quantize(CENT, rounding=ROUND_HALF_UP)
+        items.append(RoyaltyLineItem(
+            royalty_cycle=cycle,
+            partner_id=row['origin_partner_id'],
+            external_recording_id=row['external_recording_id'],
+            usage_count=row['usage_count'],
+            total_duration_seconds=row['total_duration_seconds'],
+            gross_amount=gross,
+            admin_fee_amount=admin_fee,
+            net_amount=gross - admin_fee,
+            calculation_notes=f"Admin fee {admin_percent}%",
+        ))
+    return items
+
+
+def _update_job(job, **fields):
+    """Persist job progress outside the write transaction so pollers see it"""
+    fields['updated_at'] = timezone.now()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    type(job).objects.filter(pk=job.pk).update(**fields)
+
+
+def _heartbeat(job, **fields):
+    """Record progress only while the job is still Running; raise if it was replaced"""
+    fields['updated_at'] = timezone.now()
+    if not type(job).objects.filter(pk=job.pk, status='Running').update(**fields):
+        raise CloseJobSuperseded(f"Close job {job.id} was replaced while running")
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def is_stale(job) -> bool:
+    """True for an active job whose worker stopped reporting progress"""
+    stale_seconds = getattr(settings, 'ROYALTY_CYCLE_CLOSE_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+    return (
+        job.status in ACTIVE_JOB_STATUSES
+        and job.updated_at < timezone.now() - timedelta(seconds=stale_seconds)
+    )
+
+
+def request_close(cycle, requested_by=None, force=False):
+    """
+    Return ``(job, created)``: the cycle's active close job, or a new one
+
+    The cycle row is locked while the active job is looked up, so concurrent
+    requests agree on a single job. A stale active job, or any active job
+    when ``force`` is set, is marked Failed and replaced.
+    """
+    from royalties.models import RoyaltyCycle, RoyaltyCycleCloseJob
+
+    with transaction.atomic():
+        RoyaltyCycle.objects.select_for_update().filter(pk=cycle.pk).first()
+
+        job = cycle.close_jobs.filter(status__in=ACTIVE_JOB_STATUSES).first()
+        if job is not None and (force or is_stale(job)):
+            reason = "Superseded by a forced restart" if force else (
+                f"Abandoned: no progress since {job.updated_at.isoformat()}"
+            )
+            logger.warning(f"Replacing close job {job.id} for royalty cycle {cycle.id}: {reason}")
+            _update_job(job, status='Failed', error_message=reason, completed_at=timezone.now())
+            job = None
+
+        if job is not None:
+            return job, False
+        return RoyaltyCycleCloseJob.objects.create(royalty_cycle=cycle, requested_by=requested_by), True
+
+
+def close_royalty_cycle(job):
+    """
+    Run a RoyaltyCycleCloseJob: aggregate, replace line items, lock the cycle
+
+    Returns the finished job. Errors mark the job Failed and leave the cycle
+    and its existing line items untouched.
+    """
+    from royalties.models import RoyaltyCycle, RoyaltyLineItem
+
+    batch_size = getattr(settings, 'ROYALTY_LINE_ITEM_BATCH_SIZE', DEFAULT_LINE_ITEM_BATCH_SIZE)
+    cycle = job.royalty_cycle
+
+    # Only a Pending job can start; a replaced job left in the queue is skipped
+    started_at = timezone.now()
+    claimed = type(job).objects.filter(pk=job.pk, status='Pending').update(
+        status='Running', stage='aggregating', progress_percentage=10,
+        started_at=started_at, updated_at=started_at, error_message=None,
+    )
+    if not claimed:
+        job.refresh_from_db()
+        logger.warning(f"Close job {job.id} is {job.status}; not running it")
+        return job
+    job.refresh_from_db()
+
+    try:
+        if cycle.status not in CLOSABLE_STATUSES:
+            raise ValueError(f"Cycle {cycle.id} is {cycle.status} and can no longer be closed")
+
+        rows = []
+        partner_ids = cycle_partner_ids(cycle)
+        for index, partner_id in enumerate(partner_ids, start=1):
+            rows.extend(aggregate_cycle_usage(cycle, partner_id=partner_id))
+            _heartbeat(job, progress_percentage=10 + 50 * index // len(partner_ids))
+        items = build_line_items(cycle, rows)
+
+        _heartbeat(
+            job,
+            stage='writing',
+            progress_percentage=60,
+            attributions_count=sum(row['usage_count'] for row in rows),
+        )
+
+        with transaction.atomic():
+            # The final write belongs to whoever still owns the job
+            if not type(job).objects.select_for_update().filter(pk=job.pk, status='Running').exists():
+                raise CloseJobSuperseded(f"Close job {job.id} was replaced before writing")
+            cycle = RoyaltyCycle.objects.select_for_update().get(pk=cycle.pk)
+            if cycle.status not in CLOSABLE_STATUSES:
+                raise ValueError(f"Cycle {cycle.id} is {cycle.status} and can no longer be closed")
+
+            replaced, _ = cycle.line_items.all().delete()
+            RoyaltyLineItem.objects.bulk_create(items, batch_size=batch_size)
+
+            cycle.status = 'Locked'
+            cycle.save(update_fields=['status'])
+
+        _update_job(
+            job,
+            status='Completed',
+            stage='done',
+            progress_percentage=100,
+            line_items_created=len(items),
+            line_items_replaced=replaced,
+            gross_amount=sum((item.gross_amount for item in items), Decimal('0.00')),
+            net_amount=sum((item.net_amount for item in items), Decimal('0.00')),
+            completed_at=timezone.now(),
+        )
+        logger.info(
+            f"Closed royalty cycle {cycle.id}: {len(items)} line items "
+            f"from {job.attributions_count} attributions"
+        )
+
+    except CloseJobSuperseded as e:
+        logger.warning(f"Stopped closing royalty cycle {cycle.id}: {e}")
+        job.refresh_from_db()
+    except Exception as e:
+        logger.exception(f"Closing royalty cycle {cycle.id} failed: {e}")
+        _update_job(job, status='Failed', error_message=str(e), completed_at=timezone.now())
+
+    return job
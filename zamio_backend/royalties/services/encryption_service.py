@@ -1,124 +1,355 @@
 """
 Encryption service for secure royalty file storage
+
+Files are encrypted in a chunked streaming envelope instead of one Fernet
+token, so encryption and decryption run in constant memory and any byte
+range can be decrypted without touching the rest of the file::
+
+    header  = MAGIC | version | algorithm | key id length | key id
+              | chunk size (u32) | salt (16) | nonce prefix (7)
+    chunk_i = AES-256-GCM(plaintext[i * chunk_size:(i + 1) * chunk_size])
+
+Every chunk carries its own 16-byte tag. The per-file key is derived from
+the master key named in the header and the random salt (HKDF-SHA256), the
+chunk nonce is ``prefix | chunk index (u32) | final-chunk flag``, and the
+header is authenticated as associated data of every chunk - so chunks cannot
+be reordered, swapped between files, or truncated from the end unnoticed.
+
+Files written in the original whole-file Fernet format are still decrypted
+and can be rewritten with ``migrate_legacy_file`` (see the
+``migrate_royalty_encryption`` management command).
 """
 import os
 import hashlib
 import logging
+import struct
+import tempfile
+from functools import lru_cache
+from typing import Iterator, Optional
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from django.conf import settings
 import base64
 
 logger = logging.getLogger(__name__)
 
+MAGIC = b'ZSE1'
+FORMAT_VERSION = 1
+ALGORITHM_AES_256_GCM = 1
+DEFAULT_CHUNK_SIZE = 64 * 1024
+TAG_SIZE = 16
+SALT_SIZE = 16
+NONCE_PREFIX_SIZE = 7
+DEFAULT_KEY_ID = 'default'
+
+
+class EncryptedFileError(Exception):
+    """Raised when an encrypted file is malformed or fails authentication"""
+
+
+@lru_cache(maxsize=16)
+def _derive_master_key(secret: str) -> bytes:
+    # PBKDF2 with 100k iterations is deliberately slow; derive once per secret
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=b'royalty_salt_2024',
+        iterations=100000,
+    )
+    return kdf.derive(secret.encode())
+
+
+class StreamHeader:
+    """Parsed envelope header"""
+
+    _FIXED = struct.Struct('>4sBBB')
+
+    def __init__(self, key_id: str, chunk_size: int, salt: bytes, nonce_prefix: bytes, raw: bytes = b''):
+        self.key_id = key_id
+        self.chunk_size = chunk_size
+        self.salt = salt
+        self.nonce_prefix = nonce_prefix
+        self.raw = raw or self.pack()
+
+    def pack(self) -> bytes:
+        key_id = self.key_id.encode()
+        return (
+            self._FIXED.pack(MAGIC, FORMAT_VERSION, ALGORITHM_AES_256_GCM, len(key_id))
+            + key_id
+            + struct.pack('>I', self.chunk_size)
+            + self.salt
+            + self.nonce_prefix
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.raw)
+
+    @classmethod
+    def read(cls, handle) -> 'StreamHeader':
+        fixed = handle.read(cls._FIXED.size)
+        if len(fixed) < cls._FIXED.size:
+            raise EncryptedFileError('Truncated header')
+        magic, version, algorithm, key_id_length = cls._FIXED.unpack(fixed)
+        if magic != MAGIC:
+            raise EncryptedFileError('Not a stream-encrypted file')
+        if version != FORMAT_VERSION or algorithm != ALGORITHM_AES_256_GCM:
+            raise EncryptedFileError(f"Unsupported format version {version} / algorithm {algorithm}")
+
+        rest_size = key_id_length + 4 + SALT_SIZE + NONCE_PREFIX_SIZE
+        rest = handle.read(rest_size)
+        if len(rest) < rest_size:
+            raise EncryptedFileError('Truncated header')
+        key_id = rest[:key_id_length].decode()
+        (chunk_size,) = struct.unpack('>I', rest[key_id_length:key_id_length + 4])
+        salt = rest[key_id_length + 4:key_id_length + 4 + SALT_SIZE]
+        nonce_prefix = rest[key_id_length + 4 + SALT_SIZE:]
+        if not chunk_size:
+            raise EncryptedFileError('Invalid chunk size')
+        return cls(key_id, chunk_size, salt, nonce_prefix, raw=fixed + rest)
+
 
 class RoyaltyFileEncryption:
     """Service for encrypting and decrypting royalty data files"""
-    
+
     @classmethod
     def _get_encryption_key(cls) -> bytes:
-        """Generate or retrieve encryption key from settings"""
-        # In production, this should come from environment variables or secure key management
+        """Fernet key for files written in the legacy whole-file format"""
         secret_key = getattr(settings, 'ROYALTY_ENCRYPTION_KEY', 'default-royalty-key-change-in-production')
-        
-        # Derive a key from the secret
-        kdf = PBKDF2HMAC(
+        return base64.urlsafe_b64encode(_derive_master_key(secret_key))
+
+    @classmethod
+    def _master_key(cls, key_id: str) -> bytes:
+        """
+        Master key for ``key_id``. ``ROYALTY_ENCRYPTION_KEYS`` maps key ids to
+        secrets so keys can be rotated; ``ROYALTY_ENCRYPTION_KEY`` is the
+        'default' key.
+        """
+        keys = getattr(settings, 'ROYALTY_ENCRYPTION_KEYS', {})
+        if key_id in keys:
+            secret = keys[key_id]
+        elif key_id == DEFAULT_KEY_ID:
+            secret = getattr(settings, 'ROYALTY_ENCRYPTION_KEY', 'default-royalty-key-change-in-production')
+        else:
+            raise EncryptedFileError(f"Unknown encryption key id: {key_id}")
+        return _derive_master_key(secret)
+
+    @classmethod
+    def _file_cipher(cls, header: StreamHeader) -> AESGCM:
+        file_key = HKDF(
             algorithm=hashes.SHA256(),
             length=32,
-            salt=b'royalty_salt_2024',  # In production, use a random salt per file
-            iterations=100000,
+            salt=header.salt,
+            info=b'zamio-royalty-stream-v1',
+        ).derive(cls._master_key(header.key_id))
+        return AESGCM(file_key)
+
+    @staticmethod
+    def _nonce(header: StreamHeader, index: int, final: bool) -> bytes:
+        return header.nonce_prefix + struct.pack('>IB', index, 1 if final else 0)
+
+    @staticmethod
+    def _chunk_count(header: StreamHeader, file_size: int) -> int:
+        body = file_size - header.size
+        if body < TAG_SIZE:
+            raise EncryptedFileError('Truncated file')
+        return -(-body // (header.chunk_size + TAG_SIZE))
+
+    @classmethod
+    def is_stream_encrypted(cls, path: str) -> bool:
+        with open(path, 'rb') as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+
+    @classmethod
+    def encrypt_stream(cls, source, destination, chunk_size: Optional[int] = None, key_id: Optional[str] = None):
+        """Encrypt an open binary ``source`` into ``destination`` chunk by chunk"""
+        header = StreamHeader(
+            key_id=key_id or getattr(settings, 'ROYALTY_ENCRYPTION_KEY_ID', DEFAULT_KEY_ID),
+            chunk_size=chunk_size or getattr(settings, 'ROYALTY_ENCRYPTION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+            salt=os.urandom(SALT_SIZE),
+            nonce_prefix=os.urandom(NONCE_PREFIX_SIZE),
         )
-        key = base64.urlsafe_b64encode(kdf.derive(secret_key.encode()))
-        return key
-    
+        cipher = cls._file_cipher(header)
+        destination.write(header.raw)
+
+        # Read one chunk ahead: only the last chunk gets the final flag
+        index = 0
+        chunk = source.read(header.chunk_size)
+        while True:
+            following = source.read(header.chunk_size) if chunk else b''
+            final = not following
+            destination.write(cipher.encrypt(cls._nonce(header, index, final), chunk, header.raw))
+            if final:
+                break
+            chunk = following
+            index += 1
+
+    @classmethod
+    def iter_decrypted(cls, path: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Yield the plaintext of ``path`` from byte ``start`` up to (not
+        including) ``end``, decrypting only the chunks that overlap the range
+        """
+        with open(path, 'rb') as handle:
+            header = StreamHeader.read(handle)
+            cipher = cls._file_cipher(header)
+            chunk_count = cls._chunk_count(header, os.fstat(handle.fileno()).st_size)
+            stored_chunk = header.chunk_size + TAG_SIZE
+
+            first = start // header.chunk_size
+            handle.seek(header.size + first * stored_chunk)
+            for index in range(first, chunk_count):
+                chunk_start = index * header.chunk_size
+                if end is not None and chunk_start >= end:
+                    break
+                try:
+                    plaintext = cipher.decrypt(
+                        cls._nonce(header, index, index == chunk_count - 1),
+                        handle.read(stored_chunk),
+                        header.raw,
+                    )
+                except Exception:
+                    raise EncryptedFileError(f"Chunk {index} failed authentication")
+                lower = max(start - chunk_start, 0)
+                upper = len(plaintext) if end is None else min(end - chunk_start, len(plaintext))
+                if lower < upper:
+                    yield plaintext[lower:upper]
+
+    @classmethod
+    def decrypt_range(cls, path: str, start: int, length: int) -> bytes:
+        """Plaintext bytes ``[start, start + length)`` of a stream-encrypted file"""
+        return b''.join(cls.iter_decrypted(path, start, start + length))
+
+    @classmethod
+    def plaintext_size(cls, path: str) -> int:
+        with open(path, 'rb') as handle:
+            header = StreamHeader.read(handle)
+            file_size = os.fstat(handle.fileno()).st_size
+        chunk_count = cls._chunk_count(header, file_size)
+        return file_size - header.size - chunk_count * TAG_SIZE
+
     @classmethod
     def encrypt_file(cls, input_path: str, output_path: str) -> bool:
         """
-        Encrypt a file using Fernet encryption
-        
+        Encrypt a file into the chunked streaming format
+
         Args:
             input_path: Path to the file to encrypt
             output_path: Path where encrypted file will be saved
-            
+
         Returns:
             bool: True if encryption successful
         """
         try:
-            key = cls._get_encryption_key()
-            fernet = Fernet(key)
-            
-            with open(input_path, 'rb') as input_file:
-                file_data = input_file.read()
-            
-            encrypted_data = fernet.encrypt(file_data)
-            
-            with open(output_path, 'wb') as output_file:
-                output_file.write(encrypted_data)
-            
+            with open(input_path, 'rb') as input_file, open(output_path, 'wb') as output_file:
+                cls.encrypt_stream(input_file, output_file)
+
             # Set restrictive permissions
             os.chmod(output_path, 0o600)
-            
+
             logger.info(f"Successfully encrypted file: {input_path} -> {output_path}")
             return True
-            
+
         except Exception as e:
             logger.error(f"File encryption failed: {str(e)}")
             return False
-    
+
     @classmethod
     def decrypt_file(cls, input_path: str, output_path: str) -> bool:
         """
-        Decrypt a file using Fernet encryption
-        
+        Decrypt a stream-encrypted (or legacy Fernet) file
+
         Args:
             input_path: Path to the encrypted file
             output_path: Path where decrypted file will be saved
-            
+
         Returns:
             bool: True if decryption successful
         """
         try:
-            key = cls._get_encryption_key()
-            fernet = Fernet(key)
-            
-            with open(input_path, 'rb') as input_file:
-                encrypted_data = input_file.read()
-            
-            decrypted_data = fernet.decrypt(encrypted_data)
-            
             with open(output_path, 'wb') as output_file:
-                output_file.write(decrypted_data)
-            
+                if cls.is_stream_encrypted(input_path):
+                    for chunk in cls.iter_decrypted(input_path):
+                        output_file.write(chunk)
+                else:
+                    output_file.write(cls._decrypt_legacy(input_path))
+
             # Set restrictive permissions
             os.chmod(output_path, 0o600)
-            
+
             logger.info(f"Successfully decrypted file: {input_path} -> {output_path}")
             return True
-            
+
         except Exception as e:
             logger.error(f"File decryption failed: {str(e)}")
+            if os.path.exists(output_path):
+                os.unlink(output_path)
             return False
-    
+
+    @classmethod
+    def _decrypt_legacy(cls, input_path: str) -> bytes:
+        # A Fernet token can only be authenticated as a whole
+        with open(input_path, 'rb') as input_file:
+            return Fernet(cls._get_encryption_key()).decrypt(input_file.read())
+
+    @classmethod
+    def migrate_legacy_file(cls, path: str) -> bool:
+        """
+        Rewrite a Fernet-encrypted file in the streaming format, in place.
+        Returns False when the file is already in the streaming format.
+        """
+        if cls.is_stream_encrypted(path):
+            return False
+
+        directory = os.path.dirname(path) or '.'
+        plaintext_fd, plaintext_path = tempfile.mkstemp(dir=directory, suffix='.migrate_tmp')
+        encrypted_fd, encrypted_path = tempfile.mkstemp(dir=directory, suffix='.migrate_enc')
+        try:
+            with os.fdopen(plaintext_fd, 'wb') as plaintext_file:
+                plaintext_file.write(cls._decrypt_legacy(path))
+            with open(plaintext_path, 'rb') as source, os.fdopen(encrypted_fd, 'wb') as destination:
+                cls.encrypt_stream(source, destination)
+            os.chmod(encrypted_path, 0o600)
+            os.replace(encrypted_path, path)
+            return True
+        finally:
+            for temp_path in (plaintext_path, encrypted_path):
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+
     @classmethod
-    def verify_file_integrity(cls, file_path: str, expected_hash: str) -> bool:
+    def hash_decrypted(cls, path: str) -> str:
+        """SHA-256 of an encrypted file's plaintext, without writing it to disk"""
+        digest = hashlib.sha256()
+        if cls.is_stream_encrypted(path):
+            for chunk in cls.iter_decrypted(path):
+                digest.update(chunk)
+        else:
+            digest.update(cls._decrypt_legacy(path))
+        return digest.hexdigest()
+
+    @classmethod
+    def verify_file_integrity(cls, file_path: str, expected_hash: str, encrypted: bool = False) -> bool:
         """
         Verify file integrity using SHA-256 hash
-        
+
         Args:
             file_path: Path to the file to verify
-            expected_hash: Expected SHA-256 hash
-            
+            expected_hash: Expected SHA-256 hash (of the plaintext)
+            encrypted: Whether ``file_path`` is encrypted
+
         Returns:
             bool: True if integrity check passes
         """
+        from core.services.file_integrity import hash_path
+
         try:
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
-            
-            calculated_hash = hashlib.sha256(file_content).hexdigest()
+            calculated_hash = cls.hash_decrypted(file_path) if encrypted else hash_path(file_path)
             return calculated_hash == expected_hash
-            
+
         except Exception as e:
             logger.error(f"File integrity verification failed: {str(e)}")
-            return False
\ No newline at end of file
+            return False
@@ -2,7 +2,6 @@
 Enhanced file security service for royalty data files
 """
 import os
-import hashlib
 import mimetypes
 import logging
 import tempfile
@@ -17,6 +16,8 @@ from django.conf import settings
 from django.db import transaction
 from celery import shared_task
 from accounts.models import AuditLog
+from core.services.file_integrity import hash_path, hash_stream
+from core.services.threat_scanner import SIGNATURE_GROUPS, get_scanner
 from .encryption_service import RoyaltyFileEncryption
 
 logger = logging.getLogger(__name__)
@@ -51,14 +52,7 @@ class RoyaltyFileSecurityService:
     }
     
     # Dangerous patterns in financial data
-    FINANCIAL_THREAT_PATTERNS = [
-        b'<script', b'javascript:', b'vbscript:', b'eval(',
-        b'exec(', b'system(', b'shell_exec(', b'<?php',
-        b'<%', b'#!/bin/sh', b'#!/bin/bash', b'powershell',
-        b'cmd.exe', b'CreateObject(', b'WScript.Shell',
-        b'UNION SELECT', b'DROP TABLE', b'DELETE FROM',
-        b'INSERT INTO', b'UPDATE SET', b'ALTER TABLE'
-    ]
+    FINANCIAL_THREAT_PATTERNS = SIGNATURE_GROUPS['code_execution'] + SIGNATURE_GROUPS['sql_injection']
     
     @classmethod
     def validate_financial_file(cls, file: UploadedFile, file_category: str = 'auto') -> Dict[str, Any]:
@@ -157,21 +151,16 @@ class RoyaltyFileSecurityService:
         file.seek(0)
         
         try:
-            # Read file content for analysis
-            if file.size > 10 * 1024 * 1024:  # For files larger than 10MB, sample content
-                content = file.read(1024 * 1024)  # Read first 1MB
-                file.seek(-min(1024 * 1024, file.size), 2)  # Read last 1MB
-                content += file.read()
+            scanner = get_scanner('code_execution', 'sql_injection')
+            if file.size > 10 * 1024 * 1024:
+                # For large files, scan only the first 1MB and last 1MB
+                report = scanner.scan_sampled(file, head=1024 * 1024, tail=1024 * 1024, size=file.size)
             else:
-                content = file.read()
-            
-            file.seek(0)
+                report = scanner.scan_stream(file)
             
             # Check for malware patterns
-            content_lower = content.lower()
-            for pattern in cls.FINANCIAL_THREAT_PATTERNS:
-                if pattern in content_lower:
-                    errors.append(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
+            for pattern, _description in report.threats(cls.FINANCIAL_THREAT_PATTERNS):
+                errors.append(f'File contains potentially malicious content: {pattern.decode("utf-8", errors="ignore")}')
             
             # Validate file structure based on type
             file_type = cls._get_file_type_from_content_type(file.content_type)
@@ -300,11 +289,7 @@ class RoyaltyFileSecurityService:
     @classmethod
     def calculate_file_hash(cls, file: UploadedFile) -> str:
         """Calculate SHA-256 hash of file content"""
-        file.seek(0)
-        file_content = file.read()
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        file.seek(0)
-        return file_hash
+        return hash_stream(file)
     
     @classmethod
     def scan_financial_file_for_malware(cls, file_path: str) -> Dict[str, Any]:
@@ -337,38 +322,15 @@ class RoyaltyFileSecurityService:
             with open(file_path, 'rb') as f:
                 # Read content for analysis
                 content = f.read(min(1024 * 1024, file_size))  # Read up to 1MB
-                content_lower = content.lower()
-                
-                # Enhanced financial threat detection
-                financial_threats = [
-                    (b'<script', 'HTML script injection'),
-                    (b'javascript:', 'JavaScript protocol'),
-                    (b'eval(', 'Code evaluation function'),
-                    (b'exec(', 'Code execution function'),
-                    (b'system(', 'System command execution'),
-                    (b'shell_exec(', 'Shell execution'),
-                    (b'<?php', 'PHP code injection'),
-                    (b'<%', 'Server-side script'),
-                    (b'#!/bin/', 'Shell script'),
-                    (b'powershell', 'PowerShell command'),
-                    (b'cmd.exe', 'Command prompt'),
-                    (b'union select', 'SQL injection attempt'),
-                    (b'drop table', 'SQL drop command'),
-                    (b'delete from', 'SQL delete command'),
-                    (b'insert into', 'SQL insert command'),
-                    (b'update set', 'SQL update command'),
-                    (b'alter table', 'SQL alter command'),
-                    (b'create table', 'SQL create command'),
-                    (b'grant all', 'SQL privilege escalation'),
-                    (b'revoke all', 'SQL privilege modification'),
-                ]
                 
-                scan_result['scan_details']['signatures_checked'] = len(financial_threats)
+                # Enhanced financial threat detection, all signatures in one pass
+                scanner = get_scanner('code_execution', 'sql_injection')
+                report = scanner.scan_bytes(content)
+                scan_result['scan_details']['signatures_checked'] = len(scanner.signatures)
                 
-                for pattern, description in financial_threats:
-                    if pattern in content_lower:
-                        scan_result['is_safe'] = False
-                        scan_result['threats_found'].append(f'{description}: {pattern.decode("utf-8", errors="ignore")}')
+                for pattern, description in report.threats(cls.FINANCIAL_THREAT_PATTERNS):
+                    scan_result['is_safe'] = False
+                    scan_result['threats_found'].append(f'{description}: {pattern.decode("utf-8", errors="ignore")}')
                 
                 # Check for executable signatures
                 if content.startswith(b'MZ') or content.startswith(b'\x7fELF'):
@@ -619,9 +581,7 @@ class RoyaltyFileSecurityService:
                 processing_path = stored_path
             
             # Verify file hash
-            with open(processing_path, 'rb') as f:
-                content = f.read()
-                calculated_hash = hashlib.sha256(content).hexdigest()
+            calculated_hash = hash_path(processing_path)
             
             if calculated_hash != processing_record['file_hash']:
                 raise ValidationError('File integrity check failed - hash mismatch')
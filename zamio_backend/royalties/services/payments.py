@@ -7,7 +7,8 @@ from django.db import transaction
 from django.utils import timezone
 
 from bank_account.models import PlatformAccount, StationAccount
-from royalties.models import RoyaltyRate, RoyaltyWithdrawal
+from royalties.models import RoyaltyWithdrawal
+from royalties.services.rate_card import get_rate_card
 
 
 class RoyaltyPaymentService:
@@ -18,30 +19,12 @@ class RoyaltyPaymentService:
     @staticmethod
     def get_royalty_rate_for_play(play_log):
         """
-        Get the applicable royalty rate for a play log
-        """
-        # Try to get specific rate for the track/artist
-        if play_log.track:
-            # Check for artist-specific rate
-            if play_log.track.artist:
-                rate = RoyaltyRate.objects.filter(
-                    artist=play_log.track.artist,
-                    is_active=True
-                ).first()
-                if rate:
-                    return rate.rate_per_play
-        
-        # Fall back to default rate
-        default_rate = RoyaltyRate.objects.filter(
-            artist__isnull=True,
-            is_active=True
-        ).first()
-        
-        if default_rate:
-            return default_rate.rate_per_play
-        
-        # Ultimate fallback
-        return Decimal('2.00')  # GHS 2.00 per play
+        Get the applicable royalty rate for a play log from the shared rate card
+        """
+        duration_seconds = play_log.duration.total_seconds() if play_log.duration else None
+        return get_rate_card().price_play(
+            play_log.station, play_log.played_at, duration_seconds
+        ).amount
     
     @staticmethod
     def calculate_royalty_amount(play_log, rate_per_play=None):
@@ -51,8 +34,6 @@ class RoyaltyPaymentService:
         if rate_per_play is None:
             rate_per_play = RoyaltyPaymentService.get_royalty_rate_for_play(play_log)
         
-        # For now, simple calculation: rate per play
-        # Future: Could factor in duration, time of day, etc.
         return Decimal(str(rate_per_play))
     
     @staticmethod
@@ -0,0 +1,270 @@
+"""
+In-memory rate card for per-play royalty pricing
+
+Loads active royalty rate structures, station classes and time-of-day
+multipliers once into an immutable in-process structure, so pricing a play
+costs no database queries. Every pricing path (royalty calculator, match
+cache conversion, station charging) prices plays through the same card.
+
+The card is versioned: saving a rate structure or changing a station's class
+bumps a shared version in the cache (see royalties.signals), and each process
+reloads its card when it notices the version changed.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RATE_CARD_VERSION_KEY = 'zamio:royalty:rate_card_version'
+DEFAULT_STATION_CLASS = 'class_c'
+DEFAULT_DURATION_SECONDS = Decimal('180')  # 3 minutes default
+DEFAULT_VERSION_CHECK_SECONDS = 30
+
+
+def get_time_of_day_period(played_at: datetime) -> str:
+    """Determine time of day period for rate calculation"""
+    hour = played_at.hour
+
+    # Prime time: 6 AM - 10 AM, 4 PM - 8 PM
+    if (6 <= hour < 10) or (16 <= hour < 20):
+        return 'prime_time'
+    # Off-peak: 12 AM - 6 AM
+    elif 0 <= hour < 6:
+        return 'off_peak'
+    # Regular time: everything else
+    else:
+        return 'regular_time'
+
+
+@dataclass(frozen=True)
+class RateEntry:
+    """A single effective-dated rate for a (station class, time period) pair"""
+    base_rate_per_second: Decimal
+    multiplier: Decimal
+    effective_date: date = date.min
+    expiry_date: Optional[date] = None
+    currency: str = 'GHS'
+
+
+@dataclass(frozen=True)
+class PlayPrice:
+    """Price of a single play as resolved by the rate card"""
+    amount: Decimal
+    station_class: str
+    time_period: str
+    base_rate_per_second: Decimal
+    time_multiplier: Decimal
+    duration_seconds: Decimal
+    currency: str
+    rate_card_version: int
+
+    def as_metadata(self) -> Dict[str, Any]:
+        return {
+            'station_class': self.station_class,
+            'time_period': self.time_period,
+            'base_rate_per_second': str(self.base_rate_per_second),
+            'time_multiplier': str(self.time_multiplier),
+            'duration_seconds': str(self.duration_seconds),
+            'rate_card_version': self.rate_card_version,
+        }
+
+
+def _key(value: Union[str, Enum]) -> str:
+    return value.value if isinstance(value, Enum) else str(value)
+
+
+class RateCard:
+    """
+    Immutable pricing table keyed by (station class, time period).
+    Configured rates are effective-dated; anything not configured falls back
+    to the calculator defaults.
+    """
+
+    def __init__(
+        self,
+        default_rates: Mapping[Tuple[str, str], RateEntry],
+        rates: Optional[Mapping[Tuple[str, str], Iterable[RateEntry]]] = None,
+        station_classes: Optional[Mapping[int, str]] = None,
+        version: int = 0,
+    ):
+        ordered = {
+            key: tuple(sorted(entries, key=lambda entry: entry.effective_date))
+            for key, entries in (rates or {}).items()
+        }
+        self._rates = MappingProxyType(ordered)
+        self._effective_dates = MappingProxyType({
+            key: tuple(entry.effective_date for entry in entries)
+            for key, entries in ordered.items()
+        })
+        self._default_rates = MappingProxyType(dict(default_rates))
+        self._station_classes = MappingProxyType(dict(station_classes or {}))
+        self.version = version
+
+    @staticmethod
+    def _entries_from_config(rate_config: Mapping) -> Dict[Tuple[str, str], RateEntry]:
+        """Flatten the calculator's nested rate config into rate entries"""
+        entries = {}
+        for station_class, config in rate_config.items():
+            for time_period, multiplier in config['multipliers'].items():
+                entries[(_key(station_class), _key(time_period))] = RateEntry(
+                    base_rate_per_second=config['base_rate_per_second'],
+                    multiplier=multiplier,
+                )
+        return entries
+
+    @classmethod
+    def from_rate_config(cls, rate_config: Mapping, version: int = 0) -> 'RateCard':
+        """Build a card from a calculator-style rate config, without touching the database"""
+        return cls(default_rates=cls._entries_from_config(rate_config), version=version)
+
+    @classmethod
+    def load(cls, version: int = 0, territory: Optional[str] = None) -> 'RateCard':
+        """Load all active rates and station classes from the database"""
+        from royalties.calculator import RoyaltyCalculator
+        from royalties.models import RoyaltyRateStructure
+        from stations.models import Station
+
+        territory = territory or getattr(settings, 'ROYALTY_RATE_TERRITORY', 'GH')
+
+        rates: Dict[Tuple[str, str], list] = {}
+        structures = RoyaltyRateStructure.objects.filter(
+            is_active=True,
+            territory=territory
+        ).values_list(
+            'station_class', 'time_period', 'base_rate_per_second', 'multiplier',
+            'effective_date', 'expiry_date', 'currency'
+        )
+        for station_class, time_period, base_rate, multiplier, effective, expiry, currency in structures:
+            rates.setdefault((station_class, time_period), []).append(RateEntry(
+                base_rate_per_second=base_rate,
+                multiplier=multiplier,
+                effective_date=effective,
+                expiry_date=expiry,
+                currency=currency,
+            ))
+
+        station_classes = dict(Station.objects.values_list('id', 'station_class'))
+
+        logger.info(
+            f"Loaded rate card v{version}: {sum(len(e) for e in rates.values())} rates, "
+            f"{len(station_classes)} stations"
+        )
+
+        return cls(
+            default_rates=cls._entries_from_config(RoyaltyCalculator.DEFAULT_RATES),
+            rates=rates,
+            station_classes=station_classes,
+            version=version,
+        )
+
+    def station_class_for(self, station) -> str:
+        """Resolve a station's class from a Station instance or station id"""
+        if station is None:
+            return DEFAULT_STATION_CLASS
+        if isinstance(station, int):
+            return self._station_classes.get(station, DEFAULT_STATION_CLASS)
+        return getattr(station, 'station_class', None) or self._station_classes.get(
+            station.pk, DEFAULT_STATION_CLASS
+        )
+
+    def rate_for(self, station_class: str, time_period: str, on_date: Optional[date] = None) -> RateEntry:
+        """Return the rate in effect for a station class and time period on a date"""
+        key = (_key(station_class), _key(time_period))
+        entries = self._rates.get(key)
+
+        if entries:
+            on_date = on_date or timezone.now().date()
+            index = bisect.bisect_right(self._effective_dates[key], on_date) - 1
+            if index >= 0:
+                entry = entries[index]
+                if entry.expiry_date is None or on_date <= entry.expiry_date:
+                    return entry
+
+        if key in self._default_rates:
+            return self._default_rates[key]
+        return self._default_rates[(DEFAULT_STATION_CLASS, key[1])]
+
+    def price_play(self, station, played_at: Optional[datetime], duration_seconds=None) -> PlayPrice:
+        """Price a single play; no database access"""
+        played_at = played_at or timezone.now()
+        station_class = self.station_class_for(station)
+        time_period = get_time_of_day_period(played_at)
+        rate = self.rate_for(station_class, time_period, played_at.date())
+
+        if duration_seconds is None:
+            duration_seconds = DEFAULT_DURATION_SECONDS
+        duration_seconds = Decimal(str(duration_seconds))
+
+        amount = rate.base_rate_per_second * duration_seconds * rate.multiplier
+        amount = amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+        return PlayPrice(
+            amount=amount,
+            station_class=station_class,
+            time_period=time_period,
+            base_rate_per_second=rate.base_rate_per_second,
+            time_multiplier=rate.multiplier,
+            duration_seconds=duration_seconds,
+            currency=rate.currency,
+            rate_card_version=self.version,
+        )
+
+
+_rate_card: Optional[RateCard] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_rate_card() -> RateCard:
+    """
+    Return the process-wide rate card, reloading it when the shared version
+    changed. The shared version is consulted at most every
+    ROYALTY_RATE_CARD_CHECK_SECONDS, so hot pricing loops stay in memory.
+    """
+    global _rate_card, _checked_at
+
+    interval = getattr(settings, 'ROYALTY_RATE_CARD_CHECK_SECONDS', DEFAULT_VERSION_CHECK_SECONDS)
+    now = time.monotonic()
+    card = _rate_card
+    if card is not None and now - _checked_at < interval:
+        return card
+
+    version = cache.get(RATE_CARD_VERSION_KEY, 0)
+    with _lock:
+        if _rate_card is None or _rate_card.version != version:
+            _rate_card = RateCard.load(version=version)
+        _checked_at = now
+        return _rate_card
+
+
+def peek_rate_card() -> Optional[RateCard]:
+    """Return the currently loaded card without loading one"""
+    return _rate_card
+
+
+def invalidate_rate_card() -> None:
+    """Drop the local card and bump the shared version so other processes reload"""
+    global _rate_card
+
+    try:
+        cache.incr(RATE_CARD_VERSION_KEY)
+    except ValueError:
+        cache.add(RATE_CARD_VERSION_KEY, 1, None)
+    except Exception as e:
+        logger.warning(f"Could not bump rate card version: {e}")
+
+    with _lock:
+        _rate_card = None
@@ -0,0 +1,251 @@
+"""
+Streaming partner repertoire ingestion
+
+Reads a partner CSV row by row (never the whole file), de-duplicates works
+in memory and upserts recordings in batches keyed on (partner, ISRC) with
+bulk_create(update_conflicts=True). Row errors are buffered and written as
+a single summary AuditLog. When run for an UploadProcessingStatus record,
+progress and an ETA are published through it after every batch. Plays
+of newly added ISRCs are attributed to the new recordings batch by batch.
+"""
+
+import csv
+import io
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from royalties.services.attribution import IsrcAttributionEngine
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ('isrc', 'title')
+DEFAULT_BATCH_SIZE = 2000
+MAX_BUFFERED_ERRORS = 100
+
+
+class RepertoireIngestError(Exception):
+    """Raised when a repertoire file cannot be ingested at all"""
+
+
+def missing_columns(fieldnames) -> List[str]:
+    return [column for column in REQUIRED_COLUMNS if column not in (fieldnames or [])]
+
+
+def parse_row(row) -> Dict[str, Any]:
+    """Normalise one CSV row; raises ValueError for rows that cannot be keyed"""
+    isrc = (row.get('isrc') or '').strip()
+    title = (row.get('title') or '').strip()
+    work_title = (row.get('work_title') or '').strip() or None
+    duration = (row.get('duration_seconds') or '').strip()
+
+    if not isrc:
+        raise ValueError('Missing ISRC')
+    if len(isrc) > 20:
+        raise ValueError(f'ISRC too long: {isrc[:40]}')
+
+    return {
+        'isrc': isrc,
+        'title': (title or work_title or 'Unknown')[:500],
+        'work_title': work_title[:500] if work_title else None,
+        'duration': int(duration) if duration.isdigit() else None,
+    }
+
+
+class RepertoireIngest:
+    """One streaming ingest of a partner's repertoire CSV"""
+
+    def __init__(self, partner, dry_run: bool = False, batch_size: Optional[int] = None,
+                 upload_status=None):
+        self.partner = partner
+        self.dry_run = dry_run
+        self.batch_size = batch_size or getattr(settings, 'REPERTOIRE_INGEST_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        self.upload_status = upload_status
+
+        self.work_ids: Dict[str, int] = {}
+        self.rows_read = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.attributions_created = 0
+        self.attribution_engine = IsrcAttributionEngine()
+
+    def _record_error(self, row_number, message):
+        self.skipped += 1
+        self.error_count += 1
+        if len(self.errors) < MAX_BUFFERED_ERRORS:
+            self.errors.append({'row_number': row_number, 'error': message})
+
+    def _resolve_works(self, titles):
+        """Map work titles to ids, creating only works this partner does not have yet"""
+        from royalties.models import ExternalWork
+
+        missing = {title for title in titles if title not in self.work_ids}
+        if not missing:
+            return
+
+        existing = ExternalWork.objects.filter(
+            origin_partner=self.partner, title__in=missing
+        ).order_by('id').values_list('title', 'id')
+        for title, work_id in existing:
+            self.work_ids.setdefault(title, work_id)
+
+        new_works = [
+            ExternalWork(origin_partner=self.partner, title=title, iswc=None)
+            for title in sorted(missing) if title not in self.work_ids
+        ]
+        for work in ExternalWork.objects.bulk_create(new_works):
+            self.work_ids[work.title] = work.id
+
+    def _flush(self, batch: Dict[str, Dict[str, Any]]):
+        from royalties.models import ExternalRecording
+
+        if not batch or self.dry_run:
+            return
+
+        with transaction.atomic():
+            self._resolve_works({row['work_title'] for row in batch.values() if row['work_title']})
+
+            existing = set(
+                ExternalRecording.objects.filter(
+                    origin_partner=self.partner, isrc__in=list(batch)
+                ).values_list('isrc', flat=True)
+            )
+            ExternalRecording.objects.bulk_create(
+                [
+                    ExternalRecording(
+                        origin_partner=self.partner,
+                        isrc=isrc,
+                        title=row['title'],
+                        work_id=self.work_ids.get(row['work_title']),
+                        duration=row['duration'],
+                    )
+                    for isrc, row in batch.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['origin_partner', 'isrc'],
+                update_fields=['title', 'work', 'duration'],
+            )
+
+        self.updated += len(existing)
+        self.created += len(batch) - len(existing)
+
+        # Plays already past the attribution high-water mark never see new recordings otherwise
+        new_isrcs = [isrc for isrc in batch if isrc not in existing]
+        self.attributions_created += self.attribution_engine.attribute_isrcs(new_isrcs)
+
+    def _publish_progress(self, bytes_read, total_bytes, started):
+        if self.upload_status is None or not total_bytes:
+            return
+
+        fraction = min(1.0, bytes_read / total_bytes)
+        elapsed = time.monotonic() - started
+        eta_seconds = int(elapsed * (1 - fraction) / fraction) if fraction > 0 else None
+
+        self.upload_status.metadata.update(self.summary(), eta_seconds=eta_seconds)
+        self.upload_status.progress_percentage = min(99, int(fraction * 100))
+        self.upload_status.current_step = f'Imported {self.rows_read} rows'
+        self.upload_status.save(update_fields=['metadata', 'progress_percentage', 'current_step', 'updated_at'])
+
+    def run(self, path: str) -> Dict[str, Any]:
+        """Stream the CSV at path and upsert its recordings"""
+        total_bytes = os.path.getsize(path)
+        started = time.monotonic()
+
+        with open(path, 'rb') as raw:
+            reader = csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8', errors='ignore', newline=''))
+            missing = missing_columns(reader.fieldnames)
+            if missing:
+                raise RepertoireIngestError(f"Missing required columns: {', '.join(missing)}")
+
+            # Keyed by ISRC so a repeated ISRC in one batch upserts once (last row wins)
+            batch: Dict[str, Dict[str, Any]] = {}
+            for row_number, row in enumerate(reader, 1):
+                self.rows_read += 1
+                try:
+                    parsed = parse_row(row)
+                except ValueError as e:
+                    self._record_error(row_number, str(e))
+                    continue
+
+                batch[parsed['isrc']] = parsed
+
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = {}
+                    self._publish_progress(raw.tell(), total_bytes, started)
+
+            self._flush(batch)
+
+        logger.info(
+            f"Repertoire ingest for partner {self.partner.id}: created={self.created}, "
+            f"updated={self.updated}, skipped={self.skipped}, dry_run={self.dry_run}"
+        )
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'rows_read': self.rows_read,
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'attributions_created': self.attributions_created,
+            'dry_run': self.dry_run,
+        }
+
+
+def run_repertoire_ingest(upload_status):
+    """
+    Run a queued repertoire ingest described by an UploadProcessingStatus record
+
+    The record's metadata carries partner_id, csv_path, dry_run and whether
+    the staged file should be removed afterwards.
+    """
+    from accounts.models import AuditLog
+    from royalties.models import PartnerPRO
+
+    metadata = upload_status.metadata
+    path = metadata['csv_path']
+    upload_status.mark_started()
+
+    try:
+        partner = PartnerPRO.objects.get(id=metadata['partner_id'])
+        ingest = RepertoireIngest(partner, dry_run=metadata.get('dry_run', False), upload_status=upload_status)
+        summary = ingest.run(path)
+    except (PartnerPRO.DoesNotExist, RepertoireIngestError, OSError) as e:
+        upload_status.mark_failed(str(e))
+        return None
+    except Exception as e:
+        logger.exception(f"Repertoire ingest {upload_status.upload_id} failed: {e}")
+        upload_status.mark_failed(f"Unexpected error: {e}")
+        return None
+    finally:
+        if metadata.get('delete_after') and os.path.exists(path):
+            os.remove(path)
+
+    # One summary record per ingest instead of one audit row per bad line
+    AuditLog.objects.create(
+        user=upload_status.user,
+        action='repertoire_upload_completed',
+        resource_type='RepertoireUpload',
+        resource_id=upload_status.upload_id,
+        request_data={
+            'partner_id': partner.id,
+            'filename': upload_status.original_filename,
+            **summary,
+            'errors': ingest.errors,
+        }
+    )
+
+    upload_status.metadata.update(summary, eta_seconds=0, errors=ingest.errors)
+    upload_status.current_step = f'Imported {summary["rows_read"]} rows'
+    upload_status.save(update_fields=['metadata', 'current_step', 'updated_at'])
+    upload_status.mark_completed()
+    return summary
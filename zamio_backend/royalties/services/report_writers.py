@@ -0,0 +1,392 @@
+"""
+Streaming PRO report writers
+
+Reports are written row by row to disk (optionally gzip-compressed) while a
+SHA-256 of the bytes on disk is computed as they are written, so a report
+for any number of plays uses constant memory and needs no second read for
+its checksum. Per-play usage rows come from a server-side cursor over
+UsageAttribution joined to PlayLog.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Callable, Dict, Iterator, Optional
+from xml.sax.saxutils import XMLGenerator
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDNAMES = [
+    'report_period_start',
+    'report_period_end',
+    'station_id',
+    'station_name',
+    'played_at_utc',
+    'isrc',
+    'iswc',
+    'work_title',
+    'recording_title',
+    'artist_name',
+    'duration_seconds',
+    'confidence_score',
+    'detection_source',
+    'pro_affiliation',
+    'gross_amount',
+    'admin_fee_amount',
+    'net_amount',
+    'currency',
+    'territory',
+    'usage_type'
+]
+DDEX_NAMESPACE = "http://ddex.net/xml/dsr/20120404"
+DEFAULT_CURSOR_CHUNK_SIZE = 2000
+PROGRESS_EVERY = 1000
+CENT = Decimal('0.01')
+
+FILE_EXTENSIONS = {
+    'CSV': 'csv',
+    'CWR': 'cwr',
+    'DDEX-DSR': 'xml',
+    'JSON': 'json',
+}
+
+
+@dataclass
+class ReportFile:
+    """A written report and its integrity data"""
+    path: str
+    checksum: str
+    row_count: int
+    byte_count: int
+    compressed: bool
+
+
+class HashingWriter(io.RawIOBase):
+    """Binary sink that hashes every byte on its way to the underlying file"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.byte_count = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.byte_count += len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+
+@contextmanager
+def open_report(path: str, compress: bool = False):
+    """
+    Open a text stream for a report; yields (stream, hasher). The checksum
+    covers the bytes as stored, i.e. the gzip stream when compressed.
+    """
+    with open(path, 'wb') as raw:
+        hasher = HashingWriter(raw)
+        binary = gzip.GzipFile(fileobj=hasher, mode='wb') if compress else hasher
+        stream = io.TextIOWrapper(binary, encoding='utf-8', newline='', write_through=False)
+        try:
+            yield stream, hasher
+        finally:
+            stream.flush()
+            stream.detach()
+            if compress:
+                binary.close()
+
+
+class UsageRows:
+    """
+    Per-play usage rows for a partner and period, streamed from the database
+
+    len() costs one COUNT query; iterating uses a server-side cursor, so the
+    rows are never held in memory together.
+    """
+
+    FIELDS = (
+        'id',
+        'duration_seconds',
+        'confidence_score',
+        'match_method',
+        'play_log__station_id',
+        'play_log__station__name',
+        'play_log__played_at',
+        'play_log__royalty_amount',
+        'external_recording__isrc',
+        'external_recording__title',
+        'external_work__iswc',
+        'external_work__title',
+        'external_recording__work__iswc',
+        'external_recording__work__title',
+    )
+
+    def __init__(self, partner, period_start, period_end, territory: Optional[str] = None,
+                 admin_fee_percent: Optional[Decimal] = None, chunk_size: Optional[int] = None):
+        self.partner = partner
+        self.period_start = period_start
+        self.period_end = period_end
+        self.territory = territory
+        if admin_fee_percent is None:
+            admin_fee_percent = partner.default_admin_fee_percent
+        self.admin_fee_percent = Decimal(str(admin_fee_percent))
+        self.chunk_size = chunk_size or getattr(settings, 'PRO_REPORT_CURSOR_CHUNK_SIZE', DEFAULT_CURSOR_CHUNK_SIZE)
+        self._count = None
+
+    def queryset(self):
+        from royalties.models import UsageAttribution
+
+        qs = UsageAttribution.objects.filter(
+            origin_partner=self.partner,
+            played_at__date__gte=self.period_start,
+            played_at__date__lte=self.period_end,
+        )
+        if self.territory:
+            qs = qs.filter(territory=self.territory)
+        return qs
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self.queryset().count()
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        rows = self.queryset().order_by('id').values(*self.FIELDS).iterator(chunk_size=self.chunk_size)
+        for row in rows:
+            gross = row['play_log__royalty_amount'] or Decimal('0.00')
+            admin_fee = (gross * self.admin_fee_percent / Decimal('100')).quantize(CENT, rounding=ROUND_HALF_UP)
+            played_at = row['play_log__played_at']
+            yield {
+                'station_id': row['play_log__station_id'],
+                'station_name': row['play_log__station__name'],
+                'played_at_utc': played_at.isoformat() if played_at else None,
+                'isrc': row['external_recording__isrc'],
+                'iswc': row['external_work__iswc'] or row['external_recording__work__iswc'],
+                'work_title': row['external_work__title'] or row['external_recording__work__title'],
+                'recording_title': row['external_recording__title'],
+                'artist_name': None,  # Not carried on partner recordings
+                'duration_seconds': row['duration_seconds'],
+                'confidence_score': str(row['confidence_score']),
+                'detection_source': row['match_method'],
+                'pro_affiliation': self.partner.pro_code,
+                'gross_amount': str(gross),
+                'admin_fee_amount': str(admin_fee),
+                'net_amount': str(gross - admin_fee),
+            }
+
+
+def _rows(report_data, progress: Optional[Callable[[int], None]]):
+    """Iterate usage rows, reporting progress every PROGRESS_EVERY rows"""
+    count = 0
+    for usage in report_data.usage_data:
+        yield usage
+        count += 1
+        if progress and count % PROGRESS_EVERY == 0:
+            progress(count)
+
+
+def write_csv(stream, report_data, progress=None) -> int:
+    writer = csv.DictWriter(stream, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
+    writer.writeheader()
+
+    period = {
+        'report_period_start': report_data.report_period_start.isoformat(),
+        'report_period_end': report_data.report_period_end.isoformat(),
+        'currency': report_data.currency,
+        'territory': 'GH',
+        'usage_type': 'broadcast',
+    }
+    count = 0
+    for usage in _rows(report_data, progress):
+        writer.writerow({**usage, **period})
+        count += 1
+    return count
+
+
+def write_cwr(stream, report_data, progress=None) -> int:
+    """CWR (Common Works Registration) flat file"""
+    stream.write(f"HDR01GHAMRO{datetime.now().strftime('%Y%m%d%H%M%S')}01.00CWR\n")
+    stream.write(f"GRH01{report_data.partner_pro.pro_code}0001\n")
+
+    seq_num = 1
+    count = 0
+    for usage in _rows(report_data, progress):
+        # Work Registration Transaction
+        if usage.get('iswc'):
+            stream.write(f"WRK{seq_num:08d}00000000{(usage.get('work_title') or '')[:60]:<60}\n")
+            seq_num += 1
+
+        # Performance Data
+        played_on = (usage.get('played_at_utc') or '')[:10].replace('-', '')
+        gross_cents = int((Decimal(usage.get('gross_amount') or 0) * 100).to_integral_value())
+        stream.write(
+            f"PER{seq_num:08d}"
+            f"{played_on:<8}"
+            f"{str(usage.get('station_id') or '')[:14]:<14}"
+            f"{(usage.get('recording_title') or '')[:60]:<60}"
+            f"{usage.get('duration_seconds') or 0:06d}"
+            f"{gross_cents:012d}\n"
+        )
+        seq_num += 1
+        count += 1
+
+    stream.write(f"GRT01{seq_num-1:08d}0001\n")
+    stream.write(f"TRL01{seq_num:08d}0001\n")
+    return count
+
+
+def _element(xml, name, text=None):
+    xml.startElement(name, {})
+    if text is not None:
+        xml.characters(str(text))
+    xml.endElement(name)
+
+
+def write_ddex_dsr(stream, report_data, progress=None) -> int:
+    """DDEX DSR (Digital Sales Report) XML, emitted element by element"""
+    partner = report_data.partner_pro
+    cycle_name = report_data.royalty_cycle.name if report_data.royalty_cycle else report_data.report_period_start.isoformat()
+
+    xml = XMLGenerator(stream, encoding='utf-8', short_empty_elements=True)
+    xml.startDocument()
+    xml.startElement('DigitalSalesReport', {
+        'xmlns': DDEX_NAMESPACE,
+        'MessageSchemaVersionId': 'dsr/20120404',
+    })
+
+    xml.startElement('MessageHeader', {})
+    _element(xml, 'MessageThreadId', f"GHAMRO_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    _element(xml, 'MessageId', f"DSR_{cycle_name}")
+    _element(xml, 'MessageCreatedDateTime', datetime.now().isoformat())
+    xml.startElement('MessageSender', {})
+    _element(xml, 'PartyId', 'GHAMRO')
+    _element(xml, 'PartyName', 'Ghana Music Rights Organization')
+    xml.endElement('MessageSender')
+    xml.startElement('MessageRecipient', {})
+    _element(xml, 'PartyId', partner.pro_code)
+    _element(xml, 'PartyName', partner.display_name or '')
+    xml.endElement('MessageRecipient')
+    xml.endElement('MessageHeader')
+
+    xml.startElement('ReportDetails', {})
+    _element(xml, 'ReportId', f"RPT_{cycle_name}")
+    _element(xml, 'ReportType', 'UsageReport')
+    _element(xml, 'ReportPeriodStartDate', report_data.report_period_start.isoformat())
+    _element(xml, 'ReportPeriodEndDate', report_data.report_period_end.isoformat())
+    xml.endElement('ReportDetails')
+
+    count = 0
+    for usage in _rows(report_data, progress):
+        xml.startElement('UsageRecord', {})
+        _element(xml, 'ISRC', usage.get('isrc') or '')
+        _element(xml, 'RecordingTitle', usage.get('recording_title') or '')
+        _element(xml, 'ArtistName', usage.get('artist_name') or '')
+        _element(xml, 'UsageDateTime', usage.get('played_at_utc') or '')
+        _element(xml, 'Duration', usage.get('duration_seconds') or 0)
+        _element(xml, 'Territory', 'GH')
+        _element(xml, 'UsageType', 'Broadcast')
+        xml.startElement('RoyaltyInformation', {})
+        _element(xml, 'GrossAmount', usage.get('gross_amount', 0))
+        _element(xml, 'NetAmount', usage.get('net_amount', 0))
+        _element(xml, 'Currency', report_data.currency)
+        xml.endElement('RoyaltyInformation')
+        xml.endElement('UsageRecord')
+        count += 1
+
+    xml.endElement('DigitalSalesReport')
+    xml.endDocument()
+    return count
+
+
+def write_json(stream, report_data, progress=None) -> int:
+    """JSON report; usage rows are streamed inside the usage_data array"""
+    partner = report_data.partner_pro
+    cycle_name = report_data.royalty_cycle.name if report_data.royalty_cycle else report_data.report_period_start.isoformat()
+    metadata = {
+        "report_id": f"RPT_{cycle_name}",
+        "partner_pro": partner.pro_code,
+        "partner_name": partner.display_name,
+        "reporting_organization": "GHAMRO",
+        "report_period": {
+            "start_date": report_data.report_period_start.isoformat(),
+            "end_date": report_data.report_period_end.isoformat()
+        },
+        "generated_at": datetime.now().isoformat(),
+        "currency": report_data.currency,
+        "territory": "GH",
+        "total_amount": str(report_data.total_amount),
+        "usage_count": len(report_data.usage_data),
+    }
+
+    stream.write('{"report_metadata": ')
+    stream.write(json.dumps(metadata, ensure_ascii=False))
+    stream.write(', "usage_data": [')
+
+    total_gross = Decimal('0')
+    total_net = Decimal('0')
+    works, recordings = set(), set()
+    count = 0
+    for usage in _rows(report_data, progress):
+        if count:
+            stream.write(',')
+        stream.write('\n')
+        stream.write(json.dumps(usage, ensure_ascii=False, default=str))
+        total_gross += Decimal(str(usage.get('gross_amount') or 0))
+        total_net += Decimal(str(usage.get('net_amount') or 0))
+        if usage.get('iswc'):
+            works.add(usage['iswc'])
+        if usage.get('isrc'):
+            recordings.add(usage['isrc'])
+        count += 1
+
+    summary = {
+        "total_gross_amount": str(total_gross),
+        "total_net_amount": str(total_net),
+        "unique_works": len(works),
+        "unique_recordings": len(recordings),
+    }
+    stream.write('\n], "summary": ')
+    stream.write(json.dumps(summary))
+    stream.write('}\n')
+    return count
+
+
+WRITERS = {
+    'CSV': write_csv,
+    'CWR': write_cwr,
+    'DDEX-DSR': write_ddex_dsr,
+    'JSON': write_json,
+}
+
+
+def write_report(report_data, report_format: str, path: str, compress: bool = False,
+                 progress: Optional[Callable[[int], None]] = None) -> ReportFile:
+    """Stream report_data to path in report_format and return its checksum and size"""
+    writer = WRITERS.get(report_format)
+    if writer is None:
+        raise ValueError(f"Unsupported report format: {report_format}")
+
+    with open_report(path, compress) as (stream, hasher):
+        row_count = writer(stream, report_data, progress)
+
+    logger.info(f"Wrote {report_format} report {path}: {row_count} rows, {hasher.byte_count} bytes")
+    return ReportFile(
+        path=path,
+        checksum=hasher.sha256.hexdigest(),
+        row_count=row_count,
+        byte_count=hasher.byte_count,
+        compressed=compress,
+    )
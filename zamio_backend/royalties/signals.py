@@ -0,0 +1,38 @@
+"""
+Signals for royalties app
+Keeps the in-memory rate card in sync with rate and station changes
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from royalties.models import RoyaltyRateStructure
+from royalties.services.rate_card import DEFAULT_STATION_CLASS, invalidate_rate_card
+from stations.models import Station
+
+
+@receiver(post_save, sender=RoyaltyRateStructure)
+@receiver(post_delete, sender=RoyaltyRateStructure)
+def invalidate_rate_card_on_rate_change(sender, instance, **kwargs):
+    """Reload rate cards whenever a rate structure changes"""
+    invalidate_rate_card()
+
+
+@receiver(pre_save, sender=Station)
+def detect_station_class_change(sender, instance, **kwargs):
+    """Flag saves that change a station's class, the only station field the card reads"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'station_class' not in update_fields:
+        instance._station_class_changed = False
+    elif instance._state.adding or instance.pk is None:
+        # Stations the card has not seen price at the default class
+        instance._station_class_changed = instance.station_class != DEFAULT_STATION_CLASS
+    else:
+        stored = Station.objects.filter(pk=instance.pk).values_list('station_class', flat=True).first()
+        instance._station_class_changed = stored != instance.station_class
+
+
+@receiver(post_save, sender=Station)
+def invalidate_rate_card_on_station_change(sender, instance, **kwargs):
+    """Reload rate cards when a station's class changed"""
+    if getattr(instance, '_station_class_changed', False):
+        invalidate_rate_card()
@@ -4,6 +4,7 @@ Celery tasks for royalty file processing and security
 import os
 import logging
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from django.db import models
 from accounts.models import AuditLog
@@ -324,4 +325,204 @@ def generate_financial_security_report():
     except Exception as e:
         logger.error(f"Financial security report generation failed: {str(e)}")
         report_data['report_error'] = str(e)
-        return report_data
\ No newline at end of file
+        return report_data
+
+@shared_task
+def process_royalty_cycle_chunk(chunk_id):
+    """
+    Process a single royalty cycle chunk (idempotent; completed chunks are skipped)
+    """
+    from .calculator import RoyaltyCycleManager
+    
+    chunk = RoyaltyCycleManager().process_chunk(chunk_id)
+    
+    return {
+        'chunk_id': chunk.id,
+        'status': chunk.status,
+        'play_logs_processed': chunk.play_logs_processed,
+        'distributions_created': chunk.distributions_created,
+    }
+
+
+@shared_task
+def finalize_royalty_cycle(chunk_results, cycle_id):
+    """
+    Chord callback: reconcile the cycle and lock it when all chunks completed
+    """
+    from .calculator import RoyaltyCycleManager
+    from .models import RoyaltyCycle
+    
+    cycle = RoyaltyCycle.objects.get(id=cycle_id)
+    return RoyaltyCycleManager().finalize_cycle(cycle)
+
+
+@shared_task
+def dispatch_royalty_cycle(cycle_id):
+    """
+    Plan a royalty cycle into chunks and fan them out to parallel workers
+    """
+    from celery import chord
+    from .calculator import RoyaltyCycleManager
+    from .models import RoyaltyCycle
+    
+    cycle = RoyaltyCycle.objects.get(id=cycle_id)
+    RoyaltyCycleManager().plan_chunks(cycle)
+    
+    pending_chunk_ids = list(
+        cycle.chunks.exclude(status='Completed').values_list('id', flat=True)
+    )
+    
+    if not pending_chunk_ids:
+        finalize_royalty_cycle.delay([], cycle_id)
+    else:
+        chord(
+            process_royalty_cycle_chunk.s(chunk_id) for chunk_id in pending_chunk_ids
+        )(finalize_royalty_cycle.s(cycle_id))
+    
+    logger.info(f"Dispatched {len(pending_chunk_ids)} chunks for royalty cycle {cycle_id}")
+    
+    return {
+        'cycle_id': cycle_id,
+        'chunks_dispatched': len(pending_chunk_ids),
+    }
+
+
+@shared_task
+def close_royalty_cycle(job_id):
+    """
+    Close a royalty cycle in the background (set-based aggregation into line items)
+    """
+    from .models import RoyaltyCycleCloseJob
+    from .services.cycle_close import close_royalty_cycle as run_close
+    
+    job = RoyaltyCycleCloseJob.objects.select_related('royalty_cycle').get(id=job_id)
+    job = run_close(job)
+    
+    return {
+        'job_id': job.id,
+        'cycle_id': job.royalty_cycle_id,
+        'status': job.status,
+        'line_items_created': job.line_items_created,
+        'error': job.error_message,
+    }
+
+
+@shared_task
+def attribute_partner_usage(max_chunks=None):
+    """
+    Periodic task to attribute new play logs to partner repertoire by ISRC
+    """
+    from .services.attribution import IsrcAttributionEngine
+    
+    max_chunks = max_chunks or getattr(settings, 'ATTRIBUTION_MAX_CHUNKS_PER_RUN', 50)
+    return IsrcAttributionEngine().run(max_chunks=max_chunks)
+
+
+@shared_task
+def ingest_partner_repertoire(upload_id):
+    """
+    Stream a staged partner repertoire CSV into ExternalRecordings
+    """
+    from artists.models import UploadProcessingStatus
+    from .services.repertoire_ingest import run_repertoire_ingest
+    
+    upload_status = UploadProcessingStatus.objects.get(upload_id=upload_id)
+    summary = run_repertoire_ingest(upload_status)
+    
+    return {
+        'upload_id': upload_id,
+        'status': upload_status.status,
+        'summary': summary,
+    }
+
+
+@shared_task(bind=True)
+def generate_partner_usage_report(self, cycle_id, partner_id, report_format=None, compress=None):
+    """
+    Stream a per-play usage report for one partner and cycle to disk,
+    publishing progress through the task state
+    """
+    from .models import PartnerPRO, PartnerReportExport, RoyaltyCycle
+    from .pro_integration import PROReportData, PROReportGenerator
+    from .services.report_writers import UsageRows
+    
+    cycle = RoyaltyCycle.objects.get(id=cycle_id)
+    partner = PartnerPRO.objects.get(id=partner_id)
+    report_format = report_format or partner.reporting_standard
+    if report_format not in PROReportGenerator.FILE_NAMING:
+        report_format = 'JSON'
+    if compress is None:
+        compress = getattr(settings, 'PRO_REPORT_COMPRESS', False)
+    
+    usage_data = UsageRows(partner, cycle.period_start, cycle.period_end, territory=cycle.territory)
+    total_rows = len(usage_data)
+    
+    def progress(rows_written):
+        self.update_state(state='PROGRESS', meta={
+            'rows_written': rows_written,
+            'total_rows': total_rows,
+            'progress_percentage': int(rows_written * 100 / total_rows) if total_rows else 100,
+        })
+    
+    net_total = cycle.line_items.filter(partner=partner).aggregate(
+        total=models.Sum('net_amount')
+    )['total'] or 0
+    report_data = PROReportData(
+        partner_pro=partner,
+        royalty_cycle=cycle,
+        usage_data=usage_data,
+        total_amount=net_total,
+        currency='GHS',
+        report_period_start=cycle.period_start,
+        report_period_end=cycle.period_end,
+        metadata={'cycle_id': cycle.id, 'per_play': True},
+    )
+    
+    report = PROReportGenerator().write_report(report_data, report_format, compress=compress, progress=progress)
+    
+    export = PartnerReportExport.objects.create(
+        partner=partner,
+        royalty_cycle=cycle,
+        format=report_format,
+        file=report.path,
+        checksum=report.checksum,
+    )
+    
+    return {
+        'export_id': export.id,
+        'partner_id': partner.id,
+        'cycle_id': cycle.id,
+        'format': report_format,
+        'file': report.path,
+        'checksum': report.checksum,
+        'rows_written': report.row_count,
+        'bytes_written': report.byte_count,
+        'compressed': report.compressed,
+    }
+
+
+@shared_task
+def generate_cycle_partner_reports(cycle_id, report_format=None, compress=None):
+    """
+    Fan out per-play usage reports for every partner with usage in a cycle
+    """
+    from celery import group
+    from .models import RoyaltyCycle, UsageAttribution
+    
+    cycle = RoyaltyCycle.objects.get(id=cycle_id)
+    partner_ids = list(
+        UsageAttribution.objects.filter(
+            territory=cycle.territory,
+            played_at__date__gte=cycle.period_start,
+            played_at__date__lte=cycle.period_end,
+        ).order_by().values_list('origin_partner_id', flat=True).distinct()
+    )
+    
+    group(
+        generate_partner_usage_report.s(cycle_id, partner_id, report_format, compress)
+        for partner_id in partner_ids
+    ).apply_async()
+    
+    logger.info(f"Queued usage reports for {len(partner_ids)} partners in cycle {cycle_id}")
+    
+    return {'cycle_id': cycle_id, 'partners': partner_ids}
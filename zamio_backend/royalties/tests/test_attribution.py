@@ -0,0 +1,137 @@
+"""
+Tests for incremental ISRC attribution
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from artists.models import Artist, Track
+from music_monitor.models import PlayLog
+from royalties.models import AttributionCheckpoint, ExternalRecording, PartnerPRO, UsageAttribution
+from royalties.services.attribution import IsrcAttributionEngine
+from stations.models import Station
+
+
+@override_settings(ATTRIBUTION_CHECKPOINT_MARGIN=0)
+class IsrcAttributionEngineTestCase(TestCase):
+    def setUp(self) -> None:
+        user_model = get_user_model()
+
+        partner_user = user_model.objects.create_user(
+            email='isrc-partner@example.com',
+            password='strong-password',
+        )
+        self.partner = PartnerPRO.objects.create(user=partner_user, company_name='ISRC PRO', pro_code='ISRC')
+        self.recording = ExternalRecording.objects.create(
+            origin_partner=self.partner,
+            isrc='GHA000000042',
+            title='Partner Recording',
+        )
+
+        artist_user = user_model.objects.create_user(
+            email='isrc-artist@example.com',
+            password='strong-password',
+        )
+        artist = Artist.objects.create(user=artist_user, stage_name='ISRC Artist')
+        self.matched_track = Track.objects.create(
+            artist=artist, title='Matched', isrc_code='GHA000000042', duration=timedelta(minutes=3)
+        )
+        self.unmatched_track = Track.objects.create(
+            artist=artist, title='Unmatched', isrc_code='GHA000000099', duration=timedelta(minutes=3)
+        )
+        station_user = user_model.objects.create_user(
+            email='isrc-station@example.com',
+            password='strong-password',
+        )
+        self.station = Station.objects.create(user=station_user, name='ISRC FM')
+
+    def _play(self, track):
+        return PlayLog.objects.create(
+            track=track,
+            station=self.station,
+            source='Radio',
+            played_at=timezone.now(),
+            duration=timedelta(seconds=200),
+        )
+
+    def test_run_attributes_matching_plays_in_chunks(self):
+        plays = [self._play(self.matched_track), self._play(self.unmatched_track), self._play(self.matched_track)]
+
+        summary = IsrcAttributionEngine(chunk_size=2).run()
+
+        self.assertEqual(summary['chunks'], 2)
+        self.assertEqual(summary['plays_scanned'], 3)
+        self.assertEqual(summary['attributions_created'], 2)
+        attribution = UsageAttribution.objects.get(play_log=plays[0])
+        self.assertEqual(attribution.external_recording, self.recording)
+        self.assertEqual(attribution.origin_partner_id, self.partner.id)
+        self.assertEqual(attribution.duration_seconds, 200)
+        self.assertEqual(AttributionCheckpoint.objects.get().last_play_log_id, plays[-1].id)
+
+    def test_high_water_mark_avoids_rescans(self):
+        self._play(self.matched_track)
+        engine = IsrcAttributionEngine()
+        engine.run()
+
+        self.assertEqual(engine.run()['plays_scanned'], 0)
+
+        self._play(self.matched_track)
+        summary = engine.run()
+        self.assertEqual(summary['plays_scanned'], 1)
+        self.assertEqual(UsageAttribution.objects.count(), 2)
+
+    def test_reset_does_not_duplicate_attributions(self):
+        self._play(self.matched_track)
+        engine = IsrcAttributionEngine()
+        engine.run()
+
+        engine.reset(0)
+        summary = engine.run()
+
+        self.assertEqual(summary['plays_scanned'], 1)
+        self.assertEqual(summary['attributions_created'], 0)
+        self.assertEqual(UsageAttribution.objects.count(), 1)
+
+    @override_settings(ATTRIBUTION_CHECKPOINT_MARGIN=2)
+    def test_checkpoint_trails_the_newest_play_so_late_commits_are_rescanned(self):
+        plays = [self._play(self.unmatched_track) for _ in range(3)]
+        # The middle id is still uncommitted when the first run happens
+        late_id = plays[1].id
+        plays[1].delete()
+        engine = IsrcAttributionEngine()
+        engine.run()
+
+        self.assertEqual(engine.get_checkpoint().last_play_log_id, plays[-1].id - 2)
+
+        late = self._play(self.matched_track)
+        PlayLog.objects.filter(pk=late.pk).update(id=late_id)
+        summary = engine.run()
+
+        self.assertEqual(summary['plays_scanned'], 2)
+        self.assertTrue(UsageAttribution.objects.filter(play_log_id=late_id).exists())
+
+    def test_recordings_ingested_later_are_attributed_behind_the_mark(self):
+        play = self._play(self.unmatched_track)
+        engine = IsrcAttributionEngine()
+        engine.run()
+        self.assertEqual(engine.get_checkpoint().last_play_log_id, play.id)
+
+        recording = ExternalRecording.objects.create(
+            origin_partner=self.partner, isrc='GHA000000099', title='Late Recording'
+        )
+
+        self.assertEqual(engine.attribute_isrcs(['GHA000000099']), 1)
+        self.assertEqual(UsageAttribution.objects.get(play_log=play).external_recording, recording)
+        self.assertEqual(engine.attribute_isrcs(['GHA000000099']), 0)
+
+    def test_rescan_latest_ignores_the_mark(self):
+        play = self._play(self.unmatched_track)
+        engine = IsrcAttributionEngine()
+        engine.run()
+        ExternalRecording.objects.create(origin_partner=self.partner, isrc='GHA000000099', title='Edited')
+
+        self.assertEqual(engine.rescan_latest(10), {'plays_scanned': 1, 'attributions_created': 1})
+        self.assertTrue(UsageAttribution.objects.filter(play_log=play).exists())
@@ -0,0 +1,180 @@
+"""
+Tests for set-based royalty cycle close
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from artists.models import Artist, Track
+from music_monitor.models import PlayLog
+from royalties.models import (
+    ExternalRecording,
+    PartnerPRO,
+    RoyaltyCycle,
+    RoyaltyCycleCloseJob,
+    RoyaltyLineItem,
+    UsageAttribution,
+)
+from royalties.services.cycle_close import aggregate_cycle_usage, close_royalty_cycle, request_close
+from stations.models import Station
+
+
+class RoyaltyCycleCloseTestCase(TestCase):
+    def setUp(self) -> None:
+        user_model = get_user_model()
+
+        partner_user = user_model.objects.create_user(
+            email='close-partner@example.com',
+            password='strong-password',
+        )
+        self.partner = PartnerPRO.objects.create(
+            user=partner_user,
+            company_name='Close PRO',
+            pro_code='CLOSE',
+        )
+        self.recording = ExternalRecording.objects.create(
+            origin_partner=self.partner,
+            isrc='GHA000000001',
+            title='Close Recording',
+        )
+
+        artist_user = user_model.objects.create_user(
+            email='close-artist@example.com',
+            password='strong-password',
+        )
+        artist = Artist.objects.create(user=artist_user, stage_name='Close Artist')
+        self.track = Track.objects.create(artist=artist, title='Close Track', duration=timedelta(minutes=3))
+        station_user = user_model.objects.create_user(
+            email='close-station@example.com',
+            password='strong-password',
+        )
+        self.station = Station.objects.create(user=station_user, name='Close FM')
+
+        self.cycle = RoyaltyCycle.objects.create(
+            name='Mar 2025',
+            period_start=date(2025, 3, 1),
+            period_end=date(2025, 3, 31),
+            admin_fee_percent_default=Decimal('15.00'),
+        )
+
+        self._attribute(day=2, amount='1.10', duration=120)
+        self._attribute(day=3, amount='2.25', duration=180)
+        self._attribute(day=4, amount='0.65', duration=60, recording=None)
+        # Outside the cycle period
+        self._attribute(day=1, amount='9.99', duration=200, month=4)
+
+    def _attribute(self, day, amount, duration, recording=..., month=3):
+        played_at = timezone.make_aware(datetime(2025, month, day, 9, 0))
+        play_log = PlayLog.objects.create(
+            track=self.track,
+            station=self.station,
+            source='Radio',
+            played_at=played_at,
+            royalty_amount=Decimal(amount),
+        )
+        return UsageAttribution.objects.create(
+            play_log=play_log,
+            external_recording=self.recording if recording is ... else recording,
+            origin_partner=self.partner,
+            territory='GH',
+            played_at=played_at,
+            duration_seconds=duration,
+        )
+
+    def test_aggregate_groups_by_partner_and_recording(self):
+        rows = aggregate_cycle_usage(self.cycle)
+
+        self.assertEqual(len(rows), 2)
+        by_recording = {row['external_recording_id']: row for row in rows}
+        recorded = by_recording[self.recording.id]
+        self.assertEqual(recorded['usage_count'], 2)
+        self.assertEqual(recorded['total_duration_seconds'], 300)
+        self.assertEqual(Decimal(recorded['gross_amount']), Decimal('3.35'))
+        self.assertEqual(by_recording[None]['usage_count'], 1)
+
+    def test_close_writes_line_items_and_locks_cycle(self):
+        job = RoyaltyCycleCloseJob.objects.create(royalty_cycle=self.cycle)
+
+        job = close_royalty_cycle(job)
+
+        self.cycle.refresh_from_db()
+        self.assertEqual(job.status, 'Completed')
+        self.assertEqual(job.progress_percentage, 100)
+        self.assertEqual(job.attributions_count, 3)
+        self.assertEqual(self.cycle.status, 'Locked')
+        item = RoyaltyLineItem.objects.get(external_recording=self.recording)
+        self.assertEqual(item.gross_amount, Decimal('3.35'))
+        self.assertEqual(item.admin_fee_amount, Decimal('0.50'))
+        self.assertEqual(item.net_amount, Decimal('2.85'))
+        self.assertEqual(job.gross_amount, Decimal('4.00'))
+
+    def test_rerun_replaces_line_items(self):
+        close_royalty_cycle(RoyaltyCycleCloseJob.objects.create(royalty_cycle=self.cycle))
+
+        job = close_royalty_cycle(RoyaltyCycleCloseJob.objects.create(royalty_cycle=self.cycle))
+
+        self.assertEqual(job.status, 'Completed')
+        self.assertEqual(job.line_items_replaced, 2)
+        self.assertEqual(RoyaltyLineItem.objects.filter(royalty_cycle=self.cycle).count(), 2)
+
+    def test_invoiced_cycle_is_not_rewritten(self):
+        close_royalty_cycle(RoyaltyCycleCloseJob.objects.create(royalty_cycle=self.cycle))
+        RoyaltyCycle.objects.filter(pk=self.cycle.pk).update(status='Invoiced')
+        self.cycle.refresh_from_db()
+
+        job = close_royalty_cycle(RoyaltyCycleCloseJob.objects.create(royalty_cycle=self.cycle))
+
+        self.assertEqual(job.status, 'Failed')
+        self.assertIn('Invoiced', job.error_message)
+        self.assertEqual(RoyaltyLineItem.objects.filter(royalty_cycle=self.cycle).count(), 2)
+
+    def test_request_close_reuses_active_job_until_it_goes_stale(self):
+        job, created = request_close(self.cycle)
+        self.assertTrue(created)
+        self.assertEqual(request_close(self.cycle), (job, False))
+
+        RoyaltyCycleCloseJob.objects.filter(pk=job.pk).update(
+            status='Running', updated_at=timezone.now() - timedelta(hours=2)
+        )
+        with override_settings(ROYALTY_CYCLE_CLOSE_STALE_SECONDS=600):
+            replacement, created = request_close(self.cycle)
+
+        self.assertTrue(created)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Failed')
+        self.assertIn('Abandoned', job.error_message)
+        self.assertEqual(close_royalty_cycle(replacement).status, 'Completed')
+
+    def test_forced_restart_replaces_job_and_skips_the_old_one(self):
+        job, _ = request_close(self.cycle)
+
+        replacement, created = request_close(self.cycle, force=True)
+
+        self.assertTrue(created)
+        self.assertNotEqual(replacement.pk, job.pk)
+        # The superseded job may still be picked up from the queue
+        self.assertEqual(close_royalty_cycle(job).status, 'Failed')
+        self.assertFalse(RoyaltyLineItem.objects.filter(royalty_cycle=self.cycle).exists())
+        self.assertEqual(close_royalty_cycle(replacement).status, 'Completed')
+
+    def test_worker_stops_when_its_job_is_replaced_mid_aggregation(self):
+        job, _ = request_close(self.cycle)
+
+        def replace_while_aggregating(cycle, partner_id=None):
+            request_close(self.cycle, force=True)
+            return aggregate_cycle_usage(cycle, partner_id=partner_id)
+
+        with mock.patch(
+            'royalties.services.cycle_close.aggregate_cycle_usage', side_effect=replace_while_aggregating
+        ) as aggregate:
+            job = close_royalty_cycle(job)
+
+        self.assertEqual(aggregate.call_count, 1)
+        self.assertEqual(job.status, 'Failed')
+        self.assertIn('forced restart', job.error_message)
+        self.assertFalse(RoyaltyLineItem.objects.filter(royalty_cycle=self.cycle).exists())
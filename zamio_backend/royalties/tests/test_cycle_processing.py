@@ -0,0 +1,174 @@
+"""
+Tests for chunked, checkpointed royalty cycle processing
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from artists.models import Artist, Contributor, Track
+from music_monitor.models import PlayLog, RoyaltyDistribution
+from publishers.models import PublisherProfile
+from royalties.calculator import RoyaltyCalculator, RoyaltyCycleManager
+from royalties.models import RoyaltyCycle, RoyaltyCycleChunk
+from stations.models import Station
+
+
+class RoyaltyCycleChunkingTestCase(TestCase):
+    def setUp(self) -> None:
+        user_model = get_user_model()
+
+        artist_user = user_model.objects.create_user(
+            email='cycle-artist@example.com',
+            password='strong-password',
+        )
+        self.artist = Artist.objects.create(
+            user=artist_user,
+            stage_name='Cycle Artist',
+        )
+        publisher_user = user_model.objects.create_user(
+            email='cycle-publisher@example.com',
+            password='strong-password',
+        )
+        self.publisher = PublisherProfile.objects.create(
+            user=publisher_user,
+            company_name='Cycle Publishing',
+        )
+        self.track = Track.objects.create(
+            artist=self.artist,
+            title='Cycle Track',
+            duration=timedelta(minutes=3),
+        )
+        Contributor.objects.create(
+            user=artist_user,
+            track=self.track,
+            role='Composer',
+            percent_split=Decimal('100.00'),
+            publisher=self.publisher,
+            active=True,
+        )
+
+        station_user = user_model.objects.create_user(
+            email='cycle-station@example.com',
+            password='strong-password',
+        )
+        self.station = Station.objects.create(user=station_user, name='Cycle FM')
+
+        self.cycle = RoyaltyCycle.objects.create(
+            name='Jan 2025',
+            period_start=date(2025, 1, 1),
+            period_end=date(2025, 1, 31),
+        )
+
+        for day in range(1, 6):
+            self._create_play_log(day)
+
+        # Outside the cycle period
+        self._create_play_log(1, month=2)
+
+    def _create_play_log(self, day, month=1):
+        return PlayLog.objects.create(
+            track=self.track,
+            station=self.station,
+            source='Radio',
+            played_at=timezone.make_aware(datetime(2025, month, day, 12, 0)),
+            duration=timedelta(minutes=3),
+        )
+
+    def test_plan_chunks_uses_keyset_ranges(self):
+        manager = RoyaltyCycleManager(chunk_size=2)
+
+        chunks = manager.plan_chunks(self.cycle)
+
+        self.assertEqual([chunk.play_log_count for chunk in chunks], [2, 2, 1])
+        self.assertEqual([chunk.sequence for chunk in chunks], [0, 1, 2])
+        self.assertTrue(all(
+            earlier.end_play_log_id < later.start_play_log_id
+            for earlier, later in zip(chunks, chunks[1:])
+        ))
+
+        # Re-planning only covers play logs that arrived afterwards
+        self.assertEqual(manager.plan_chunks(self.cycle), [])
+        self._create_play_log(20)
+        new_chunks = manager.plan_chunks(self.cycle)
+        self.assertEqual(len(new_chunks), 1)
+        self.assertEqual(new_chunks[0].sequence, 3)
+
+    def test_process_royalty_cycle_locks_after_all_chunks_complete(self):
+        manager = RoyaltyCycleManager(chunk_size=2)
+
+        result = manager.process_royalty_cycle(self.cycle)
+
+        self.cycle.refresh_from_db()
+        self.assertEqual(self.cycle.status, 'Locked')
+        self.assertEqual(result['chunks_total'], 3)
+        self.assertEqual(result['chunks_incomplete'], 0)
+        self.assertEqual(result['play_logs_processed'], 5)
+        self.assertEqual(result['distributions_created'], 5)
+        self.assertEqual(RoyaltyDistribution.objects.count(), 5)
+
+    def test_reprocessing_is_idempotent(self):
+        manager = RoyaltyCycleManager(chunk_size=2)
+        manager.process_royalty_cycle(self.cycle)
+
+        result = manager.process_royalty_cycle(self.cycle)
+
+        self.assertEqual(RoyaltyDistribution.objects.count(), 5)
+        self.assertEqual(result['distributions_created'], 5)
+
+    def test_failed_chunk_rolls_back_and_keeps_cycle_open(self):
+        calculator = RoyaltyCalculator()
+        manager = RoyaltyCycleManager(calculator=calculator, chunk_size=2)
+        original = calculator.create_royalty_distributions
+        calls = {'count': 0}
+
+        def fail_on_third_play(result):
+            calls['count'] += 1
+            if calls['count'] == 3:
+                raise RuntimeError('worker lost')
+            return original(result)
+
+        with mock.patch.object(calculator, 'create_royalty_distributions', side_effect=fail_on_third_play):
+            result = manager.process_royalty_cycle(self.cycle)
+
+        self.cycle.refresh_from_db()
+        self.assertEqual(self.cycle.status, 'Open')
+        self.assertEqual(result['chunks_incomplete'], 1)
+        failed_chunk = self.cycle.chunks.get(status='Failed')
+        self.assertEqual(failed_chunk.sequence, 1)
+        # The failed chunk committed nothing; the other two chunks committed 3 plays
+        self.assertEqual(RoyaltyDistribution.objects.count(), 3)
+
+        # Resuming processes only the failed chunk
+        result = manager.process_royalty_cycle(self.cycle)
+
+        self.cycle.refresh_from_db()
+        self.assertEqual(self.cycle.status, 'Locked')
+        self.assertEqual(RoyaltyDistribution.objects.count(), 5)
+        self.assertEqual(
+            RoyaltyCycleChunk.objects.get(id=failed_chunk.id).attempts, 2
+        )
+
+    def test_chunks_are_claimed_before_processing_and_stalled_claims_are_taken_over(self):
+        manager = RoyaltyCycleManager(chunk_size=5)
+        chunk = manager.plan_chunks(self.cycle)[0]
+
+        claimed_at = manager.claim_chunk(chunk.id)
+        chunk.refresh_from_db()
+        self.assertEqual((chunk.status, chunk.started_at), ('Processing', claimed_at))
+
+        # A live claim is left alone
+        self.assertIsNone(manager.claim_chunk(chunk.id))
+        self.assertEqual(manager.process_chunk(chunk.id).status, 'Processing')
+        self.assertEqual(RoyaltyDistribution.objects.count(), 0)
+
+        RoyaltyCycleChunk.objects.filter(id=chunk.id).update(started_at=timezone.now() - timedelta(hours=1))
+        chunk = manager.process_chunk(chunk.id)
+
+        self.assertEqual(chunk.status, 'Completed')
+        self.assertIsNotNone(chunk.started_at)
+        self.assertEqual(RoyaltyDistribution.objects.count(), 5)
@@ -0,0 +1,76 @@
+"""Tests for the chunked streaming encryption of royalty files."""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from cryptography.fernet import Fernet
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from royalties.services.encryption_service import TAG_SIZE, EncryptedFileError, RoyaltyFileEncryption
+
+
+@override_settings(ROYALTY_ENCRYPTION_CHUNK_SIZE=1024)
+class StreamingEncryptionTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.plaintext = os.urandom(5 * 1024 + 300)
+        self.source = self._write('remittance.csv', self.plaintext)
+        self.encrypted = os.path.join(self.directory, 'remittance.csv.enc')
+        self.assertTrue(RoyaltyFileEncryption.encrypt_file(self.source, self.encrypted))
+
+    def _write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as handle:
+            handle.write(content)
+        return path
+
+    def test_round_trip_without_base64_expansion(self):
+        decrypted = os.path.join(self.directory, 'remittance.out')
+
+        self.assertTrue(RoyaltyFileEncryption.decrypt_file(self.encrypted, decrypted))
+        with open(decrypted, 'rb') as handle:
+            self.assertEqual(handle.read(), self.plaintext)
+        overhead = os.path.getsize(self.encrypted) - len(self.plaintext)
+        self.assertLess(overhead, 6 * TAG_SIZE + 64)
+        self.assertEqual(RoyaltyFileEncryption.plaintext_size(self.encrypted), len(self.plaintext))
+
+    def test_ranges_decrypt_without_reading_the_whole_file(self):
+        for start, length in [(0, 10), (1000, 100), (2048, 1024), (5 * 1024, 1000)]:
+            self.assertEqual(
+                RoyaltyFileEncryption.decrypt_range(self.encrypted, start, length),
+                self.plaintext[start:start + length],
+            )
+
+    def test_tampering_and_truncation_are_detected(self):
+        with open(self.encrypted, 'r+b') as handle:
+            handle.seek(-TAG_SIZE - 5, os.SEEK_END)
+            handle.write(b'\x00')
+        with self.assertRaises(EncryptedFileError):
+            RoyaltyFileEncryption.decrypt_range(self.encrypted, 5 * 1024, 10)
+
+        self.assertTrue(RoyaltyFileEncryption.encrypt_file(self.source, self.encrypted))
+        with open(self.encrypted, 'r+b') as handle:
+            handle.truncate(os.path.getsize(self.encrypted) - (300 + TAG_SIZE))
+        self.assertFalse(RoyaltyFileEncryption.decrypt_file(self.encrypted, os.path.join(self.directory, 'cut')))
+
+    def test_integrity_is_checked_on_the_decrypted_stream(self):
+        expected = hashlib.sha256(self.plaintext).hexdigest()
+
+        self.assertTrue(RoyaltyFileEncryption.verify_file_integrity(self.encrypted, expected, encrypted=True))
+        self.assertFalse(RoyaltyFileEncryption.verify_file_integrity(self.encrypted, expected))
+
+    def test_legacy_fernet_files_are_read_and_migrated(self):
+        legacy = os.path.join(self.directory, 'legacy.csv.enc')
+        with open(legacy, 'wb') as handle:
+            handle.write(Fernet(RoyaltyFileEncryption._get_encryption_key()).encrypt(self.plaintext))
+        expected = hashlib.sha256(self.plaintext).hexdigest()
+        self.assertTrue(RoyaltyFileEncryption.verify_file_integrity(legacy, expected, encrypted=True))
+
+        call_command('migrate_royalty_encryption', path=self.directory, stdout=open(os.devnull, 'w'))
+
+        self.assertTrue(RoyaltyFileEncryption.is_stream_encrypted(legacy))
+        self.assertEqual(RoyaltyFileEncryption.decrypt_range(legacy, 0, len(self.plaintext)), self.plaintext)
+        self.assertEqual(sorted(os.listdir(self.directory)), ['legacy.csv.enc', 'remittance.csv', 'remittance.csv.enc'])
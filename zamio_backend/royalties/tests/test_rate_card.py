@@ -0,0 +1,125 @@
+"""
+Tests for the in-memory royalty rate card
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from royalties.calculator import RoyaltyCalculator
+from royalties.models import RoyaltyRateStructure
+from royalties.services import rate_card as rate_card_module
+from royalties.services.rate_card import RateCard, get_rate_card
+from stations.models import Station
+
+
+class RateCardTestCase(TestCase):
+    def setUp(self) -> None:
+        rate_card_module.invalidate_rate_card()
+
+        station_user = get_user_model().objects.create_user(
+            email='rate-station@example.com',
+            password='strong-password',
+        )
+        self.station = Station.objects.create(
+            user=station_user,
+            name='Rate FM',
+            station_class='class_a',
+        )
+        # Prime time play
+        self.played_at = timezone.make_aware(datetime(2025, 3, 10, 7, 30))
+
+    def tearDown(self) -> None:
+        rate_card_module.invalidate_rate_card()
+
+    def test_defaults_match_calculator_rates(self):
+        price = get_rate_card().price_play(self.station, self.played_at, 100)
+
+        # class_a prime time: 0.015/s * 100s * 1.5
+        self.assertEqual(price.amount, Decimal('2.25'))
+        self.assertEqual(price.station_class, 'class_a')
+        self.assertEqual(price.time_period, 'prime_time')
+
+    def test_pricing_needs_no_queries_once_loaded(self):
+        card = get_rate_card()
+
+        with self.assertNumQueries(0):
+            card.price_play(self.station, self.played_at, 180)
+            card.price_play(self.station.id, self.played_at, None)
+            get_rate_card()
+
+    def test_configured_rates_are_effective_dated(self):
+        RoyaltyRateStructure.objects.create(
+            name='Old Class A Prime',
+            station_class='class_a',
+            time_period='prime_time',
+            base_rate_per_second=Decimal('0.010'),
+            multiplier=Decimal('2.0'),
+            effective_date=date(2024, 1, 1),
+        )
+        RoyaltyRateStructure.objects.create(
+            name='New Class A Prime',
+            station_class='class_a',
+            time_period='prime_time',
+            base_rate_per_second=Decimal('0.020'),
+            multiplier=Decimal('2.0'),
+            effective_date=date(2025, 6, 1),
+        )
+        card = get_rate_card()
+
+        self.assertEqual(card.price_play(self.station, self.played_at, 100).amount, Decimal('2.00'))
+        later = self.played_at.replace(month=7)
+        self.assertEqual(card.price_play(self.station, later, 100).amount, Decimal('4.00'))
+
+    def test_signals_invalidate_loaded_card(self):
+        card = get_rate_card()
+
+        RoyaltyRateStructure.objects.create(
+            name='Class A Prime',
+            station_class='class_a',
+            time_period='prime_time',
+            base_rate_per_second=Decimal('0.030'),
+            multiplier=Decimal('1.0'),
+            effective_date=date(2025, 1, 1),
+        )
+        reloaded = get_rate_card()
+        self.assertIsNot(reloaded, card)
+        self.assertEqual(reloaded.price_play(self.station, self.played_at, 100).amount, Decimal('3.00'))
+
+        self.station.station_class = 'community'
+        self.station.save()
+        self.assertEqual(get_rate_card().station_class_for(self.station.id), 'community')
+
+    def test_unrelated_station_updates_keep_card(self):
+        card = get_rate_card()
+
+        self.station.tagline = 'Hits all day'
+        self.station.save(update_fields=['tagline'])
+        self.station.save()
+
+        self.assertIs(get_rate_card(), card)
+
+    def test_station_saves_only_bump_the_version_when_the_class_changes(self):
+        with mock.patch('royalties.signals.invalidate_rate_card') as invalidate:
+            self.station.tagline = 'Hits all day'
+            self.station.save()
+            Station.objects.create(user=self.station.user, name='Default FM')
+            self.assertFalse(invalidate.called)
+
+            self.station.station_class = 'community'
+            self.station.save()
+            self.assertEqual(invalidate.call_count, 1)
+
+    def test_calculator_uses_rate_card(self):
+        card = RateCard.from_rate_config(RoyaltyCalculator.DEFAULT_RATES)
+        calculator = RoyaltyCalculator(rate_card=card)
+
+        self.assertEqual(calculator.get_station_class(self.station).value, 'class_a')
+        self.assertEqual(
+            calculator.get_time_of_day_period(self.played_at + timedelta(hours=5)).value,
+            'regular_time'
+        )
@@ -0,0 +1,103 @@
+"""
+Tests for streaming partner repertoire ingestion
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from accounts.models import AuditLog
+from artists.models import UploadProcessingStatus
+from royalties.models import ExternalRecording, ExternalWork, PartnerPRO
+from royalties.services.repertoire_ingest import RepertoireIngest, run_repertoire_ingest
+
+
+class RepertoireIngestTestCase(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            email='repertoire-partner@example.com',
+            password='strong-password',
+        )
+        self.partner = PartnerPRO.objects.create(user=self.user, company_name='Repertoire PRO', pro_code='REP')
+
+    def _write_csv(self, rows):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='', encoding='utf-8') as f:
+            f.write('isrc,title,work_title,duration_seconds\n')
+            for row in rows:
+                f.write(','.join(row) + '\n')
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        return path
+
+    def test_batched_upsert_creates_and_updates(self):
+        ExternalRecording.objects.create(origin_partner=self.partner, isrc='GHA000000001', title='Old Title')
+        path = self._write_csv([
+            ('GHA000000001', 'New Title', 'Shared Work', '200'),
+            ('GHA000000002', 'Second', 'Shared Work', '180'),
+            ('GHA000000003', 'Third', '', 'abc'),
+            ('GHA000000002', 'Second (remaster)', 'Shared Work', '181'),
+        ])
+
+        summary = RepertoireIngest(self.partner, batch_size=2).run(path)
+
+        self.assertEqual(summary['rows_read'], 4)
+        self.assertEqual(ExternalRecording.objects.filter(origin_partner=self.partner).count(), 3)
+        self.assertEqual(ExternalWork.objects.filter(origin_partner=self.partner).count(), 1)
+        updated = ExternalRecording.objects.get(isrc='GHA000000001')
+        self.assertEqual(updated.title, 'New Title')
+        self.assertEqual(updated.duration, 200)
+        self.assertEqual(updated.work.title, 'Shared Work')
+        self.assertEqual(ExternalRecording.objects.get(isrc='GHA000000002').title, 'Second (remaster)')
+        self.assertIsNone(ExternalRecording.objects.get(isrc='GHA000000003').duration)
+
+    def test_new_isrcs_are_attributed_behind_the_high_water_mark(self):
+        ExternalRecording.objects.create(origin_partner=self.partner, isrc='GHA000000001', title='Known')
+        path = self._write_csv([('GHA000000001', 'Known', '', ''), ('GHA000000002', 'New', '', '')])
+
+        with mock.patch(
+            'royalties.services.attribution.IsrcAttributionEngine.attribute_isrcs', return_value=3
+        ) as attribute_isrcs:
+            summary = RepertoireIngest(self.partner).run(path)
+
+        attribute_isrcs.assert_called_once_with(['GHA000000002'])
+        self.assertEqual(summary['attributions_created'], 3)
+
+    def test_dry_run_writes_nothing(self):
+        path = self._write_csv([('GHA000000009', 'Dry', '', '')])
+
+        RepertoireIngest(self.partner, dry_run=True).run(path)
+
+        self.assertFalse(ExternalRecording.objects.exists())
+
+    def test_queued_ingest_reports_progress_and_one_error_summary(self):
+        path = self._write_csv([
+            ('GHA000000010', 'Good', '', '120'),
+            ('', 'No ISRC', '', ''),
+            ('', '', '', ''),
+        ])
+        upload_status = UploadProcessingStatus.objects.create(
+            upload_id='repertoire_test',
+            user=self.user,
+            upload_type='partner_repertoire',
+            original_filename='catalog.csv',
+            file_size=os.path.getsize(path),
+            status='queued',
+            metadata={'partner_id': self.partner.id, 'csv_path': path, 'dry_run': False, 'delete_after': True},
+        )
+
+        summary = run_repertoire_ingest(upload_status)
+
+        upload_status.refresh_from_db()
+        self.assertEqual(upload_status.status, 'completed')
+        self.assertEqual(upload_status.progress_percentage, 100)
+        self.assertEqual(upload_status.metadata['created'], 1)
+        self.assertEqual(upload_status.metadata['error_count'], 2)
+        self.assertEqual(upload_status.metadata['eta_seconds'], 0)
+        self.assertEqual(summary['skipped'], 2)
+        self.assertFalse(os.path.exists(path))
+        audit = AuditLog.objects.get(resource_id='repertoire_test')
+        self.assertEqual(audit.action, 'repertoire_upload_completed')
+        self.assertEqual(len(audit.request_data['errors']), 2)
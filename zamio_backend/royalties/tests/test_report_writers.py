@@ -0,0 +1,188 @@
+"""
+Tests for streaming PRO report writers
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from artists.models import Artist, Track
+from music_monitor.models import PlayLog
+from royalties.models import (
+    ExternalRecording,
+    ExternalWork,
+    PartnerPRO,
+    PartnerReportExport,
+    RoyaltyCycle,
+    UsageAttribution,
+)
+from royalties.pro_integration import PROReportData, PROReportGenerator
+from royalties.services.report_writers import UsageRows
+from royalties.tasks import generate_partner_usage_report
+from stations.models import Station
+
+
+class StreamingReportWriterTestCase(TestCase):
+    def setUp(self) -> None:
+        self.export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_dir, ignore_errors=True)
+        settings_override = override_settings(PRO_EXPORT_DIR=self.export_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user_model = get_user_model()
+        partner_user = user_model.objects.create_user(
+            email='report-partner@example.com',
+            password='strong-password',
+        )
+        self.partner = PartnerPRO.objects.create(
+            user=partner_user,
+            company_name='Report PRO',
+            display_name='Report PRO',
+            pro_code='RPT',
+            default_admin_fee_percent=Decimal('10.00'),
+        )
+        work = ExternalWork.objects.create(origin_partner=self.partner, title='Report Work', iswc='T-000.000.001-0')
+        recording = ExternalRecording.objects.create(
+            origin_partner=self.partner, work=work, isrc='GHA000000077', title='Report Recording'
+        )
+
+        artist_user = user_model.objects.create_user(
+            email='report-artist@example.com',
+            password='strong-password',
+        )
+        artist = Artist.objects.create(user=artist_user, stage_name='Report Artist')
+        track = Track.objects.create(artist=artist, title='Report Track', duration=timedelta(minutes=3))
+        station_user = user_model.objects.create_user(
+            email='report-station@example.com',
+            password='strong-password',
+        )
+        station = Station.objects.create(user=station_user, name='Report FM')
+
+        self.cycle = RoyaltyCycle.objects.create(
+            name='May 2025',
+            period_start=date(2025, 5, 1),
+            period_end=date(2025, 5, 31),
+        )
+        for day, amount in ((2, '1.00'), (3, '2.50'), (4, '0.40')):
+            played_at = timezone.make_aware(datetime(2025, 5, day, 8, 0))
+            play_log = PlayLog.objects.create(
+                track=track, station=station, source='Radio',
+                played_at=played_at, royalty_amount=Decimal(amount),
+            )
+            UsageAttribution.objects.create(
+                play_log=play_log, external_recording=recording, origin_partner=self.partner,
+                territory='GH', station_id=station.id, played_at=played_at, duration_seconds=180,
+            )
+
+        self.generator = PROReportGenerator()
+
+    def _report_data(self):
+        return PROReportData(
+            partner_pro=self.partner,
+            royalty_cycle=self.cycle,
+            usage_data=UsageRows(self.partner, self.cycle.period_start, self.cycle.period_end),
+            total_amount=Decimal('3.51'),
+            currency='GHS',
+            report_period_start=self.cycle.period_start,
+            report_period_end=self.cycle.period_end,
+            metadata={},
+        )
+
+    def _assert_checksum(self, report):
+        with open(report.path, 'rb') as f:
+            self.assertEqual(hashlib.sha256(f.read()).hexdigest(), report.checksum)
+
+    def test_compressed_csv_has_per_play_rows(self):
+        report = self.generator.write_report(self._report_data(), 'CSV', compress=True)
+
+        self.assertTrue(report.path.endswith('.csv.gz'))
+        self._assert_checksum(report)
+        with gzip.open(report.path, 'rt', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(report.row_count, 3)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]['gross_amount'], '2.50')
+        self.assertEqual(rows[1]['admin_fee_amount'], '0.25')
+        self.assertEqual(rows[1]['net_amount'], '2.25')
+        self.assertEqual(rows[0]['iswc'], 'T-000.000.001-0')
+
+    def test_ddex_and_json_are_well_formed(self):
+        ddex = self.generator.write_report(self._report_data(), 'DDEX-DSR')
+        root = ET.parse(ddex.path).getroot()
+        self.assertEqual(len(root.findall('{http://ddex.net/xml/dsr/20120404}UsageRecord')), 3)
+        self._assert_checksum(ddex)
+
+        report = self.generator.write_report(self._report_data(), 'JSON')
+        with open(report.path, encoding='utf-8') as f:
+            payload = json.load(f)
+        self.assertEqual(payload['report_metadata']['usage_count'], 3)
+        self.assertEqual(len(payload['usage_data']), 3)
+        self.assertEqual(payload['summary']['total_gross_amount'], '3.90')
+        self.assertEqual(payload['summary']['unique_recordings'], 1)
+
+    def test_cwr_lines_are_fixed_width(self):
+        path = self.generator.generate_cwr_report(self._report_data())
+
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        performances = [line for line in lines if line.startswith('PER')]
+        self.assertEqual(len(performances), 3)
+        self.assertIn('20250502', performances[0])
+        self.assertTrue(performances[0].endswith(f"{100:012d}"))
+
+    def test_task_records_export_with_streamed_checksum(self):
+        result = generate_partner_usage_report.apply(args=(self.cycle.id, self.partner.id, 'CSV', False)).get()
+
+        export = PartnerReportExport.objects.get(id=result['export_id'])
+        self.assertEqual(result['rows_written'], 3)
+        self.assertEqual(export.checksum, result['checksum'])
+        with open(export.file, 'rb') as f:
+            content = f.read()
+        self.assertEqual(hashlib.sha256(content).hexdigest(), export.checksum)
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(content.decode('utf-8'))))), 3)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'report-task-tests'}}
+    )
+    def test_task_status_is_only_visible_to_the_requester_and_staff(self):
+        cache.clear()
+        user_model = get_user_model()
+        requester = user_model.objects.create_user(email='report-ops@example.com', password='strong-password')
+        client = APIClient()
+        client.force_authenticate(requester)
+        response = client.post(f'/api/royalties/cycles/{self.cycle.id}/partners/{self.partner.id}/export/')
+        self.assertEqual(response.status_code, 202)
+        url = f"/api/royalties/report-tasks/{response.json()['task_id']}/"
+
+        # Eager results are not stored in a backend; only the access check is under test
+        async_result = mock.patch('celery.result.AsyncResult', return_value=mock.Mock(status='SUCCESS', result={}))
+        async_result.start()
+        self.addCleanup(async_result.stop)
+        self.assertEqual(client.get(url).status_code, 200)
+
+        other_client = APIClient()
+        other_client.force_authenticate(
+            user_model.objects.create_user(email='report-other@example.com', password='strong-password')
+        )
+        self.assertEqual(other_client.get(url).status_code, 404)
+
+        staff_client = APIClient()
+        staff_client.force_authenticate(
+            user_model.objects.create_user(email='report-staff@example.com', password='strong-password', is_staff=True)
+        )
+        self.assertEqual(staff_client.get(url).status_code, 200)
@@ -16,11 +16,13 @@ urlpatterns = [
     path("cycles/", views.list_cycles),
     path("cycles/create/", views.create_cycle),
     path("cycles/<int:cycle_id>/close/", views.close_cycle),
+    path("cycles/<int:cycle_id>/close/status/", views.close_cycle_status),
     path("cycles/<int:cycle_id>/line-items/", views.list_cycle_line_items),
     path("cycles/<int:cycle_id>/exports/", views.list_cycle_exports),
 
     # Exports & Remittance
     path("cycles/<int:cycle_id>/partners/<int:partner_id>/export/", views.export_partner_csv),
+    path("report-tasks/<str:task_id>/", views.report_task_status),
     path("cycles/<int:cycle_id>/partners/<int:partner_id>/remit/", views.create_remittance),
     path("remittances/<int:remittance_id>/", views.get_remittance),
     path("cycles/<int:cycle_id>/remittances/", views.list_cycle_remittances),
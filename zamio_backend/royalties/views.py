@@ -1,9 +1,10 @@
 import csv
-import hashlib
 import os
+import uuid
 from datetime import datetime
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction, models
 from django.utils.timezone import now
 from django.utils import timezone
@@ -21,10 +22,9 @@ from music_monitor.models import PlayLog
 from .models import (
     PartnerPRO,
     ReciprocalAgreement,
-    ExternalRecording,
-    ExternalWork,
     UsageAttribution,
     RoyaltyCycle,
+    RoyaltyCycleCloseJob,
     RoyaltyLineItem,
     PartnerRemittance,
     PartnerReportExport,
@@ -128,6 +128,37 @@ def list_agreements(request, partner_id: int):
     return Response(ReciprocalAgreementSerializer(qs, many=True).data)
 
 
+def _import_dir():
+    base = getattr(settings, "PARTNER_IMPORT_DIR", None) or os.path.join(settings.BASE_DIR, "imports")
+    os.makedirs(base, exist_ok=True)
+    return base
+
+
+def _queue_repertoire_ingest(user, partner, csv_path, filename, dry_run, delete_after):
+    """Record an ingest in the shared upload-status table and queue it after commit"""
+    from artists.models import UploadProcessingStatus
+    from .tasks import ingest_partner_repertoire
+
+    upload_status = UploadProcessingStatus.objects.create(
+        upload_id=f"repertoire_{uuid.uuid4().hex}",
+        user=user,
+        upload_type="partner_repertoire",
+        original_filename=filename,
+        file_size=os.path.getsize(csv_path),
+        mime_type="text/csv",
+        status="queued",
+        current_step="Queued for import",
+        metadata={
+            "partner_id": partner.id,
+            "csv_path": csv_path,
+            "dry_run": dry_run,
+            "delete_after": delete_after,
+        },
+    )
+    transaction.on_commit(lambda: ingest_partner_repertoire.delay(upload_status.upload_id))
+    return upload_status
+
+
 @api_view(["POST"]) 
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
@@ -142,56 +173,25 @@ def ingest_repertoire(request, partner_id: int):
     csv_path = ser.validated_data["csv_path"]
     dry_run = ser.validated_data["dry_run"]
 
-    created = 0
-    updated = 0
-    skipped = 0
-    try:
-        with open(csv_path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                isrc = (row.get("isrc") or "").strip()
-                title = (row.get("title") or "").strip()
-                work_title = (row.get("work_title") or "").strip() or None
-                duration = row.get("duration_seconds")
-                duration = int(duration) if (duration and str(duration).isdigit()) else None
-
-                if not isrc and not title:
-                    skipped += 1
-                    continue
-                if dry_run:
-                    continue
-                work = None
-                if work_title:
-                    work, _ = ExternalWork.objects.get_or_create(
-                        origin_partner=partner,
-                        title=work_title,
-                        defaults={"iswc": None},
-                    )
-                obj, created_flag = ExternalRecording.objects.update_or_create(
-                    origin_partner=partner,
-                    isrc=isrc or None,
-                    defaults={
-                        "title": title or (work_title or "Unknown"),
-                        "work": work,
-                        "duration": duration,
-                    },
-                )
-                if created_flag:
-                    created += 1
-                else:
-                    updated += 1
-    except FileNotFoundError:
+    if not os.path.isfile(csv_path):
         return Response({"detail": f"CSV not found: {csv_path}"}, status=status.HTTP_400_BAD_REQUEST)
 
-    return Response({"created": created, "updated": updated, "skipped": skipped, "dry_run": dry_run})
+    upload_status = _queue_repertoire_ingest(
+        request.user, partner, csv_path, os.path.basename(csv_path), dry_run, delete_after=False
+    )
+    return Response(
+        {"upload_id": upload_status.upload_id, "status": upload_status.status, "dry_run": dry_run},
+        status=status.HTTP_202_ACCEPTED,
+    )
 
 
 @api_view(["POST"]) 
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
 def ingest_repertoire_upload(request, partner_id: int):
-    """Enhanced secure repertoire upload with comprehensive validation and malware scanning"""
+    """Secure repertoire upload: scan and validate now, import in the background"""
     from .services.file_security_service import RoyaltyFileSecurityService
+    from .services.repertoire_ingest import missing_columns
     from accounts.models import AuditLog
     
     try:
@@ -215,123 +215,43 @@ def ingest_repertoire_upload(request, partner_id: int):
             file=upload,
             file_category='repertoire',
             encrypt_storage=True,
-            process_async=False  # Process synchronously for immediate response
+            process_async=False  # Scan synchronously so unsafe files are rejected up front
         )
-        
-        # If security processing successful, proceed with repertoire ingestion
-        created = 0
-        updated = 0
-        skipped = 0
 
-        try:
-            import io, csv
-            upload.seek(0)  # Reset file pointer after security processing
-            content = upload.read().decode("utf-8", errors="ignore")
-            reader = csv.DictReader(io.StringIO(content))
-            
-            # Validate required columns
-            required_columns = ['isrc', 'title']
-            if not all(col in reader.fieldnames for col in required_columns):
-                missing = [col for col in required_columns if col not in reader.fieldnames]
-                return Response(
-                    {"detail": f"Missing required columns: {', '.join(missing)}"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            for row_num, row in enumerate(reader, 1):
-                try:
-                    isrc = (row.get("isrc") or "").strip()
-                    title = (row.get("title") or "").strip()
-                    work_title = (row.get("work_title") or "").strip() or None
-                    duration = row.get("duration_seconds")
-                    duration = int(duration) if (duration and str(duration).isdigit()) else None
-
-                    if not isrc and not title:
-                        skipped += 1
-                        continue
-                    if dry_run:
-                        continue
-                        
-                    work = None
-                    if work_title:
-                        work, _ = ExternalWork.objects.get_or_create(
-                            origin_partner=partner,
-                            title=work_title,
-                            defaults={"iswc": None},
-                        )
-                    obj, created_flag = ExternalRecording.objects.update_or_create(
-                        origin_partner=partner,
-                        isrc=isrc or None,
-                        defaults={
-                            "title": title or (work_title or "Unknown"),
-                            "work": work,
-                            "duration": duration,
-                        },
-                    )
-                    if created_flag:
-                        created += 1
-                    else:
-                        updated += 1
-                        
-                except Exception as row_error:
-                    # Log row processing error but continue
-                    AuditLog.objects.create(
-                        user=request.user,
-                        action='repertoire_row_processing_error',
-                        resource_type='RepertoireUpload',
-                        resource_id=security_result['upload_id'],
-                        request_data={
-                            'row_number': row_num,
-                            'error': str(row_error),
-                            'row_data': dict(row)
-                        }
-                    )
-                    skipped += 1
-                    
-        except Exception as e:
-            # Log processing error
-            AuditLog.objects.create(
-                user=request.user,
-                action='repertoire_processing_error',
-                resource_type='RepertoireUpload',
-                resource_id=security_result['upload_id'],
-                request_data={
-                    'error': str(e),
-                    'partner_id': partner_id,
-                    'filename': upload.name
-                }
+        # Stage a plain copy for the streaming importer, chunk by chunk
+        # One staged copy per upload, so concurrent uploads of the same file never share one
+        staged_path = os.path.join(
+            _import_dir(),
+            f"repertoire_{partner.id}_{security_result['file_hash'][:16]}_{uuid.uuid4().hex}.csv",
+        )
+        upload.seek(0)
+        with open(staged_path, "wb") as staged:
+            for chunk in upload.chunks():
+                staged.write(chunk)
+
+        with open(staged_path, newline="", encoding="utf-8", errors="ignore") as f:
+            missing = missing_columns(csv.DictReader(f).fieldnames)
+        if missing:
+            os.remove(staged_path)
+            return Response(
+                {"detail": f"Missing required columns: {', '.join(missing)}"}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
-            return Response({"detail": f"Failed to parse CSV: {e}"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Log successful processing
-        AuditLog.objects.create(
-            user=request.user,
-            action='repertoire_upload_completed',
-            resource_type='RepertoireUpload',
-            resource_id=security_result['upload_id'],
-            request_data={
-                'partner_id': partner_id,
-                'filename': upload.name,
-                'created': created,
-                'updated': updated,
-                'skipped': skipped,
-                'dry_run': dry_run,
-                'file_hash': security_result['file_hash']
-            }
+        upload_status = _queue_repertoire_ingest(
+            request.user, partner, staged_path, upload.name, dry_run, delete_after=True
         )
 
         return Response({
-            "created": created, 
-            "updated": updated, 
-            "skipped": skipped, 
+            "upload_id": upload_status.upload_id,
+            "status": upload_status.status,
             "dry_run": dry_run,
-            "upload_id": security_result['upload_id'],
             "file_hash": security_result['file_hash'],
             "security_scan": {
                 "threats_found": security_result['scan_result']['threats_count'],
                 "is_safe": security_result['scan_result']['is_safe']
             }
-        })
+        }, status=status.HTTP_202_ACCEPTED)
         
     except ValidationError as e:
         # Log security validation error
@@ -382,69 +302,61 @@ def list_cycles(request):
     return Response(RoyaltyCycleSerializer(qs, many=True).data)
 
 
+def _close_job_payload(job):
+    return {
+        "job_id": job.id,
+        "cycle_id": job.royalty_cycle_id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress_percentage": job.progress_percentage,
+        "attributions_count": job.attributions_count,
+        "line_items_created": job.line_items_created,
+        "line_items_replaced": job.line_items_replaced,
+        "gross_amount": job.gross_amount,
+        "net_amount": job.net_amount,
+        "error": job.error_message,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at,
+    }
+
+
 @api_view(["POST"]) 
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
-@transaction.atomic
 def close_cycle(request, cycle_id: int):
+    """Queue a background close of the cycle; poll close-status for progress"""
+    from .services.cycle_close import request_close
+    from .tasks import close_royalty_cycle
+
     try:
         cycle = RoyaltyCycle.objects.get(id=cycle_id)
     except RoyaltyCycle.DoesNotExist:
         return Response({"detail": "Cycle not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    # Aggregate UsageAttribution within period and territory
-    atts = UsageAttribution.objects.select_related("play_log", "external_recording", "origin_partner").filter(
-        territory=cycle.territory,
-        played_at__date__gte=cycle.period_start,
-        played_at__date__lte=cycle.period_end,
-    )
-
-    aggregates = {}
-    for a in atts.iterator():
-        key = (a.origin_partner_id, a.external_recording_id or 0)
-        if key not in aggregates:
-            aggregates[key] = {
-                "partner_id": a.origin_partner_id,
-                "external_recording_id": a.external_recording_id,
-                "usage_count": 0,
-                "total_duration_seconds": 0,
-                "gross_amount": 0,
-            }
-        row = aggregates[key]
-        row["usage_count"] += 1
-        if a.duration_seconds:
-            row["total_duration_seconds"] += a.duration_seconds
-        # Use PlayLog.royalty_amount if available as gross component; else 0
-        if a.play_log and a.play_log.royalty_amount:
-            try:
-                row["gross_amount"] += float(a.play_log.royalty_amount)
-            except Exception:
-                pass
-
-    # Create line items
-    created = 0
-    for (partner_id, rec_id), row in aggregates.items():
-        admin_percent = float(cycle.admin_fee_percent_default)
-        gross = row["gross_amount"]
-        admin_fee = round(gross * (admin_percent / 100.0), 2)
-        net = round(gross - admin_fee, 2)
-
-        RoyaltyLineItem.objects.create(
-            royalty_cycle=cycle,
-            partner_id=partner_id,
-            external_recording_id=rec_id or None,
-            usage_count=row["usage_count"],
-            total_duration_seconds=row["total_duration_seconds"],
-            gross_amount=gross,
-            admin_fee_amount=admin_fee,
-            net_amount=net,
-            calculation_notes=f"Admin fee {admin_percent}%",
+    if cycle.status not in ("Open", "Locked"):
+        return Response(
+            {"detail": f"Cycle is {cycle.status} and can no longer be closed"},
+            status=status.HTTP_400_BAD_REQUEST,
         )
-        created += 1
 
-    cycle.status = "Locked"
-    cycle.save(update_fields=["status"])
-    return Response({"line_items_created": created, "status": cycle.status})
+    # Reuse an in-flight close rather than racing a second one; stale jobs
+    # left by a dead worker are replaced, and force=true replaces any job
+    force = str(request.data.get("force", "")).lower() in ("1", "true", "yes")
+    job, created = request_close(cycle, requested_by=request.user, force=force)
+    if created:
+        transaction.on_commit(lambda: close_royalty_cycle.delay(job.id))
+
+    return Response(_close_job_payload(job), status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"]) 
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def close_cycle_status(request, cycle_id: int):
+    job = RoyaltyCycleCloseJob.objects.filter(royalty_cycle_id=cycle_id).first()
+    if job is None:
+        return Response({"detail": "No close job for this cycle"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(_close_job_payload(job))
 
 
 @api_view(["GET"]) 
@@ -487,71 +399,48 @@ def list_cycle_exports(request, cycle_id: int):
 @authentication_classes([TokenAuthentication])
 @permission_classes([IsAuthenticated])
 def export_partner_csv(request, cycle_id: int, partner_id: int):
+    """Queue a per-play CSV usage report for a partner; poll report-tasks for progress"""
+    from .tasks import generate_partner_usage_report
+
     try:
         cycle = RoyaltyCycle.objects.get(id=cycle_id)
         partner = PartnerPRO.objects.get(id=partner_id)
     except (RoyaltyCycle.DoesNotExist, PartnerPRO.DoesNotExist):
         return Response({"detail": "Cycle or Partner not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    items = RoyaltyLineItem.objects.filter(royalty_cycle=cycle, partner=partner).select_related("external_recording")
-    export_dir = _export_dir()
-    folder = os.path.join(export_dir, f"partner_{partner.id}", cycle.name)
-    os.makedirs(folder, exist_ok=True)
-    out_path = os.path.join(folder, f"usage_{partner.id}_{cycle.id}.csv")
-
-    checksum = hashlib.sha256()
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "station_id",
-                "played_at_utc",
-                "isrc",
-                "recording_title",
-                "duration_seconds",
-                "confidence",
-                "match_method",
-                "attribution_source",
-                "gross_amount",
-                "admin_fee_amount",
-                "net_amount",
-                "currency",
-                "cycle_name",
-            ],
-        )
-        writer.writeheader()
-
-        # Walk attributions per line item to reconstruct rows (simplified)
-        for item in items:
-            # For simplicity, summarize at line-item level as one row
-            isrc = item.external_recording.isrc if item.external_recording else None
-            title = item.external_recording.title if item.external_recording else None
-            row = {
-                "station_id": None,
-                "played_at_utc": None,
-                "isrc": isrc,
-                "recording_title": title,
-                "duration_seconds": item.total_duration_seconds,
-                "confidence": None,
-                "match_method": "metadata",
-                "attribution_source": "Partner",
-                "gross_amount": item.gross_amount,
-                "admin_fee_amount": item.admin_fee_amount,
-                "net_amount": item.net_amount,
-                "currency": "GHS",
-                "cycle_name": cycle.name,
-            }
-            writer.writerow(row)
-            checksum.update(str(row).encode("utf-8"))
-
-    pre = PartnerReportExport.objects.create(
-        partner=partner,
-        royalty_cycle=cycle,
-        format="CSV",
-        file=out_path,
-        checksum=checksum.hexdigest(),
+    compress = str(request.data.get("compress", "")).lower() in ("1", "true", "yes")
+    # The owner is recorded before the task exists, so the first poll can already see it
+    task_id = str(uuid.uuid4())
+    cache.set(
+        report_task_owner_key(task_id), request.user.pk, getattr(settings, "CELERY_RESULT_EXPIRES", 3600)
     )
-    return Response({"file": out_path, "checksum": pre.checksum})
+    result = generate_partner_usage_report.apply_async((cycle.id, partner.id, "CSV", compress), task_id=task_id)
+    return Response({"task_id": result.id, "status": result.status}, status=status.HTTP_202_ACCEPTED)
+
+
+def report_task_owner_key(task_id: str) -> str:
+    return f"royalties:report_task_owner:{task_id}"
+
+
+@api_view(["GET"]) 
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def report_task_status(request, task_id: str):
+    from celery.result import AsyncResult
+
+    # Results carry report file paths; only the requester (or staff) may read them
+    if not request.user.is_staff and cache.get(report_task_owner_key(task_id)) != request.user.pk:
+        return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    result = AsyncResult(task_id)
+    payload = {"task_id": task_id, "status": result.status}
+    if result.status == "PROGRESS":
+        payload["progress"] = result.info
+    elif result.successful():
+        payload["result"] = result.result
+    elif result.failed():
+        payload["error"] = str(result.result)
+    return Response(payload)
 
 
 @api_view(["POST"]) 
@@ -1310,7 +1199,7 @@ def process_reciprocal_cycle(request, cycle_id):
 def generate_pro_report(request):
     """Generate PRO compliance report"""
     from .pro_integration import PROReportGenerator, PROReportData
-    from decimal import Decimal
+    from .services.report_writers import UsageRows
     
     # Validate request data
     partner_id = request.data.get('partner_id')
@@ -1346,50 +1235,19 @@ def generate_pro_report(request):
             )
     
     try:
-        # Get usage attributions for this partner
-        attributions = UsageAttribution.objects.filter(
-            origin_partner=partner,
-            played_at__date__gte=period_start,
-            played_at__date__lte=period_end
-        ).select_related('play_log', 'external_recording', 'external_work', 'play_log__station')
-        
-        if not attributions.exists():
+        # Per-play rows are streamed from the database while the report is written
+        usage_data = UsageRows(partner, period_start, period_end, admin_fee_percent=Decimal('15'))
+        
+        if not len(usage_data):
             return Response(
                 {"detail": "No usage data found for the specified period"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Prepare usage data
-        usage_data = []
-        total_amount = Decimal('0')
-        
-        for attr in attributions:
-            play_log = attr.play_log
-            recording = attr.external_recording
-            work = attr.external_work
-            
-            gross_amount = Decimal(str(play_log.royalty_amount)) if play_log and play_log.royalty_amount else Decimal('0')
-            admin_fee = gross_amount * Decimal('0.15')  # 15% admin fee
-            net_amount = gross_amount - admin_fee
-            
-            total_amount += net_amount
-            
-            usage_data.append({
-                'station_id': play_log.station.id if play_log and play_log.station else None,
-                'station_name': play_log.station.name if play_log and play_log.station else None,
-                'played_at_utc': play_log.played_at.isoformat() if play_log and play_log.played_at else None,
-                'isrc': recording.isrc if recording else None,
-                'iswc': work.iswc if work else None,
-                'work_title': work.title if work else None,
-                'recording_title': recording.title if recording else None,
-                'duration_seconds': attr.duration_seconds,
-                'confidence_score': str(attr.confidence_score),
-                'detection_source': attr.match_method,
-                'pro_affiliation': partner.pro_code,
-                'gross_amount': str(gross_amount),
-                'admin_fee_amount': str(admin_fee),
-                'net_amount': str(net_amount)
-            })
+        gross_total = usage_data.queryset().aggregate(
+            total=models.Sum('play_log__royalty_amount')
+        )['total'] or Decimal('0')
+        total_amount = gross_total - (gross_total * Decimal('0.15'))  # 15% admin fee
         
         # Create report data
         report_data = PROReportData(
@@ -1430,7 +1288,7 @@ def generate_pro_report(request):
             royalty_cycle=cycle,
             format=report_format,
             file=report_path,
-            checksum=hashlib.sha256(open(report_path, 'rb').read()).hexdigest()
+            checksum=generator.last_report.checksum
         )
         
         return Response({
@@ -1737,17 +1595,10 @@ def verify_financial_file_integrity(request):
                 })
                 continue
             
-            # Verify file integrity
-            if encrypted:
-                # For encrypted files, we need to decrypt temporarily to verify
-                temp_path = stored_path.replace('.enc', '.verify_tmp')
-                if RoyaltyFileEncryption.decrypt_file(stored_path, temp_path):
-                    integrity_ok = RoyaltyFileEncryption.verify_file_integrity(temp_path, expected_hash)
-                    os.unlink(temp_path)  # Clean up
-                else:
-                    integrity_ok = False
-            else:
-                integrity_ok = RoyaltyFileEncryption.verify_file_integrity(stored_path, expected_hash)
+            # Verify file integrity (encrypted files are hashed as they are decrypted)
+            integrity_ok = RoyaltyFileEncryption.verify_file_integrity(
+                stored_path, expected_hash, encrypted=encrypted
+            )
             
             verification_results.append({
                 'upload_id': upload_id,
@@ -1803,7 +1654,7 @@ def approve_withdrawal_with_payment(request, withdrawal_id):
     Approve withdrawal and process actual money transfer
     Integrates with the money flow system
     """
-    from royalties.services import RoyaltyPaymentService
+    from royalties.services.payments import RoyaltyPaymentService
     from accounts.models import AuditLog
     
     # Only staff can approve
@@ -1861,7 +1712,7 @@ def reject_withdrawal_with_reason(request, withdrawal_id):
     """
     Reject a withdrawal request with reason
     """
-    from royalties.services import RoyaltyPaymentService
+    from royalties.services.payments import RoyaltyPaymentService
     from accounts.models import AuditLog
     
     # Only staff can reject
@@ -1934,13 +1785,14 @@ def get_platform_balance(request):
         )
     
     central_pool = PlatformAccount.get_central_pool()
+    totals = central_pool.get_live_totals()
     
     return Response({
         'account_id': central_pool.account_id,
-        'balance': str(central_pool.balance),
+        'balance': str(totals['balance']),
         'currency': central_pool.currency,
-        'total_received': str(central_pool.total_received),
-        'total_paid_out': str(central_pool.total_paid_out),
+        'total_received': str(totals['total_received']),
+        'total_paid_out': str(totals['total_paid_out']),
         'updated_at': central_pool.updated_at.isoformat()
     })
 
@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from stations.models import ProgramStaff, Station, StationProgram, StationStreamLink, Complaint, ComplaintUpdate, StationStaff
+from stations.models import (
+    ProgramStaff, Station, StationProgram, StationStreamLink, Complaint, ComplaintUpdate, StationStaff,
+    PlaylogImportJob, PlaylogImportReviewEntry,
+)
 
 
 @admin.register(Complaint)
@@ -40,6 +43,23 @@ class ComplaintUpdateAdmin(admin.ModelAdmin):
     raw_id_fields = ['complaint', 'user']
 
 
+@admin.register(PlaylogImportJob)
+class PlaylogImportJobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'station', 'file_format', 'status', 'total_entries', 'matched_count', 'review_count', 'created_at']
+    list_filter = ['status', 'file_format', 'created_at']
+    search_fields = ['job_id', 'station__name', 'station__station_id']
+    readonly_fields = ['job_id', 'started_at', 'completed_at', 'created_at', 'updated_at']
+    raw_id_fields = ['station', 'uploaded_by']
+
+
+@admin.register(PlaylogImportReviewEntry)
+class PlaylogImportReviewEntryAdmin(admin.ModelAdmin):
+    list_display = ['job', 'row_number', 'title', 'artist', 'reason', 'status', 'suggested_track']
+    list_filter = ['reason', 'status']
+    search_fields = ['title', 'artist', 'job__job_id']
+    raw_id_fields = ['job', 'suggested_track']
+
+
 # Register your models here.
 admin.site.register(Station)
 admin.site.register(StationStreamLink)
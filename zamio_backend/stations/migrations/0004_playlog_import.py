@@ -0,0 +1,71 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:11
+
+import django.db.models.deletion
+import stations.models
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artists', '0006_alter_uploadprocessingstatus_upload_type'),
+        ('stations', '0003_stationstaff_can_manage_compliance_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlaylogImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('playlog_file', models.FileField(upload_to=stations.models.playlog_import_upload_path)),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('xml', 'XML'), ('json', 'JSON')], default='csv', max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_entries', models.PositiveIntegerField(default=0)),
+                ('matched_count', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='playlog_imports', to='stations.station')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='playlog_imports', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlaylogImportReviewEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField()),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('artist', models.CharField(blank=True, max_length=255)),
+                ('album', models.CharField(blank=True, max_length=255)),
+                ('played_at', models.CharField(blank=True, max_length=64)),
+                ('raw_entry', models.JSONField(blank=True, default=dict)),
+                ('reason', models.CharField(choices=[('missing_fields', 'Missing Required Fields'), ('invalid', 'Invalid Value'), ('unmatched', 'No Matching Track')], default='unmatched', max_length=20)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending Review'), ('resolved', 'Resolved'), ('dismissed', 'Dismissed')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_entries', to='stations.playlogimportjob')),
+                ('suggested_track', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='playlog_import_suggestions', to='artists.track')),
+            ],
+            options={
+                'ordering': ['job', 'row_number'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='playlogimportjob',
+            index=models.Index(fields=['station', 'status'], name='stations_pl_station_75ed43_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playlogimportreviewentry',
+            index=models.Index(fields=['job', 'status'], name='stations_pl_job_id_d3de67_idx'),
+        ),
+    ]
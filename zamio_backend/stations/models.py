@@ -44,6 +44,19 @@ def station_document_upload_path(instance, filename):
     return f"stations/documents/{station_id}/{final_filename}"
 
 
+def playlog_import_upload_path(instance, filename):
+    """Upload path for station playlog files awaiting import."""
+    name, ext = os.path.splitext(filename)
+    safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+
+    timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+    unique_id = uuid.uuid4().hex[:8]
+    final_filename = f"{safe_name}_{timestamp}_{unique_id}{ext}"
+
+    station_id = getattr(instance.station, 'station_id', None) or 'temp'
+    return f"stations/playlog_imports/{station_id}/{final_filename}"
+
+
 def validate_station_image_size(file):
     """Validate station image file size - max 5MB"""
     max_size = 5 * 1024 * 1024  # 5MB
@@ -654,6 +667,92 @@ class StationComplianceDocument(models.Model):
         return f"{self.name} ({self.get_status_display()})"
 
 
+class PlaylogImportJob(models.Model):
+    """A station playlog file queued for bulk import into PlayLog"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xml', 'XML'),
+        ('json', 'JSON'),
+    ]
+
+    job_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    station = models.ForeignKey(Station, on_delete=models.CASCADE, related_name='playlog_imports')
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='playlog_imports')
+    playlog_file = models.FileField(upload_to=playlog_import_upload_path)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    total_entries = models.PositiveIntegerField(default=0)
+    matched_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, null=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['station', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Playlog import {self.job_id} for {self.station.name} ({self.status})"
+
+
+class PlaylogImportReviewEntry(models.Model):
+    """A playlog row that could not be imported automatically"""
+    REASON_CHOICES = [
+        ('missing_fields', 'Missing Required Fields'),
+        ('invalid', 'Invalid Value'),
+        ('unmatched', 'No Matching Track'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending Review'),
+        ('resolved', 'Resolved'),
+        ('dismissed', 'Dismissed'),
+    ]
+
+    job = models.ForeignKey(PlaylogImportJob, on_delete=models.CASCADE, related_name='review_entries')
+    row_number = models.PositiveIntegerField()
+    title = models.CharField(max_length=255, blank=True)
+    artist = models.CharField(max_length=255, blank=True)
+    album = models.CharField(max_length=255, blank=True)
+    played_at = models.CharField(max_length=64, blank=True)
+    raw_entry = models.JSONField(default=dict, blank=True)
+
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default='unmatched')
+    error_message = models.TextField(blank=True, null=True)
+    suggested_track = models.ForeignKey(
+        'artists.Track',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='playlog_import_suggestions'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['job', 'row_number']
+        indexes = [
+            models.Index(fields=['job', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} by {self.artist} (row {self.row_number}, {self.get_reason_display()})"
+
+
 class Complaint(models.Model):
     COMPLAINT_STATUS_CHOICES = [
         ('open', 'Open'),
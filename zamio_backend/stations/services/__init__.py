@@ -0,0 +1 @@
+# Stations services package
\ No newline at end of file
@@ -0,0 +1,488 @@
+"""
+Bulk import of station playlogs
+
+Uploaded playlogs used to be matched and inserted one row at a time inside the
+request: up to four catalog queries per entry followed by an individual
+``PlayLog.objects.create`` whose post_save handler published a realtime event.
+``PlaylogImporter`` runs as a background job instead:
+
+* ``CatalogMatcher`` loads the (title, artist) -> track index for the whole
+  catalog with one query and matches rows in memory, first on the exact
+  case-folded names, then on normalized names (accents, punctuation and
+  featured-artist credits removed), then by fuzzy title similarity within
+  the artist;
+* matched rows are written with ``bulk_create`` in batches, and the realtime
+  updates post_save would have sent are published once per artist after the
+  batch commits;
+* rows that are incomplete, unparseable or unmatched are stored as
+  ``PlaylogImportReviewEntry`` rows for manual review.
+
+A worker claims its job with a conditional UPDATE and bumps ``updated_at``
+as each batch commits. A job left in processing longer than
+``PLAYLOG_IMPORT_STALE_SECONDS`` is taken over by the next run, which resumes
+after the rows the stalled worker had committed.
+"""
+import csv
+import difflib
+import json
+import logging
+import re
+import unicodedata
+import xml.etree.ElementTree as ET
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .playlog_reconciliation import playlog_reconciler
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('title', 'artist', 'played_at')
+
+MatchResult = namedtuple('MatchResult', ['track_id', 'stage', 'suggested_track_id'])
+
+_BRACKETED = re.compile(r'[\(\[][^\)\]]*[\)\]]')
+_FEATURING = re.compile(r'\s+(?:feat|ft|featuring|with)\.?\s+.*$')
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+# Playlog parsing
+
+def parse_csv_playlog(content):
+    """Parse CSV playlog content"""
+    entries = []
+    reader = csv.DictReader(StringIO(content))
+
+    for row in reader:
+        entry = {
+            'title': (row.get('title') or '').strip(),
+            'artist': (row.get('artist') or '').strip(),
+            'album': (row.get('album') or '').strip(),
+            'played_at': (row.get('played_at') or '').strip(),
+            'start_time': (row.get('start_time') or '').strip(),
+            'stop_time': (row.get('stop_time') or '').strip(),
+            'duration': (row.get('duration') or '').strip()
+        }
+        entries.append(entry)
+
+    return entries
+
+
+def parse_xml_playlog(content):
+    """Parse XML playlog content"""
+    entries = []
+    root = ET.fromstring(content)
+
+    def text(item, *tags):
+        for tag in tags:
+            element = item.find(tag)
+            if element is not None:
+                return (element.text or '').strip()
+        return ''
+
+    for item in root.findall('.//item') or root.findall('.//entry') or root.findall('.//track'):
+        entry = {
+            'title': text(item, 'title', 'name'),
+            'artist': text(item, 'artist'),
+            'album': text(item, 'album'),
+            'played_at': text(item, 'played_at'),
+            'start_time': text(item, 'start_time'),
+            'stop_time': text(item, 'stop_time'),
+            'duration': text(item, 'duration')
+        }
+        entries.append(entry)
+
+    return entries
+
+
+def parse_json_playlog(content):
+    """Parse JSON playlog content"""
+    data = json.loads(content)
+
+    # Handle different JSON structures
+    if isinstance(data, list):
+        entries = data
+    elif isinstance(data, dict):
+        entries = data.get('entries', []) or data.get('tracks', []) or data.get('playlist', [])
+    else:
+        raise ValueError("Invalid JSON structure")
+
+    # Normalize field names
+    normalized_entries = []
+    for entry in entries:
+        normalized_entry = {
+            'title': entry.get('title') or entry.get('name') or entry.get('track_name', ''),
+            'artist': entry.get('artist') or entry.get('artist_name', ''),
+            'album': entry.get('album') or entry.get('album_name', ''),
+            'played_at': entry.get('played_at') or entry.get('timestamp') or entry.get('time', ''),
+            'start_time': entry.get('start_time', ''),
+            'stop_time': entry.get('stop_time') or entry.get('end_time', ''),
+            'duration': entry.get('duration', '')
+        }
+        normalized_entries.append(normalized_entry)
+
+    return normalized_entries
+
+
+PLAYLOG_PARSERS = {
+    'csv': parse_csv_playlog,
+    'xml': parse_xml_playlog,
+    'json': parse_json_playlog,
+}
+
+
+def parse_datetime(datetime_str):
+    """Parse datetime string in various formats"""
+    if not datetime_str:
+        return None
+
+    formats = [
+        '%Y-%m-%d %H:%M:%S',
+        '%Y-%m-%d %H:%M',
+        '%Y-%m-%dT%H:%M:%S',
+        '%Y-%m-%dT%H:%M:%SZ',
+        '%d/%m/%Y %H:%M:%S',
+        '%d/%m/%Y %H:%M',
+        '%m/%d/%Y %H:%M:%S',
+        '%m/%d/%Y %H:%M'
+    ]
+
+    for fmt in formats:
+        try:
+            return datetime.strptime(datetime_str, fmt)
+        except ValueError:
+            continue
+
+    raise ValueError(f"Unable to parse datetime: {datetime_str}")
+
+
+def parse_duration(duration_str):
+    """Parse duration string in various formats"""
+    if not duration_str:
+        return None
+
+    try:
+        # Try parsing as seconds
+        seconds = float(duration_str)
+        return timedelta(seconds=seconds)
+    except ValueError:
+        pass
+
+    try:
+        # Try parsing as MM:SS or HH:MM:SS
+        parts = duration_str.split(':')
+        if len(parts) == 2:
+            minutes, seconds = map(int, parts)
+            return timedelta(minutes=minutes, seconds=seconds)
+        elif len(parts) == 3:
+            hours, minutes, seconds = map(int, parts)
+            return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    except ValueError:
+        pass
+
+    return None
+
+
+# Catalog matching
+
+def fold_text(value: str) -> str:
+    """Case-fold and trim a name for exact comparison"""
+    return ' '.join((value or '').split()).casefold()
+
+
+def normalize_text(value: str) -> str:
+    """
+    Reduce a title or artist name to its comparable core: accents, bracketed
+    qualifiers ("(Radio Edit)"), featured-artist credits, punctuation and a
+    leading "the" are dropped.
+    """
+    folded = unicodedata.normalize('NFKD', fold_text(value))
+    folded = ''.join(char for char in folded if not unicodedata.combining(char))
+    folded = _BRACKETED.sub(' ', folded)
+    folded = _FEATURING.sub('', folded)
+    folded = _NON_WORD.sub(' ', folded).replace('_', ' ')
+    words = folded.split()
+    if len(words) > 1 and words[0] == 'the':
+        words = words[1:]
+    return ' '.join(words)
+
+
+class CatalogMatcher:
+    """In-memory (title, artist) -> track index over the active catalog"""
+
+    DEFAULT_FUZZY_CUTOFF = 0.85
+    SUGGESTION_CUTOFF = 0.6
+
+    def __init__(self, catalog: Iterable[Tuple[int, str, str]], fuzzy_cutoff: Optional[float] = None):
+        """``catalog`` yields ``(track_id, title, artist_stage_name)``; the first track wins a key"""
+        self.fuzzy_cutoff = fuzzy_cutoff or getattr(
+            settings, 'PLAYLOG_IMPORT_FUZZY_CUTOFF', self.DEFAULT_FUZZY_CUTOFF
+        )
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._normalized: Dict[Tuple[str, str], int] = {}
+        self._titles_by_artist: Dict[str, Dict[str, int]] = {}
+        self._memo: Dict[Tuple[str, str], MatchResult] = {}
+
+        for track_id, title, artist in catalog:
+            self._exact.setdefault((fold_text(title), fold_text(artist)), track_id)
+            normalized_title, normalized_artist = normalize_text(title), normalize_text(artist)
+            self._normalized.setdefault((normalized_title, normalized_artist), track_id)
+            self._titles_by_artist.setdefault(normalized_artist, {}).setdefault(normalized_title, track_id)
+
+    @classmethod
+    def from_catalog(cls, **kwargs) -> 'CatalogMatcher':
+        """Build the index from every non-archived track in one query"""
+        from artists.models import Track
+
+        catalog = (
+            Track.objects.filter(is_archived=False)
+            .order_by('id')
+            .values_list('id', 'title', 'artist__stage_name')
+            .iterator(chunk_size=5000)
+        )
+        return cls(catalog, **kwargs)
+
+    def __len__(self):
+        return len(self._exact)
+
+    def match(self, title: str, artist: str) -> MatchResult:
+        """Match one playlog row; a playlog repeats songs, so results are memoized"""
+        key = (fold_text(title), fold_text(artist))
+        result = self._memo.get(key)
+        if result is None:
+            result = self._memo[key] = self._match(key, title, artist)
+        return result
+
+    def _match(self, key, title, artist) -> MatchResult:
+        track_id = self._exact.get(key)
+        if track_id is not None:
+            return MatchResult(track_id, 'exact', None)
+
+        normalized_title, normalized_artist = normalize_text(title), normalize_text(artist)
+        track_id = self._normalized.get((normalized_title, normalized_artist))
+        if track_id is not None:
+            return MatchResult(track_id, 'normalized', None)
+
+        titles = self._titles_by_artist.get(normalized_artist)
+        if titles is None:
+            artists = difflib.get_close_matches(
+                normalized_artist, self._titles_by_artist.keys(), n=1, cutoff=self.fuzzy_cutoff
+            )
+            titles = self._titles_by_artist[artists[0]] if artists else {}
+
+        best_title, best_ratio = None, 0.0
+        for candidate in titles:
+            matcher = difflib.SequenceMatcher(None, normalized_title, candidate)
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio:
+                best_title, best_ratio = candidate, ratio
+
+        if best_title is not None and best_ratio >= self.fuzzy_cutoff:
+            return MatchResult(titles[best_title], 'fuzzy', None)
+        if best_title is not None and best_ratio >= self.SUGGESTION_CUTOFF:
+            return MatchResult(None, None, titles[best_title])
+        return MatchResult(None, None, None)
+
+
+# Import job
+
+class ImportJobSuperseded(Exception):
+    """The job was taken over by another worker while this run held it"""
+
+
+class PlaylogImporter:
+    """Matches and inserts the rows of one ``PlaylogImportJob``"""
+
+    DEFAULT_BATCH_SIZE = 2000
+    DEFAULT_STALE_SECONDS = 1800
+
+    def __init__(self, matcher: Optional[CatalogMatcher] = None, batch_size: Optional[int] = None):
+        self.matcher = matcher
+        self.batch_size = batch_size or getattr(
+            settings, 'PLAYLOG_IMPORT_BATCH_SIZE', self.DEFAULT_BATCH_SIZE
+        )
+
+    @classmethod
+    def stale_before(cls, now: Optional[datetime] = None) -> datetime:
+        """Processing jobs without a heartbeat since this time are considered abandoned"""
+        seconds = getattr(settings, 'PLAYLOG_IMPORT_STALE_SECONDS', cls.DEFAULT_STALE_SECONDS)
+        return (now or timezone.now()) - timedelta(seconds=seconds)
+
+    def claim(self, job) -> Optional[datetime]:
+        """Move a pending or stalled ``job`` to processing; returns the claim time, or None if it is held"""
+        from stations.models import PlaylogImportJob
+
+        claimed_at = timezone.now()
+        claimed = PlaylogImportJob.objects.filter(pk=job.pk).filter(
+            Q(status='pending') | Q(status='processing', updated_at__lt=self.stale_before(claimed_at))
+        ).update(status='processing', started_at=claimed_at, error_message=None, updated_at=claimed_at)
+        if not claimed:
+            return None
+        job.status, job.started_at, job.error_message, job.updated_at = 'processing', claimed_at, None, claimed_at
+        return claimed_at
+
+    def run(self, job) -> Optional[Dict]:
+        """Import ``job``'s file; returns the job's counts, or None when another worker holds it"""
+        claimed_at = self.claim(job)
+        if claimed_at is None:
+            return None
+
+        try:
+            with job.playlog_file.open('rb') as handle:
+                content = handle.read().decode('utf-8-sig')
+            entries = PLAYLOG_PARSERS[job.file_format](content)
+        except Exception as e:
+            logger.error(f"Failed to parse playlog import {job.job_id}: {str(e)}")
+            self._update(job, claimed_at, status='failed', error_message=str(e), completed_at=timezone.now())
+            return self.summary(job)
+
+        matcher = self.matcher or CatalogMatcher.from_catalog()
+        stages = Counter()
+        # A job taken over from a stalled worker resumes after its committed rows
+        matched, review = job.matched_count, job.review_count
+
+        status, error_message = 'completed', None
+        try:
+            for start in range(matched + review, len(entries), self.batch_size):
+                plays, review_entries = [], []
+                for row_number, entry in enumerate(entries[start:start + self.batch_size], start=start + 1):
+                    play, review_entry = self._build_row(job, matcher, row_number, entry, stages)
+                    if play is not None:
+                        plays.append(play)
+                    else:
+                        review_entries.append(review_entry)
+                self._write_batch(job, claimed_at, plays, review_entries)
+                matched += len(plays)
+                review += len(review_entries)
+        except ImportJobSuperseded:
+            logger.warning(f"Playlog import {job.job_id} was taken over by another worker")
+            return None
+        except Exception as e:
+            # Batches already written stay in place; the counts say how far it got
+            logger.error(f"Playlog import {job.job_id} failed after {matched + review} rows: {str(e)}")
+            status, error_message = 'failed', str(e)
+
+        if matched:
+            # Imported plays are usually backdated into already reconciled days
+            playlog_reconciler.invalidate(job.station)
+
+        self._update(
+            job, claimed_at, status=status, total_entries=len(entries), matched_count=matched,
+            review_count=review, error_message=error_message, completed_at=timezone.now()
+        )
+        logger.info(
+            f"Playlog import {job.job_id}: {matched}/{len(entries)} matched "
+            f"({dict(stages)}), {review} sent to review"
+        )
+        return self.summary(job)
+
+    @staticmethod
+    def _update(job, claimed_at, **fields) -> bool:
+        """Write ``fields`` while this run still holds ``job``; False once another worker took it over"""
+        from stations.models import PlaylogImportJob
+
+        fields['updated_at'] = timezone.now()
+        updated = PlaylogImportJob.objects.filter(
+            pk=job.pk, status='processing', started_at=claimed_at
+        ).update(**fields)
+        if updated:
+            for name, value in fields.items():
+                setattr(job, name, value)
+        return bool(updated)
+
+    def _build_row(self, job, matcher, row_number, entry, stages):
+        """Return ``(PlayLog, None)`` for a matched row or ``(None, review entry)``"""
+        from music_monitor.models import PlayLog
+        from stations.models import PlaylogImportReviewEntry
+
+        entry = {key: ('' if value is None else str(value).strip()) for key, value in entry.items()}
+        review_entry = PlaylogImportReviewEntry(
+            job=job,
+            row_number=row_number,
+            title=entry.get('title', '')[:255],
+            artist=entry.get('artist', '')[:255],
+            album=entry.get('album', '')[:255],
+            played_at=entry.get('played_at', '')[:64],
+            raw_entry=entry,
+        )
+
+        if not all(entry.get(field) for field in REQUIRED_FIELDS):
+            review_entry.reason = 'missing_fields'
+            review_entry.error_message = 'Missing required fields (title, artist, played_at)'
+            return None, review_entry
+
+        try:
+            played_at = self._aware(parse_datetime(entry['played_at']))
+            start_time = self._aware(parse_datetime(entry.get('start_time')))
+            stop_time = self._aware(parse_datetime(entry.get('stop_time')))
+            duration = parse_duration(entry.get('duration'))
+        except ValueError as e:
+            review_entry.reason = 'invalid'
+            review_entry.error_message = str(e)
+            return None, review_entry
+
+        result = matcher.match(entry['title'], entry['artist'])
+        if result.track_id is None:
+            review_entry.reason = 'unmatched'
+            review_entry.error_message = f'Track not found: {entry["title"]} by {entry["artist"]}'
+            review_entry.suggested_track_id = result.suggested_track_id
+            return None, review_entry
+
+        stages[result.stage] += 1
+        return PlayLog(
+            track_id=result.track_id,
+            station_id=job.station_id,
+            source='Radio',
+            played_at=played_at,
+            start_time=start_time,
+            stop_time=stop_time,
+            duration=duration,
+            avg_confidence_score=Decimal('1.0'),  # Manual upload gets high confidence
+            active=True
+        ), None
+
+    @staticmethod
+    def _aware(value):
+        if value is not None and settings.USE_TZ and timezone.is_naive(value):
+            return timezone.make_aware(value)
+        return value
+
+    def _write_batch(self, job, claimed_at, plays: List, review_entries: List):
+        from analytics.signals import publish_imported_plays
+        from music_monitor.models import PlayLog
+        from stations.models import PlaylogImportReviewEntry
+
+        with transaction.atomic():
+            # bulk_create skips post_save; the realtime updates it would have
+            # sent go out once per artist when this batch commits
+            PlayLog.objects.bulk_create(plays, batch_size=self.batch_size)
+            PlaylogImportReviewEntry.objects.bulk_create(review_entries, batch_size=self.batch_size)
+            if plays:
+                publish_imported_plays(job.station, Counter(play.track_id for play in plays))
+            # The heartbeat commits with the batch, so the counts always match the rows written
+            if not self._update(
+                job, claimed_at,
+                matched_count=job.matched_count + len(plays),
+                review_count=job.review_count + len(review_entries),
+            ):
+                raise ImportJobSuperseded(str(job.job_id))
+
+    @staticmethod
+    def summary(job) -> Dict:
+        return {
+            'job_id': str(job.job_id),
+            'status': job.status,
+            'total_entries': job.total_entries,
+            'matched_count': job.matched_count,
+            'review_count': job.review_count,
+            'error_message': job.error_message,
+        }
@@ -0,0 +1,247 @@
+"""
+Reconciliation of station playlogs against audio detections
+
+The comparison report used to run a filtered ``AudioDetection`` query plus an
+aggregate for every PlayLog on the page, and its summary only counted the
+matches on that page. ``PlaylogReconciler`` instead reads two sorted streams
+per station-day, the PlayLogs and the completed detections, and joins them
+in one sweep: a play matches every detection of the same track within
+``PLAYLOG_MATCH_WINDOW_SECONDS`` of it.
+
+Each day's result holds the per-play matches and exact discrepancy counts in
+both directions (plays without a detection, detections without a play).
+Closed days are cached per station under a ``CacheNamespace``, so a report
+over a period only reads the days it has not seen before; writers that
+backfill plays invalidate the station's namespace. A period missing an end
+is bounded to ``PLAYLOG_RECONCILIATION_DEFAULT_DAYS`` ending today, so every
+report goes through the per-day cache.
+"""
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.caching_service import CacheNamespace
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReconciliationResult:
+    """Per-play matches and discrepancy counts for a station and period"""
+    matches: Dict[int, Tuple[int, Decimal]] = field(default_factory=dict)
+    total_playlogs: int = 0
+    total_detections: int = 0
+    matched_playlogs: int = 0
+    multiple_matches: int = 0
+    unmatched_detections: int = 0
+
+    def merge(self, other: 'ReconciliationResult') -> 'ReconciliationResult':
+        self.matches.update(other.matches)
+        self.total_playlogs += other.total_playlogs
+        self.total_detections += other.total_detections
+        self.matched_playlogs += other.matched_playlogs
+        self.multiple_matches += other.multiple_matches
+        self.unmatched_detections += other.unmatched_detections
+        return self
+
+    def row(self, playlog_id: int) -> Tuple[int, float]:
+        """``(matching detections, average confidence)`` for one play"""
+        count, confidence_total = self.matches.get(playlog_id, (0, Decimal('0')))
+        return count, float(confidence_total / count) if count else 0
+
+    def summary(self) -> Dict:
+        unmatched_playlogs = self.total_playlogs - self.matched_playlogs
+        discrepancy_rate = (unmatched_playlogs / self.total_playlogs * 100) if self.total_playlogs else 0
+        return {
+            'total_playlogs': self.total_playlogs,
+            'total_detections': self.total_detections,
+            'matched_entries': self.matched_playlogs,
+            'unmatched_playlogs': unmatched_playlogs,
+            'unmatched_detections': self.unmatched_detections,
+            'multiple_matches': self.multiple_matches,
+            'discrepancy_rate': round(discrepancy_rate, 2),
+        }
+
+
+class PlaylogReconciler:
+    """Joins a station's PlayLogs and completed detections on track and time"""
+
+    CACHE_PREFIX = 'zamio:playlog_reconciliation'
+    DEFAULT_WINDOW_SECONDS = 300
+    DEFAULT_CACHE_TTL = 3600
+    DEFAULT_PERIOD_DAYS = 30
+
+    @property
+    def window(self) -> timedelta:
+        return timedelta(seconds=getattr(settings, 'PLAYLOG_MATCH_WINDOW_SECONDS', self.DEFAULT_WINDOW_SECONDS))
+
+    @property
+    def cache_ttl(self) -> int:
+        return getattr(settings, 'PLAYLOG_RECONCILIATION_CACHE_TTL', self.DEFAULT_CACHE_TTL)
+
+    # Join -------------------------------------------------------------------
+
+    @staticmethod
+    def join(plays: Iterable[Tuple], detections: Iterable[Tuple], window: timedelta,
+             start: Optional[datetime] = None, end: Optional[datetime] = None) -> ReconciliationResult:
+        """
+        Sweep ``plays`` ``(id, track_id, played_at)`` and ``detections``
+        ``(id, track_id, detected_at, confidence)``, both sorted by time.
+
+        Only rows inside ``[start, end)`` are reported; the streams should
+        extend ``window`` beyond it so matches across the edges are seen.
+        """
+        result = ReconciliationResult()
+        pending = deque()
+        # track_id -> [[detected_at, confidence, matched], ...] currently inside the window
+        open_by_track = defaultdict(deque)
+        detections = iter(detections)
+        upcoming = next(detections, None)
+
+        def inside(moment):
+            return (start is None or moment >= start) and (end is None or moment < end)
+
+        def close(detection):
+            # Detections leave the window oldest first, for every track alike
+            entry = open_by_track[detection[1]].popleft()
+            if not open_by_track[detection[1]]:
+                del open_by_track[detection[1]]
+            if inside(entry[0]):
+                result.total_detections += 1
+                if not entry[2]:
+                    result.unmatched_detections += 1
+
+        for playlog_id, track_id, played_at in plays:
+            while upcoming is not None and upcoming[2] <= played_at + window:
+                pending.append(upcoming)
+                open_by_track[upcoming[1]].append([upcoming[2], upcoming[3], False])
+                upcoming = next(detections, None)
+            while pending and pending[0][2] < played_at - window:
+                close(pending.popleft())
+
+            matched = open_by_track.get(track_id, ())
+            for entry in matched:
+                entry[2] = True
+            if not inside(played_at):
+                continue
+
+            result.total_playlogs += 1
+            if matched:
+                result.matched_playlogs += 1
+                if len(matched) > 1:
+                    result.multiple_matches += 1
+                result.matches[playlog_id] = (
+                    len(matched), sum((Decimal(entry[1] or 0) for entry in matched), Decimal('0'))
+                )
+
+        while pending:
+            close(pending.popleft())
+        while upcoming is not None:
+            if inside(upcoming[2]):
+                result.total_detections += 1
+                result.unmatched_detections += 1
+            upcoming = next(detections, None)
+        return result
+
+    def reconcile(self, station, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> ReconciliationResult:
+        """Run the join over ``[start, end)`` (unbounded when omitted) with two queries"""
+        from music_monitor.models import AudioDetection, PlayLog
+
+        window = self.window
+        plays = PlayLog.objects.filter(station=station, is_archived=False)
+        detections = AudioDetection.objects.filter(station=station, processing_status='completed')
+        if start is not None:
+            plays = plays.filter(played_at__gte=start - window)
+            detections = detections.filter(detected_at__gte=start - window)
+        if end is not None:
+            plays = plays.filter(played_at__lt=end + window)
+            detections = detections.filter(detected_at__lt=end + window)
+
+        result = self.join(
+            plays.filter(played_at__isnull=False).order_by('played_at', 'id')
+            .values_list('id', 'track_id', 'played_at').iterator(chunk_size=5000),
+            detections.order_by('detected_at', 'id')
+            .values_list('id', 'track_id', 'detected_at', 'confidence_score').iterator(chunk_size=5000),
+            window, start, end,
+        )
+        if start is None and end is None:
+            # Plays without a time cannot match anything but still count as discrepancies
+            result.total_playlogs += plays.filter(played_at__isnull=True).count()
+        return result
+
+    # Station-day cache ------------------------------------------------------
+
+    @staticmethod
+    def day_bounds(day: date) -> Tuple[datetime, datetime]:
+        start = datetime.combine(day, time.min)
+        if settings.USE_TZ:
+            start = timezone.make_aware(start)
+        return start, start + timedelta(days=1)
+
+    def _namespace(self, station) -> CacheNamespace:
+        return CacheNamespace('playlog_reconciliation', station.pk)
+
+    def period(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> Tuple[date, date]:
+        """
+        Fill in a missing end: ``date_to`` defaults to today and ``date_from``
+        to ``PLAYLOG_RECONCILIATION_DEFAULT_DAYS`` days ending at ``date_to``
+        """
+        if date_to is None:
+            date_to = timezone.localdate() if settings.USE_TZ else date.today()
+        if date_from is None:
+            days = getattr(settings, 'PLAYLOG_RECONCILIATION_DEFAULT_DAYS', self.DEFAULT_PERIOD_DAYS)
+            date_from = date_to - timedelta(days=days - 1)
+        return date_from, date_to
+
+    def report(self, station, date_from: Optional[date] = None,
+               date_to: Optional[date] = None) -> ReconciliationResult:
+        """
+        Reconcile ``date_from`` through ``date_to`` inclusive (missing ends are
+        filled in by ``period``). Days whose matching window has closed are
+        cached per station-day.
+        """
+        date_from, date_to = self.period(date_from, date_to)
+        days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+        cutoff = timezone.now() - self.window
+        base = CacheNamespace.versioned_key(f"{self.CACHE_PREFIX}:{station.pk}", [self._namespace(station)])
+        keys = {day: f"{base}:{day.isoformat()}" for day in days if self.day_bounds(day)[1] <= cutoff}
+
+        cached = {}
+        if keys:
+            try:
+                cached = cache.get_many(list(keys.values()))
+            except Exception as e:
+                logger.error(f"Failed to read playlog reconciliation cache: {e}")
+
+        result, fresh = ReconciliationResult(), {}
+        for day in days:
+            key = keys.get(day)
+            day_result = cached.get(key) if key else None
+            if day_result is None:
+                day_result = self.reconcile(station, *self.day_bounds(day))
+                if key:
+                    fresh[key] = day_result
+            result.merge(day_result)
+
+        if fresh:
+            try:
+                cache.set_many(fresh, timeout=self.cache_ttl)
+            except Exception as e:
+                logger.error(f"Failed to cache playlog reconciliation: {e}")
+        return result
+
+    def invalidate(self, station) -> bool:
+        """Drop every cached station-day, e.g. after plays were backfilled"""
+        return self._namespace(station).invalidate()
+
+
+# Singleton instance
+playlog_reconciler = PlaylogReconciler()
@@ -6,7 +6,7 @@ from django.conf import settings
 from datetime import timedelta
 import logging
 
-from .models import Complaint, ComplaintUpdate
+from .models import Complaint, ComplaintUpdate, PlaylogImportJob
 from notifications.models import Notification
 
 User = get_user_model()
@@ -527,4 +527,42 @@ def auto_assign_complaints():
         except Exception as e:
             logger.error(f"Failed to auto-assign complaint {complaint.complaint_id}: {str(e)}")
     
-    return f"Auto-assigned {assigned_count} complaints"
\ No newline at end of file
+    return f"Auto-assigned {assigned_count} complaints"
+
+
+@shared_task
+def import_station_playlog(job_id):
+    """Match and insert the rows of an uploaded station playlog"""
+    from .services.playlog_import import PlaylogImporter
+
+    try:
+        job = PlaylogImportJob.objects.select_related('station').get(id=job_id)
+    except PlaylogImportJob.DoesNotExist:
+        logger.error(f"Playlog import job {job_id} not found")
+        return f"Playlog import job {job_id} not found"
+
+    if job.status in ('completed', 'failed'):
+        return f"Playlog import {job.job_id} already {job.status}"
+
+    summary = PlaylogImporter().run(job)
+    if summary is None:
+        return f"Playlog import {job.job_id} is held by another worker"
+    return (
+        f"Playlog import {job.job_id} {summary['status']}: "
+        f"{summary['matched_count']} matched, {summary['review_count']} for review"
+    )
+
+
+@shared_task
+def requeue_stale_playlog_imports():
+    """Queue imports whose worker stopped heartbeating; the import claims them back atomically"""
+    from .services.playlog_import import PlaylogImporter
+
+    stale_ids = list(
+        PlaylogImportJob.objects.filter(
+            status='processing', updated_at__lt=PlaylogImporter.stale_before()
+        ).values_list('id', flat=True)
+    )
+    for job_id in stale_ids:
+        import_station_playlog.delay(job_id)
+    return f"Requeued {len(stale_ids)} stale playlog imports"
@@ -0,0 +1,187 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from artists.models import Artist, Genre, Track
+from music_monitor.models import PlayLog
+from stations.models import PlaylogImportJob, PlaylogImportReviewEntry, Station
+from stations.services.playlog_import import CatalogMatcher, PlaylogImporter, normalize_text
+
+
+class CatalogMatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.matcher = CatalogMatcher([
+            (1, 'Kwaku the Traveller', 'Black Sherif'),
+            (2, 'Sika', 'Beyoncé'),
+            (3, 'Sika', 'King Promise'),
+            (4, 'Terminator', 'King Promise'),
+        ])
+
+    def test_stages(self):
+        self.assertEqual(self.matcher.match('kwaku THE traveller', ' Black  Sherif'), (1, 'exact', None))
+        self.assertEqual(self.matcher.match('Sika (Radio Edit)', 'Beyonce'), (2, 'normalized', None))
+        self.assertEqual(self.matcher.match('Sika', 'King Promise feat. Sarkodie'), (3, 'normalized', None))
+        self.assertEqual(self.matcher.match('Terminater', 'King Promise'), (4, 'fuzzy', None))
+        self.assertEqual(self.matcher.match('Traveller', 'Black Sheriff'), (None, None, 1))
+        self.assertEqual(self.matcher.match('Unknown Song', 'Nobody'), (None, None, None))
+
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text('  The Beatles '), 'beatles')
+        self.assertEqual(normalize_text('Ye (Remix) ft. Burna Boy'), 'ye')
+        self.assertEqual(normalize_text('Señorita!'), 'senorita')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PlaylogImportAPITests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=self.media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        user_model = get_user_model()
+        station_user = user_model.objects.create_user(
+            email='importer@example.com',
+            password='strong-password',
+            first_name='Station',
+            last_name='User',
+        )
+        self.station = Station.objects.create(
+            user=station_user,
+            name='Wave FM',
+            station_id='ST-IMPORT-001',
+            active=True,
+        )
+        token, _ = Token.objects.get_or_create(user=station_user)
+
+        artist_user = user_model.objects.create_user(
+            email='import-artist@example.com',
+            password='strong-password',
+            first_name='Artist',
+            last_name='User',
+        )
+        artist = Artist.objects.create(user=artist_user, stage_name='Black Sherif')
+        self.track = Track.objects.create(
+            artist=artist,
+            title='Kwaku the Traveller',
+            audio_file=SimpleUploadedFile('track.mp3', b'fake-mp3-data', content_type='audio/mpeg'),
+            genre=Genre.objects.create(name='Afrobeats'),
+            duration=timedelta(minutes=3),
+            royalty_amount=Decimal('12.50'),
+        )
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def _upload(self, content, file_format='csv'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('stations:upload_playlog'),
+                {
+                    'station_id': self.station.station_id,
+                    'format': file_format,
+                    'playlog_file': SimpleUploadedFile(f'log.{file_format}', content.encode('utf-8')),
+                },
+                format='multipart',
+            )
+
+    def test_csv_import_bulk_inserts_matches_and_queues_the_rest_for_review(self):
+        rows = ['title,artist,played_at,duration']
+        rows += [f'Kwaku the Traveller,Black Sherif,2024-05-01 10:{minute:02d}:00,3:05' for minute in range(30)]
+        rows += [
+            'KWAKU THE TRAVELLER (Radio Edit),Black Sherif,2024-05-01 11:00:00,185',
+            'Unknown Song,Nobody,2024-05-01 11:05:00,',
+            'Kwaku the Traveller,Black Sherif,yesterday,',
+            ',Black Sherif,2024-05-01 11:10:00,',
+        ]
+
+        with self.assertNumQueries(14):
+            response = self._upload('\n'.join(rows))
+
+        self.assertEqual(response.status_code, 202)
+        job = PlaylogImportJob.objects.get(job_id=response.json()['data']['job_id'])
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.total_entries, job.matched_count, job.review_count), (34, 31, 3))
+
+        plays = PlayLog.objects.filter(station=self.station, track=self.track)
+        self.assertEqual(plays.count(), 31)
+        self.assertEqual(plays.filter(duration=timedelta(minutes=3, seconds=5)).count(), 31)
+        self.assertEqual(
+            list(PlaylogImportReviewEntry.objects.filter(job=job).values_list('row_number', 'reason')),
+            [(32, 'unmatched'), (33, 'invalid'), (34, 'missing_fields')],
+        )
+
+        status_response = self.client.get(
+            reverse('stations:get_playlog_import_status'), {'job_id': str(job.job_id)}
+        )
+        data = status_response.json()['data']
+        self.assertEqual(data['processed_count'], 31)
+        self.assertEqual([entry['reason'] for entry in data['review_entries']], ['unmatched', 'invalid', 'missing_fields'])
+
+    def test_import_status_is_only_visible_to_the_station_owner_and_staff(self):
+        job = PlaylogImportJob.objects.get(
+            job_id=self._upload('title,artist,played_at\n').json()['data']['job_id']
+        )
+        url = reverse('stations:get_playlog_import_status')
+        user_model = get_user_model()
+
+        other_user = user_model.objects.create_user(email='other-station@example.com', password='strong-password')
+        other_client = APIClient()
+        other_client.force_authenticate(other_user)
+        response = other_client.get(url, {'job_id': str(job.job_id)})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors']['job_id'], ['Import job does not exist.'])
+
+        staff_user = user_model.objects.create_user(
+            email='ops@example.com', password='strong-password', is_staff=True
+        )
+        staff_client = APIClient()
+        staff_client.force_authenticate(staff_user)
+        response = staff_client.get(url, {'job_id': str(job.job_id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['station_id'], self.station.station_id)
+
+    def test_only_stalled_processing_jobs_are_taken_over_and_resume_after_committed_rows(self):
+        content = 'title,artist,played_at\n' + '\n'.join(
+            f'Kwaku the Traveller,Black Sherif,2024-05-01 10:0{minute}:00' for minute in range(3)
+        )
+        job = PlaylogImportJob.objects.create(
+            station=self.station,
+            playlog_file=SimpleUploadedFile('log.csv', content.encode('utf-8')),
+            status='processing',
+            matched_count=1,
+            started_at=timezone.now(),
+        )
+
+        self.assertIsNone(PlaylogImporter(batch_size=1).run(job))
+        self.assertEqual(PlayLog.objects.filter(station=self.station).count(), 0)
+
+        PlaylogImportJob.objects.filter(pk=job.pk).update(
+            updated_at=PlaylogImporter.stale_before() - timedelta(minutes=1)
+        )
+        job.refresh_from_db()
+        summary = PlaylogImporter(batch_size=1).run(job)
+
+        self.assertEqual(summary['status'], 'completed')
+        self.assertEqual((summary['total_entries'], summary['matched_count']), (3, 3))
+        self.assertEqual(
+            sorted(PlayLog.objects.filter(station=self.station).values_list('played_at__minute', flat=True)), [1, 2]
+        )
+
+    def test_unparseable_file_fails_the_job(self):
+        response = self._upload('{"entries": [', file_format='json')
+
+        job = PlaylogImportJob.objects.get(job_id=response.json()['data']['job_id'])
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(job.error_message)
+        self.assertFalse(PlayLog.objects.filter(station=self.station).exists())
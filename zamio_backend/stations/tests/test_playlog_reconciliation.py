@@ -0,0 +1,177 @@
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from artists.models import Artist, Genre, Track
+from music_monitor.models import AudioDetection, PlayLog
+from stations.models import Station
+from stations.services.playlog_reconciliation import PlaylogReconciler, playlog_reconciler
+
+WINDOW = timedelta(minutes=5)
+BASE = datetime(2024, 5, 1, 10, 0)
+
+
+def at(minutes):
+    return BASE + timedelta(minutes=minutes)
+
+
+class PlaylogJoinTests(SimpleTestCase):
+    def test_sweep_matches_on_track_within_the_window(self):
+        plays = [(1, 'a', at(0)), (2, 'b', at(1)), (3, 'a', at(20)), (4, 'a', at(40))]
+        detections = [
+            (10, 'a', at(-4), Decimal('0.8')),
+            (11, 'a', at(3), Decimal('0.6')),
+            (12, 'b', at(7), Decimal('0.9')),
+            (13, 'a', at(26), Decimal('0.9')),
+            (14, None, at(40), Decimal('0.5')),
+            (15, 'a', at(60), Decimal('0.9')),
+        ]
+
+        result = PlaylogReconciler.join(plays, detections, WINDOW)
+
+        self.assertEqual(result.row(1), (2, 0.7))
+        self.assertEqual(result.row(2), (0, 0))
+        self.assertEqual(result.row(3), (0, 0))
+        self.assertEqual(result.summary(), {
+            'total_playlogs': 4,
+            'total_detections': 6,
+            'matched_entries': 1,
+            'unmatched_playlogs': 3,
+            'unmatched_detections': 4,
+            'multiple_matches': 1,
+            'discrepancy_rate': 75.0,
+        })
+
+    def test_rows_outside_the_period_only_confirm_matches(self):
+        plays = [(1, 'a', at(-2)), (2, 'a', at(30))]
+        detections = [(10, 'a', at(1), Decimal('1')), (11, 'a', at(33), Decimal('1'))]
+
+        result = PlaylogReconciler.join(plays, detections, WINDOW, start=at(0), end=at(31))
+
+        self.assertEqual((result.total_playlogs, result.matched_playlogs), (1, 1))
+        self.assertEqual((result.total_detections, result.unmatched_detections), (1, 0))
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'reconciliation-tests'}},
+)
+class PlaylogComparisonAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_model = get_user_model()
+        station_user = user_model.objects.create_user(
+            email='reconcile@example.com',
+            password='strong-password',
+            first_name='Station',
+            last_name='User',
+        )
+        self.station = Station.objects.create(
+            user=station_user,
+            name='Wave FM',
+            station_id='ST-RECON-001',
+            active=True,
+        )
+        token, _ = Token.objects.get_or_create(user=station_user)
+
+        artist_user = user_model.objects.create_user(
+            email='reconcile-artist@example.com',
+            password='strong-password',
+            first_name='Artist',
+            last_name='User',
+        )
+        self.track = Track.objects.create(
+            artist=Artist.objects.create(user=artist_user, stage_name='Test Artist'),
+            title='Test Track',
+            audio_file=SimpleUploadedFile('track.mp3', b'fake-mp3-data', content_type='audio/mpeg'),
+            genre=Genre.objects.create(name='Afrobeats'),
+            duration=timedelta(minutes=3),
+        )
+
+        start = playlog_reconciler.day_bounds(date(2024, 5, 1))[0]
+        for hour in range(6):
+            PlayLog.objects.create(
+                track=self.track, station=self.station, source='Radio', played_at=start + timedelta(hours=hour)
+            )
+        # The first three plays were detected; one detection has no play
+        for hour in (0, 1, 2, 9):
+            detection = AudioDetection.objects.create(
+                session_id=uuid.uuid4(),
+                station=self.station,
+                track=self.track,
+                confidence_score=Decimal('0.9'),
+                processing_status='completed',
+                audio_timestamp=start + timedelta(hours=hour),
+            )
+            AudioDetection.objects.filter(pk=detection.pk).update(detected_at=start + timedelta(hours=hour, minutes=2))
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_summary_covers_the_whole_period_not_just_the_page(self):
+        response = self.client.get(reverse('stations:get_playlog_comparison'), {
+            'station_id': self.station.station_id,
+            'date_from': '2024-05-01',
+            'date_to': '2024-05-02',
+            'page_size': 2,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual([row['discrepancy'] for row in data['comparison_data']], [True, True])
+        self.assertEqual(data['pagination']['total_count'], 6)
+        self.assertEqual(data['summary']['matched_entries'], 3)
+        self.assertEqual(data['summary']['unmatched_detections'], 1)
+        self.assertEqual(data['summary']['discrepancy_rate'], 50.0)
+
+        last_page = self.client.get(reverse('stations:get_playlog_comparison'), {
+            'station_id': self.station.station_id,
+            'date_from': '2024-05-01',
+            'date_to': '2024-05-01',
+            'page_size': 2,
+            'page': 3,
+        }).json()['data']
+        self.assertEqual([row['matching_detections'] for row in last_page['comparison_data']], [1, 1])
+        self.assertEqual(last_page['comparison_data'][0]['detection_confidence'], 0.9)
+
+    def test_closed_days_are_served_from_cache_until_invalidated(self):
+        first = playlog_reconciler.report(self.station, date(2024, 5, 1), date(2024, 5, 3))
+
+        with self.assertNumQueries(0):
+            cached = playlog_reconciler.report(self.station, date(2024, 5, 1), date(2024, 5, 3))
+        self.assertEqual(cached.summary(), first.summary())
+
+        PlayLog.objects.create(
+            track=self.track,
+            station=self.station,
+            source='Radio',
+            played_at=playlog_reconciler.day_bounds(date(2024, 5, 1))[0] + timedelta(hours=9),
+        )
+        playlog_reconciler.invalidate(self.station)
+        self.assertEqual(
+            playlog_reconciler.report(self.station, date(2024, 5, 1), date(2024, 5, 3)).summary()['matched_entries'], 4
+        )
+
+    def test_missing_dates_default_to_a_bounded_cached_window(self):
+        self.assertEqual(
+            playlog_reconciler.period(None, date(2024, 5, 3)),
+            (date(2024, 5, 3) - timedelta(days=PlaylogReconciler.DEFAULT_PERIOD_DAYS - 1), date(2024, 5, 3)),
+        )
+        first = playlog_reconciler.report(self.station, date_to=date(2024, 5, 3))
+        self.assertEqual(first.summary()['matched_entries'], 3)
+        with self.assertNumQueries(0):
+            playlog_reconciler.report(self.station, date_to=date(2024, 5, 3))
+
+        data = self.client.get(
+            reverse('stations:get_playlog_comparison'), {'station_id': self.station.station_id}
+        ).json()['data']
+        self.assertEqual(data['pagination']['total_count'], 0)
+        self.assertEqual(data['summary']['total_detections'], 0)
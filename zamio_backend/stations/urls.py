@@ -42,6 +42,7 @@ from stations.views.station_compliance_views import (
 )
 from stations.views.playlog_management_views import (
     upload_playlog,
+    get_playlog_import_status,
     get_playlog_comparison,
     get_match_log_details,
     verify_detection_match,
@@ -128,6 +129,7 @@ urlpatterns = [
 
     # Playlog and Match Log Management
     path('upload-playlog/', upload_playlog, name='upload_playlog'),
+    path('playlog-import-status/', get_playlog_import_status, name='get_playlog_import_status'),
     path('get-playlog-comparison/', get_playlog_comparison, name='get_playlog_comparison'),
     path('get-match-log-details/', get_match_log_details, name='get_match_log_details'),
     path('verify-detection-match/', verify_detection_match, name='verify_detection_match'),
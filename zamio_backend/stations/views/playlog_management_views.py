@@ -1,11 +1,9 @@
-import csv
-import json
-import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
 from decimal import Decimal
-from io import StringIO
 
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.db import transaction
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
 from rest_framework import status
@@ -17,8 +15,11 @@ from rest_framework.response import Response
 
 from artists.models import Track
 from music_monitor.models import PlayLog, AudioDetection, MatchCache
-from stations.models import Station
+from stations.models import PlaylogImportJob, Station
 from stations.serializers import StationPlayLogSerializer, StationMatchCacheSerializer
+from stations.services.playlog_import import PlaylogImporter
+from stations.services.playlog_reconciliation import playlog_reconciler
+from stations.tasks import import_station_playlog
 
 
 @api_view(['POST'])
@@ -51,80 +52,76 @@ def upload_playlog(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # Read and parse the uploaded file
-        file_content = uploaded_file.read().decode('utf-8')
-        
-        if file_format == 'csv':
-            playlog_entries = parse_csv_playlog(file_content)
-        elif file_format == 'xml':
-            playlog_entries = parse_xml_playlog(file_content)
-        elif file_format == 'json':
-            playlog_entries = parse_json_playlog(file_content)
-        
-        # Process and validate entries
-        processed_count = 0
-        skipped_count = 0
-        error_entries = []
-        
-        for entry in playlog_entries:
-            try:
-                # Validate required fields
-                if not all([entry.get('title'), entry.get('artist'), entry.get('played_at')]):
-                    skipped_count += 1
-                    error_entries.append({
-                        'entry': entry,
-                        'error': 'Missing required fields (title, artist, played_at)'
-                    })
-                    continue
-                
-                # Try to find matching track
-                track = find_matching_track(entry['title'], entry['artist'])
-                
-                if track:
-                    # Create PlayLog entry
-                    play_log = PlayLog.objects.create(
-                        track=track,
-                        station=station,
-                        source='Radio',
-                        played_at=parse_datetime(entry['played_at']),
-                        start_time=parse_datetime(entry.get('start_time')) if entry.get('start_time') else None,
-                        stop_time=parse_datetime(entry.get('stop_time')) if entry.get('stop_time') else None,
-                        duration=parse_duration(entry.get('duration')) if entry.get('duration') else None,
-                        avg_confidence_score=Decimal('1.0'),  # Manual upload gets high confidence
-                        active=True
-                    )
-                    processed_count += 1
-                else:
-                    # Track not found, create entry for manual verification
-                    skipped_count += 1
-                    error_entries.append({
-                        'entry': entry,
-                        'error': f'Track not found: {entry["title"]} by {entry["artist"]}'
-                    })
-                    
-            except Exception as e:
-                skipped_count += 1
-                error_entries.append({
-                    'entry': entry,
-                    'error': str(e)
-                })
-        
-        payload['message'] = 'Playlog upload completed'
-        payload['data'] = {
-            'processed_count': processed_count,
-            'skipped_count': skipped_count,
-            'total_entries': len(playlog_entries),
-            'error_entries': error_entries[:10]  # Limit to first 10 errors
-        }
-        
-        return Response(payload, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        payload['message'] = 'Failed to process playlog file'
-        payload['errors'] = {'file': [str(e)]}
+    job = PlaylogImportJob.objects.create(
+        station=station,
+        uploaded_by=request.user,
+        playlog_file=uploaded_file,
+        file_format=file_format,
+    )
+    # Matching and inserting a station-sized log runs in the worker
+    transaction.on_commit(lambda: import_station_playlog.delay(job.id))
+
+    payload['message'] = 'Playlog upload queued for import'
+    payload['data'] = {
+        'job_id': str(job.job_id),
+        'status': job.status,
+    }
+
+    return Response(payload, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@authentication_classes([TokenAuthentication])
+def get_playlog_import_status(request):
+    """Progress of a playlog import and the first rows waiting for review"""
+    payload = {}
+    errors = {}
+
+    job_id = request.query_params.get('job_id', '')
+    if not job_id:
+        errors['job_id'] = ['Job ID is required.']
+
+    job = None
+    if job_id:
+        try:
+            jobs = PlaylogImportJob.objects.select_related('station')
+            if not request.user.is_staff:
+                # Station users only see imports for their own stations
+                jobs = jobs.filter(station__user=request.user)
+            job = jobs.get(job_id=job_id)
+        except (PlaylogImportJob.DoesNotExist, ValidationError):
+            errors['job_id'] = ['Import job does not exist.']
+
+    if errors:
+        payload['message'] = 'Errors'
+        payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
+    review_entries = job.review_entries.filter(status='pending').order_by('row_number')[:10]
+
+    payload['message'] = 'Successful'
+    payload['data'] = {
+        **PlaylogImporter.summary(job),
+        'station_id': job.station.station_id,
+        'processed_count': job.matched_count,
+        'skipped_count': job.review_count,
+        'review_entries': [
+            {
+                'row_number': entry.row_number,
+                'title': entry.title,
+                'artist': entry.artist,
+                'played_at': entry.played_at,
+                'reason': entry.reason,
+                'error': entry.error_message,
+                'suggested_track_id': entry.suggested_track_id,
+            }
+            for entry in review_entries
+        ],
+    }
+
+    return Response(payload, status=status.HTTP_200_OK)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -153,37 +150,32 @@ def get_playlog_comparison(request):
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    # Build date filter
-    date_filter = {}
-    if date_from:
-        try:
-            date_filter['played_at__gte'] = datetime.strptime(date_from, '%Y-%m-%d').date()
-        except ValueError:
-            errors['date_from'] = ['Invalid date format. Use YYYY-MM-DD.']
-    
-    if date_to:
-        try:
-            date_filter['played_at__lte'] = datetime.strptime(date_to, '%Y-%m-%d').date()
-        except ValueError:
-            errors['date_to'] = ['Invalid date format. Use YYYY-MM-DD.']
+    # Build date range (both ends inclusive)
+    period = {}
+    for param, value in (('date_from', date_from), ('date_to', date_to)):
+        if value:
+            try:
+                period[param] = datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                errors[param] = ['Invalid date format. Use YYYY-MM-DD.']
 
     if errors:
         payload['message'] = 'Errors'
         payload['errors'] = errors
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get playlogs and detections for comparison
+    # Missing ends default to a bounded window, so the report is always cached per day
+    period_start, period_end = playlog_reconciler.period(period.get('date_from'), period.get('date_to'))
+
+    # Whole-period matches and statistics from one sweep over both streams
+    reconciliation = playlog_reconciler.report(station, period_start, period_end)
+
     playlogs = PlayLog.objects.filter(
         station=station,
         is_archived=False,
-        **date_filter
-    ).order_by('-played_at')
-
-    detections = AudioDetection.objects.filter(
-        station=station,
-        processing_status='completed',
-        **{f'detected_at__{k}': v for k, v in date_filter.items()}
-    ).order_by('-detected_at')
+        played_at__gte=playlog_reconciler.day_bounds(period_start)[0],
+        played_at__lt=playlog_reconciler.day_bounds(period_end)[1],
+    ).select_related('track', 'track__artist', 'station').order_by('-played_at')
 
     # Paginate playlogs
     paginator = Paginator(playlogs, page_size)
@@ -197,32 +189,14 @@ def get_playlog_comparison(request):
     # Create comparison data
     comparison_data = []
     for playlog in paginated_playlogs:
-        # Find matching detections within a time window (±5 minutes)
-        time_window_start = playlog.played_at - timedelta(minutes=5)
-        time_window_end = playlog.played_at + timedelta(minutes=5)
-        
-        matching_detections = detections.filter(
-            detected_at__gte=time_window_start,
-            detected_at__lte=time_window_end,
-            track=playlog.track
-        )
-        
-        comparison_entry = {
+        match_count, detection_confidence = reconciliation.row(playlog.id)
+        comparison_data.append({
             'playlog': StationPlayLogSerializer(playlog).data,
-            'matching_detections': len(matching_detections),
-            'detection_confidence': matching_detections.aggregate(
-                avg_confidence=Avg('confidence_score')
-            )['avg_confidence'] or 0,
-            'discrepancy': len(matching_detections) == 0,
-            'multiple_matches': len(matching_detections) > 1
-        }
-        comparison_data.append(comparison_entry)
-
-    # Calculate summary statistics
-    total_playlogs = playlogs.count()
-    total_detections = detections.count()
-    matched_entries = sum(1 for entry in comparison_data if not entry['discrepancy'])
-    discrepancy_rate = ((total_playlogs - matched_entries) / total_playlogs * 100) if total_playlogs > 0 else 0
+            'matching_detections': match_count,
+            'detection_confidence': detection_confidence,
+            'discrepancy': match_count == 0,
+            'multiple_matches': match_count > 1
+        })
 
     payload['message'] = 'Playlog comparison completed'
     payload['data'] = {
@@ -234,12 +208,7 @@ def get_playlog_comparison(request):
             'next': paginated_playlogs.next_page_number() if paginated_playlogs.has_next() else None,
             'previous': paginated_playlogs.previous_page_number() if paginated_playlogs.has_previous() else None,
         },
-        'summary': {
-            'total_playlogs': total_playlogs,
-            'total_detections': total_detections,
-            'matched_entries': matched_entries,
-            'discrepancy_rate': round(discrepancy_rate, 2)
-        }
+        'summary': reconciliation.summary()
     }
 
     return Response(payload, status=status.HTTP_200_OK)
@@ -441,6 +410,9 @@ def verify_detection_match(request):
                 }
             )
 
+        # The detection's day may already be reconciled and cached
+        playlog_reconciler.invalidate(detection.station)
+
         payload['message'] = f'Detection {action}ed successfully'
         payload['data'] = {
             'detection_id': str(detection.detection_id),
@@ -455,151 +427,3 @@ def verify_detection_match(request):
         payload['message'] = 'Failed to verify detection'
         payload['errors'] = {'verification': [str(e)]}
         return Response(payload, status=status.HTTP_400_BAD_REQUEST)
-
-
-# Helper functions
-
-def parse_csv_playlog(content):
-    """Parse CSV playlog content"""
-    entries = []
-    reader = csv.DictReader(StringIO(content))
-    
-    for row in reader:
-        entry = {
-            'title': row.get('title', '').strip(),
-            'artist': row.get('artist', '').strip(),
-            'album': row.get('album', '').strip(),
-            'played_at': row.get('played_at', '').strip(),
-            'start_time': row.get('start_time', '').strip(),
-            'stop_time': row.get('stop_time', '').strip(),
-            'duration': row.get('duration', '').strip()
-        }
-        entries.append(entry)
-    
-    return entries
-
-
-def parse_xml_playlog(content):
-    """Parse XML playlog content"""
-    entries = []
-    root = ET.fromstring(content)
-    
-    for item in root.findall('.//item') or root.findall('.//entry') or root.findall('.//track'):
-        entry = {
-            'title': (item.find('title') or item.find('name')).text if (item.find('title') or item.find('name')) is not None else '',
-            'artist': item.find('artist').text if item.find('artist') is not None else '',
-            'album': item.find('album').text if item.find('album') is not None else '',
-            'played_at': item.find('played_at').text if item.find('played_at') is not None else '',
-            'start_time': item.find('start_time').text if item.find('start_time') is not None else '',
-            'stop_time': item.find('stop_time').text if item.find('stop_time') is not None else '',
-            'duration': item.find('duration').text if item.find('duration') is not None else ''
-        }
-        entries.append(entry)
-    
-    return entries
-
-
-def parse_json_playlog(content):
-    """Parse JSON playlog content"""
-    data = json.loads(content)
-    
-    # Handle different JSON structures
-    if isinstance(data, list):
-        entries = data
-    elif isinstance(data, dict):
-        entries = data.get('entries', []) or data.get('tracks', []) or data.get('playlist', [])
-    else:
-        raise ValueError("Invalid JSON structure")
-    
-    # Normalize field names
-    normalized_entries = []
-    for entry in entries:
-        normalized_entry = {
-            'title': entry.get('title') or entry.get('name') or entry.get('track_name', ''),
-            'artist': entry.get('artist') or entry.get('artist_name', ''),
-            'album': entry.get('album') or entry.get('album_name', ''),
-            'played_at': entry.get('played_at') or entry.get('timestamp') or entry.get('time', ''),
-            'start_time': entry.get('start_time', ''),
-            'stop_time': entry.get('stop_time') or entry.get('end_time', ''),
-            'duration': entry.get('duration', '')
-        }
-        normalized_entries.append(normalized_entry)
-    
-    return normalized_entries
-
-
-def find_matching_track(title, artist):
-    """Find matching track in the database"""
-    # Try exact match first
-    tracks = Track.objects.filter(
-        title__iexact=title,
-        artist__stage_name__iexact=artist,
-        is_archived=False
-    )
-    
-    if tracks.exists():
-        return tracks.first()
-    
-    # Try fuzzy matching
-    tracks = Track.objects.filter(
-        title__icontains=title.split()[0] if title.split() else title,
-        artist__stage_name__icontains=artist.split()[0] if artist.split() else artist,
-        is_archived=False
-    )
-    
-    if tracks.exists():
-        return tracks.first()
-    
-    return None
-
-
-def parse_datetime(datetime_str):
-    """Parse datetime string in various formats"""
-    if not datetime_str:
-        return None
-    
-    formats = [
-        '%Y-%m-%d %H:%M:%S',
-        '%Y-%m-%d %H:%M',
-        '%Y-%m-%dT%H:%M:%S',
-        '%Y-%m-%dT%H:%M:%SZ',
-        '%d/%m/%Y %H:%M:%S',
-        '%d/%m/%Y %H:%M',
-        '%m/%d/%Y %H:%M:%S',
-        '%m/%d/%Y %H:%M'
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(datetime_str, fmt)
-        except ValueError:
-            continue
-    
-    raise ValueError(f"Unable to parse datetime: {datetime_str}")
-
-
-def parse_duration(duration_str):
-    """Parse duration string in various formats"""
-    if not duration_str:
-        return None
-    
-    try:
-        # Try parsing as seconds
-        seconds = float(duration_str)
-        return timedelta(seconds=seconds)
-    except ValueError:
-        pass
-    
-    try:
-        # Try parsing as MM:SS or HH:MM:SS
-        parts = duration_str.split(':')
-        if len(parts) == 2:
-            minutes, seconds = map(int, parts)
-            return timedelta(minutes=minutes, seconds=seconds)
-        elif len(parts) == 3:
-            hours, minutes, seconds = map(int, parts)
-            return timedelta(hours=hours, minutes=minutes, seconds=seconds)
-    except ValueError:
-        pass
-    
-    return None
\ No newline at end of file